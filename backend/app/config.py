@@ -24,6 +24,8 @@ class Settings:
 
     # OpenAI (for RAG)
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
+    # Endpoint compatível com a API da OpenAI (vazio = api.openai.com)
+    OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "")
 
     # Internal auth between Next.js and FastAPI
     INTERNAL_API_KEY = os.getenv("INTERNAL_API_KEY", "")
@@ -34,6 +36,45 @@ class Settings:
     # envia cada uma como um request — por isso o limite acompanha o do PID (60).
     RATE_LIMIT_PDF_PER_MIN = int(os.getenv("RATE_LIMIT_PDF_PER_MIN", "60"))
     RATE_LIMIT_PID_PER_MIN = int(os.getenv("RATE_LIMIT_PID_PER_MIN", "60"))
+    # Redis para o limite valer entre todos os workers (vazio = limite por processo, em memória;
+    # requer o pacote redis). Limites próprios de rotas, somados ao do grupo, no formato
+    # "/api/pdf/convert=10/60, /api/pid/jobs=5" (requisições/segundos, janela padrão 60 s),
+    # com o caminho completo da rota; parâmetros como em "/api/pid/jobs/{job_id}/pdf=3".
+    # Chaves mantidas em memória antes de descartar as menos recentes.
+    RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", os.getenv("REDIS_URL", ""))
+    RATE_LIMIT_ROUTE_BUDGETS = os.getenv("RATE_LIMIT_ROUTE_BUDGETS", "")
+    RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+    # Extrator de Tabelas: processos para extração/renderização por página (0 = um por CPU, 1 = serial)
+    PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", "0"))
+
+    # Comentários de PDF: processos para a leitura dos arquivos (1 = serial, 0 = um por CPU),
+    # anotações por request ao Gemini e requests simultâneos (limite do processo)
+    PDF_COMMENTS_WORKERS = int(os.getenv("PDF_COMMENTS_WORKERS", "2"))
+    PDF_COMMENTS_AI_BATCH_SIZE = int(os.getenv("PDF_COMMENTS_AI_BATCH_SIZE", "8"))
+    PDF_COMMENTS_AI_CONCURRENCY = int(os.getenv("PDF_COMMENTS_AI_CONCURRENCY", "5"))
+
+    # PDF → Word: processos para as faixas de páginas (0 = um por CPU, 1 = serial),
+    # jobs simultâneos, jobs ativos por usuário e horas que o job fica em disco
+    PDF_CONVERT_WORKERS = int(os.getenv("PDF_CONVERT_WORKERS", "0"))
+    PDF_CONVERT_JOB_WORKERS = int(os.getenv("PDF_CONVERT_JOB_WORKERS", "2"))
+    PDF_CONVERT_JOBS_PER_USER = int(os.getenv("PDF_CONVERT_JOBS_PER_USER", "2"))
+    PDF_CONVERT_JOB_TTL_HOURS = float(os.getenv("PDF_CONVERT_JOB_TTL_HOURS", "24"))
+
+    # Quantitativo Civil: processos para o OCR das folhas e desenhos de um lote em paralelo
+    # (1 = serial, 0 = um por CPU; os dois usam o mesmo pool) e máximo de arquivos por lote
+    CIVIL_OCR_WORKERS = int(os.getenv("CIVIL_OCR_WORKERS", "0"))
+    CIVIL_BATCH_WORKERS = int(os.getenv("CIVIL_BATCH_WORKERS", "2"))
+    CIVIL_BATCH_MAX_FILES = int(os.getenv("CIVIL_BATCH_MAX_FILES", "100"))
+    # Planilha do lote: apagada ao ser baixada, ou após este prazo se nunca for baixada
+    CIVIL_DOWNLOAD_TTL_HOURS = float(os.getenv("CIVIL_DOWNLOAD_TTL_HOURS", "24"))
+
+    # P&ID extraction: processes for the per-page stage (0 = one per CPU, 1 = serial)
+    PID_EXTRACT_WORKERS = int(os.getenv("PID_EXTRACT_WORKERS", "0"))
+    # P&ID background jobs: concurrent jobs, active jobs per user, hours kept on disk
+    PID_JOB_WORKERS = int(os.getenv("PID_JOB_WORKERS", "2"))
+    PID_JOBS_PER_USER = int(os.getenv("PID_JOBS_PER_USER", "2"))
+    PID_JOB_TTL_HOURS = float(os.getenv("PID_JOB_TTL_HOURS", "24"))
 
     # Microsoft Graph (Email RAG)
     MICROSOFT_CLIENT_ID = os.getenv("MICROSOFT_CLIENT_ID", "")
@@ -41,10 +82,36 @@ class Settings:
     MICROSOFT_TENANT_ID = os.getenv("MICROSOFT_TENANT_ID", "common")
     MICROSOFT_REDIRECT_URI = os.getenv("MICROSOFT_REDIRECT_URI", "http://localhost:3000/api/email/callback")
     MICROSOFT_SCOPES = ["Mail.Read", "User.Read", "offline_access"]
+    MICROSOFT_GRAPH_BASE = os.getenv("MICROSOFT_GRAPH_BASE", "https://graph.microsoft.com/v1.0")
+
+    # Sincronização de emails: mensagens por página do Graph, janelas de datas buscadas
+    # em paralelo, páginas em espera na fila, linhas por commit e intervalo (s) entre
+    # atualizações dos contadores do job
+    EMAIL_SYNC_PAGE_SIZE = int(os.getenv("EMAIL_SYNC_PAGE_SIZE", "250"))
+    EMAIL_SYNC_FETCH_CONCURRENCY = int(os.getenv("EMAIL_SYNC_FETCH_CONCURRENCY", "4"))
+    EMAIL_SYNC_QUEUE_PAGES = int(os.getenv("EMAIL_SYNC_QUEUE_PAGES", "8"))
+    EMAIL_SYNC_BATCH_SIZE = int(os.getenv("EMAIL_SYNC_BATCH_SIZE", "500"))
+    EMAIL_SYNC_PROGRESS_SECONDS = float(os.getenv("EMAIL_SYNC_PROGRESS_SECONDS", "2"))
 
     # Email RAG — Embeddings locais
     EMAIL_EMBEDDING_MODEL = os.getenv("EMAIL_EMBEDDING_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
     EMAIL_CHROMA_COLLECTION = os.getenv("EMAIL_CHROMA_COLLECTION", "email_rag_collection")
+    # Threads para busca/rerank das perguntas (fora do event loop)
+    EMAIL_RAG_WORKERS = int(os.getenv("EMAIL_RAG_WORKERS", "4"))
+    # Busca de emails: até MAX × k candidatos (limitado à coleção); o pool guarda os que
+    # pontuam a menos de SCORE_MARGIN do k-ésimo, no mínimo MIN × k; scores do rerank em LRU
+    EMAIL_RETRIEVAL_MIN_FETCH_FACTOR = int(os.getenv("EMAIL_RETRIEVAL_MIN_FETCH_FACTOR", "4"))
+    EMAIL_RETRIEVAL_MAX_FETCH_FACTOR = int(os.getenv("EMAIL_RETRIEVAL_MAX_FETCH_FACTOR", "10"))
+    EMAIL_RETRIEVAL_SCORE_MARGIN = float(os.getenv("EMAIL_RETRIEVAL_SCORE_MARGIN", "0.1"))
+    EMAIL_RERANK_CACHE_SIZE = int(os.getenv("EMAIL_RERANK_CACHE_SIZE", "50000"))
+    # Chunks por lote de embedding/gravação no Chroma e threads do PyTorch (0 = padrão)
+    EMAIL_EMBED_BATCH_SIZE = int(os.getenv("EMAIL_EMBED_BATCH_SIZE", "64"))
+    EMAIL_EMBED_THREADS = int(os.getenv("EMAIL_EMBED_THREADS", "0"))
+
+    # Startup: subsistemas carregados em background logo após o boot ("all" ou lista como
+    # "pid,translate"; vazio = cada um carrega na primeira request). /health/ready só
+    # responde 200 depois que os listados terminaram de carregar.
+    STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "")
 
     # File Upload
     MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
@@ -58,5 +125,26 @@ class Settings:
     DATA_DIR = os.path.join(BASE_DIR, "data")
     CHROMA_DB_DIR = os.getenv("CHROMA_DB_DIR", os.path.join(DATA_DIR, "chroma_db"))
 
+    # P&ID per-page result cache (0 MB = disabled)
+    PID_CACHE_DIR = os.getenv("PID_CACHE_DIR", os.path.join(DATA_DIR, "pid_cache"))
+    PID_CACHE_MAX_MB = int(os.getenv("PID_CACHE_MAX_MB", "512"))
+
+    # Cache das análises IA de comentários de PDF (SQLite; 0 MB ou 0 dias = desligado)
+    COMMENTS_AI_CACHE_PATH = os.getenv("COMMENTS_AI_CACHE_PATH", os.path.join(DATA_DIR, "comments_ai_cache.db"))
+    COMMENTS_AI_CACHE_TTL_DAYS = float(os.getenv("COMMENTS_AI_CACHE_TTL_DAYS", "30"))
+    COMMENTS_AI_CACHE_MAX_MB = int(os.getenv("COMMENTS_AI_CACHE_MAX_MB", "64"))
+
+    # Tradução por segmentos: memória de tradução (SQLite; 0 MB ou 0 dias = desligada),
+    # tokens estimados de texto por request ao Gemini e requests simultâneos (limite do processo)
+    TRANSLATE_MEMORY_PATH = os.getenv("TRANSLATE_MEMORY_PATH", os.path.join(DATA_DIR, "translation_memory.db"))
+    TRANSLATE_MEMORY_TTL_DAYS = float(os.getenv("TRANSLATE_MEMORY_TTL_DAYS", "90"))
+    TRANSLATE_MEMORY_MAX_MB = int(os.getenv("TRANSLATE_MEMORY_MAX_MB", "128"))
+    TRANSLATE_BATCH_TOKENS = int(os.getenv("TRANSLATE_BATCH_TOKENS", "2000"))
+    TRANSLATE_CONCURRENCY = int(os.getenv("TRANSLATE_CONCURRENCY", "4"))
+
+    # Cache do OCR (Gemini) de páginas escaneadas do Extrator de Tabelas (0 MB = desligado)
+    OCR_CACHE_DIR = os.getenv("OCR_CACHE_DIR", os.path.join(DATA_DIR, "ocr_cache"))
+    OCR_CACHE_MAX_MB = int(os.getenv("OCR_CACHE_MAX_MB", "256"))
+
 
 settings = Settings()
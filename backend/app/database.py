@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker, declarative_base
 import os
 
@@ -15,6 +15,45 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+# Colunas adicionadas a tabelas que já existem (create_all não altera tabelas).
+# Tipos em SQL do SQLite, iguais aos dos modelos
+_ADDED_COLUMNS = {
+    "email_accounts": {
+        "sync_watermark": "DATETIME",
+        "synced_since": "DATETIME",
+    },
+    "email_sync_jobs": {
+        "failed_emails": "INTEGER DEFAULT 0",
+    },
+}
+
+
+def init_db():
+    """Cria as tabelas que faltam. Chamado no startup da aplicação, não no import."""
+    # Importar modelos para garantir que o SQLAlchemy os conheça antes de criar tabelas
+    import app.models.auth_models  # noqa: F401
+    import app.models.admin_notes_models  # noqa: F401
+
+    Base.metadata.create_all(bind=engine)
+    _add_missing_columns()
+
+
+def _add_missing_columns():
+    """ALTER TABLE ... ADD COLUMN para as colunas de ``_ADDED_COLUMNS`` que faltam.
+
+    Idempotente: tabelas que ainda não existem e colunas já presentes são ignoradas.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table, columns in _ADDED_COLUMNS.items():
+            if not inspector.has_table(table):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table)}
+            for name, sql_type in columns.items():
+                if name not in existing:
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {sql_type}"))
+
+
 # Dependência para injetar sessão do banco
 def get_db():
     db = SessionLocal()
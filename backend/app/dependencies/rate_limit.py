@@ -1,38 +1,237 @@
+import logging
 import math
+import re
 import time
-from collections import defaultdict, deque
+import uuid
+from collections import OrderedDict, deque
 from threading import Lock
 
 from fastapi import Header, HTTPException, Request, status
+from starlette.routing import compile_path
 
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
+# Após uma falha do Redis, usa só o fallback por este tempo (s) em vez de
+# pagar o timeout de conexão em cada request
+_REDIS_RETRY_SECONDS = 5.0
+# Timeout (s) de conexão/leitura do Redis: a decisão tem que ser rápida
+_REDIS_TIMEOUT = 0.1
+# Chaves ociosas removidas por chamada: uma onda de chaves expirando não trava um request
+_EVICT_PER_CALL = 64
+
+# Janela deslizante atômica sobre uma ou mais chaves: remove o que saiu da
+# janela e confere todas; só registra o request (em todas) se nenhuma estourou.
+# ARGV = membro, depois limite e janela (ms) de cada chave.
+# Usa o relógio do Redis, então todos os workers veem o mesmo "agora".
+_SLIDING_WINDOW_LUA = """
+local t = redis.call('TIME')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+local blocked = false
+local retry_ms = 0
+for i, key in ipairs(KEYS) do
+    local limit = tonumber(ARGV[2 * i])
+    local window_ms = tonumber(ARGV[2 * i + 1])
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window_ms)
+    if redis.call('ZCARD', key) >= limit then
+        blocked = true
+        local wait_ms = window_ms
+        local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+        if oldest[2] then
+            wait_ms = tonumber(oldest[2]) + window_ms - now
+        end
+        retry_ms = math.max(retry_ms, wait_ms)
+    end
+end
+if blocked then
+    return {0, retry_ms}
+end
+for i, key in ipairs(KEYS) do
+    redis.call('ZADD', key, now, ARGV[1])
+    redis.call('PEXPIRE', key, tonumber(ARGV[2 * i + 1]))
+end
+return {1, 0}
+"""
+
+# (chave, limite, janela em segundos)
+Rule = tuple[str, int, int]
+
 
 class InMemoryRateLimiter:
-    """Simple process-local sliding-window rate limiter."""
+    """Process-local sliding-window rate limiter.
 
-    def __init__(self):
-        self._buckets: dict[str, deque[float]] = defaultdict(deque)
+    Keys are kept in least-recently-used order; keys whose newest request
+    left their window are dropped as new requests arrive (at most
+    ``_EVICT_PER_CALL`` per call), and beyond ``max_keys`` the least recently
+    used key is dropped. No periodic sweep, no unbounded growth.
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[deque[float], int]] = OrderedDict()
         self._lock = Lock()
 
     def allow(self, key: str, limit: int, window_seconds: int) -> tuple[bool, int]:
+        return self.allow_all([(key, limit, window_seconds)])
+
+    def allow_all(self, rules: list[Rule]) -> tuple[bool, int]:
+        """Record one request under every rule, or under none if any is exhausted."""
         now = time.time()
         with self._lock:
-            bucket = self._buckets[key]
-            cutoff = now - window_seconds
+            self._evict_idle(now)
+            buckets = []
+            retry_after = 0
+            for key, limit, window_seconds in rules:
+                entry = self._buckets.get(key)
+                if entry is None:
+                    bucket: deque[float] = deque()
+                    self._buckets[key] = (bucket, window_seconds)
+                else:
+                    bucket = entry[0]
+                    self._buckets.move_to_end(key)
+                cutoff = now - window_seconds
+
+                while bucket and bucket[0] <= cutoff:
+                    bucket.popleft()
 
-            while bucket and bucket[0] <= cutoff:
-                bucket.popleft()
+                if len(bucket) >= limit:
+                    wait = max(1, math.ceil(window_seconds - (now - bucket[0]))) if bucket else 1
+                    retry_after = max(retry_after, wait)
+                buckets.append(bucket)
 
-            if len(bucket) >= limit:
-                retry_after = max(1, math.ceil(window_seconds - (now - bucket[0])))
+            if retry_after:
                 return False, retry_after
 
-            bucket.append(now)
+            for bucket in buckets:
+                bucket.append(now)
+            return True, 0
+
+    def _evict_idle(self, now: float) -> None:
+        for _ in range(_EVICT_PER_CALL):
+            if not self._buckets:
+                return
+            bucket, window_seconds = next(iter(self._buckets.values()))
+            idle = not bucket or bucket[-1] <= now - window_seconds
+            if not idle and len(self._buckets) < self.max_keys:
+                return
+            self._buckets.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class RedisRateLimiter:
+    """Sliding-window limiter shared by every worker through Redis.
+
+    One Lua script per decision (atomic across all of its keys, one round
+    trip); keys expire with their window. If Redis is unreachable the
+    ``fallback`` limiter decides (per process) and Redis is retried after
+    ``_REDIS_RETRY_SECONDS`` — requests are never rejected because Redis is
+    down. Calls block for up to ``_REDIS_TIMEOUT``: call from a thread, not
+    the event loop.
+    """
+
+    def __init__(self, url: str, fallback: InMemoryRateLimiter, prefix: str = "ratelimit"):
+        self.url = url
+        self.fallback = fallback
+        self.prefix = prefix
+        self._client = None
+        self._script = None
+        self._down_until = 0.0
+
+    def _redis(self):
+        if self._client is None:
+            import redis
+
+            self._client = redis.Redis.from_url(
+                self.url, socket_timeout=_REDIS_TIMEOUT, socket_connect_timeout=_REDIS_TIMEOUT,
+            )
+            self._script = self._client.register_script(_SLIDING_WINDOW_LUA)
+        return self._client
+
+    def allow(self, key: str, limit: int, window_seconds: int) -> tuple[bool, int]:
+        return self.allow_all([(key, limit, window_seconds)])
+
+    def allow_all(self, rules: list[Rule]) -> tuple[bool, int]:
+        """Record one request under every rule, or under none if any is exhausted."""
+        if time.monotonic() < self._down_until:
+            return self.fallback.allow_all(rules)
+        args: list = [uuid.uuid4().hex[:12]]
+        for _, limit, window_seconds in rules:
+            args += [limit, int(window_seconds * 1000)]
+        try:
+            self._redis()
+            allowed, retry_ms = self._script(
+                keys=[f"{self.prefix}:{key}" for key, _, _ in rules],
+                args=args,
+            )
+        except Exception:
+            self._down_until = time.monotonic() + _REDIS_RETRY_SECONDS
+            logger.warning(
+                "Redis do rate limit indisponível — usando limite em memória por %.0f s",
+                _REDIS_RETRY_SECONDS, exc_info=True,
+            )
+            return self.fallback.allow_all(rules)
+        if allowed:
             return True, 0
+        return False, max(1, math.ceil(int(retry_ms) / 1000))
+
+
+def _build_limiter() -> InMemoryRateLimiter | RedisRateLimiter:
+    memory = InMemoryRateLimiter(max_keys=settings.RATE_LIMIT_MAX_KEYS)
+    if not settings.RATE_LIMIT_REDIS_URL:
+        return memory
+    try:
+        import redis  # noqa: F401
+    except ImportError:
+        logger.warning("RATE_LIMIT_REDIS_URL definido, mas o pacote redis não está instalado; limite por processo")
+        return memory
+    return RedisRateLimiter(settings.RATE_LIMIT_REDIS_URL, fallback=memory)
+
+
+limiter = _build_limiter()
+
+
+def parse_route_budgets(spec: str) -> dict[str, tuple[int, int]]:
+    """``"/api/pdf/convert=10/60, /api/pid/jobs=5"`` → {path: (limit, window_seconds)}."""
+    budgets = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        try:
+            path, budget = item.rsplit("=", 1)
+            limit, _, window = budget.partition("/")
+            budgets[path.strip()] = (int(limit), int(window or 60))
+        except ValueError:
+            logger.warning("Limite por rota inválido em RATE_LIMIT_ROUTE_BUDGETS: %r", item)
+    return budgets
+
 
+# Especificação em uso → [(caminho, regex do caminho, (limite, janela))]
+_route_budgets: tuple[str, list[tuple[str, re.Pattern, tuple[int, int]]]] = ("", [])
 
-limiter = InMemoryRateLimiter()
+
+def _route_budget(request: Request) -> tuple[str, tuple[int, int]] | None:
+    """Limite da rota pelo caminho completo (com o prefixo do router).
+
+    Casa o caminho do request com o template configurado (``{job_id}`` etc.),
+    não com ``scope["route"].path``: sob ``include_router(prefix=...)`` este
+    vem sem o prefixo.
+    """
+    global _route_budgets
+    if _route_budgets[0] != settings.RATE_LIMIT_ROUTE_BUDGETS:
+        _route_budgets = (
+            settings.RATE_LIMIT_ROUTE_BUDGETS,
+            [
+                (path, compile_path(path)[0], budget)
+                for path, budget in parse_route_budgets(settings.RATE_LIMIT_ROUTE_BUDGETS).items()
+            ],
+        )
+    for path, regex, budget in _route_budgets[1]:
+        if regex.match(request.url.path):
+            return path, budget
+    return None
 
 
 def _identity(request: Request, x_user_id: str | None) -> str:
@@ -57,43 +256,50 @@ def _raise_limit_exceeded(retry_after: int):
     )
 
 
-async def enforce_translate_rate_limit(
-    request: Request,
-    x_user_id: str | None = Header(default=None),
-):
+def _enforce(request: Request, x_user_id: str | None, scope: str, limit: int) -> None:
+    """Limite do grupo (``scope``) e, se configurado, o limite próprio da rota.
+
+    Os dois são conferidos numa decisão só: um request recusado por um deles
+    não consome o outro.
+    """
     user = _identity(request, x_user_id)
-    allowed, retry_after = limiter.allow(
-        key=f"translate:{user}",
-        limit=settings.RATE_LIMIT_TRANSLATE_PER_MIN,
-        window_seconds=60,
-    )
+    rules: list[Rule] = [(f"{scope}:{user}", limit, 60)]
+    route_budget = _route_budget(request)
+    if route_budget:
+        path, (route_limit, route_window) = route_budget
+        rules.append((f"route:{path}:{user}", route_limit, route_window))
+
+    allowed, retry_after = limiter.allow_all(rules)
     if not allowed:
         _raise_limit_exceeded(retry_after)
 
 
-async def enforce_pdf_rate_limit(
+# Dependências síncronas: o FastAPI as roda no threadpool, então a ida ao
+# Redis (até _REDIS_TIMEOUT) não bloqueia o event loop
+def enforce_translate_rate_limit(
     request: Request,
     x_user_id: str | None = Header(default=None),
 ):
-    user = _identity(request, x_user_id)
-    allowed, retry_after = limiter.allow(
-        key=f"pdf:{user}",
-        limit=settings.RATE_LIMIT_PDF_PER_MIN,
-        window_seconds=60,
-    )
-    if not allowed:
-        _raise_limit_exceeded(retry_after)
+    _enforce(request, x_user_id, "translate", settings.RATE_LIMIT_TRANSLATE_PER_MIN)
 
 
-async def enforce_pid_rate_limit(
+def enforce_pdf_rate_limit(
     request: Request,
     x_user_id: str | None = Header(default=None),
 ):
-    user = _identity(request, x_user_id)
-    allowed, retry_after = limiter.allow(
-        key=f"pid:{user}",
-        limit=settings.RATE_LIMIT_PID_PER_MIN,
-        window_seconds=60,
-    )
-    if not allowed:
-        _raise_limit_exceeded(retry_after)
+    _enforce(request, x_user_id, "pdf", settings.RATE_LIMIT_PDF_PER_MIN)
+
+
+def enforce_pid_rate_limit(
+    request: Request,
+    x_user_id: str | None = Header(default=None),
+):
+    _enforce(request, x_user_id, "pid", settings.RATE_LIMIT_PID_PER_MIN)
+
+
+async def request_identity(
+    request: Request,
+    x_user_id: str | None = Header(default=None),
+) -> str:
+    """Same user key the rate limiters use, for routes that scope data per user."""
+    return _identity(request, x_user_id)
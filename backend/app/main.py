@@ -2,31 +2,43 @@ import os
 import time
 import json
 import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 
+from app import warmup
 from app.config import settings
+# Os routers não importam as bibliotecas pesadas: cada módulo carrega as suas na
+# primeira request (ou no warm-up, ver app/warmup.py)
 from app.routers import translate, pdf, pid, auth, admin_notes, civil, pdf_comments
-from app.database import engine, Base
-# Importar modelos para garantir que o SQLAlchemy os conheça antes de criar tabelas
-import app.models.auth_models
-import app.models.admin_notes_models
-
-# Criar tabelas do banco de dados (SQLite)
-Base.metadata.create_all(bind=engine)
-
-# Criar diretórios necessários
-os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
-os.makedirs(settings.OUTPUT_DIR, exist_ok=True)
+from app.database import init_db
 
 logging.basicConfig(level=logging.INFO, format="%(message)s")
 logger = logging.getLogger("julia")
 
+_startup = {"database": False}
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Criar diretórios necessários e as tabelas do banco (SQLite) no startup, não no import
+    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+    os.makedirs(settings.OUTPUT_DIR, exist_ok=True)
+    await run_in_threadpool(init_db)
+    _startup["database"] = True
+    warmup.start_warmup(settings.STARTUP_WARMUP)
+    yield
+
+
 # Criar aplicação FastAPI
 app = FastAPI(
     title=settings.API_TITLE,
     version=settings.API_VERSION,
     description=settings.API_DESCRIPTION,
+    lifespan=lifespan,
 )
 
 # Configurar CORS
@@ -46,7 +58,7 @@ async def log_requests(request: Request, call_next):
     duration_ms = round((time.monotonic() - start) * 1000)
 
     # Ignora health checks para não poluir os logs
-    if request.url.path not in ("/", "/health"):
+    if request.url.path not in ("/", "/health", "/health/ready"):
         logger.info(json.dumps({
             "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
             "method": request.method,
@@ -74,6 +86,25 @@ async def health_check():
     return {"status": "ok"}
 
 
+@app.get("/health/ready")
+async def readiness_check():
+    """Pronto quando o banco foi criado e o warm-up pedido em STARTUP_WARMUP terminou sem falhas.
+
+    Lista cada subsistema com ``warm`` (bibliotecas já carregadas) e o tempo de
+    carga; enquanto não está pronto responde 503 (``failed`` se algum
+    subsistema do warm-up não carregou).
+    """
+    state = warmup.readiness()
+    warm = state.pop("ready")
+    ready = _startup["database"] and warm
+    if ready:
+        status = "ready"
+    else:
+        status = "failed" if state["failed"] else "starting"
+    body = {"status": status, "database": _startup["database"], **state}
+    return JSONResponse(body, status_code=200 if ready else 503)
+
+
 # Registrar routers
 app.include_router(translate.router, prefix="/api/translate", tags=["Translate"])
 app.include_router(pdf.router, prefix="/api/pdf", tags=["PDF"])
@@ -37,6 +37,10 @@ class EmailAccount(Base):
     status = Column(String, default=EmailAccountStatus.CONNECTED)
     collection_id = Column(String, ForeignKey("collections.id"), nullable=True)
     consent_accepted_at = Column(DateTime, nullable=True)
+    # Sincronização incremental: receivedDateTime mais recente já gravado e
+    # início do período coberto (UTC)
+    sync_watermark = Column(DateTime, nullable=True)
+    synced_since = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -71,6 +75,7 @@ class EmailSyncJob(Base):
     total_emails = Column(Integer, default=0)
     processed_emails = Column(Integer, default=0)
     indexed_emails = Column(Integer, default=0)
+    failed_emails = Column(Integer, default=0)
     error_message = Column(Text, nullable=True)
     started_at = Column(DateTime, nullable=True)
     completed_at = Column(DateTime, nullable=True)
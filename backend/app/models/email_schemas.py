@@ -7,6 +7,8 @@ from datetime import datetime
 
 class EmailSyncRequest(BaseModel):
     period_months: int = 3
+    # Só indexa as mensagens já gravadas que ficaram sem índice
+    resume: bool = False
 
 
 class EmailConsentRequest(BaseModel):
@@ -43,6 +45,7 @@ class EmailSyncJobResponse(BaseModel):
     total_emails: int
     processed_emails: int
     indexed_emails: int
+    failed_emails: int
     error_message: Optional[str]
     started_at: Optional[datetime]
     completed_at: Optional[datetime]
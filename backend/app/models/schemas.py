@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 
 # Translation Models
@@ -8,6 +8,8 @@ class TranslateRequest(BaseModel):
     source_lang: str = "auto"
     target_lang: str = "en"
     improve_mode: bool = False
+    # Termos com tradução fixa (termo → tradução); entra na chave da memória de tradução
+    glossary: Optional[Dict[str, str]] = None
 
 
 class TranslateResponse(BaseModel):
@@ -1,27 +1,50 @@
 import os
+import time
 import uuid
 from pathlib import Path
 from typing import Any
 
 from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
-from fastapi.responses import Response
+from fastapi.responses import FileResponse, Response
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 
 from app.config import settings
 from app.dependencies.rate_limit import enforce_pdf_rate_limit
 from app.dependencies.security import require_internal_api_key
-from app.services.civil.calculator import calcular_todos
-from app.services.civil.excel_generator import gerar_excel_bytes
-from app.services.civil.models import ConfigProjeto, ResultadoQuantitativo
-from app.services.civil.pdf_extractor import ExtractionError, PDFExtractor
-from app.services.civil.validator import validar_calculos, validar_geometria
+from app.services.civil.models import ResultadoQuantitativo
+from app.warmup import require
 
-router = APIRouter(dependencies=[Depends(require_internal_api_key)])
+# Extrator, OCR e openpyxl carregam na primeira request do módulo (os imports
+# dos serviços ficam dentro das rotas)
+router = APIRouter(dependencies=[Depends(require_internal_api_key), Depends(require("civil"))])
 
-_CONFIG_PATH = Path(__file__).parent.parent / "services" / "civil" / "config" / "defaults.json"
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
 
 
-async def _extrair_resultado(file: UploadFile) -> tuple[ResultadoQuantitativo, str]:
-    """Valida, salva, processa e retorna (resultado, filename_base). Lança HTTPException em erros."""
+def _xlsx_lote(file_id: str) -> str:
+    return os.path.join(settings.OUTPUT_DIR, f"civil_{file_id}.xlsx")
+
+
+def _remover(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _limpar_planilhas_antigas() -> None:
+    """Apaga as planilhas de lote nunca baixadas há mais de ``CIVIL_DOWNLOAD_TTL_HOURS``."""
+    limite = time.time() - settings.CIVIL_DOWNLOAD_TTL_HOURS * 3600
+    for path in Path(settings.OUTPUT_DIR).glob("civil_*.xlsx"):
+        try:
+            if path.stat().st_mtime < limite:
+                path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _validar_pdf(file: UploadFile) -> None:
     if not file.filename:
         raise HTTPException(status_code=400, detail="Nome do arquivo não fornecido")
 
@@ -29,44 +52,25 @@ async def _extrair_resultado(file: UploadFile) -> tuple[ResultadoQuantitativo, s
     if ext != ".pdf":
         raise HTTPException(status_code=400, detail="Apenas arquivos PDF são aceitos")
 
-    file_id = str(uuid.uuid4())
-    temp_path = Path(settings.UPLOAD_DIR) / f"civil_{file_id}.pdf"
-
-    try:
-        content = await file.read()
-        temp_path.write_bytes(content)
-
-        config = ConfigProjeto.from_file(_CONFIG_PATH)
-        extractor = PDFExtractor(config)
 
-        try:
-            geo = extractor.extract(temp_path)
-        except ExtractionError as exc:
-            raise HTTPException(status_code=422, detail=str(exc))
+def _nome_base(resultado: ResultadoQuantitativo) -> str:
+    return resultado.geometria.documento.replace("/", "-").replace("\\", "-")
 
-        missing = extractor.find_missing_fields(geo)
-        if missing:
-            raise HTTPException(
-                status_code=422,
-                detail=f"Campos não encontrados no PDF: {', '.join(missing)}. "
-                       "Verifique se o arquivo é um desenho de fundação de tanque Petrobras.",
-            )
 
-        resultado = calcular_todos(geo, config)
+async def _extrair_resultado(file: UploadFile) -> tuple[ResultadoQuantitativo, str]:
+    """Valida, salva, processa e retorna (resultado, filename_base). Lança HTTPException em erros."""
+    _validar_pdf(file)
+    content = await file.read()
 
-        erros = validar_geometria(geo) + validar_calculos(resultado, config.tolerancia_validacao)
-        if erros:
-            raise HTTPException(
-                status_code=422,
-                detail=f"Validação falhou: {'; '.join(erros[:3])}",
-            )
+    from app.services.civil.batch_processor import DesenhoInvalido, processar_bytes
 
-        nome_base = geo.documento.replace("/", "-").replace("\\", "-")
-        return resultado, nome_base
+    # Extração e OCR são CPU-bound: fora do event loop
+    try:
+        resultado = await run_in_threadpool(processar_bytes, file.filename, content)
+    except DesenhoInvalido as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
 
-    finally:
-        if temp_path.exists():
-            temp_path.unlink()
+    return resultado, _nome_base(resultado)
 
 
 @router.post("/preview")
@@ -92,12 +96,118 @@ async def processar_pdf(
     file: UploadFile = File(...),
     _: None = Depends(enforce_pdf_rate_limit),
 ):
+    from app.services.civil.excel_generator import gerar_excel_bytes
+
     resultado, nome_base = await _extrair_resultado(file)
     xlsx_bytes = gerar_excel_bytes([resultado])
     filename = f"quantitativo_{nome_base}.xlsx"
 
     return Response(
         content=xlsx_bytes,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        media_type=XLSX_MEDIA_TYPE,
         headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
+
+
+@router.post("/processar-lote")
+async def processar_lote_pdfs(
+    files: list[UploadFile] = File(...),
+    _: None = Depends(enforce_pdf_rate_limit),
+) -> dict[str, Any]:
+    """Processa vários desenhos de uma vez (um por processo).
+
+    Retorna o relatório por arquivo e, se algum desenho foi processado, o link
+    da planilha consolidada (uma aba por desenho, na ordem do envio). Desenhos
+    com erro não interrompem o lote.
+    """
+    from app.services.civil.batch_processor import processar_lote
+    from app.services.civil.excel_generator import gerar_excel_bytes
+
+    if not files:
+        raise HTTPException(status_code=400, detail="Nenhum arquivo enviado.")
+    if len(files) > settings.CIVIL_BATCH_MAX_FILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Máximo de {settings.CIVIL_BATCH_MAX_FILES} arquivos por lote.",
+        )
+
+    started = time.perf_counter()
+    relatorio: list[dict[str, Any]] = []
+    pending: list[tuple[int, str, bytes]] = []
+
+    for upload in files:
+        filename = upload.filename or "arquivo.pdf"
+        try:
+            _validar_pdf(upload)
+        except HTTPException as exc:
+            relatorio.append({"filename": filename, "documento": None, "tanques": [], "erro": exc.detail})
+            continue
+        content = await upload.read()
+        if len(content) > settings.MAX_FILE_SIZE:
+            relatorio.append({
+                "filename": filename,
+                "documento": None,
+                "tanques": [],
+                "erro": f"Arquivo muito grande ({len(content) // 1024 // 1024} MB). "
+                        f"Máximo: {settings.MAX_FILE_SIZE // 1024 // 1024} MB.",
+            })
+            continue
+        pending.append((len(relatorio), filename, content))
+        relatorio.append({})
+
+    slots = [slot for slot, _, _ in pending]
+    processados = await run_in_threadpool(processar_lote, [(name, content) for _, name, content in pending])
+    del pending
+
+    resultados: list[ResultadoQuantitativo] = []
+    for slot, item in zip(slots, processados):
+        resultado = item["resultado"]
+        relatorio[slot] = {
+            "filename": item["filename"],
+            "documento": resultado.geometria.documento if resultado else None,
+            "tanques": resultado.geometria.tanques if resultado else [],
+            "erro": item["erro"],
+        }
+        if resultado is not None:
+            resultados.append(resultado)
+
+    download_url = None
+    if resultados:
+        file_id = str(uuid.uuid4())
+        xlsx_bytes = await run_in_threadpool(gerar_excel_bytes, resultados)
+        await run_in_threadpool(_limpar_planilhas_antigas)
+        Path(_xlsx_lote(file_id)).write_bytes(xlsx_bytes)
+        download_url = f"/api/civil/download/{file_id}"
+
+    return {
+        "arquivos": relatorio,
+        "total_arquivos": len(relatorio),
+        "processados": len(resultados),
+        "com_erro": len(relatorio) - len(resultados),
+        "download_url": download_url,
+        "tempo_s": round(time.perf_counter() - started, 3),
+    }
+
+
+@router.get("/download/{file_id}")
+async def download_lote(
+    file_id: str,
+    filename: str = "quantitativo_lote.xlsx",
+    _: None = Depends(enforce_pdf_rate_limit),
+):
+    """Baixa a planilha consolidada de um lote (uma vez: o arquivo é apagado em seguida)."""
+    try:
+        file_id = str(uuid.UUID(file_id))
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Arquivo não encontrado")
+
+    xlsx_path = _xlsx_lote(file_id)
+    if not os.path.exists(xlsx_path):
+        raise HTTPException(status_code=404, detail="Arquivo não encontrado")
+
+    return FileResponse(
+        xlsx_path,
+        media_type=XLSX_MEDIA_TYPE,
+        filename=filename,
+        background=BackgroundTask(_remover, xlsx_path),
+    )
@@ -27,7 +27,7 @@ from app.models.email_schemas import (
 )
 from app.models.rag_models import ChatSession, ChatMessage
 from app.services.email.microsoft_graph import get_graph_service
-from app.services.email.email_sync_service import sync_emails
+from app.services.email.email_sync_service import resume_indexing, sync_emails
 from app.services.email.email_vector_store import get_email_vector_store_service
 from app.services.email.email_rag_service import get_email_rag_service
 
@@ -149,6 +149,8 @@ def disconnect_account(user_id: str = Query(...), db: Session = Depends(get_db))
     account.access_token = None
     account.refresh_token = None
     account.token_expires_at = None
+    account.sync_watermark = None
+    account.synced_since = None
     db.commit()
     return {"status": "disconnected"}
 
@@ -178,6 +180,8 @@ async def start_sync(
     if active_job:
         raise HTTPException(status_code=409, detail="Sincronização já em andamento")
 
+    if request.resume:
+        return await resume_indexing(account.id, request.period_months, db)
     job = await sync_emails(account.id, request.period_months, db)
     return job
 
@@ -320,29 +324,37 @@ async def send_chat_message(
     db.commit()
 
     chat_history = _get_email_chat_history(db, session_id, limit=10)
+    collection_id = account.collection_id
+    # Devolve a conexão ao pool durante o streaming (a sessão reabre ao salvar a resposta);
+    # senão cada stream aberto segura uma conexão e o pool esgota com ~15 perguntas simultâneas
+    db.close()
 
     # Streaming response
     async def generate():
         full_response = ""
+        timings: dict = {}
         try:
-            for chunk in get_email_rag_service().stream_answer(
+            async for chunk in get_email_rag_service().astream_answer(
                 question=message.content,
-                collection_id=account.collection_id,
+                collection_id=collection_id,
                 chat_history=chat_history,
+                timings=timings,
             ):
                 full_response += chunk
                 yield f"data: {json.dumps({'chunk': chunk})}\n\n"
 
-            ai_msg = ChatMessage(
-                id=str(uuid.uuid4()),
+            # Id gerado aqui: ler ai_msg.id após o commit recarregaria a linha e
+            # prenderia outra conexão até o fim da resposta
+            message_id = str(uuid.uuid4())
+            db.add(ChatMessage(
+                id=message_id,
                 session_id=session_id,
                 role="assistant",
                 content=full_response,
-            )
-            db.add(ai_msg)
+            ))
             db.commit()
 
-            yield f"data: {json.dumps({'done': True, 'message_id': ai_msg.id})}\n\n"
+            yield f"data: {json.dumps({'done': True, 'message_id': message_id, 'timings': timings})}\n\n"
 
         except Exception as e:
             logger.error(f"Email chat streaming error: {e}", exc_info=True)
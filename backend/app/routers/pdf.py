@@ -1,20 +1,64 @@
+import json
+import logging
 import os
+import shutil
 import uuid
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
-from fastapi.responses import FileResponse
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile
+from fastapi.responses import FileResponse, StreamingResponse
+from pydantic import ValidationError
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 
 from app.config import settings
-from app.dependencies.rate_limit import enforce_pdf_rate_limit
+from app.dependencies.rate_limit import enforce_pdf_rate_limit, request_identity
 from app.dependencies.security import require_internal_api_key
-from app.models.schemas import ExtractResponse, ConvertResponse, FormatResponse, ExcelFromTablesRequest
-from app.services.pdf_extract_service import PdfExtractService
-from app.services.pdf_convert_service import PdfConvertService
-from app.services.word_format_service import WordFormatService
+from app.models.schemas import ExtractResponse, ConvertResponse, FormatResponse, ExcelFromTablesRequest, TableData
+from app.services.job_store import JobLimitExceeded, JobNotFound, JobNotReady
+from app.services.ocr_cache import get_ocr_cache
+from app.services.pdf_convert_job_service import get_convert_job_service
+from app.warmup import require
+
+if TYPE_CHECKING:
+    from app.services.pdf_convert_service import PdfConvertService
+    from app.services.pdf_extract_service import PdfExtractService
+    from app.services.word_format_service import WordFormatService
+
+logger = logging.getLogger(__name__)
+
+# pandas, pdfplumber, PyMuPDF e pdf2docx carregam na primeira request do módulo
+router = APIRouter(dependencies=[Depends(require_internal_api_key), Depends(require("pdf"))])
+
+
+@lru_cache(maxsize=1)
+def get_extract_service() -> "PdfExtractService":
+    from app.services.pdf_extract_service import PdfExtractService
+
+    return PdfExtractService()
+
+
+@lru_cache(maxsize=1)
+def get_convert_service() -> "PdfConvertService":
+    from app.services.pdf_convert_service import PdfConvertService
+
+    return PdfConvertService()
+
 
-router = APIRouter(dependencies=[Depends(require_internal_api_key)])
-extract_service = PdfExtractService()
-convert_service = PdfConvertService()
-format_service = WordFormatService()
+@lru_cache(maxsize=1)
+def get_format_service() -> "WordFormatService":
+    from app.services.word_format_service import WordFormatService
+
+    return WordFormatService()
+
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def remove_file(path: str) -> None:
+    if os.path.exists(path):
+        os.remove(path)
 
 
 def validate_pdf(file: UploadFile):
@@ -29,6 +73,12 @@ def validate_pdf(file: UploadFile):
         )
 
 
+@router.get("/cache/stats")
+async def ocr_cache_stats():
+    """Contadores do cache de OCR de páginas escaneadas (hits, misses, tamanho)."""
+    return get_ocr_cache().stats()
+
+
 @router.post("/extract", response_model=ExtractResponse)
 async def extract_tables(
     file: UploadFile = File(...),
@@ -49,8 +99,8 @@ async def extract_tables(
         with open(temp_path, "wb") as f:
             f.write(content)
 
-        # Extrair tabelas
-        result = extract_service.extract_tables(temp_path)
+        # Extrair tabelas (fora do event loop: a extração espera o pool de processos)
+        result = await run_in_threadpool(get_extract_service().extract_tables, temp_path)
 
         return ExtractResponse(
             filename=file.filename or "unknown.pdf",
@@ -65,6 +115,111 @@ async def extract_tables(
             os.remove(temp_path)
 
 
+@router.post("/extract/stream")
+async def extract_tables_stream(
+    file: UploadFile = File(...),
+    _: None = Depends(enforce_pdf_rate_limit),
+):
+    """
+    Extrai tabelas de um PDF e devolve NDJSON incremental (uma linha por registro).
+
+    Registros: ``start``, ``table`` (um por tabela, assim que a página dela
+    termina — vetorial ou OCR), ``progress`` periódico, ``done`` e, se a
+    extração falhar no meio, ``error``. O cliente pode mandar as linhas de volta
+    para /extract/stream/excel para gerar o Excel sem reextrair o PDF.
+    """
+    validate_pdf(file)
+
+    file_id = str(uuid.uuid4())
+    temp_path = os.path.join(settings.UPLOAD_DIR, f"{file_id}.pdf")
+
+    try:
+        content = await file.read()
+        with open(temp_path, "wb") as f:
+            f.write(content)
+    except Exception:
+        remove_file(temp_path)
+        raise
+
+    filename = file.filename or "unknown.pdf"
+
+    def records():
+        try:
+            for record in get_extract_service().iter_tables(temp_path):
+                if record["type"] == "start":
+                    record["filename"] = filename
+                yield json.dumps(record, ensure_ascii=False) + "\n"
+        except Exception as e:
+            logger.error(f"Erro na extração em streaming: {e}", exc_info=True)
+            yield json.dumps({"type": "error", "detail": f"Erro na extração: {str(e)}"}, ensure_ascii=False) + "\n"
+
+    # Gerador síncrono: o Starlette itera em threadpool, fora do event loop
+    return StreamingResponse(
+        records(),
+        media_type=NDJSON_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(remove_file, temp_path),
+    )
+
+
+@router.post("/extract/stream/excel")
+async def excel_from_stream(
+    request: Request,
+    filename: str = "tabelas",
+    _: None = Depends(enforce_pdf_rate_limit),
+):
+    """
+    Gera o Excel a partir das linhas NDJSON devolvidas por /extract/stream.
+
+    Aceita o stream como veio (registros que não são ``table`` são ignorados)
+    e lê o corpo linha a linha, sem reextrair o PDF.
+    """
+    tables = []
+    buffer = b""
+    line_no = 0
+
+    def parse(line: bytes) -> None:
+        line = line.strip()
+        if not line:
+            return
+        try:
+            record = json.loads(line)
+            if isinstance(record, dict) and record.get("type") == "table":
+                tables.append(TableData.model_validate(record).model_dump())
+        except (ValueError, ValidationError):
+            raise HTTPException(status_code=400, detail=f"Linha NDJSON inválida: {line_no}")
+
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_no += 1
+            parse(line)
+    line_no += 1
+    parse(buffer)
+
+    # O stream entrega as tabelas de OCR depois das vetoriais; o Excel segue a
+    # ordem de /extract (página, índice).
+    tables.sort(key=lambda t: (t["page"], t["table_index"]))
+
+    file_id = str(uuid.uuid4())
+    output_excel = os.path.join(settings.OUTPUT_DIR, f"{file_id}.xlsx")
+
+    try:
+        await run_in_threadpool(get_extract_service().tables_to_excel, tables, output_excel)
+
+        safe_name = os.path.splitext(filename or "tabelas")[0]
+        return FileResponse(
+            output_excel,
+            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            filename=f"{safe_name}.xlsx",
+        )
+
+    except Exception as e:
+        remove_file(output_excel)
+        raise HTTPException(status_code=500, detail=f"Erro ao gerar Excel: {str(e)}")
+
+
 @router.post("/extract/download")
 async def download_excel(
     file: UploadFile = File(...),
@@ -86,7 +241,7 @@ async def download_excel(
             f.write(content)
 
         # Extrair e salvar como Excel
-        extract_service.extract_to_excel(temp_pdf, output_excel)
+        await run_in_threadpool(get_extract_service().extract_to_excel, temp_pdf, output_excel)
 
         return FileResponse(
             output_excel,
@@ -120,7 +275,7 @@ async def excel_from_tables(
 
     try:
         tables = [t.model_dump() for t in payload.tables]
-        extract_service.tables_to_excel(tables, output_excel)
+        get_extract_service().tables_to_excel(tables, output_excel)
 
         safe_name = os.path.splitext(payload.filename or "tabelas")[0]
         return FileResponse(
@@ -142,11 +297,14 @@ async def convert_to_word(
 ):
     """
     Converte PDF para documento Word.
+
+    Espera a conversão terminar; para documentos grandes use /convert/jobs.
     """
     validate_pdf(file)
 
     file_id = str(uuid.uuid4())
-    temp_pdf = os.path.join(settings.UPLOAD_DIR, f"{file_id}.pdf")
+    work_dir = os.path.join(settings.UPLOAD_DIR, f"convert_{file_id}")
+    temp_pdf = os.path.join(work_dir, "input.pdf")
     output_docx = os.path.join(settings.OUTPUT_DIR, f"{file_id}.docx")
 
     try:
@@ -154,11 +312,12 @@ async def convert_to_word(
         content = await file.read()
         original_size = len(content)
 
+        os.makedirs(work_dir)
         with open(temp_pdf, "wb") as f:
             f.write(content)
 
-        # Converter
-        convert_service.convert(temp_pdf, output_docx)
+        # Converter (faixas de páginas em paralelo, fora do event loop)
+        await run_in_threadpool(get_convert_service().convert_parallel, temp_pdf, output_docx, work_dir)
 
         converted_size = os.path.getsize(output_docx)
 
@@ -171,11 +330,70 @@ async def convert_to_word(
 
     except Exception as e:
         # Limpar arquivos em caso de erro
-        for path in [temp_pdf, output_docx]:
-            if os.path.exists(path):
-                os.remove(path)
+        remove_file(output_docx)
         raise HTTPException(status_code=500, detail=f"Erro na conversão: {str(e)}")
 
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def convert_job_http_error(exc: Exception) -> HTTPException:
+    if isinstance(exc, JobLimitExceeded):
+        return HTTPException(
+            status_code=429,
+            detail="Limite de conversões simultâneas atingido. Aguarde a conclusão de um job.",
+        )
+    if isinstance(exc, JobNotFound):
+        return HTTPException(status_code=404, detail="Job não encontrado")
+    return HTTPException(status_code=409, detail="Job ainda não concluído")
+
+
+def validate_job_id(job_id: str) -> None:
+    try:
+        uuid.UUID(job_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+
+
+@router.post("/convert/jobs", status_code=202)
+async def submit_convert_job(
+    file: UploadFile = File(...),
+    user: str = Depends(request_identity),
+    _: None = Depends(enforce_pdf_rate_limit),
+):
+    """Enfileira a conversão PDF → Word e retorna o job_id (status em /convert/jobs/{job_id})."""
+    validate_pdf(file)
+    content = await file.read()
+    try:
+        return await run_in_threadpool(
+            get_convert_job_service().submit, user, file.filename or "document.pdf", content,
+        )
+    except JobLimitExceeded as e:
+        raise convert_job_http_error(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao criar job: {str(e)}")
+
+
+@router.get("/convert/jobs/{job_id}")
+async def get_convert_job_status(job_id: str, user: str = Depends(request_identity)):
+    """Status e progresso por faixa de páginas; ``download_url`` quando concluído."""
+    validate_job_id(job_id)
+    try:
+        return get_convert_job_service().status(job_id, user)
+    except JobNotFound as e:
+        raise convert_job_http_error(e)
+
+
+@router.delete("/convert/jobs/{job_id}")
+async def delete_convert_job(job_id: str, user: str = Depends(request_identity)):
+    """Remove um job concluído e o DOCX gerado."""
+    validate_job_id(job_id)
+    try:
+        get_convert_job_service().delete(job_id, user)
+    except (JobNotFound, JobNotReady) as e:
+        raise convert_job_http_error(e)
+    return {"ok": True}
+
 
 @router.get("/download/{file_id}")
 async def download_converted(
@@ -233,7 +451,7 @@ async def format_docx(
             f.write(content)
 
         # Formatar
-        format_service.format_document(temp_docx, output_docx)
+        get_format_service().format_document(temp_docx, output_docx)
 
         formatted_size = os.path.getsize(output_docx)
 
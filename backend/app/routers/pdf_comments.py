@@ -1,69 +1,82 @@
-import tempfile
-from dataclasses import asdict
-from pathlib import Path
+import time
+from typing import Optional
 
 from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
 from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
 from app.dependencies.security import require_internal_api_key
 from app.dependencies.rate_limit import enforce_pdf_rate_limit
-from app.services.pdf_comments_service import analyze_batch, extract_from_pdf, generate_excel
+from app.services.comment_ai_cache import get_comment_cache
+from app.warmup import require
 
-router = APIRouter(dependencies=[Depends(require_internal_api_key)])
+# PyMuPDF e openpyxl carregam na primeira request do módulo (os imports do
+# serviço ficam dentro das rotas)
+router = APIRouter(dependencies=[Depends(require_internal_api_key), Depends(require("pdf_comments"))])
 
 MAX_FILE_SIZE = 100 * 1024 * 1024  # 100 MB
 
 
+@router.get("/cache/stats")
+async def cache_stats():
+    """Contadores do cache de análises IA (hits, misses, entradas, tamanho)."""
+    return get_comment_cache().stats()
+
+
 @router.post("/process")
 async def process_pdfs(
     files: list[UploadFile] = File(...),
     _: None = Depends(enforce_pdf_rate_limit),
 ):
+    from app.services.pdf_comments_service import analyze_batch, extract_many
+
     if not files:
         raise HTTPException(status_code=400, detail="Nenhum arquivo enviado.")
 
-    results = []
-    tmp_dir = Path(tempfile.mkdtemp())
-
-    try:
-        for upload in files:
-            filename = upload.filename or "arquivo.pdf"
-            content = await upload.read()
-
-            if len(content) > MAX_FILE_SIZE:
-                results.append({
-                    "filename": filename,
-                    "annotations": [],
-                    "error": f"Arquivo muito grande ({len(content) // 1024 // 1024} MB). Máximo: 100 MB.",
-                    "page_count": 0,
-                })
-                continue
-
-            if not filename.lower().endswith(".pdf"):
-                results.append({
-                    "filename": filename,
-                    "annotations": [],
-                    "error": "Tipo de arquivo inválido. Apenas PDFs são aceitos.",
-                    "page_count": 0,
-                })
-                continue
-
-            tmp_path = tmp_dir / filename
-            tmp_path.write_bytes(content)
-
-            result = extract_from_pdf(tmp_path)
-            results.append(asdict(result))
-
-            tmp_path.unlink(missing_ok=True)
-    finally:
-        try:
-            tmp_dir.rmdir()
-        except OSError:
-            pass
+    started = time.perf_counter()
+    results: list[Optional[dict]] = []
+    pending: list[tuple[int, str, bytes]] = []
+
+    for upload in files:
+        filename = upload.filename or "arquivo.pdf"
+        content = await upload.read()
+
+        if len(content) > MAX_FILE_SIZE:
+            results.append({
+                "filename": filename,
+                "annotations": [],
+                "error": f"Arquivo muito grande ({len(content) // 1024 // 1024} MB). Máximo: 100 MB.",
+                "page_count": 0,
+            })
+            continue
+
+        if not filename.lower().endswith(".pdf"):
+            results.append({
+                "filename": filename,
+                "annotations": [],
+                "error": "Tipo de arquivo inválido. Apenas PDFs são aceitos.",
+                "page_count": 0,
+            })
+            continue
+
+        pending.append((len(results), filename, content))
+        results.append(None)
+
+    read_done = time.perf_counter()
+
+    # PDFs abertos da memória, um processo por arquivo (fora do event loop)
+    extracted = await run_in_threadpool(extract_many, [(name, content) for _, name, content in pending])
+    for (slot, _, _), result in zip(pending, extracted):
+        results[slot] = result
+    del pending
+
+    extract_done = time.perf_counter()
 
     # Collect all annotations across files and run AI analysis in parallel
     all_annotations = [a for r in results if not r.get("error") for a in r.get("annotations", [])]
-    analyze_batch(all_annotations)
+    ai_stats = await run_in_threadpool(analyze_batch, all_annotations)
+
+    finished = time.perf_counter()
 
     total_annotations = sum(
         len(r.get("annotations", [])) for r in results if not r.get("error")
@@ -73,6 +86,13 @@ async def process_pdfs(
         "results": results,
         "total_annotations": total_annotations,
         "total_files": len(results),
+        "ai": ai_stats,
+        "timings": {
+            "read_s": round(read_done - started, 3),
+            "extract_s": round(extract_done - read_done, 3),
+            "ai_s": round(finished - extract_done, 3),
+            "total_s": round(finished - started, 3),
+        },
     }
 
 
@@ -81,6 +101,8 @@ async def export_excel(
     payload: dict,
     _: None = Depends(enforce_pdf_rate_limit),
 ):
+    from app.services.pdf_comments_service import generate_excel
+
     results = payload.get("results", [])
     if not results:
         raise HTTPException(status_code=400, detail="Nenhum resultado para exportar.")
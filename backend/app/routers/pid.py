@@ -2,20 +2,39 @@ import os
 import json
 import shutil
 import uuid
+from functools import lru_cache
 from pathlib import Path
+from typing import TYPE_CHECKING
+from urllib.parse import quote
 from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, UploadFile
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 from starlette.datastructures import UploadFile as StarletteUploadFile
 
 from app.config import settings
-from app.dependencies.rate_limit import enforce_pid_rate_limit
+from app.dependencies.rate_limit import enforce_pid_rate_limit, request_identity
 from app.dependencies.security import require_internal_api_key
-from app.services.pid_extract_service import PidExtractService
+from app.services.job_store import STATUS_ERROR, JobLimitExceeded, JobNotFound, JobNotReady
+from app.services.pid.core.result_cache import get_result_cache
+from app.services.pid.export.csv_export import iter_csv
+from app.services.pid_job_service import get_job_service
+from app.warmup import require
 
-router = APIRouter(dependencies=[Depends(require_internal_api_key)])
-pid_service = PidExtractService()
+if TYPE_CHECKING:
+    from app.services.pid_extract_service import PidExtractService
+
+# PyMuPDF, pdfplumber and openpyxl load on the module's first request
+router = APIRouter(dependencies=[Depends(require_internal_api_key), Depends(require("pid"))])
 BATCH_DIR = os.path.join(settings.UPLOAD_DIR, "pid-batches")
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+@lru_cache(maxsize=1)
+def get_pid_service() -> "PidExtractService":
+    from app.services.pid_extract_service import PidExtractService
+
+    return PidExtractService()
 
 
 def validate_pdf(file: UploadFile):
@@ -26,6 +45,14 @@ def validate_pdf(file: UploadFile):
         raise HTTPException(status_code=400, detail=f"Tipo de arquivo não permitido: {ext}")
 
 
+def attachment_headers(filename: str) -> dict[str, str]:
+    """Content-Disposition for a download, RFC 5987-encoded when not plain ASCII."""
+    quoted = quote(filename)
+    if quoted != filename:
+        return {"Content-Disposition": f"attachment; filename*=utf-8''{quoted}"}
+    return {"Content-Disposition": f'attachment; filename="{filename}"'}
+
+
 def cleanup_files(paths: list[str]) -> None:
     for path in paths:
         if os.path.exists(path):
@@ -111,6 +138,30 @@ async def save_pid_uploads(files: list[StarletteUploadFile]) -> tuple[list[str],
     return temp_paths, source_filenames
 
 
+def job_http_error(exc: Exception) -> HTTPException:
+    if isinstance(exc, JobLimitExceeded):
+        return HTTPException(
+            status_code=429,
+            detail="Limite de extrações simultâneas atingido. Aguarde a conclusão de um job.",
+        )
+    if isinstance(exc, JobNotFound):
+        return HTTPException(status_code=404, detail="Job não encontrado")
+    return HTTPException(status_code=409, detail="Job ainda não concluído")
+
+
+def validate_job_id(job_id: str) -> None:
+    try:
+        uuid.UUID(job_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+
+
+@router.get("/cache/stats")
+async def cache_stats():
+    """Contadores do cache de resultados por página (hits, misses, tamanho)."""
+    return get_result_cache().stats()
+
+
 @router.post("/extract/batch/start")
 async def start_batch():
     """Cria um batch temporário para exportação consolidada."""
@@ -179,34 +230,29 @@ async def download_batch_excel(
     validate_profile(profile)
     enable_llm = use_llm.lower() == "true"
     temp_paths, source_filenames = load_batch_manifest(batch_id)
-    output_excel = os.path.join(settings.OUTPUT_DIR, f"{batch_id}_pid.xlsx")
 
     try:
-        pid_service.extract_many_to_excel(
+        result = await run_in_threadpool(
+            get_pid_service().extract_many,
             temp_paths,
-            output_excel,
-            profile_name=profile,
+            profile,
             use_llm=enable_llm,
             source_filenames=source_filenames,
-            single_sheet=True,
-        )
-
-        if not os.path.exists(output_excel):
-            raise HTTPException(status_code=500, detail="Excel consolidado não foi gerado")
-
-        return FileResponse(
-            output_excel,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            filename="instrument_index_consolidado.xlsx",
-            background=BackgroundTask(cleanup_batch, batch_id, [output_excel]),
         )
-    except HTTPException:
-        cleanup_batch(batch_id, [output_excel])
-        raise
     except Exception as e:
-        cleanup_batch(batch_id, [output_excel])
+        cleanup_batch(batch_id)
         raise HTTPException(status_code=500, detail=f"Erro na extração: {str(e)}")
 
+    from app.services.pid.export.excel_export import iter_excel
+
+    # Workbook is written straight into the response body, no output file
+    return StreamingResponse(
+        iter_excel(result, include_support_sheets=False),
+        media_type=XLSX_MEDIA_TYPE,
+        headers=attachment_headers("instrument_index_consolidado.xlsx"),
+        background=BackgroundTask(cleanup_batch, batch_id),
+    )
+
 
 @router.post("/extract/batch/preview")
 async def preview_batch_pdf(
@@ -222,7 +268,8 @@ async def preview_batch_pdf(
     output_pdf = os.path.join(settings.OUTPUT_DIR, f"{batch_id}_annotated.pdf")
 
     try:
-        pid_service.extract_many_to_annotated_pdf(
+        await run_in_threadpool(
+            get_pid_service().extract_many_to_annotated_pdf,
             temp_paths,
             output_pdf,
             profile_name=profile,
@@ -268,7 +315,9 @@ async def extract_instruments(
         with open(temp_path, "wb") as f:
             f.write(content)
 
-        result = pid_service.extract_to_json(temp_path, profile_name=profile, use_llm=enable_llm)
+        result = await run_in_threadpool(
+            get_pid_service().extract_to_json, temp_path, profile_name=profile, use_llm=enable_llm,
+        )
         result["filename"] = file.filename or "unknown.pdf"
         return result
 
@@ -293,7 +342,8 @@ async def extract_preview(
     try:
         temp_paths, source_filenames = await save_pid_uploads(files)
 
-        pid_service.extract_many_to_annotated_pdf(
+        await run_in_threadpool(
+            get_pid_service().extract_many_to_annotated_pdf,
             temp_paths,
             output_pdf,
             profile_name=profile,
@@ -332,41 +382,176 @@ async def download_excel(
 ):
     """Extrai instrumentos e retorna um Excel consolidado."""
     files, profile, enable_llm = await parse_pid_uploads(request)
-    file_id = str(uuid.uuid4())
-    output_excel = os.path.join(settings.OUTPUT_DIR, f"{file_id}_pid.xlsx")
     temp_paths: list[str] = []
 
     try:
         temp_paths, source_filenames = await save_pid_uploads(files)
 
-        pid_service.extract_many_to_excel(
+        result = await run_in_threadpool(
+            get_pid_service().extract_many,
             temp_paths,
-            output_excel,
-            profile_name=profile,
+            profile,
             use_llm=enable_llm,
             source_filenames=source_filenames,
-            single_sheet=len(temp_paths) > 1,
         )
+    except HTTPException:
+        cleanup_files(temp_paths)
+        raise
+    except Exception as e:
+        cleanup_files(temp_paths)
+        raise HTTPException(status_code=500, detail=f"Erro na extração: {str(e)}")
 
-        if not os.path.exists(output_excel):
-            raise HTTPException(status_code=500, detail="Excel não foi gerado")
+    filename = (
+        f"{os.path.splitext(files[0].filename or 'pid')[0]}_instrument_index.xlsx"
+        if len(files) == 1
+        else "instrument_index_consolidado.xlsx"
+    )
 
-        filename = (
-            f"{os.path.splitext(files[0].filename or 'pid')[0]}_instrument_index.xlsx"
-            if len(files) == 1
-            else "instrument_index_consolidado.xlsx"
-        )
+    from app.services.pid.export.excel_export import iter_excel
+
+    # Workbook is written straight into the response body, no output file
+    return StreamingResponse(
+        iter_excel(result, include_support_sheets=len(temp_paths) == 1),
+        media_type=XLSX_MEDIA_TYPE,
+        headers=attachment_headers(filename),
+        background=BackgroundTask(cleanup_files, temp_paths),
+    )
+
+
+@router.post("/jobs", status_code=202)
+async def submit_job(
+    request: Request,
+    user: str = Depends(request_identity),
+    _: None = Depends(enforce_pid_rate_limit),
+):
+    """Enfileira uma extração (arquivos enviados ou batch existente) e retorna o job_id."""
+    form = await request.form()
+    profile = str(form.get("profile") or "promon")
+    validate_profile(profile)
+    enable_llm = str(form.get("use_llm") or "false").lower() == "true"
+    batch_id = str(form.get("batch_id") or "")
+
+    uploads: list[StarletteUploadFile] = []
+    if batch_id:
+        batch_paths, source_filenames = load_batch_manifest(batch_id)
+    else:
+        uploads = [
+            item
+            for item in [*form.getlist("files"), *form.getlist("file")]
+            if isinstance(item, StarletteUploadFile)
+        ]
+        if not uploads:
+            raise HTTPException(status_code=400, detail="Nenhum arquivo PDF fornecido")
+        for upload in uploads:
+            validate_pdf(upload)
+
+    job_service = get_job_service()
+    try:
+        job_id, job_dir = job_service.reserve(user)
+    except JobLimitExceeded as e:
+        raise job_http_error(e)
+
+    try:
+        files: list[dict[str, str]] = []
+        if batch_id:
+            for index, path in enumerate(batch_paths):
+                dest = os.path.join(job_dir, f"{index:04d}.pdf")
+                shutil.move(path, dest)
+                files.append({
+                    "path": str(Path(dest).resolve()),
+                    "filename": source_filenames[str(Path(path).resolve())],
+                })
+        else:
+            for index, upload in enumerate(uploads):
+                dest = os.path.join(job_dir, f"{index:04d}.pdf")
+                content = await upload.read()
+                with open(dest, "wb") as f:
+                    f.write(content)
+                files.append({
+                    "path": str(Path(dest).resolve()),
+                    "filename": upload.filename or f"pid_{index + 1}.pdf",
+                })
+
+        status = job_service.submit(job_id, user, files, profile_name=profile, use_llm=enable_llm)
+    except Exception as e:
+        job_service.abandon(job_id, user)
+        raise HTTPException(status_code=500, detail=f"Erro ao criar job: {str(e)}")
 
+    if batch_id:
+        cleanup_batch(batch_id)
+    return status
+
+
+@router.get("/jobs/{job_id}")
+async def get_job_status(job_id: str, user: str = Depends(request_identity)):
+    """Status e progresso (páginas processadas / total) de um job."""
+    validate_job_id(job_id)
+    try:
+        return get_job_service().status(job_id, user)
+    except JobNotFound as e:
+        raise job_http_error(e)
+
+
+@router.get("/jobs/{job_id}/result")
+async def get_job_result(
+    job_id: str,
+    format: str = "json",
+    single_sheet: bool | None = None,
+    user: str = Depends(request_identity),
+):
+    """Resultado de um job concluído: json, xlsx, csv ou pdf (anotado)."""
+    validate_job_id(job_id)
+    if format not in ("json", "xlsx", "csv", "pdf"):
+        raise HTTPException(status_code=400, detail=f"Formato inválido: {format}")
+
+    job_service = get_job_service()
+    try:
+        job = job_service.get(job_id, user)
+        if job["status"] == STATUS_ERROR:
+            raise HTTPException(status_code=500, detail=f"Erro na extração: {job['error']}")
+
+        filenames = [item["filename"] for item in job["files"]]
+        stem = os.path.splitext(filenames[0])[0] if len(filenames) == 1 else None
+
+        if format == "json":
+            return await run_in_threadpool(job_service.result_json, job_id, user)
+
+        if format == "xlsx":
+            if single_sheet is None:
+                single_sheet = len(filenames) > 1
+            path = await run_in_threadpool(job_service.result_excel, job_id, user, single_sheet)
+            return FileResponse(
+                path,
+                media_type=XLSX_MEDIA_TYPE,
+                filename=f"{stem}_instrument_index.xlsx" if stem else "instrument_index_consolidado.xlsx",
+            )
+
+        if format == "csv":
+            result = await run_in_threadpool(job_service.result, job_id, user)
+            return StreamingResponse(
+                iter_csv(result),
+                media_type="text/csv",
+                headers=attachment_headers(
+                    f"{stem}_instrument_index.csv" if stem else "instrument_index_consolidado.csv"
+                ),
+            )
+
+        path = await run_in_threadpool(job_service.result_pdf, job_id, user)
         return FileResponse(
-            output_excel,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            filename=filename,
-            background=BackgroundTask(cleanup_files, [*temp_paths, output_excel]),
+            path,
+            media_type="application/pdf",
+            filename=f"{stem}_anotado.pdf" if stem else "pids_anotados_consolidado.pdf",
         )
+    except (JobNotFound, JobNotReady) as e:
+        raise job_http_error(e)
 
-    except HTTPException:
-        cleanup_files([*temp_paths, output_excel])
-        raise
-    except Exception as e:
-        cleanup_files([*temp_paths, output_excel])
-        raise HTTPException(status_code=500, detail=f"Erro na extração: {str(e)}")
+
+@router.delete("/jobs/{job_id}")
+async def delete_job(job_id: str, user: str = Depends(request_identity)):
+    """Remove os arquivos de um job concluído."""
+    validate_job_id(job_id)
+    try:
+        get_job_service().delete(job_id, user)
+    except (JobNotFound, JobNotReady) as e:
+        raise job_http_error(e)
+    return {"ok": True}
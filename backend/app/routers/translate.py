@@ -1,12 +1,25 @@
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
 from fastapi import APIRouter, Depends, HTTPException
 
 from app.models.schemas import TranslateRequest, TranslateResponse
 from app.dependencies.rate_limit import enforce_translate_rate_limit
 from app.dependencies.security import require_internal_api_key
-from app.services.gemini_service import GeminiService
+from app.warmup import require
+
+if TYPE_CHECKING:
+    from app.services.gemini_service import GeminiService
+
+# O SDK do Gemini leva ~1 s para importar: carrega na primeira tradução (ou no warm-up)
+router = APIRouter(dependencies=[Depends(require_internal_api_key), Depends(require("translate"))])
+
+
+@lru_cache(maxsize=1)
+def get_gemini_service() -> "GeminiService":
+    from app.services.gemini_service import GeminiService
 
-router = APIRouter(dependencies=[Depends(require_internal_api_key)])
-gemini_service = GeminiService()
+    return GeminiService()
 
 
 @router.post("/", response_model=TranslateResponse)
@@ -16,17 +29,30 @@ async def translate_text(
 ):
     """
     Traduz texto usando Google Gemini.
+
+    Sem o modo de revisão, traduz frase a frase com memória de tradução:
+    reenviar um documento levemente editado só paga as frases alteradas.
     """
     if not request.text.strip():
         raise HTTPException(status_code=400, detail="Texto não pode estar vazio")
 
     try:
-        result = await gemini_service.translate(
-            text=request.text,
-            source_lang=request.source_lang,
-            target_lang=request.target_lang,
-            improve_mode=request.improve_mode,
-        )
+        gemini_service = get_gemini_service()
+        if request.improve_mode:
+            # A revisão reescreve o texto inteiro: não dá para traduzir por frase
+            result = await gemini_service.translate(
+                text=request.text,
+                source_lang=request.source_lang,
+                target_lang=request.target_lang,
+                improve_mode=True,
+            )
+        else:
+            result = await gemini_service.translate_segments(
+                text=request.text,
+                source_lang=request.source_lang,
+                target_lang=request.target_lang,
+                glossary=request.glossary,
+            )
 
         return TranslateResponse(
             original_text=request.text,
@@ -0,0 +1,153 @@
+"""Processamento de desenhos de fundação: um arquivo ou um lote inteiro.
+
+Um parque de tanques chega como 20–60 desenhos. Cada desenho passa pelo mesmo
+pipeline do endpoint individual (extração, ``calcular_todos`` e validadores),
+mas os arquivos são processados em paralelo num pool de processos e um
+desenho com problema vira uma linha no relatório, sem abortar o lote.
+"""
+
+from __future__ import annotations
+
+import logging
+import shutil
+import uuid
+from concurrent.futures import FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Optional
+
+from app.config import settings
+from app.services import process_pool
+
+from .calculator import calcular_todos
+from .models import ConfigProjeto, ResultadoQuantitativo
+from .pdf_extractor import POOL, ExtractionError, PDFExtractor, get_pool
+from .validator import validar_calculos, validar_geometria
+
+logger = logging.getLogger(__name__)
+
+CONFIG_PATH = Path(__file__).parent / "config" / "defaults.json"
+
+
+class DesenhoInvalido(Exception):
+    """O desenho foi lido, mas não rende um quantitativo válido (HTTP 422)."""
+
+
+@lru_cache(maxsize=1)
+def get_config() -> ConfigProjeto:
+    """``defaults.json`` lido uma vez por processo (API e workers do lote)."""
+    return ConfigProjeto.from_file(CONFIG_PATH)
+
+
+def processar_desenho(pdf_path: Path, max_workers: Optional[int] = None) -> ResultadoQuantitativo:
+    """Extrai, calcula e valida um desenho. Levanta :class:`DesenhoInvalido`.
+
+    ``max_workers`` é repassado ao OCR do extrator.
+    """
+    config = get_config()
+    extractor = PDFExtractor(config)
+
+    try:
+        geo = extractor.extract(pdf_path, max_workers=max_workers)
+    except ExtractionError as exc:
+        raise DesenhoInvalido(str(exc)) from exc
+
+    missing = extractor.find_missing_fields(geo)
+    if missing:
+        raise DesenhoInvalido(
+            f"Campos não encontrados no PDF: {', '.join(missing)}. "
+            "Verifique se o arquivo é um desenho de fundação de tanque Petrobras."
+        )
+
+    resultado = calcular_todos(geo, config)
+
+    erros = validar_geometria(geo) + validar_calculos(resultado, config.tolerancia_validacao)
+    if erros:
+        raise DesenhoInvalido(f"Validação falhou: {'; '.join(erros[:3])}")
+
+    return resultado
+
+
+def processar_bytes(filename: str, content: bytes, max_workers: Optional[int] = None) -> ResultadoQuantitativo:
+    """:func:`processar_desenho` sobre um upload.
+
+    O PDF é salvo com o nome original numa pasta temporária própria: o nome
+    aparece nas mensagens de erro e é o documento quando o carimbo não traz
+    o código.
+    """
+    temp_dir = Path(settings.UPLOAD_DIR) / f"civil_{uuid.uuid4()}"
+    temp_path = temp_dir / (Path(filename).name or "desenho.pdf")
+    try:
+        temp_dir.mkdir(parents=True)
+        temp_path.write_bytes(content)
+        return processar_desenho(temp_path, max_workers=max_workers)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def _processar_task(filename: str, content: bytes) -> dict[str, Any]:
+    """Tarefa do lote: um arquivo, com o erro no resultado em vez de exceção."""
+    try:
+        # Já em paralelo por arquivo: o OCR de cada desenho roda serial no worker
+        resultado = processar_bytes(filename, content, max_workers=1)
+        return {"filename": filename, "resultado": resultado, "erro": None}
+    except DesenhoInvalido as exc:
+        return {"filename": filename, "resultado": None, "erro": str(exc)}
+    except Exception as exc:
+        logger.exception("Falha ao processar %s", filename)
+        return {"filename": filename, "resultado": None, "erro": f"Erro ao processar o PDF: {exc}"}
+
+
+_INTERROMPIDO = "O processo de extração foi interrompido; envie o arquivo novamente."
+
+
+def processar_lote(files: list[tuple[str, bytes]], max_workers: Optional[int] = None) -> list[dict[str, Any]]:
+    """Processa vários PDFs (``(filename, conteúdo)``), na ordem recebida.
+
+    Cada item traz ``filename``, ``resultado`` (:class:`ResultadoQuantitativo`
+    ou ``None``) e ``erro``. Os desenhos vão para o pool civil (o mesmo do
+    OCR), no máximo ``max_workers`` (padrão: ``CIVIL_BATCH_WORKERS``) de cada
+    vez. Se um worker morrer (PDF que derruba o MuPDF), os arquivos que ainda
+    não terminaram são marcados com erro e o pool é recriado na próxima chamada.
+    """
+    if not files:
+        return []
+
+    workers = min(process_pool.resolve_workers(max_workers, settings.CIVIL_BATCH_WORKERS), len(files))
+    if workers <= 1:
+        return [_processar_task(filename, content) for filename, content in files]
+
+    # O pool pode ser maior (é dimensionado também para o OCR): o limite do lote vale pelos envios
+    pool = get_pool()
+    resultados: list[Optional[dict[str, Any]]] = [None] * len(files)
+    pendentes: dict = {}
+    proximo = 0
+    broken = False
+    while pendentes or (proximo < len(files) and not broken):
+        while not broken and proximo < len(files) and len(pendentes) < workers:
+            filename, content = files[proximo]
+            try:
+                pendentes[pool.submit(_processar_task, filename, content)] = proximo
+            except (BrokenProcessPool, RuntimeError):
+                # RuntimeError: pool encerrado (descartado por outro request) entre os envios
+                broken = True
+                break
+            proximo += 1
+        if not pendentes:
+            break
+        prontos, _ = wait(pendentes, return_when=FIRST_COMPLETED)
+        for future in prontos:
+            indice = pendentes.pop(future)
+            try:
+                resultados[indice] = future.result()
+            except BrokenProcessPool:
+                broken = True
+
+    if broken:
+        logger.error("Pool do lote civil interrompido; será recriado")
+        process_pool.discard_pool(POOL, pool)
+    return [
+        resultado or {"filename": filename, "resultado": None, "erro": _INTERROMPIDO}
+        for (filename, _), resultado in zip(files, resultados)
+    ]
@@ -2,11 +2,21 @@
 
 from __future__ import annotations
 
+import io
 import logging
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import chain
 from pathlib import Path
 from typing import Optional
 
+import numpy as np
+
+from app.config import settings
+from app.services import process_pool
+
 from .geometry_parser import (
     classify_radii,
     extract_all_radii,
@@ -27,18 +37,386 @@ _CIRCLE_SQUARENESS = 0.05
 _R_BASE_MIN, _R_BASE_MAX = 3.0, 20.0
 _R_POCO_MIN, _R_POCO_MAX = 0.5, 1.5
 
+OCR_DPI = 300
+_OCR_LANG = "por+eng"
+_OCR_CONFIG = "--psm 11 --oem 3"
+# Regiões gráficas: grade de ocupação com células de _OCR_CELL_PT pontos; caminhos
+# a menos de _OCR_MERGE_PT pontos entre si formam a mesma região (uma vista)
+_OCR_CELL_PT = 6.0
+_OCR_MERGE_PT = 12.0
+# Caminhos que cobrem mais que esta fração da largura ou da altura da página são
+# moldura, eixos ou linhas de cota longas: não têm texto e colariam as vistas
+_OCR_FRAME_SHARE = 0.5
+# Região coberta por texto nativo acima desta fração não vai para o OCR
+_OCR_TEXT_COVERED = 0.9
+# Acima desta fração da página (ou de _OCR_MAX_REGIONS regiões) um único recorte
+# envolvendo tudo sai mais barato que várias chamadas ao Tesseract
+_OCR_SINGLE_CLIP_SHARE = 0.7
+_OCR_MAX_REGIONS = 24
+
 
 class ExtractionError(Exception):
     """Levantada quando não é possível extrair dados suficientes do PDF."""
 
 
+class _DocumentoPDF:
+    """PDF lido e aberto uma única vez, compartilhado pelas camadas de extração.
+
+    Guarda os bytes do arquivo (para o pdfplumber) e o documento PyMuPDF. O
+    TextPage e os caminhos vetoriais de cada página são calculados quando uma
+    camada pede pela primeira vez e reaproveitados pelas demais: o texto de
+    fallback, as elevações e os blocos de texto vêm do mesmo TextPage, e os
+    retângulos dos caminhos (em array) servem tanto às regiões de OCR quanto
+    aos círculos.
+    """
+
+    def __init__(self, pdf_path: Path) -> None:
+        self.path = pdf_path
+        self.data = pdf_path.read_bytes()
+        self.doc = None
+        self._pages: dict[int, object] = {}
+        self._textpages: dict[int, object] = {}
+        self._drawing_rects: dict[int, np.ndarray] = {}
+        try:
+            import fitz  # type: ignore
+            self.doc = fitz.open(stream=self.data, filetype="pdf")
+        except Exception as exc:
+            logger.warning("PyMuPDF falhou ao abrir %s: %s", pdf_path.name, exc)
+
+    def __enter__(self) -> "_DocumentoPDF":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._textpages.clear()
+        self._drawing_rects.clear()
+        self._pages.clear()
+        if self.doc is not None:
+            self.doc.close()
+            self.doc = None
+
+    @property
+    def page_count(self) -> int:
+        return len(self.doc) if self.doc is not None else 0
+
+    def page(self, page_index: int):
+        # O TextPage só guarda uma referência fraca à página: ela fica no cache
+        page = self._pages.get(page_index)
+        if page is None:
+            page = self.doc[page_index]
+            self._pages[page_index] = page
+        return page
+
+    def textpage(self, page_index: int):
+        tp = self._textpages.get(page_index)
+        if tp is None:
+            import fitz  # type: ignore
+            # Mesmos flags de get_text("text"/"words"/"blocks") sem TextPage
+            tp = self.page(page_index).get_textpage(flags=fitz.TEXTFLAGS_TEXT)
+            self._textpages[page_index] = tp
+        return tp
+
+    def text(self, page_index: int) -> str:
+        return self.page(page_index).get_text(textpage=self.textpage(page_index))
+
+    def words(self, page_index: int) -> list:
+        return self.page(page_index).get_text("words", textpage=self.textpage(page_index))
+
+    def text_rects(self, page_index: int) -> list[tuple[float, float, float, float]]:
+        blocks = self.page(page_index).get_text("blocks", textpage=self.textpage(page_index))
+        return [tuple(b[:4]) for b in blocks if b[6] == 0]
+
+    def drawing_rects(self, page_index: int) -> np.ndarray:
+        """Retângulos ``(x0, y0, x1, y1)`` dos caminhos vetoriais, shape ``(n, 4)``.
+
+        ``get_drawings()`` é a etapa mais cara em folhas detalhadas (dezenas de
+        milhares de caminhos); roda uma vez por página e só os retângulos ficam
+        em memória, para as regiões de OCR, os círculos e outras verificações.
+        """
+        rects = self._drawing_rects.get(page_index)
+        if rects is None:
+            rects = _rects_array(self.page(page_index).get_drawings())
+            self._drawing_rects[page_index] = rects
+        return rects
+
+
+Rect = tuple[float, float, float, float]
+
+
+def _rects_array(drawings: list) -> np.ndarray:
+    # fromiter sobre os atributos: ~10x mais rápido que np.array([tuple(rect), ...])
+    coords = chain.from_iterable((r.x0, r.y0, r.x1, r.y1) for r in (d["rect"] for d in drawings))
+    return np.fromiter(coords, dtype=np.float64, count=4 * len(drawings)).reshape(-1, 4)
+
+
+def _regioes_graficas(
+    page_rect: Rect, drawing_rects: np.ndarray, image_rects: list[Rect], text_rects: list[Rect]
+) -> list[Rect]:
+    """Recortes da página com gráficos (vetoriais ou imagens) para o OCR.
+
+    Os retângulos dos caminhos e imagens são marcados numa grade grossa,
+    dilatados por ``_OCR_MERGE_PT`` e agrupados em componentes conexas — cada
+    vista do desenho vira um recorte. Recortes quase todo cobertos por texto
+    nativo são descartados (esse texto já foi extraído).
+    """
+    px0, py0, px1, py1 = page_rect
+    page_w, page_h = px1 - px0, py1 - py0
+    if page_w <= 0 or page_h <= 0:
+        return []
+    cols = int(np.ceil(page_w / _OCR_CELL_PT))
+    rows = int(np.ceil(page_h / _OCR_CELL_PT))
+
+    rects = drawing_rects.reshape(-1, 4)
+    # Moldura, eixos e cotas longas ficam de fora
+    largura = rects[:, 2] - rects[:, 0]
+    altura = rects[:, 3] - rects[:, 1]
+    rects = rects[(largura <= page_w * _OCR_FRAME_SHARE) & (altura <= page_h * _OCR_FRAME_SHARE)]
+    if image_rects:
+        rects = np.vstack([rects, np.asarray(image_rects, dtype=np.float64).reshape(-1, 4)])
+    if not len(rects):
+        return []
+
+    # Retângulos dilatados -> células; marcação de todos de uma vez por soma de
+    # prefixos 2D (+1/-1 nos cantos), sem laço por caminho
+    pad = _OCR_MERGE_PT / 2
+    c0 = np.clip(((rects[:, 0] - px0 - pad) // _OCR_CELL_PT).astype(np.int64), 0, cols)
+    c1 = np.clip(((rects[:, 2] - px0 + pad) // _OCR_CELL_PT).astype(np.int64) + 1, 0, cols)
+    r0 = np.clip(((rects[:, 1] - py0 - pad) // _OCR_CELL_PT).astype(np.int64), 0, rows)
+    r1 = np.clip(((rects[:, 3] - py0 + pad) // _OCR_CELL_PT).astype(np.int64) + 1, 0, rows)
+    ok = (c0 < c1) & (r0 < r1)
+    c0, c1, r0, r1 = c0[ok], c1[ok], r0[ok], r1[ok]
+    cantos = np.zeros((rows + 1, cols + 1), dtype=np.int32)
+    np.add.at(cantos, (r0, c0), 1)
+    np.add.at(cantos, (r0, c1), -1)
+    np.add.at(cantos, (r1, c0), -1)
+    np.add.at(cantos, (r1, c1), 1)
+    grid = cantos.cumsum(axis=0).cumsum(axis=1)[:rows, :cols] > 0
+
+    regioes: list[Rect] = []
+    for r0, c0, r1, c1 in _componentes(grid):
+        x0 = max(px0, px0 + c0 * _OCR_CELL_PT)
+        y0 = max(py0, py0 + r0 * _OCR_CELL_PT)
+        x1 = min(px1, px0 + c1 * _OCR_CELL_PT)
+        y1 = min(py1, py0 + r1 * _OCR_CELL_PT)
+        area = (x1 - x0) * (y1 - y0)
+        if area <= 0:
+            continue
+        coberta = sum(_area_intersecao((x0, y0, x1, y1), t) for t in text_rects)
+        if coberta >= area * _OCR_TEXT_COVERED:
+            continue
+        regioes.append((x0, y0, x1, y1))
+
+    if not regioes:
+        return []
+    total = sum((x1 - x0) * (y1 - y0) for x0, y0, x1, y1 in regioes)
+    if len(regioes) > _OCR_MAX_REGIONS or total >= page_w * page_h * _OCR_SINGLE_CLIP_SHARE:
+        return [(
+            min(r[0] for r in regioes), min(r[1] for r in regioes),
+            max(r[2] for r in regioes), max(r[3] for r in regioes),
+        )]
+    return sorted(regioes, key=lambda r: (r[1], r[0]))
+
+
+def _componentes(grid: np.ndarray) -> list[tuple[int, int, int, int]]:
+    """Caixas (linha0, col0, linha1, col1) das componentes 4-conexas da grade.
+
+    Trabalha sobre as sequências de células marcadas de cada linha (bem menos
+    numerosas que as células): sequências de linhas vizinhas que se sobrepõem
+    são unidas (union-find) e as caixas saem por redução em array.
+    """
+    rows, cols = grid.shape
+    bordas = np.zeros((rows, cols + 2), dtype=np.int8)
+    bordas[:, 1:-1] = grid
+    delta = np.diff(bordas, axis=1)
+    linhas, inicios = np.nonzero(delta == 1)
+    _, fins = np.nonzero(delta == -1)
+    n = len(linhas)
+    if not n:
+        return []
+
+    pai = list(range(n))
+
+    def raiz(k: int) -> int:
+        while pai[k] != k:
+            pai[k] = pai[pai[k]]
+            k = pai[k]
+        return k
+
+    # Primeira sequência de cada linha; sequências da mesma linha são contíguas
+    primeira = np.searchsorted(linhas, np.arange(rows + 1))
+    linhas_l, inicios_l, fins_l = linhas.tolist(), inicios.tolist(), fins.tolist()
+    for a in range(n):
+        abaixo = linhas_l[a] + 1
+        if abaixo >= rows:
+            continue
+        b, fim_b = int(primeira[abaixo]), int(primeira[abaixo + 1])
+        while b < fim_b and fins_l[b] <= inicios_l[a]:
+            b += 1
+        while b < fim_b and inicios_l[b] < fins_l[a]:
+            ra, rb = raiz(a), raiz(b)
+            if ra != rb:
+                pai[rb] = ra
+            b += 1
+
+    rotulos = np.array([raiz(k) for k in range(n)])
+    unicos, grupo = np.unique(rotulos, return_inverse=True)
+    m = len(unicos)
+    r0 = np.full(m, rows)
+    c0 = np.full(m, cols)
+    r1 = np.zeros(m, dtype=np.int64)
+    c1 = np.zeros(m, dtype=np.int64)
+    np.minimum.at(r0, grupo, linhas)
+    np.minimum.at(c0, grupo, inicios)
+    np.maximum.at(r1, grupo, linhas + 1)
+    np.maximum.at(c1, grupo, fins)
+    return list(zip(r0.tolist(), c0.tolist(), r1.tolist(), c1.tolist()))
+
+
+def _area_intersecao(a: Rect, b: Rect) -> float:
+    w = min(a[2], b[2]) - max(a[0], b[0])
+    h = min(a[3], b[3]) - max(a[1], b[1])
+    return w * h if w > 0 and h > 0 else 0.0
+
+
+def _raios_circulos(rects: np.ndarray, pt_to_m: float) -> np.ndarray:
+    """Raios (m, 4 casas) dos caminhos de caixa quase quadrada com lado >= 10 pt."""
+    largura = rects[:, 2] - rects[:, 0]
+    altura = rects[:, 3] - rects[:, 1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        quadrado = np.abs(largura - altura) / np.maximum(largura, altura) <= _CIRCLE_SQUARENESS
+    circulos = (largura >= 10) & (altura >= 10) & quadrado
+    return _arredondar(largura[circulos] / 2 * pt_to_m, 4)
+
+
+def _arredondar(valores: np.ndarray, casas: int) -> np.ndarray:
+    """``round(v, casas)`` do Python em array.
+
+    ``np.round`` escala e arredonda em ponto flutuante e erra alguns empates
+    (x,xxxx5); esses poucos valores são refeitos com ``round``.
+    """
+    arredondados = np.round(valores, casas)
+    escalados = valores * 10.0 ** casas
+    empate = np.abs(np.abs(escalados - np.trunc(escalados)) - 0.5) < 1e-6
+    if empate.any():
+        arredondados[empate] = [round(v, casas) for v in valores[empate].tolist()]
+    return arredondados
+
+
+def _agrupar_raios(raios: np.ndarray, tol: float) -> np.ndarray:
+    """Raios distintos em ordem crescente, com tolerância ``tol``.
+
+    Mantém um raio quando ele passa de ``tol`` do último mantido (o primeiro
+    de cada grupo fica). O laço anda de grupo em grupo via ``searchsorted``
+    sobre os valores únicos ordenados — no máximo algumas dezenas de passos,
+    mesmo com dezenas de milhares de caminhos.
+    """
+    valores = np.unique(raios)
+    n = len(valores)
+    mantidos: list[int] = []
+    i = 0
+    while i < n:
+        mantidos.append(i)
+        ultimo = valores[i]
+        # Candidato pelo limite; o ajuste fino usa a mesma conta (v - ultimo > tol)
+        j = int(np.searchsorted(valores, ultimo + tol, side="left"))
+        while j > i + 1 and valores[j - 1] - ultimo > tol:
+            j -= 1
+        while j < n and not valores[j] - ultimo > tol:
+            j += 1
+        i = j
+    return valores[mantidos]
+
+
+def _par_anel(candidatos: np.ndarray) -> Optional[tuple[float, float]]:
+    """(raio externo, raio interno) da parede do poço: círculos concêntricos a 5–30 cm.
+
+    Entre os pares válidos vence o de maior raio externo e, para ele, o
+    interno mais próximo — a mesma escolha da busca aninhada de antes, agora
+    numa matriz de diferenças.
+    """
+    if len(candidatos) < 2:
+        return None
+    diff = candidatos[:, None] - candidatos[None, :]
+    validos = (diff >= 0.05) & (diff <= 0.30)
+    linhas = np.nonzero(validos.any(axis=1))[0]
+    if not len(linhas):
+        return None
+    i = linhas[-1]
+    j = np.nonzero(validos[i])[0][-1]
+    return float(candidatos[i]), float(candidatos[j])
+
+
+def _ocr_regioes(page, regioes: list[Rect], mascaras: list[Rect], dpi: int) -> str:
+    """OCR de cada recorte da página, com o texto nativo apagado (branco)."""
+    import fitz  # type: ignore
+    import pytesseract  # type: ignore
+    from PIL import Image  # type: ignore
+
+    mat = fitz.Matrix(dpi / 72, dpi / 72)
+    # Interpreta o conteúdo da página uma vez para todos os recortes
+    display_list = page.get_displaylist()
+    partes: list[str] = []
+    for regiao in regioes:
+        clip = fitz.Rect(regiao)
+        pix = display_list.get_pixmap(matrix=mat, clip=clip, colorspace=fitz.csGRAY)
+        gray = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.stride).copy()
+        for mascara in mascaras:
+            area = fitz.Rect(mascara) & clip
+            if not area.is_empty:
+                # Coordenadas da página transformada -> índices do pixmap
+                ir = (area * mat).irect & pix.irect
+                gray[ir.y0 - pix.y:ir.y1 - pix.y, ir.x0 - pix.x:ir.x1 - pix.x] = 255
+        img = Image.fromarray(gray[:, :pix.width])
+        partes.append(pytesseract.image_to_string(img, lang=_OCR_LANG, config=_OCR_CONFIG))
+    return "\n".join(partes)
+
+
+def ocr_pagina(pdf_path: str, page_index: int, regioes: list[Rect], mascaras: list[Rect], dpi: int) -> str:
+    """Tarefa do pool: abre o PDF no processo filho e faz o OCR de uma página."""
+    import fitz  # type: ignore
+
+    with fitz.open(pdf_path) as doc:
+        return _ocr_regioes(doc[page_index], regioes, mascaras, dpi)
+
+
+# ── Pool de processos do OCR ────────────────────────────────────────────────
+#
+# O Tesseract é CPU-bound: páginas em paralelo, cada uma num processo. O pool é
+# mantido entre requests (criar processos custa mais que o OCR de uma folha).
+
+# Nome do pool compartilhado (app.services.process_pool), também usado pelo lote
+POOL = "civil"
+
+
+def _init_ocr_worker() -> None:
+    # Um Tesseract por processo: sem isso cada um abre threads OpenMP por núcleo
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """Pool de processos do Quantitativo Civil (OCR das folhas e desenhos do lote).
+
+    Dimensionado pela configuração (o maior entre ``CIVIL_OCR_WORKERS`` e
+    ``CIVIL_BATCH_WORKERS``), não pelo request: cada chamador limita os seus
+    envios.
+    """
+    workers = max(
+        process_pool.resolve_workers(None, settings.CIVIL_OCR_WORKERS),
+        process_pool.resolve_workers(None, settings.CIVIL_BATCH_WORKERS),
+    )
+    return process_pool.get_pool(POOL, workers, initializer=_init_ocr_worker)
+
+
 class PDFExtractor:
     """Extrai geometria de fundação de PDFs de desenhos técnicos Petrobras.
 
-    Estratégia em quatro camadas:
+    Estratégia em quatro camadas, sobre um único ``_DocumentoPDF`` aberto:
     1. pdfplumber / PyMuPDF — texto nativo
     2. PyMuPDF words — anotações de elevação
-    3. OCR (pytesseract) — texto nas vistas gráficas
+    3. OCR (pytesseract) — texto nas vistas gráficas, só nas regiões sem texto
+       nativo e com uma página por processo
     4. Análise vetorial — círculos nos caminhos vetoriais
     """
 
@@ -51,33 +429,38 @@ class PDFExtractor:
     def __init__(self, config: ConfigProjeto) -> None:
         self.config = config
 
-    def extract(self, pdf_path: Path) -> GeometriaExtraida:
-        logger.info("[1/4] Texto nativo (pdfplumber): %s", pdf_path.name)
-        text = self._extract_text_pdfplumber(pdf_path)
-        if len(text) < self.config.threshold_texto_pdf:
-            text = self._extract_text_pymupdf(pdf_path)
-
-        logger.info("[2/4] Elevações via PyMuPDF words")
-        el_text = self._extract_elevacoes_pymupdf(pdf_path)
-        if el_text:
-            text = text + "\n" + el_text
-
-        if "ESTACA" not in text.upper() or len(text) < 500:
-            logger.info("[3/4] OCR — anotações gráficas não encontradas no texto nativo")
-            ocr = self._extract_text_ocr(pdf_path)
-            if ocr:
-                text = text + "\n" + ocr
-        else:
-            logger.info("[3/4] OCR — pulado (texto nativo suficiente)")
-
-        if len(text) < self.config.threshold_texto_pdf:
-            raise ExtractionError(
-                f"O PDF '{pdf_path.name}' não contém texto suficiente ({len(text)} chars)."
-            )
+    def extract(self, pdf_path: Path, max_workers: Optional[int] = None) -> GeometriaExtraida:
+        """Extrai a geometria abrindo o PDF uma única vez para as quatro camadas.
+
+        ``max_workers`` limita os processos do OCR (padrão: ``CIVIL_OCR_WORKERS``).
+        """
+        with _DocumentoPDF(pdf_path) as pdf:
+            logger.info("[1/4] Texto nativo (pdfplumber): %s", pdf_path.name)
+            text = self._extract_text_pdfplumber(pdf)
+            if len(text) < self.config.threshold_texto_pdf:
+                text = self._extract_text_pymupdf(pdf)
+
+            logger.info("[2/4] Elevações via PyMuPDF words")
+            el_text = self._extract_elevacoes_pymupdf(pdf)
+            if el_text:
+                text = text + "\n" + el_text
+
+            if "ESTACA" not in text.upper() or len(text) < 500:
+                logger.info("[3/4] OCR — anotações gráficas não encontradas no texto nativo")
+                ocr = self._extract_text_ocr(pdf, max_workers)
+                if ocr:
+                    text = text + "\n" + ocr
+            else:
+                logger.info("[3/4] OCR — pulado (texto nativo suficiente)")
+
+            if len(text) < self.config.threshold_texto_pdf:
+                raise ExtractionError(
+                    f"O PDF '{pdf_path.name}' não contém texto suficiente ({len(text)} chars)."
+                )
 
-        logger.info("[4/4] Raios via caminhos vetoriais (círculos)")
-        scale = self._extract_scale_from_text(text)
-        vector_radii = self._extract_circles_from_vectors(pdf_path, scale)
+            logger.info("[4/4] Raios via caminhos vetoriais (círculos)")
+            scale = self._extract_scale_from_text(text)
+            vector_radii = self._extract_circles_from_vectors(pdf, scale)
 
         geo = self._parse_text(text, pdf_path.stem)
         self._patch_radii_from_vectors(geo, vector_radii)
@@ -111,12 +494,12 @@ class PDFExtractor:
             except Exception as exc:
                 logger.warning("Não foi possível setar %s.%s = %s: %s", nome_elem, campo, valor, exc)
 
-    def _extract_text_pdfplumber(self, pdf_path: Path) -> str:
+    def _extract_text_pdfplumber(self, pdf: _DocumentoPDF) -> str:
         try:
             import pdfplumber  # type: ignore
-            with pdfplumber.open(pdf_path) as pdf:
+            with pdfplumber.open(io.BytesIO(pdf.data)) as doc:
                 partes: list[str] = []
-                for page in pdf.pages:
+                for page in doc.pages:
                     texto = page.extract_text()
                     if texto:
                         partes.append(texto)
@@ -125,26 +508,18 @@ class PDFExtractor:
             logger.warning("pdfplumber falhou: %s", exc)
             return ""
 
-    def _extract_text_pymupdf(self, pdf_path: Path) -> str:
+    def _extract_text_pymupdf(self, pdf: _DocumentoPDF) -> str:
         try:
-            import fitz  # type: ignore
-            doc = fitz.open(str(pdf_path))
-            partes: list[str] = []
-            for page in doc:
-                partes.append(page.get_text())
-            doc.close()
-            return "\n".join(partes)
+            return "\n".join(pdf.text(i) for i in range(pdf.page_count))
         except Exception as exc:
             logger.warning("PyMuPDF falhou: %s", exc)
             return ""
 
-    def _extract_elevacoes_pymupdf(self, pdf_path: Path) -> str:
+    def _extract_elevacoes_pymupdf(self, pdf: _DocumentoPDF) -> str:
+        if not pdf.page_count:
+            return ""
         try:
-            import fitz  # type: ignore
-            doc = fitz.open(str(pdf_path))
-            page = doc[0]
-            words = page.get_text("words")
-            doc.close()
+            words = pdf.words(0)
 
             elevacoes: list[str] = []
             for w in words:
@@ -157,27 +532,47 @@ class PDFExtractor:
             logger.warning("Extração de elevações PyMuPDF falhou: %s", exc)
             return ""
 
-    def _extract_text_ocr(self, pdf_path: Path) -> str:
+    def _extract_text_ocr(self, pdf: _DocumentoPDF, max_workers: Optional[int] = None) -> str:
+        """OCR só das regiões gráficas sem texto nativo, uma página por processo."""
         try:
-            import fitz  # type: ignore
-            import pytesseract  # type: ignore
-            from PIL import Image  # type: ignore
-
-            doc = fitz.open(str(pdf_path))
-            partes: list[str] = []
-            for page in doc:
-                mat = fitz.Matrix(300 / 72, 300 / 72)
-                pix = page.get_pixmap(matrix=mat, colorspace=fitz.csGRAY)
-                img = Image.frombytes("L", [pix.width, pix.height], pix.samples)
-                ocr_text = pytesseract.image_to_string(
-                    img, lang="por+eng", config="--psm 11 --oem 3"
-                )
-                partes.append(ocr_text)
-            doc.close()
-            return "\n".join(partes)
+            import pytesseract  # type: ignore  # noqa: F401
+            from PIL import Image  # type: ignore  # noqa: F401
         except ImportError:
             logger.warning("pytesseract ou Pillow não instalado; OCR desativado")
             return ""
+
+        try:
+            paginas: list[tuple[int, list[Rect], list[Rect]]] = []
+            for i in range(pdf.page_count):
+                page = pdf.page(i)
+                mascaras = pdf.text_rects(i)
+                imagens = [tuple(info["bbox"]) for info in page.get_image_info()]
+                regioes = _regioes_graficas(tuple(page.rect), pdf.drawing_rects(i), imagens, mascaras)
+                if regioes:
+                    paginas.append((i, regioes, mascaras))
+            if not paginas:
+                logger.info("OCR — nenhuma região gráfica sem texto nativo")
+                return ""
+            logger.info(
+                "OCR — %d região(ões) em %d de %d página(s)",
+                sum(len(r) for _, r, _ in paginas), len(paginas), pdf.page_count,
+            )
+
+            workers = min(process_pool.resolve_workers(max_workers, settings.CIVIL_OCR_WORKERS), len(paginas))
+            if workers <= 1:
+                partes = [_ocr_regioes(pdf.page(i), regioes, mascaras, OCR_DPI) for i, regioes, mascaras in paginas]
+            else:
+                pool = get_pool()
+                try:
+                    partes = process_pool.map_bounded(
+                        pool, ocr_pagina,
+                        ((str(pdf.path), i, regioes, mascaras, OCR_DPI) for i, regioes, mascaras in paginas),
+                        workers,
+                    )
+                except BrokenProcessPool:
+                    process_pool.discard_pool(POOL, pool)
+                    raise
+            return "\n".join(partes)
         except Exception as exc:
             logger.warning("OCR falhou: %s", exc)
             return ""
@@ -186,57 +581,26 @@ class PDFExtractor:
         m = re.search(r'1\s*:\s*(\d+)', text)
         return int(m.group(1)) if m else 50
 
-    def _extract_circles_from_vectors(self, pdf_path: Path, scale: int) -> dict[str, float]:
+    def _extract_circles_from_vectors(self, pdf: _DocumentoPDF, scale: int) -> dict[str, float]:
+        if not pdf.page_count:
+            return {}
         try:
-            import fitz  # type: ignore
-
             pt_to_m = scale * _PT_TO_M_BASE
 
-            doc = fitz.open(str(pdf_path))
-            page = doc[0]
-            drawings = page.get_drawings()
-            doc.close()
-
-            radii_m: list[float] = []
-            for d in drawings:
-                r = d["rect"]
-                w = r.width
-                h = r.height
-                if w < 10 or h < 10:
-                    continue
-                if abs(w - h) / max(w, h) > _CIRCLE_SQUARENESS:
-                    continue
-                radius_m = round(w / 2 * pt_to_m, 4)
-                radii_m.append(radius_m)
-
-            radii_unique = self._dedup_radii(radii_m, tol=0.01)
-            radii_unique.sort(reverse=True)
+            radii_unique = _agrupar_raios(_raios_circulos(pdf.drawing_rects(0), pt_to_m), tol=0.01)
 
             result: dict[str, float] = {}
 
-            for r in radii_unique:
-                if _R_BASE_MIN <= r <= _R_BASE_MAX:
-                    result["r_base"] = r
-                    break
+            base = radii_unique[(radii_unique >= _R_BASE_MIN) & (radii_unique <= _R_BASE_MAX)]
+            if len(base):
+                result["r_base"] = float(base[-1])
 
-            poco_candidatos = sorted(
-                [r for r in radii_unique if _R_POCO_MIN <= r <= _R_POCO_MAX]
-            )
-            anel_encontrado = False
-            esp = self.config.esp_parede_poco
-            for i in range(len(poco_candidatos) - 1, 0, -1):
-                for j in range(i - 1, -1, -1):
-                    diff = poco_candidatos[i] - poco_candidatos[j]
-                    if 0.05 <= diff <= 0.30:
-                        result["r_ext_parede"] = poco_candidatos[i]
-                        result["r_poco"] = poco_candidatos[j]
-                        anel_encontrado = True
-                        break
-                if anel_encontrado:
-                    break
-
-            if not anel_encontrado and poco_candidatos:
-                result["r_poco"] = poco_candidatos[0]
+            poco_candidatos = radii_unique[(radii_unique >= _R_POCO_MIN) & (radii_unique <= _R_POCO_MAX)]
+            anel = _par_anel(poco_candidatos)
+            if anel is not None:
+                result["r_ext_parede"], result["r_poco"] = anel
+            elif len(poco_candidatos):
+                result["r_poco"] = float(poco_candidatos[0])
 
             return result
 
@@ -246,14 +610,7 @@ class PDFExtractor:
 
     @staticmethod
     def _dedup_radii(radii: list[float], tol: float = 0.01) -> list[float]:
-        if not radii:
-            return []
-        sorted_r = sorted(radii)
-        unique: list[float] = [sorted_r[0]]
-        for r in sorted_r[1:]:
-            if abs(r - unique[-1]) > tol:
-                unique.append(r)
-        return unique
+        return _agrupar_raios(np.asarray(radii, dtype=np.float64), tol).tolist()
 
     def _patch_radii_from_vectors(self, geo: GeometriaExtraida, vector_radii: dict[str, float]) -> None:
         if not vector_radii:
@@ -0,0 +1,59 @@
+"""Persistent cache of AI explanations for PDF review comments.
+
+The same review package is often uploaded again (a new export, a colleague
+checking it the next day). Each explanation is stored in a small SQLite file
+under ``DATA_DIR`` keyed by a hash of the normalized (document_number,
+annotation_type, comment, marked_text) and the prompt version, so a re-upload
+is answered without calling the model.
+
+Storage, expiry and LRU eviction are those of
+:class:`app.services.sqlite_cache.SQLiteTextCache`.
+"""
+
+from typing import Optional
+
+from app.config import settings
+from app.services.disk_cache import cache_key
+from app.services.sqlite_cache import SQLiteTextCache
+
+
+def _normalize(text: str) -> str:
+    return " ".join((text or "").split()).casefold()
+
+
+def comment_key(
+    prompt_version: str,
+    document_number: str,
+    annotation_type: str,
+    comment: str,
+    marked_text: str,
+) -> str:
+    return cache_key(
+        "comment-ai", prompt_version, _normalize(document_number), annotation_type,
+        _normalize(comment), _normalize(marked_text),
+    )
+
+
+class CommentAnalysisCache(SQLiteTextCache):
+    """Explanation text per comment."""
+
+    def __init__(self, path: str, ttl_seconds: float, max_bytes: int):
+        super().__init__(
+            path, ttl_seconds, max_bytes,
+            table="explanations", key_func=comment_key, value_column="analysis",
+            label="Cache de análises IA",
+        )
+
+
+_cache: Optional[CommentAnalysisCache] = None
+
+
+def get_comment_cache() -> CommentAnalysisCache:
+    global _cache
+    if _cache is None:
+        _cache = CommentAnalysisCache(
+            settings.COMMENTS_AI_CACHE_PATH,
+            settings.COMMENTS_AI_CACHE_TTL_DAYS * 86400,
+            settings.COMMENTS_AI_CACHE_MAX_MB * 1024 * 1024,
+        )
+    return _cache
@@ -1,5 +1,9 @@
+import asyncio
 import logging
-from typing import List, Dict, Generator, Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncGenerator, List, Dict, Optional
 from langchain_openai import ChatOpenAI
 from app.config import settings
 from app.services.email.email_vector_store import get_email_vector_store_service
@@ -28,17 +32,39 @@ EMAIL_SYSTEM_PROMPT_WITH_HISTORY = (
 )
 
 
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Threads para busca, embedding da pergunta e rerank (CPU), fora do event loop.
+
+    Limitado a ``EMAIL_RAG_WORKERS``: perguntas além disso esperam na fila em
+    vez de disputar CPU com todas as outras.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=max(1, settings.EMAIL_RAG_WORKERS),
+                thread_name_prefix="email-rag",
+            )
+        return _executor
+
+
 class EmailRAGService:
     def __init__(self):
         self.llm = ChatOpenAI(
             model="gpt-4o-mini",
             temperature=0,
             openai_api_key=settings.OPENAI_API_KEY,
+            base_url=settings.OPENAI_BASE_URL or None,
         )
         self.streaming_llm = ChatOpenAI(
             model="gpt-4o-mini",
             temperature=0,
             openai_api_key=settings.OPENAI_API_KEY,
+            base_url=settings.OPENAI_BASE_URL or None,
             streaming=True,
         )
 
@@ -49,12 +75,9 @@ class EmailRAGService:
         k_initial: int = 40,
         k_final: int = 7,
     ) -> List:
-        retriever = get_email_vector_store_service().as_retriever(
-            collection_id=collection_id,
-            k=k_initial,
+        initial_docs = get_email_vector_store_service().search(
+            question, collection_id, k=k_initial
         )
-
-        initial_docs = retriever.invoke(question)
         logger.info(f"Retrieved {len(initial_docs)} email chunks")
 
         if not initial_docs:
@@ -99,19 +122,9 @@ class EmailRAGService:
             )
         return "\n".join(parts)
 
-    def stream_answer(
-        self,
-        question: str,
-        collection_id: str,
-        chat_history: Optional[List[Dict]] = None,
-    ) -> Generator[str, None, None]:
-        logger.info(f"Email RAG streaming: '{question[:50]}...'")
-
-        docs = self._retrieve_and_rerank(question, collection_id)
-        if not docs:
-            yield "Não encontrei emails relevantes para responder sua pergunta."
-            return
-
+    def _build_messages(
+        self, question: str, docs: List, chat_history: Optional[List[Dict]]
+    ) -> List[Dict]:
         context = self._build_context(docs)
         has_history = bool(chat_history and len(chat_history) > 0)
 
@@ -124,20 +137,58 @@ class EmailRAGService:
 
         system += f"\n\nContexto dos Emails:\n{context}"
 
-        messages = [
+        return [
             {"role": "system", "content": system},
             {"role": "user", "content": question},
         ]
 
+    async def astream_answer(
+        self,
+        question: str,
+        collection_id: str,
+        chat_history: Optional[List[Dict]] = None,
+        timings: Optional[Dict[str, float]] = None,
+    ) -> AsyncGenerator[str, None]:
+        """Resposta em streaming sem bloquear o event loop.
+
+        Busca e rerank rodam no executor limitado; o LLM é consumido pelo
+        cliente assíncrono. ``timings`` (se passado) recebe, em ms desde o
+        início: ``retrieval_ms``, ``ttft_ms`` (primeiro token) e ``total_ms``.
+        """
+        logger.info(f"Email RAG streaming: '{question[:50]}...'")
+        timings = timings if timings is not None else {}
+        started = time.perf_counter()
+
+        def elapsed_ms() -> float:
+            return round((time.perf_counter() - started) * 1000, 1)
+
+        loop = asyncio.get_running_loop()
+        docs = await loop.run_in_executor(
+            _get_executor(), self._retrieve_and_rerank, question, collection_id
+        )
+        timings["retrieval_ms"] = elapsed_ms()
+        if not docs:
+            timings["ttft_ms"] = timings["total_ms"] = elapsed_ms()
+            yield "Não encontrei emails relevantes para responder sua pergunta."
+            return
+
+        messages = self._build_messages(question, docs, chat_history)
+
         try:
-            for chunk in self.streaming_llm.stream(messages):
+            async for chunk in self.streaming_llm.astream(messages):
                 if chunk.content:
+                    if "ttft_ms" not in timings:
+                        timings["ttft_ms"] = elapsed_ms()
                     yield chunk.content
         except Exception as e:
             logger.error(f"Streaming error: {e}", exc_info=True)
             yield f"\n\n[Erro ao gerar resposta: {str(e)}]"
 
-        logger.info("Email RAG streaming completed")
+        timings["total_ms"] = elapsed_ms()
+        logger.info(
+            f"Email RAG streaming completed: busca {timings['retrieval_ms']} ms, "
+            f"primeiro token {timings.get('ttft_ms')} ms, total {timings['total_ms']} ms"
+        )
 
     def get_answer(
         self,
@@ -151,24 +202,7 @@ class EmailRAGService:
         if not docs:
             return "Não encontrei emails relevantes para responder sua pergunta."
 
-        context = self._build_context(docs)
-        has_history = bool(chat_history and len(chat_history) > 0)
-
-        if has_history:
-            system = EMAIL_SYSTEM_PROMPT_WITH_HISTORY.replace(
-                "{history}", self._format_history(chat_history)
-            )
-        else:
-            system = EMAIL_SYSTEM_PROMPT
-
-        system += f"\n\nContexto dos Emails:\n{context}"
-
-        messages = [
-            {"role": "system", "content": system},
-            {"role": "user", "content": question},
-        ]
-
-        response = self.llm.invoke(messages)
+        response = self.llm.invoke(self._build_messages(question, docs, chat_history))
         return response.content
 
 
@@ -1,17 +1,23 @@
+import asyncio
 import json
 import logging
-from datetime import datetime, timedelta
-from typing import Set
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence, Set, Tuple
 from bs4 import BeautifulSoup
+from langchain_core.documents import Document
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+from app.config import settings
 from app.models.email_models import (
     EmailAccount,
     EmailMessage,
     EmailSyncJob,
     EmailSyncStatus,
     EmailAccountStatus,
+    generate_uuid,
 )
 from app.models.rag_models import Collection
 from app.services.email.microsoft_graph import get_graph_service
@@ -19,6 +25,14 @@ from app.services.email.email_vector_store import get_email_vector_store_service
 
 logger = logging.getLogger(__name__)
 
+# Janelas paralelas menores que isso não compensam o request extra
+_MIN_WINDOW = timedelta(days=7)
+# Folga abaixo da marca d'água: mensagens com receivedDateTime anterior à
+# última sincronização mas entregues depois dela
+_WATERMARK_SKEW = timedelta(minutes=15)
+# Limite de parâmetros por consulta do SQLite (999)
+_QUERY_CHUNK = 500
+
 email_text_splitter = RecursiveCharacterTextSplitter(
     chunk_size=1500,
     chunk_overlap=200,
@@ -57,7 +71,220 @@ def _ensure_token_valid(account: EmailAccount, db: Session) -> str:
         raise Exception(f"Falha ao renovar token: {e}")
 
 
-async def sync_emails(account_id: str, period_months: int, db: Session) -> EmailSyncJob:
+def _time_windows(since: datetime, until: datetime, count: int) -> List[Tuple[datetime, datetime]]:
+    """Divide ``[since, until)`` em até ``count`` janelas consecutivas, a mais recente primeiro.
+
+    O ``@odata.nextLink`` só anda uma página por vez; janelas de datas
+    independentes deixam o Graph paginar várias em paralelo. Intervalos
+    curtos (uma sincronização incremental) ficam numa janela só.
+    """
+    count = max(1, min(count, int((until - since) / _MIN_WINDOW)))
+    step = (until - since) / count
+    bounds = [since + step * i for i in range(count)] + [until]
+    return [(bounds[i], bounds[i + 1]) for i in reversed(range(count))]
+
+
+def _sync_ranges(account: EmailAccount, since: datetime, until: datetime) -> List[Tuple[datetime, datetime]]:
+    """Intervalos de ``receivedDateTime`` que ainda precisam ser buscados.
+
+    Já coberto: ``[synced_since, sync_watermark]``. Busca o que é mais novo
+    que a marca (com ``_WATERMARK_SKEW`` de folga para entregas atrasadas) e,
+    se o período pedido aumentou, o trecho mais antigo que faltava.
+    """
+    if account.sync_watermark is None or account.synced_since is None:
+        return [(since, until)]
+    ranges = [(max(since, account.sync_watermark - _WATERMARK_SKEW), until)]
+    if since < account.synced_since:
+        ranges.append((since, account.synced_since))
+    return ranges
+
+
+def _received_at(msg: Dict) -> Optional[datetime]:
+    """``receivedDateTime`` do Graph como datetime UTC sem fuso (como ``utcnow``)."""
+    value = msg.get("receivedDateTime")
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _known_ids(db: Session, message_ids: List[str]) -> Set[str]:
+    """IDs desta lista que já estão no banco (consulta pelo índice único)."""
+    found: Set[str] = set()
+    for start in range(0, len(message_ids), _QUERY_CHUNK):
+        chunk = message_ids[start:start + _QUERY_CHUNK]
+        found.update(
+            row[0]
+            for row in db.query(EmailMessage.microsoft_message_id)
+            .filter(EmailMessage.microsoft_message_id.in_(chunk))
+        )
+    return found
+
+
+def _prepare_message(
+    msg: Dict, account_id: str, collection_id: str, message_id: Optional[str] = None
+) -> Tuple[Dict, List[Document]]:
+    """Linha de ``EmailMessage`` e chunks do vector store para uma mensagem do Graph.
+
+    ``message_id`` reaproveita o id de uma linha já gravada (retomada). Cada
+    chunk recebe o id ``<id da mensagem>:<n>``, então indexar de novo
+    substitui os chunks em vez de duplicá-los. Uma mensagem sem texto para
+    indexar não gera chunks e a linha já sai com ``is_indexed=True``.
+    """
+    subject = msg.get("subject", "(Sem assunto)")
+    sender = msg.get("from", {}).get("emailAddress", {})
+    sender_name = sender.get("name", "")
+    sender_email = sender.get("address", "")
+    recipients = [
+        {
+            "name": r.get("emailAddress", {}).get("name", ""),
+            "email": r.get("emailAddress", {}).get("address", ""),
+        }
+        for r in msg.get("toRecipients", [])
+    ]
+    received_at_str = msg.get("receivedDateTime", "")
+    received_at = (
+        datetime.fromisoformat(received_at_str.replace("Z", "+00:00"))
+        if received_at_str
+        else None
+    )
+
+    body_html = msg.get("body", {}).get("content", "")
+    body_text = strip_html(body_html)
+    body_preview = msg.get("bodyPreview", "")[:200]
+
+    row = {
+        "id": message_id or generate_uuid(),
+        "account_id": account_id,
+        "microsoft_message_id": msg["id"],
+        "subject": subject,
+        "sender_name": sender_name,
+        "sender_email": sender_email,
+        "recipients": json.dumps(recipients),
+        "received_at": received_at,
+        "body_preview": body_preview,
+        "is_indexed": False,
+        "created_at": datetime.utcnow(),
+    }
+
+    # Montar texto com header do email
+    recipients_str = ", ".join(r["email"] for r in recipients if r["email"])
+    date_str = received_at.strftime("%d/%m/%Y %H:%M") if received_at else "N/A"
+    email_header = (
+        f"Assunto: {subject}\n"
+        f"De: {sender_name} <{sender_email}>\n"
+        f"Para: {recipients_str}\n"
+        f"Data: {date_str}\n"
+        f"---\n"
+    )
+    full_text = email_header + body_text
+
+    if len(full_text.strip()) < 30:
+        # Nada a indexar: marcada como tratada para a retomada não voltar a ela
+        row["is_indexed"] = True
+        return row, []
+
+    chunks = email_text_splitter.create_documents(
+        texts=[full_text],
+        metadatas=[
+            {
+                "document_id": row["id"],
+                "collection_id": collection_id,
+                "source_type": "email",
+                "filename": f"Email: {subject}",
+                "page_number": 1,
+                "email_subject": subject,
+                "email_sender": f"{sender_name} <{sender_email}>",
+                "email_date": received_at.isoformat() if received_at else "",
+            }
+        ],
+    )
+    for index, chunk in enumerate(chunks):
+        chunk.id = f"{row['id']}:{index}"
+    return row, chunks
+
+
+def _prepare_page(
+    messages: List[Dict], account_id: str, collection_id: str
+) -> Tuple[List[Dict], List[Document], int]:
+    """Prepara uma página (HTML → texto, chunks). Retorna linhas, chunks e falhas."""
+    rows: List[Dict] = []
+    chunks: List[Document] = []
+    failed = 0
+    for msg in messages:
+        try:
+            row, msg_chunks = _prepare_message(msg, account_id, collection_id)
+        except Exception as e:
+            logger.error(f"Erro ao processar email {msg.get('id')}: {e}")
+            failed += 1
+            continue
+        rows.append(row)
+        chunks.extend(msg_chunks)
+    return rows, chunks, failed
+
+
+def _persist_chunks(
+    db: Session, vector_store, chunks: List[Document], empty_ids: Sequence[str] = ()
+) -> int:
+    """Embeda e grava os chunks em lotes fixos; só então marca as mensagens como indexadas.
+
+    ``empty_ids`` são mensagens sem nada a indexar, marcadas junto. Retorna o
+    número de mensagens com chunks gravados. Se o processo cair antes, as
+    mensagens continuam com ``is_indexed=False`` e :func:`resume_indexing`
+    as retoma.
+    """
+    batch_size = max(1, settings.EMAIL_EMBED_BATCH_SIZE)
+    for start in range(0, len(chunks), batch_size):
+        batch = chunks[start:start + batch_size]
+        vector_store.add_documents(batch, ids=[chunk.id for chunk in batch])
+
+    message_ids = list(dict.fromkeys(chunk.metadata["document_id"] for chunk in chunks))
+    handled = message_ids + list(empty_ids)
+    for start in range(0, len(handled), _QUERY_CHUNK):
+        db.query(EmailMessage).filter(
+            EmailMessage.id.in_(handled[start:start + _QUERY_CHUNK])
+        ).update({EmailMessage.is_indexed: True}, synchronize_session=False)
+    db.commit()
+    return len(message_ids)
+
+
+def _drop_messages(db: Session, message_ids: List[str]) -> None:
+    """Remove as linhas de mensagens que não existem mais na caixa."""
+    for start in range(0, len(message_ids), _QUERY_CHUNK):
+        db.query(EmailMessage).filter(
+            EmailMessage.id.in_(message_ids[start:start + _QUERY_CHUNK])
+        ).delete(synchronize_session=False)
+    db.commit()
+
+
+def _store_batch(db: Session, vector_store, rows: List[Dict], chunks: List[Document]) -> int:
+    """Grava um lote de mensagens (um commit) e depois indexa os chunks delas."""
+    if rows:
+        db.execute(insert(EmailMessage), rows)
+        db.commit()
+    return _persist_chunks(db, vector_store, chunks)
+
+
+async def sync_emails(
+    account_id: str,
+    period_months: int,
+    db: Session,
+    vector_store=None,
+) -> EmailSyncJob:
+    """Busca as mensagens do período no Graph, grava as novas e indexa no vector store.
+
+    Janelas de datas são paginadas em paralelo (um cliente HTTP com pool de
+    conexões) e entregam as páginas numa fila limitada; o consumidor prepara
+    cada página numa thread e grava as mensagens em lotes de
+    ``EMAIL_SYNC_BATCH_SIZE`` linhas, um commit por lote. Os chunks de cada
+    lote são embedados e gravados logo em seguida, em lotes de
+    ``EMAIL_EMBED_BATCH_SIZE``, e só então as mensagens ficam
+    ``is_indexed=True``. Mensagens que falham no preparo não são gravadas e
+    entram em ``failed_emails``. Os contadores do job são atualizados junto
+    com cada lote ou a cada ``EMAIL_SYNC_PROGRESS_SECONDS``.
+    """
     account = db.query(EmailAccount).filter(EmailAccount.id == account_id).first()
     if not account:
         raise Exception("Conta não encontrada")
@@ -85,129 +312,126 @@ async def sync_emails(account_id: str, period_months: int, db: Session) -> Email
             db.refresh(collection)
             account.collection_id = collection.id
             db.commit()
+        collection_id = account.collection_id
 
-        # IDs existentes para dedup
-        existing_ids: Set[str] = set(
-            row[0]
-            for row in db.query(EmailMessage.microsoft_message_id)
-            .filter(EmailMessage.account_id == account_id)
-            .all()
-        )
-
-        # Fetch emails do Graph API
-        since_date = datetime.utcnow() - timedelta(days=period_months * 30)
+        now = datetime.utcnow()
+        since_date = now - timedelta(days=period_months * 30)
+        # Folga para mensagens que chegam durante a sincronização
+        until_date = now + timedelta(minutes=5)
+        windows = [
+            window
+            for start, end in _sync_ranges(account, since_date, until_date)
+            for window in _time_windows(start, end, settings.EMAIL_SYNC_FETCH_CONCURRENCY)
+        ]
         graph = get_graph_service()
-        next_link = None
-        all_new_messages = []
-
-        while True:
-            result = await graph.get_messages(access_token, since_date, next_link=next_link)
-            messages = result["value"]
+        queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, settings.EMAIL_SYNC_QUEUE_PAGES))
+        done = object()
 
-            for msg in messages:
-                if msg["id"] not in existing_ids:
-                    all_new_messages.append(msg)
+        async def fetch_window(client, start: datetime, end: datetime) -> None:
+            next_link = None
+            while True:
+                result = await graph.get_messages(
+                    access_token, start, next_link=next_link, top=settings.EMAIL_SYNC_PAGE_SIZE,
+                    until_date=end, client=client,
+                )
+                if result["value"]:
+                    await queue.put(result["value"])
+                next_link = result.get("next_link")
+                if not next_link or not result["value"]:
+                    break
 
-            next_link = result.get("next_link")
-            if not next_link or not messages:
-                break
+        async def fetch_all() -> None:
+            try:
+                async with graph.open_client() as client:
+                    async with asyncio.TaskGroup() as group:
+                        for start, end in windows:
+                            group.create_task(fetch_window(client, start, end))
+            except BaseException as e:
+                # A sincronização vai falhar: descarta as páginas na fila para o
+                # aviso de fim caber sem bloquear
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(done)
+                if isinstance(e, BaseExceptionGroup):
+                    raise e.exceptions[0] from None
+                raise
+            await queue.put(done)
 
-        job.total_emails = len(all_new_messages)
-        db.commit()
-        logger.info(f"Encontrados {len(all_new_messages)} emails novos para indexar")
+        store = vector_store or get_email_vector_store_service()
+        counters = {"total": 0, "processed": 0, "indexed": 0, "failed": 0}
+        seen_ids: Set[str] = set()
+        newest: Optional[datetime] = account.sync_watermark
+        pending_rows: List[Dict] = []
+        pending_chunks: List[Document] = []
+        last_progress = time.monotonic()
 
-        # Processar e indexar
-        vector_chunks = []
-        for msg in all_new_messages:
-            try:
-                subject = msg.get("subject", "(Sem assunto)")
-                sender = msg.get("from", {}).get("emailAddress", {})
-                sender_name = sender.get("name", "")
-                sender_email = sender.get("address", "")
-                recipients = [
-                    {
-                        "name": r.get("emailAddress", {}).get("name", ""),
-                        "email": r.get("emailAddress", {}).get("address", ""),
-                    }
-                    for r in msg.get("toRecipients", [])
-                ]
-                received_at_str = msg.get("receivedDateTime", "")
-                received_at = (
-                    datetime.fromisoformat(received_at_str.replace("Z", "+00:00"))
-                    if received_at_str
-                    else None
-                )
+        def save_progress() -> None:
+            nonlocal last_progress
+            job.total_emails = counters["total"]
+            job.processed_emails = counters["processed"]
+            job.indexed_emails = counters["indexed"]
+            job.failed_emails = counters["failed"]
+            db.commit()
+            last_progress = time.monotonic()
 
-                body_html = msg.get("body", {}).get("content", "")
-                body_text = strip_html(body_html)
-                body_preview = msg.get("bodyPreview", "")[:200]
-
-                email_record = EmailMessage(
-                    account_id=account_id,
-                    microsoft_message_id=msg["id"],
-                    subject=subject,
-                    sender_name=sender_name,
-                    sender_email=sender_email,
-                    recipients=json.dumps(recipients),
-                    received_at=received_at,
-                    body_preview=body_preview,
-                    is_indexed=False,
-                )
-                db.add(email_record)
-                db.commit()
-                db.refresh(email_record)
-
-                # Montar texto com header do email
-                recipients_str = ", ".join(r["email"] for r in recipients if r["email"])
-                date_str = received_at.strftime("%d/%m/%Y %H:%M") if received_at else "N/A"
-                email_header = (
-                    f"Assunto: {subject}\n"
-                    f"De: {sender_name} <{sender_email}>\n"
-                    f"Para: {recipients_str}\n"
-                    f"Data: {date_str}\n"
-                    f"---\n"
-                )
-                full_text = email_header + body_text
+        async def flush() -> None:
+            rows, chunks = pending_rows[:], pending_chunks[:]
+            pending_rows.clear()
+            pending_chunks.clear()
+            # Embeddings em CPU: fora do event loop, enquanto as buscas continuam
+            counters["indexed"] += await asyncio.to_thread(_store_batch, db, store, rows, chunks)
+            save_progress()
 
-                if len(full_text.strip()) < 30:
-                    job.processed_emails += 1
-                    db.commit()
+        producer = asyncio.create_task(fetch_all())
+        try:
+            while True:
+                page = await queue.get()
+                if page is done:
+                    break
+                for msg in page:
+                    received_at = _received_at(msg)
+                    if received_at is not None and (newest is None or received_at > newest):
+                        newest = received_at
+                # Dedup: vistos nesta execução (ainda não gravados) e já no banco
+                candidates = [msg for msg in page if msg["id"] not in seen_ids]
+                known = _known_ids(db, [msg["id"] for msg in candidates])
+                new_messages = [msg for msg in candidates if msg["id"] not in known]
+                seen_ids.update(msg["id"] for msg in candidates)
+                if not new_messages:
                     continue
+                counters["total"] += len(new_messages)
 
-                chunks = email_text_splitter.create_documents(
-                    texts=[full_text],
-                    metadatas=[
-                        {
-                            "document_id": email_record.id,
-                            "collection_id": account.collection_id,
-                            "source_type": "email",
-                            "filename": f"Email: {subject}",
-                            "page_number": 1,
-                            "email_subject": subject,
-                            "email_sender": f"{sender_name} <{sender_email}>",
-                            "email_date": received_at.isoformat() if received_at else "",
-                        }
-                    ],
-                )
-                vector_chunks.extend(chunks)
+                # HTML → texto e chunking fora do event loop
+                rows, chunks, failed = await asyncio.to_thread(_prepare_page, new_messages, account_id, collection_id)
+                pending_rows.extend(rows)
+                pending_chunks.extend(chunks)
+                counters["processed"] += len(new_messages)
+                counters["failed"] += failed
 
-                email_record.is_indexed = True
-                job.processed_emails += 1
-                job.indexed_emails += 1
-                db.commit()
+                if len(pending_rows) >= settings.EMAIL_SYNC_BATCH_SIZE:
+                    await flush()
+                elif time.monotonic() - last_progress >= settings.EMAIL_SYNC_PROGRESS_SECONDS:
+                    save_progress()
+        finally:
+            if not producer.done():
+                producer.cancel()
+            # Propaga o erro da busca (se houve) depois de esvaziar a fila
+            try:
+                await producer
+            except asyncio.CancelledError:
+                pass
 
-            except Exception as e:
-                logger.error(f"Erro ao processar email {msg.get('id')}: {e}")
-                job.processed_emails += 1
-                db.commit()
-                continue
+        await flush()
+        logger.info(
+            f"Sincronizados {counters['total']} emails novos, {counters['indexed']} indexados, "
+            f"{counters['failed']} com falha"
+        )
 
-        # Indexar no vector store
-        if vector_chunks:
-            get_email_vector_store_service().add_documents(vector_chunks)
-            logger.info(
-                f"Indexados {len(vector_chunks)} chunks de {job.indexed_emails} emails"
-            )
+        # Só depois de tudo gravado: uma sincronização que falha no meio é
+        # refeita a partir da marca anterior
+        account.sync_watermark = newest
+        if account.synced_since is None or since_date < account.synced_since:
+            account.synced_since = since_date
 
         job.status = EmailSyncStatus.COMPLETED
         job.completed_at = datetime.utcnow()
@@ -215,6 +439,7 @@ async def sync_emails(account_id: str, period_months: int, db: Session) -> Email
 
     except Exception as e:
         logger.error(f"Sync falhou: {e}", exc_info=True)
+        db.rollback()
         job.status = EmailSyncStatus.FAILED
         job.error_message = str(e)
         job.completed_at = datetime.utcnow()
@@ -222,3 +447,126 @@ async def sync_emails(account_id: str, period_months: int, db: Session) -> Email
         raise
 
     return job
+
+
+async def resume_indexing(
+    account_id: str,
+    period_months: int,
+    db: Session,
+    vector_store=None,
+) -> EmailSyncJob:
+    """Indexa as mensagens gravadas que ficaram com ``is_indexed=False``.
+
+    O corpo não fica no banco, então cada mensagem é buscada de novo no Graph
+    (até ``EMAIL_SYNC_FETCH_CONCURRENCY`` em paralelo). Mensagens sem texto
+    para indexar são marcadas como indexadas e as apagadas na caixa são
+    removidas do banco, então uma retomada seguinte não volta a elas; as que
+    falham no preparo continuam pendentes e entram em ``failed_emails``.
+    """
+    account = db.query(EmailAccount).filter(EmailAccount.id == account_id).first()
+    if not account:
+        raise Exception("Conta não encontrada")
+
+    job = EmailSyncJob(
+        account_id=account_id,
+        status=EmailSyncStatus.SYNCING,
+        period_months=period_months,
+        started_at=datetime.utcnow(),
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+
+    try:
+        access_token = _ensure_token_valid(account, db)
+        if not account.collection_id:
+            raise Exception("Nenhum email sincronizado ainda")
+        collection_id = account.collection_id
+        store = vector_store or get_email_vector_store_service()
+        graph = get_graph_service()
+        semaphore = asyncio.Semaphore(max(1, settings.EMAIL_SYNC_FETCH_CONCURRENCY))
+
+        pending = db.query(EmailMessage.id).filter(
+            EmailMessage.account_id == account_id, EmailMessage.is_indexed == False  # noqa: E712
+        )
+        job.total_emails = pending.count()
+        db.commit()
+
+        async with graph.open_client() as client:
+
+            async def fetch(message_id: str, microsoft_id: str) -> Tuple[str, Optional[Dict]]:
+                async with semaphore:
+                    return message_id, await graph.get_message(access_token, microsoft_id, client=client)
+
+            last_id = ""
+            while True:
+                # Paginação por id: cada mensagem é tentada uma vez por retomada
+                batch = (
+                    db.query(EmailMessage.id, EmailMessage.microsoft_message_id)
+                    .filter(
+                        EmailMessage.account_id == account_id,
+                        EmailMessage.is_indexed == False,  # noqa: E712
+                        EmailMessage.id > last_id,
+                    )
+                    .order_by(EmailMessage.id)
+                    .limit(max(1, settings.EMAIL_SYNC_BATCH_SIZE))
+                    .all()
+                )
+                if not batch:
+                    break
+                last_id = batch[-1][0]
+
+                fetched = await asyncio.gather(*(fetch(message_id, ms_id) for message_id, ms_id in batch))
+                chunks, empty_ids, deleted_ids, failed = await asyncio.to_thread(
+                    _prepare_chunks, fetched, account_id, collection_id
+                )
+                job.indexed_emails += await asyncio.to_thread(_persist_chunks, db, store, chunks, empty_ids)
+                if deleted_ids:
+                    await asyncio.to_thread(_drop_messages, db, deleted_ids)
+                job.processed_emails += len(batch)
+                job.failed_emails += failed
+                db.commit()
+
+        job.status = EmailSyncStatus.COMPLETED
+        job.completed_at = datetime.utcnow()
+        db.commit()
+
+    except Exception as e:
+        logger.error(f"Retomada da indexação falhou: {e}", exc_info=True)
+        db.rollback()
+        job.status = EmailSyncStatus.FAILED
+        job.error_message = str(e)
+        job.completed_at = datetime.utcnow()
+        db.commit()
+        raise
+
+    return job
+
+
+def _prepare_chunks(
+    fetched: List[Tuple[str, Optional[Dict]]], account_id: str, collection_id: str
+) -> Tuple[List[Document], List[str], List[str], int]:
+    """Chunks das mensagens buscadas de novo, com os ids das linhas existentes.
+
+    Retorna também os ids das mensagens sem nada a indexar, os das apagadas
+    na caixa (``None`` do Graph) e o número de falhas.
+    """
+    chunks: List[Document] = []
+    empty_ids: List[str] = []
+    deleted_ids: List[str] = []
+    failed = 0
+    for message_id, msg in fetched:
+        if msg is None:
+            deleted_ids.append(message_id)
+            continue
+        try:
+            _, msg_chunks = _prepare_message(msg, account_id, collection_id, message_id=message_id)
+        except Exception as e:
+            logger.error(f"Erro ao processar email {msg.get('id')}: {e}")
+            failed += 1
+            continue
+        if msg_chunks:
+            chunks.extend(msg_chunks)
+        else:
+            empty_ids.append(message_id)
+    return chunks, empty_ids, deleted_ids, failed
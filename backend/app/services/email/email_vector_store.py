@@ -1,12 +1,62 @@
 from langchain_chroma import Chroma
 from app.config import settings
 from app.services.email.local_embedding_service import get_local_embedding_service
-from typing import List
+from typing import List, Optional
 from langchain_core.documents import Document
 import logging
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
+# Peso da relevância no MMR (o mesmo do retriever anterior)
+_MMR_LAMBDA = 0.6
+
+
+def _mmr(query_sims: np.ndarray, pair_sims: np.ndarray, k: int, lambda_mult: float) -> List[int]:
+    """Seleção gulosa de MMR sobre similaridades já calculadas (mesmo critério do LangChain)."""
+    selected = [int(np.argmax(query_sims))]
+    redundancy = pair_sims[selected[0]].copy()
+    available = np.ones(len(query_sims), dtype=bool)
+    available[selected[0]] = False
+    while len(selected) < min(k, len(query_sims)):
+        scores = lambda_mult * query_sims - (1 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, pair_sims[best])
+    return selected
+
+
+def _mmr_keeps_top(query_sims: np.ndarray, pair_sims: np.ndarray, top: np.ndarray, lambda_mult: float) -> bool:
+    """True quando o MMR escolheria exatamente os ``top`` (mudaria só a ordem).
+
+    Vale se o pior escore MMR possível dentro dos ``top`` (redundância = maior
+    similaridade com outro dos ``top``) supera o melhor possível fora deles
+    (redundância ≥ similaridade com o primeiro escolhido, sempre ``top[0]``).
+    """
+    outside = np.ones(len(query_sims), dtype=bool)
+    outside[top] = False
+    if len(top) < 2 or not outside.any():
+        return True
+    top_pairs = pair_sims[np.ix_(top, top)]
+    np.fill_diagonal(top_pairs, -np.inf)
+    worst_inside = np.min(lambda_mult * query_sims[top] - (1 - lambda_mult) * top_pairs.max(axis=1))
+    best_outside = np.max(lambda_mult * query_sims[outside] - (1 - lambda_mult) * pair_sims[outside, top[0]])
+    return bool(worst_inside > best_outside)
+
+
+def _similarities(distances: np.ndarray, space: str) -> np.ndarray:
+    """Distâncias do Chroma → similaridade de cosseno (embeddings normalizados).
+
+    ``cosine`` e ``ip`` guardam ``1 - cos`` e ``1 - produto interno`` (iguais com
+    vetores unitários); ``l2`` guarda a distância ao quadrado, ``2 - 2·cos``.
+    """
+    if space in ("cosine", "ip"):
+        return 1.0 - distances
+    return 1.0 - distances / 2.0
+
 
 class EmailVectorStoreService:
     def __init__(self):
@@ -19,10 +69,11 @@ class EmailVectorStoreService:
             collection_name=settings.EMAIL_CHROMA_COLLECTION,
         )
 
-    def add_documents(self, documents: List[Document]):
+    def add_documents(self, documents: List[Document], ids: Optional[List[str]] = None):
+        """Grava os chunks; com ``ids`` o Chroma faz upsert (reindexar não duplica)."""
         if not documents:
             return
-        self.vector_db.add_documents(documents)
+        self.vector_db.add_documents(documents, ids=ids)
 
     def similarity_search(
         self, query: str, collection_id: str = None, k: int = 4
@@ -39,7 +90,7 @@ class EmailVectorStoreService:
         search_kwargs = {
             "k": k,
             "fetch_k": k * 10,
-            "lambda_mult": 0.6,
+            "lambda_mult": _MMR_LAMBDA,
         }
 
         if collection_id:
@@ -50,6 +101,65 @@ class EmailVectorStoreService:
             search_kwargs=search_kwargs,
         )
 
+    def search(self, query: str, collection_id: str, k: int = 20) -> List[Document]:
+        """Os ``k`` chunks mais relevantes, com pool de candidatos adaptativo.
+
+        O retriever MMR fixo trazia ``10 × k`` candidatos com embeddings e
+        rodava o MMR sobre todos, em qualquer caixa. Aqui uma única consulta
+        traz só as distâncias de até ``EMAIL_RETRIEVAL_MAX_FETCH_FACTOR × k``
+        chunks (a coleção inteira, se for menor); o pool fica com os que
+        pontuam a menos de ``EMAIL_RETRIEVAL_SCORE_MARGIN`` do k-ésimo, no
+        mínimo ``EMAIL_RETRIEVAL_MIN_FETCH_FACTOR × k``, e só esses são lidos
+        com embeddings. O MMR (vetorizado) só roda quando mudaria quais ``k``
+        chunks são escolhidos; se os melhores já são diversos o suficiente,
+        ficam os ``k`` mais similares.
+        """
+        collection = self.vector_db._collection
+        where = {"collection_id": collection_id}
+        query_embedding = np.asarray(self.embedding_function.embed_query(query), dtype=np.float32)
+        query_embedding /= np.linalg.norm(query_embedding) or 1.0
+
+        nearest = collection.query(
+            query_embeddings=[query_embedding.tolist()],
+            n_results=k * max(1, settings.EMAIL_RETRIEVAL_MAX_FETCH_FACTOR),
+            where=where,
+            include=["distances"],
+        )
+        ids = nearest["ids"][0]
+        if not ids:
+            return []
+        sims = _similarities(np.asarray(nearest["distances"][0]), (collection.metadata or {}).get("hnsw:space", "l2"))
+        kth = sims[min(k, len(sims)) - 1]
+        pool_size = max(
+            k * max(1, settings.EMAIL_RETRIEVAL_MIN_FETCH_FACTOR),
+            int(np.count_nonzero(sims >= kth - settings.EMAIL_RETRIEVAL_SCORE_MARGIN)),
+        )
+        pool_ids = ids[:pool_size]
+
+        fetched = collection.get(ids=pool_ids, include=["metadatas", "documents", "embeddings"])
+        position = {chunk_id: i for i, chunk_id in enumerate(fetched["ids"])}
+        rows = [position[chunk_id] for chunk_id in pool_ids if chunk_id in position]
+        embeddings = np.asarray(fetched["embeddings"], dtype=np.float32)[rows]
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True).clip(min=1e-12)
+        query_sims = embeddings @ query_embedding
+
+        top = np.argsort(-query_sims, kind="stable")[:k]
+        pair_sims = embeddings @ embeddings.T
+        # O rerank reordena tudo: se o MMR não muda o conjunto, não precisa rodar
+        mmr = not _mmr_keeps_top(query_sims, pair_sims, top, _MMR_LAMBDA)
+        chosen = _mmr(query_sims, pair_sims, k, _MMR_LAMBDA) if mmr else [int(i) for i in top]
+        logger.info(
+            f"Busca de emails: {len(rows)} de {len(ids)} candidatos, {'com' if mmr else 'sem'} MMR"
+        )
+        return [
+            Document(
+                page_content=fetched["documents"][rows[i]],
+                metadata=fetched["metadatas"][rows[i]] or {},
+                id=fetched["ids"][rows[i]],
+            )
+            for i in chosen
+        ]
+
     def delete_by_collection(self, collection_id: str):
         if not collection_id:
             return
@@ -12,10 +12,17 @@ class LocalEmbeddingService:
     def get_embeddings(self) -> HuggingFaceEmbeddings:
         if self._embeddings is None:
             logger.info(f"Carregando modelo de embeddings local: {settings.EMAIL_EMBEDDING_MODEL}")
+            if settings.EMAIL_EMBED_THREADS > 0:
+                import torch
+
+                torch.set_num_threads(settings.EMAIL_EMBED_THREADS)
             self._embeddings = HuggingFaceEmbeddings(
                 model_name=settings.EMAIL_EMBEDDING_MODEL,
                 model_kwargs={"device": "cpu"},
-                encode_kwargs={"normalize_embeddings": True},
+                encode_kwargs={
+                    "normalize_embeddings": True,
+                    "batch_size": max(1, settings.EMAIL_EMBED_BATCH_SIZE),
+                },
             )
             logger.info("Modelo de embeddings local carregado")
         return self._embeddings
@@ -1,23 +1,46 @@
+import asyncio
 import msal
 import httpx
 import logging
 from datetime import datetime
 from typing import Optional, Dict
+from urllib.parse import quote
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Campos pedidos ao Graph para cada mensagem
+MESSAGE_FIELDS = "id,subject,from,toRecipients,receivedDateTime,body,bodyPreview"
+# Respostas de throttling/indisponibilidade que valem nova tentativa
+_RETRY_STATUS = {429, 503, 504}
+_MAX_ATTEMPTS = 5
+
 
 class MicrosoftGraphService:
     AUTHORITY = f"https://login.microsoftonline.com/{settings.MICROSOFT_TENANT_ID}"
-    GRAPH_BASE = "https://graph.microsoft.com/v1.0"
+    GRAPH_BASE = settings.MICROSOFT_GRAPH_BASE
     SCOPES = settings.MICROSOFT_SCOPES
 
     def __init__(self):
-        self.app = msal.ConfidentialClientApplication(
-            client_id=settings.MICROSOFT_CLIENT_ID,
-            client_credential=settings.MICROSOFT_CLIENT_SECRET,
-            authority=self.AUTHORITY,
+        self._app = None
+
+    @property
+    def app(self) -> msal.ConfidentialClientApplication:
+        # Criado no primeiro uso: o MSAL consulta a authority ao ser instanciado
+        if self._app is None:
+            self._app = msal.ConfidentialClientApplication(
+                client_id=settings.MICROSOFT_CLIENT_ID,
+                client_credential=settings.MICROSOFT_CLIENT_SECRET,
+                authority=self.AUTHORITY,
+            )
+        return self._app
+
+    def open_client(self) -> httpx.AsyncClient:
+        """Cliente com pool de conexões, para reusar em todas as páginas de uma sincronização."""
+        concurrency = max(1, settings.EMAIL_SYNC_FETCH_CONCURRENCY)
+        return httpx.AsyncClient(
+            timeout=httpx.Timeout(60.0, connect=10.0),
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
         )
 
     def get_auth_url(self, state: str = "") -> str:
@@ -65,30 +88,71 @@ class MicrosoftGraphService:
         since_date: datetime,
         next_link: Optional[str] = None,
         top: int = 50,
+        until_date: Optional[datetime] = None,
+        client: Optional[httpx.AsyncClient] = None,
     ) -> Dict:
+        """Uma página de mensagens recebidas em ``[since_date, until_date)``.
+
+        Com ``client`` a conexão do pool é reaproveitada; sem ele, um cliente
+        é aberto só para esta página.
+        """
         if next_link:
             url = next_link
         else:
-            date_filter = since_date.strftime("%Y-%m-%dT%H:%M:%SZ")
+            date_filter = f"receivedDateTime ge {since_date.strftime('%Y-%m-%dT%H:%M:%SZ')}"
+            if until_date is not None:
+                date_filter += f" and receivedDateTime lt {until_date.strftime('%Y-%m-%dT%H:%M:%SZ')}"
             url = (
                 f"{self.GRAPH_BASE}/me/messages"
-                f"?$filter=receivedDateTime ge {date_filter}"
+                f"?$filter={date_filter}"
                 f"&$orderby=receivedDateTime desc"
                 f"&$top={top}"
-                f"&$select=id,subject,from,toRecipients,receivedDateTime,body,bodyPreview"
+                f"&$select={MESSAGE_FIELDS}"
             )
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(
-                url,
-                headers={"Authorization": f"Bearer {access_token}"},
-            )
-            response.raise_for_status()
-            data = response.json()
-            return {
-                "value": data.get("value", []),
-                "next_link": data.get("@odata.nextLink"),
-            }
+        if client is None:
+            async with httpx.AsyncClient(timeout=30.0) as own_client:
+                data = await self._get_json(own_client, url, access_token)
+        else:
+            data = await self._get_json(client, url, access_token)
+        return {
+            "value": data.get("value", []),
+            "next_link": data.get("@odata.nextLink"),
+        }
+
+    async def get_message(
+        self,
+        access_token: str,
+        message_id: str,
+        client: Optional[httpx.AsyncClient] = None,
+    ) -> Optional[Dict]:
+        """Uma mensagem pelo id, com os mesmos campos da listagem; ``None`` se foi apagada."""
+        url = f"{self.GRAPH_BASE}/me/messages/{quote(message_id, safe='')}?$select={MESSAGE_FIELDS}"
+        try:
+            if client is None:
+                async with httpx.AsyncClient(timeout=30.0) as own_client:
+                    return await self._get_json(own_client, url, access_token)
+            return await self._get_json(client, url, access_token)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                return None
+            raise
+
+    async def _get_json(self, client: httpx.AsyncClient, url: str, access_token: str) -> Dict:
+        """GET com novas tentativas em throttling (429) e 503/504, respeitando Retry-After."""
+        attempt = 1
+        while True:
+            response = await client.get(url, headers={"Authorization": f"Bearer {access_token}"})
+            if response.status_code not in _RETRY_STATUS or attempt >= _MAX_ATTEMPTS:
+                response.raise_for_status()
+                return response.json()
+            try:
+                delay = float(response.headers.get("Retry-After", ""))
+            except ValueError:
+                delay = 2.0 ** attempt
+            logger.warning(f"Graph respondeu {response.status_code}; nova tentativa em {delay:.0f}s")
+            await asyncio.sleep(min(delay, 60.0))
+            attempt += 1
 
 
 _graph_service = None
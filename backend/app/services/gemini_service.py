@@ -1,5 +1,17 @@
+import asyncio
+import json
+import logging
+import re
+from typing import Dict, List, Optional, Tuple
+
 import google.generativeai as genai
 from app.config import settings
+from app.services.disk_cache import prompt_version
+from app.services.translation_memory import TranslationMemory, get_translation_memory, glossary_digest
+
+logger = logging.getLogger(__name__)
+
+_MODEL_NAME = "gemini-3.5-flash"
 
 # Mapeamento de códigos de idioma
 LANGUAGE_NAMES = {
@@ -18,11 +30,95 @@ LANGUAGE_NAMES = {
 }
 
 
+_SEGMENT_PROMPT = """You are an expert technical translator.
+Translate each string of the JSON array below from {source} into {target}.
+The strings are consecutive sentences of one document: translate each one on its own,
+keep numbers, units, codes, tags and punctuation, and never merge, split or skip strings.
+{glossary}
+Return JSON: {{"detected_language": "Name of the source language (e.g., Portuguese, English)",
+"translations": [exactly {count} translated strings, in the same order]}}
+
+{segments}"""
+
+# Entra na chave da memória de tradução: mudar o prompt ou o modelo invalida as entradas
+_PROMPT_VERSION = prompt_version(_MODEL_NAME, _SEGMENT_PROMPT)
+
+# Quebra de linha (parágrafo, item de lista, título) sempre separa segmentos
+_LINE_BREAK = re.compile(r"(\s*\n\s*)")
+# Fim de frase: pontuação depois de uma palavra (não "nº." / "a."), espaço, maiúscula
+_SENTENCE_BREAK = re.compile(
+    r"(?:(?<=\w\w[.!?])|(?<=[.!?][\"'”)]))(\s+)(?=[\"'“(\[]?[A-ZÀ-ÖØ-Þ])"
+)
+_LETTER = re.compile(r"[^\W\d_]")
+# Abreviações seguidas de maiúscula que não encerram a frase ("Sr. Silva", "Fig. A")
+_ABBREVIATIONS = {"sr", "sra", "srs", "dr", "dra", "eng", "prof", "fig", "ref", "art", "mr", "mrs", "ms", "st", "no"}
+
+# Limita as chamadas simultâneas ao Gemini no processo todo (todas as requests)
+_translate_limiter = asyncio.Semaphore(max(1, settings.TRANSLATE_CONCURRENCY))
+
+
+def split_segments(text: str) -> List[Tuple[str, bool]]:
+    """Divide o texto em parágrafos/linhas e depois em frases, sem perder nada.
+
+    Retorna ``(trecho, traduzível)`` na ordem original: juntar os trechos
+    devolve o texto exato. Separadores (espaços, quebras de linha) e trechos
+    sem letras (numeração, valores) não são traduzíveis.
+    """
+    pieces: List[Tuple[str, bool]] = []
+    for i, line in enumerate(_LINE_BREAK.split(text)):
+        if i % 2:
+            pieces.append((line, False))
+            continue
+        stripped = line.strip()
+        if not stripped:
+            if line:
+                pieces.append((line, False))
+            continue
+        lead = line[:len(line) - len(line.lstrip())]
+        trail = line[len(line.rstrip()):]
+        if lead:
+            pieces.append((lead, False))
+        sentences = _SENTENCE_BREAK.split(stripped)
+        merged = [sentences[0]]
+        for j in range(1, len(sentences), 2):
+            if merged[-1].rsplit(None, 1)[-1].rstrip(".").casefold() in _ABBREVIATIONS:
+                merged[-1] += sentences[j] + sentences[j + 1]
+            else:
+                merged.extend(sentences[j:j + 2])
+        for j, part in enumerate(merged):
+            pieces.append((part, j % 2 == 0 and bool(_LETTER.search(part))))
+        if trail:
+            pieces.append((trail, False))
+    return pieces
+
+
+def _estimate_tokens(text: str) -> int:
+    # ~4 caracteres por token em textos latinos
+    return len(text) // 4 + 1
+
+
+def _token_batches(segments: List[str], budget: int) -> List[List[int]]:
+    """Índices de ``segments`` em lotes consecutivos de até ``budget`` tokens estimados."""
+    batches: List[List[int]] = []
+    current: List[int] = []
+    used = 0
+    for idx, segment in enumerate(segments):
+        tokens = _estimate_tokens(segment)
+        if current and used + tokens > budget:
+            batches.append(current)
+            current, used = [], 0
+        current.append(idx)
+        used += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
 class GeminiService:
     def __init__(self):
         if settings.GOOGLE_API_KEY:
             genai.configure(api_key=settings.GOOGLE_API_KEY)
-            self.model = genai.GenerativeModel("gemini-3.5-flash")
+            self.model = genai.GenerativeModel(_MODEL_NAME)
         else:
             self.model = None
 
@@ -59,10 +155,8 @@ class GeminiService:
         """
 
         try:
-            response = self.model.generate_content(prompt)
+            response = await asyncio.to_thread(self.model.generate_content, prompt)
             # Parse the JSON response
-            import json
-            
             # Limpeza básica caso o modelo retorne markdown ```json
             clean_text = response.text.strip()
             if clean_text.startswith("```json"):
@@ -96,3 +190,149 @@ class GeminiService:
         except Exception as e:
             print(f"Error processing text: {e}")
             raise e
+
+    async def translate_segments(
+        self,
+        text: str,
+        source_lang: str = "auto",
+        target_lang: str = "en",
+        glossary: Optional[Dict[str, str]] = None,
+        memory: Optional[TranslationMemory] = None,
+    ) -> dict:
+        """Traduz texto longo frase a frase, reaproveitando a memória de tradução.
+
+        O texto é dividido em parágrafos e frases (``split_segments``); cada
+        frase é procurada na memória pela chave (texto normalizado, idiomas,
+        glossário, versão do prompt). Só as que faltam vão ao modelo — frases
+        repetidas uma vez só —, em lotes de até ``TRANSLATE_BATCH_TOKENS``
+        tokens estimados, com no máximo ``TRANSLATE_CONCURRENCY`` requests
+        simultâneos no processo. Um lote cuja resposta não bate com as frases é
+        refeito frase a frase. O texto final é remontado na ordem original, com
+        os separadores originais.
+
+        Returns:
+            ``translated_text``, ``detected_language``, ``improved_text`` (None)
+            e ``segments``: contadores ``total``, ``cached`` (da memória),
+            ``translated`` (enviadas ao modelo após o dedup) e ``requests``.
+        """
+        if not self.model:
+            raise ValueError("Google API Key não configurada")
+
+        memory = memory or get_translation_memory()
+        glossary_key = glossary_digest(glossary)
+        pieces = split_segments(text)
+        keys = {
+            idx: memory.key(_PROMPT_VERSION, piece, source_lang, target_lang, glossary_key)
+            for idx, (piece, translatable) in enumerate(pieces)
+            if translatable
+        }
+        # SQLite fora do event loop
+        translations = await asyncio.to_thread(memory.get_many, keys.values()) if memory.enabled else {}
+        stats = {"total": len(keys), "cached": 0, "translated": 0, "requests": 0}
+        stats["cached"] = sum(1 for key in keys.values() if key in translations)
+
+        # Uma entrada por frase distinta que falta, na ordem do documento
+        missing: Dict[str, str] = {}
+        for idx, key in keys.items():
+            if key not in translations and key not in missing:
+                missing[key] = pieces[idx][0].strip()
+        stats["translated"] = len(missing)
+
+        detected: List[str] = []
+        if missing:
+            missing_keys = list(missing)
+            segments = list(missing.values())
+            prompt_context = {
+                "source": LANGUAGE_NAMES.get(source_lang, source_lang)
+                if source_lang != "auto" else "the source language (detect it)",
+                "target": LANGUAGE_NAMES.get(target_lang, target_lang),
+                "glossary": (
+                    "Glossary (always use these translations):\n"
+                    + "\n".join(f"- {src} → {dst}" for src, dst in glossary.items())
+                    if glossary else ""
+                ),
+            }
+
+            async def _batch(batch: List[int]) -> None:
+                items = [segments[i] for i in batch]
+                result = await self._translate_batch(items, prompt_context, stats)
+                if result is None and len(items) > 1:
+                    singles = await asyncio.gather(
+                        *(self._translate_batch([item], prompt_context, stats) for item in items)
+                    )
+                    if all(singles):
+                        result = (
+                            [single[0][0] for single in singles],
+                            [lang for single in singles for lang in single[1]],
+                        )
+                if result is None:
+                    raise ValueError("Resposta inválida do modelo na tradução por segmentos")
+                for i, translated in zip(batch, result[0]):
+                    translations[missing_keys[i]] = translated
+                detected.extend(result[1])
+
+            budget = max(1, settings.TRANSLATE_BATCH_TOKENS)
+            await asyncio.gather(*(_batch(batch) for batch in _token_batches(segments, budget)))
+            await asyncio.to_thread(
+                memory.set_many, {key: translations[key] for key in missing_keys if translations.get(key)}
+            )
+
+        output = []
+        for idx, (piece, translatable) in enumerate(pieces):
+            if not translatable:
+                output.append(piece)
+                continue
+            # Mantém os espaços das bordas do trecho original
+            lead = piece[:len(piece) - len(piece.lstrip())]
+            trail = piece[len(piece.rstrip()):]
+            output.append(f"{lead}{translations[keys[idx]]}{trail}")
+
+        if detected:
+            detected_language = max(set(detected), key=detected.count)
+        elif source_lang != "auto":
+            detected_language = LANGUAGE_NAMES.get(source_lang, source_lang)
+        else:
+            detected_language = None
+        logger.info(
+            "Tradução por segmentos: %d frases, %d da memória, %d traduzidas em %d requests",
+            stats["total"], stats["cached"], stats["translated"], stats["requests"],
+        )
+        return {
+            "translated_text": "".join(output),
+            "improved_text": None,
+            "detected_language": detected_language,
+            "segments": stats,
+        }
+
+    async def _translate_batch(
+        self, items: List[str], prompt_context: dict, stats: dict
+    ) -> Optional[Tuple[List[str], List[str]]]:
+        """Um request ao modelo. None se a resposta não tiver uma tradução por item."""
+        prompt = _SEGMENT_PROMPT.format(
+            count=len(items),
+            segments=json.dumps(items, ensure_ascii=False),
+            **prompt_context,
+        )
+        async with _translate_limiter:
+            stats["requests"] += 1
+            try:
+                response = await asyncio.to_thread(
+                    self.model.generate_content,
+                    prompt,
+                    generation_config={"temperature": 0.2, "response_mime_type": "application/json"},
+                )
+                result = json.loads(response.text or "")
+            except Exception as exc:
+                logger.warning("Falha num lote da tradução por segmentos: %s", exc)
+                return None
+
+        if isinstance(result, dict):
+            translated = result.get("translations")
+            detected = [str(result["detected_language"])] if result.get("detected_language") else []
+        else:
+            translated, detected = result, []
+        if not isinstance(translated, list) or len(translated) != len(items):
+            return None
+        if not all(isinstance(t, str) and t.strip() for t in translated):
+            return None
+        return [t.strip() for t in translated], detected
@@ -0,0 +1,259 @@
+"""Disk-backed background jobs, shared by the P&ID and PDF → DOCX job services.
+
+A job is a directory ``<jobs_dir>/<job_id>/`` with a ``job.json`` record
+(owner, status, progress) next to the job's own inputs and outputs.
+:class:`JobStore` owns that layout and the job lifecycle: taking one of the
+user's job slots, writing the record atomically, running the work in a
+bounded thread pool, serving the record to its owner only, deleting
+finished jobs and purging expired ones.
+
+Subclasses implement :meth:`JobStore.execute` (the work) and
+:meth:`JobStore.public_status` (what clients see), and extend
+:meth:`JobStore.finalize` and :meth:`JobStore.drop` for files they keep
+elsewhere. The per-user limit is tracked in memory, so it applies per
+backend process.
+
+Each record names the process running it (host and pid). A queued or
+running job whose process is gone — the backend restarted, or a worker
+died mid-job — is marked failed the next time it is read or purged, and
+then expires like any finished job. Jobs of another host are judged by
+``updated_at`` against ``ttl_hours``.
+"""
+
+import json
+import logging
+import os
+import shutil
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_ERROR = "error"
+
+# Progress is written to job.json at most this often (seconds)
+PROGRESS_INTERVAL = 0.5
+
+_INTERRUPTED = "O processamento foi interrompido (servidor reiniciado); envie o arquivo novamente."
+
+
+class JobLimitExceeded(Exception):
+    """The user already has the maximum number of active jobs."""
+
+
+class JobNotFound(Exception):
+    pass
+
+
+class JobNotReady(Exception):
+    """The job is still queued or running (or failed); no result to serve."""
+
+
+class JobStore:
+    """Job directories and records on disk, run in a bounded thread pool."""
+
+    def __init__(
+        self,
+        jobs_dir: str,
+        workers: int,
+        jobs_per_user: int,
+        ttl_hours: float,
+        thread_name_prefix: str,
+    ):
+        self.jobs_dir = jobs_dir
+        self.jobs_per_user = jobs_per_user
+        self.ttl_hours = ttl_hours
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix=thread_name_prefix)
+        self._lock = threading.Lock()
+        self._active: Dict[str, int] = {}
+        # Jobs queued by this process and not finished yet
+        self._running: set[str] = set()
+        self._host = socket.gethostname()
+
+    # ------------------------------------------------------------------
+    # Hooks
+    # ------------------------------------------------------------------
+
+    def execute(self, job: Dict[str, Any]) -> None:
+        """Do the job's work (in a pool thread); raise to mark it failed."""
+        raise NotImplementedError
+
+    def public_status(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Job fields safe to return to clients (no server paths)."""
+        raise NotImplementedError
+
+    def finalize(self, job: Dict[str, Any]) -> None:
+        """Called once the job is done or failed, before its last record write."""
+
+    def drop(self, job_id: str) -> None:
+        """Remove everything the job left on disk."""
+        shutil.rmtree(self.job_path(job_id), ignore_errors=True)
+
+    # ------------------------------------------------------------------
+    # Submission
+    # ------------------------------------------------------------------
+
+    def job_path(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, job_id)
+
+    def reserve(self, user: str) -> tuple[str, str]:
+        """Take one of the user's job slots and create the job directory.
+
+        The caller saves the inputs there and then calls :meth:`enqueue`, or
+        :meth:`abandon` if that fails. Raises :class:`JobLimitExceeded` when
+        the user already has ``jobs_per_user`` active jobs.
+        """
+        with self._lock:
+            active = self._active.get(user, 0)
+            if active >= self.jobs_per_user:
+                raise JobLimitExceeded(user)
+            self._active[user] = active + 1
+
+        job_id = str(uuid.uuid4())
+        try:
+            self.purge_expired()
+            path = self.job_path(job_id)
+            os.makedirs(path, exist_ok=False)
+        except Exception:
+            self._release(user)
+            raise
+        return job_id, path
+
+    def abandon(self, job_id: str, user: str) -> None:
+        """Undo :meth:`reserve` for a job that was never queued."""
+        self.drop(job_id)
+        self._release(user)
+
+    def enqueue(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Write the record of a reserved job and queue it; returns its public status."""
+        job["worker"] = f"{self._host}:{os.getpid()}"
+        with self._lock:
+            self._running.add(job["job_id"])
+        self.write_job(job)
+        status = self.public_status(job)
+        self._executor.submit(self._run, job)
+        return status
+
+    def _run(self, job: Dict[str, Any]) -> None:
+        try:
+            job["status"] = STATUS_RUNNING
+            self.write_job(job)
+            self.execute(job)
+            job["status"] = STATUS_DONE
+        except Exception as exc:
+            logger.exception("Job %s (%s) falhou", job["job_id"], type(self).__name__)
+            job["status"] = STATUS_ERROR
+            job["error"] = str(exc)
+        finally:
+            self._release(job["user"])
+            if os.path.isdir(self.job_path(job["job_id"])):
+                self.finalize(job)
+                self.write_job(job)
+            with self._lock:
+                self._running.discard(job["job_id"])
+
+    def _release(self, user: str) -> None:
+        with self._lock:
+            remaining = self._active.get(user, 0) - 1
+            if remaining > 0:
+                self._active[user] = remaining
+            else:
+                self._active.pop(user, None)
+
+    def _orphaned(self, job: Dict[str, Any]) -> bool:
+        """Queued or running, but no live process will ever finish it."""
+        if job.get("status") not in (STATUS_QUEUED, STATUS_RUNNING):
+            return False
+        host, _, pid = str(job.get("worker", "")).rpartition(":")
+        if host != self._host or not pid.isdigit():
+            return job.get("updated_at", 0) < time.time() - self.ttl_hours * 3600
+        if int(pid) == os.getpid():
+            with self._lock:
+                return job["job_id"] not in self._running
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            pass
+        return False
+
+    def _interrupt(self, job: Dict[str, Any]) -> None:
+        logger.warning(
+            "Job %s (%s) interrompido: nenhum processo ativo o executa (%s)", job["job_id"], type(self).__name__, job.get("worker")
+        )
+        job["status"] = STATUS_ERROR
+        job["error"] = _INTERRUPTED
+        self.finalize(job)
+        self.write_job(job)
+
+    # ------------------------------------------------------------------
+    # Records
+    # ------------------------------------------------------------------
+
+    def get(self, job_id: str, user: str) -> Dict[str, Any]:
+        """Raw job record; jobs of other users are reported as not found."""
+        try:
+            with open(os.path.join(self.job_path(job_id), "job.json"), encoding="utf-8") as f:
+                job = json.load(f)
+        except (OSError, ValueError):
+            raise JobNotFound(job_id)
+        if job.get("user") != user:
+            raise JobNotFound(job_id)
+        if self._orphaned(job):
+            self._interrupt(job)
+        return job
+
+    def status(self, job_id: str, user: str) -> Dict[str, Any]:
+        return self.public_status(self.get(job_id, user))
+
+    def delete(self, job_id: str, user: str) -> None:
+        job = self.get(job_id, user)
+        if job["status"] in (STATUS_QUEUED, STATUS_RUNNING):
+            raise JobNotReady(job_id)
+        self.drop(job_id)
+
+    def purge_expired(self) -> int:
+        """Remove finished jobs older than ``ttl_hours``; mark orphaned ones failed."""
+        if not os.path.isdir(self.jobs_dir):
+            return 0
+        cutoff = time.time() - self.ttl_hours * 3600
+        removed = 0
+        for job_id in os.listdir(self.jobs_dir):
+            try:
+                with open(os.path.join(self.jobs_dir, job_id, "job.json"), encoding="utf-8") as f:
+                    job = json.load(f)
+                if self._orphaned(job):
+                    self._interrupt(job)
+                    continue
+                if job["status"] in (STATUS_QUEUED, STATUS_RUNNING) or job["updated_at"] >= cutoff:
+                    continue
+            except (OSError, ValueError, KeyError):
+                # Half-created directory: judge it by its own mtime
+                try:
+                    if os.path.getmtime(os.path.join(self.jobs_dir, job_id)) >= cutoff:
+                        continue
+                except OSError:
+                    continue
+            self.drop(job_id)
+            removed += 1
+        return removed
+
+    def write_job(self, job: Dict[str, Any]) -> None:
+        job["updated_at"] = time.time()
+        data = json.dumps(job, ensure_ascii=False).encode("utf-8")
+        atomic_write(os.path.join(self.job_path(job["job_id"]), "job.json"), data)
+
+
+def atomic_write(path: str, data: bytes) -> None:
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
@@ -0,0 +1,65 @@
+"""Persistent cache of Gemini OCR results for scanned PDF pages.
+
+The table extractor renders each scanned page to PNG and sends it to Gemini.
+The same pages come back often: the frontend's auto-split flow re-submits
+overlapping chunks and users re-export the same scanned datasheets. Entries
+are keyed by the SHA-256 of the rendered PNG, the render DPI and the OCR
+prompt version, and hold the tables as returned by ``_normalize_ocr_tables``
+(JSON). A hit skips the model call entirely.
+
+Rendering is deterministic for the same page and DPI, so identical pages in
+different uploads share one entry. Changing the prompt or the model changes
+the version and leaves the old entries to be evicted.
+"""
+
+import hashlib
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from app.services.disk_cache import DiskCache, cache_key
+
+logger = logging.getLogger(__name__)
+
+
+class OcrResultCache:
+    """Normalized OCR tables per rendered page on top of :class:`DiskCache`."""
+
+    def __init__(self, disk: DiskCache):
+        self.disk = disk
+
+    @property
+    def enabled(self) -> bool:
+        return self.disk.enabled
+
+    @staticmethod
+    def key(png_bytes: bytes, dpi: int, version: str) -> str:
+        return cache_key("ocr", hashlib.sha256(png_bytes).hexdigest(), int(dpi), version)
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        data = self.disk.get(key)
+        if data is None:
+            return None
+        try:
+            return json.loads(data)
+        except ValueError as exc:
+            logger.warning("OCR cache entry unreadable, discarding: %s", exc)
+            self.disk.delete(key)
+            return None
+
+    def set(self, key: str, tables: List[Dict[str, Any]]) -> None:
+        self.disk.set(key, json.dumps(tables, ensure_ascii=False).encode("utf-8"))
+
+    def stats(self) -> Dict[str, float]:
+        return self.disk.stats()
+
+
+_cache: Optional[OcrResultCache] = None
+
+
+def get_ocr_cache() -> OcrResultCache:
+    global _cache
+    if _cache is None:
+        _cache = OcrResultCache(DiskCache(settings.OCR_CACHE_DIR, settings.OCR_CACHE_MAX_MB * 1024 * 1024))
+    return _cache
@@ -1,9 +1,11 @@
 import io
+import json
 import os
 import re
-import tempfile
+import threading
 from collections import Counter
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import asdict, dataclass, field
 from datetime import datetime
 from pathlib import Path
@@ -14,10 +16,18 @@ from openpyxl import Workbook
 from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
 from openpyxl.utils import get_column_letter
 
+from app.config import settings
+from app.services.comment_ai_cache import get_comment_cache
+from app.services.disk_cache import prompt_version
+from app.services.process_pool import discard_pool, get_pool, resolve_workers
+
 COMMENT_TYPES = {"Text", "FreeText", "Highlight", "Underline", "StrikeOut", "Squiggly"}
 MARKUP_TYPES = {"Highlight", "Underline", "StrikeOut", "Squiggly"}
 _PDF_FLAG_LOCKED = 1 << 7  # = 128 — campos de template CAD (AutoCAD/Revit)
 
+# Nome do pool de processos compartilhado (app.services.process_pool)
+_POOL = "pdf_comments"
+
 
 # ── Data models ───────────────────────────────────────────────────────────────
 
@@ -66,13 +76,30 @@ def _is_template_field(annot) -> bool:
 
 def extract_from_pdf(path: Path) -> ExtractionResult:
     filename = path.name
-    document_number = _extract_document_number(filename)
 
     try:
         doc = fitz.open(str(path))
     except Exception as exc:
         return ExtractionResult(filename=filename, error=f"Falha ao abrir PDF: {exc}")
 
+    return _extract_document(doc, filename)
+
+
+def extract_from_bytes(filename: str, content: bytes) -> ExtractionResult:
+    """Mesmo que ``extract_from_pdf``, mas abre o PDF da memória (sem arquivo temporário)."""
+    filename = Path(filename).name
+
+    try:
+        doc = fitz.open(stream=content, filetype="pdf")
+    except Exception as exc:
+        return ExtractionResult(filename=filename, error=f"Falha ao abrir PDF: {exc}")
+
+    return _extract_document(doc, filename)
+
+
+def _extract_document(doc: fitz.Document, filename: str) -> ExtractionResult:
+    document_number = _extract_document_number(filename)
+
     if doc.is_encrypted:
         if not doc.authenticate(""):
             doc.close()
@@ -131,8 +158,33 @@ def extract_from_pdf(path: Path) -> ExtractionResult:
     )
 
 
+def _extract_task(filename: str, content: bytes) -> dict:
+    """Unidade de trabalho do pool de processos (resultado já serializável)."""
+    return asdict(extract_from_bytes(filename, content))
+
+
+def extract_many(files: list[tuple[str, bytes]], max_workers: Optional[int] = None) -> list[dict]:
+    """Extrai as anotações de vários PDFs (``(filename, conteúdo)``), na ordem recebida.
+
+    Com mais de um arquivo e ``max_workers`` (padrão: ``settings.PDF_COMMENTS_WORKERS``)
+    maior que 1, cada arquivo vai para um processo do pool.
+    """
+    workers = resolve_workers(max_workers, settings.PDF_COMMENTS_WORKERS)
+    if workers <= 1 or len(files) <= 1:
+        return [_extract_task(filename, content) for filename, content in files]
+
+    pool = get_pool(_POOL, workers)
+    try:
+        futures = [pool.submit(_extract_task, filename, content) for filename, content in files]
+        return [future.result() for future in futures]
+    except BrokenProcessPool:
+        discard_pool(_POOL, pool)
+        raise
+
+
 # ── AI analysis ──────────────────────────────────────────────────────────────
 
+_GEMINI_MODEL_NAME = "gemini-3.5-flash"
 _gemini_model = None
 _gemini_available: Optional[bool] = None
 
@@ -161,7 +213,7 @@ def _get_gemini_model():
     try:
         import google.generativeai as genai
         genai.configure(api_key=api_key)
-        _gemini_model = genai.GenerativeModel("gemini-3.5-flash")
+        _gemini_model = genai.GenerativeModel(_GEMINI_MODEL_NAME)
         _gemini_available = True
         return _gemini_model
     except Exception:
@@ -174,11 +226,7 @@ def _analyze_one(document_number: str, annot_type: str, comment: str, marked_tex
     if model is None:
         return ""
 
-    parts = [f"Documento: {document_number}", f"Tipo de anotação: {annot_type}"]
-    if marked_text:
-        parts.append(f'Texto marcado no documento: "{marked_text}"')
-    if comment:
-        parts.append(f'Comentário do revisor: "{comment}"')
+    parts = _annotation_parts(document_number, annot_type, comment, marked_text)
 
     try:
         response = model.generate_content(
@@ -190,26 +238,176 @@ def _analyze_one(document_number: str, annot_type: str, comment: str, marked_tex
         return ""
 
 
-def analyze_batch(annotations: list[dict]) -> None:
-    """Analisa anotações em paralelo e preenche 'ai_analysis' in-place."""
-    if not annotations or _get_gemini_model() is None:
-        return
+_BATCH_PROMPT = (
+    "Você receberá vários comentários de revisão numerados. Para CADA um, siga as "
+    "instruções acima e escreva a análise.\n"
+    'Responda APENAS com JSON no formato {"analyses": ["análise 1", "análise 2", ...]}, '
+    "com exatamente uma análise por comentário, na mesma ordem."
+)
+
+
+def _annotation_parts(document_number: str, annot_type: str, comment: str, marked_text: str) -> list[str]:
+    parts = [f"Documento: {document_number}", f"Tipo de anotação: {annot_type}"]
+    if marked_text:
+        parts.append(f'Texto marcado no documento: "{marked_text}"')
+    if comment:
+        parts.append(f'Comentário do revisor: "{comment}"')
+    return parts
+
 
-    def _task(idx_annot):
-        idx, annot = idx_annot
-        result = _analyze_one(
-            document_number=annot.get("document_number", ""),
-            annot_type=annot.get("annotation_type", ""),
-            comment=annot.get("comment", ""),
-            marked_text=annot.get("marked_text", ""),
+def _analyze_many(items: list[dict]) -> Optional[list[str]]:
+    """Analisa várias anotações num único request. None se a resposta não servir."""
+    model = _get_gemini_model()
+    if model is None:
+        return None
+
+    blocks = [
+        f"[{i}]\n" + "\n".join(_annotation_parts(
+            item.get("document_number", ""),
+            item.get("annotation_type", ""),
+            item.get("comment", ""),
+            item.get("marked_text", ""),
+        ))
+        for i, item in enumerate(items, start=1)
+    ]
+    try:
+        response = model.generate_content(
+            f"{_SYSTEM_PROMPT}\n\n{_BATCH_PROMPT}\n\n" + "\n\n".join(blocks),
+            generation_config={
+                "temperature": 0.3,
+                "max_output_tokens": 150 * len(items),
+                "response_mime_type": "application/json",
+            },
         )
-        return idx, result
+        analyses = json.loads(response.text or "")
+        if isinstance(analyses, dict):
+            analyses = analyses.get("analyses")
+    except Exception:
+        return None
+
+    if not isinstance(analyses, list) or len(analyses) != len(items):
+        return None
+    return [str(a).strip() if a is not None else "" for a in analyses]
+
+
+def _normalize_text(text: str) -> str:
+    return " ".join((text or "").split()).casefold()
+
 
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        futures = {executor.submit(_task, (i, a)): i for i, a in enumerate(annotations)}
-        for future in as_completed(futures):
-            idx, result = future.result()
-            annotations[idx]["ai_analysis"] = result
+def _dedup_key(annot: dict) -> tuple[str, str, str]:
+    """Anotações com o mesmo tipo, comentário e texto marcado (após normalizar
+    espaços e caixa) recebem a mesma análise — "idem", "ver nota 3"..."""
+    return (
+        annot.get("annotation_type", ""),
+        _normalize_text(annot.get("comment", "")),
+        _normalize_text(annot.get("marked_text", "")),
+    )
+
+
+# Entra na chave do cache de análises: mudar os prompts ou o modelo invalida as entradas
+_PROMPT_VERSION = prompt_version(_GEMINI_MODEL_NAME, _SYSTEM_PROMPT, _BATCH_PROMPT)
+
+# Limita as chamadas simultâneas ao Gemini no processo todo (todas as requests)
+_ai_limiter = threading.BoundedSemaphore(max(1, settings.PDF_COMMENTS_AI_CONCURRENCY))
+
+
+def analyze_batch(
+    annotations: list[dict],
+    batch_size: Optional[int] = None,
+    concurrency: Optional[int] = None,
+) -> dict:
+    """Analisa anotações em paralelo e preenche 'ai_analysis' in-place.
+
+    Anotações repetidas são analisadas uma vez só; as únicas vão em lotes de
+    ``batch_size`` por request (padrão: ``settings.PDF_COMMENTS_AI_BATCH_SIZE``),
+    com até ``concurrency`` lotes em paralelo nesta chamada (padrão:
+    ``settings.PDF_COMMENTS_AI_CONCURRENCY``) e nunca mais que esse limite no
+    processo inteiro. Um lote cuja resposta não bate com os itens é refeito item
+    a item.
+
+    Antes de tudo consulta o cache persistente de análises: anotações já
+    explicadas (mesmo documento, tipo, comentário, texto marcado e versão do
+    prompt) não vão para o modelo. Análises novas e não vazias são gravadas.
+
+    Returns:
+        Contadores: ``annotations``, ``cached`` (servidas do cache), ``unique``
+        (enviadas ao modelo após o dedup) e ``requests`` (chamadas ao modelo).
+    """
+    stats = {"annotations": len(annotations), "cached": 0, "unique": 0, "requests": 0}
+    if not annotations:
+        return stats
+
+    cache = get_comment_cache()
+    keys = [
+        cache.key(
+            _PROMPT_VERSION,
+            annot.get("document_number", ""),
+            annot.get("annotation_type", ""),
+            annot.get("comment", ""),
+            annot.get("marked_text", ""),
+        )
+        for annot in annotations
+    ]
+    cached = cache.get_many(keys) if cache.enabled else {}
+    missing = []
+    for idx, key in enumerate(keys):
+        if key in cached:
+            annotations[idx]["ai_analysis"] = cached[key]
+        else:
+            missing.append(idx)
+    stats["cached"] = len(annotations) - len(missing)
+
+    if not missing or _get_gemini_model() is None:
+        return stats
+
+    batch_size = max(1, batch_size or settings.PDF_COMMENTS_AI_BATCH_SIZE)
+    concurrency = max(1, concurrency or settings.PDF_COMMENTS_AI_CONCURRENCY)
+
+    groups: dict[tuple[str, str, str], list[int]] = {}
+    for idx in missing:
+        groups.setdefault(_dedup_key(annotations[idx]), []).append(idx)
+    unique = [indices[0] for indices in groups.values()]
+    stats["unique"] = len(unique)
+
+    stats_lock = threading.Lock()
+
+    def _count(requests: int) -> None:
+        with stats_lock:
+            stats["requests"] += requests
+
+    def _task(batch: list[int]) -> list[str]:
+        items = [annotations[i] for i in batch]
+        with _ai_limiter:
+            if len(items) > 1:
+                _count(1)
+                analyses = _analyze_many(items)
+                if analyses is not None:
+                    return analyses
+            results = []
+            for item in items:
+                _count(1)
+                results.append(_analyze_one(
+                    document_number=item.get("document_number", ""),
+                    annot_type=item.get("annotation_type", ""),
+                    comment=item.get("comment", ""),
+                    marked_text=item.get("marked_text", ""),
+                ))
+            return results
+
+    batches = [unique[start:start + batch_size] for start in range(0, len(unique), batch_size)]
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(batches))) as executor:
+        for batch, analyses in zip(batches, executor.map(_task, batches)):
+            for idx, analysis in zip(batch, analyses):
+                for target in groups[_dedup_key(annotations[idx])]:
+                    annotations[target]["ai_analysis"] = analysis
+
+    # Vazio = modelo indisponível ou falha: não memoriza
+    cache.set_many({
+        keys[idx]: annotations[idx]["ai_analysis"]
+        for idx in missing
+        if annotations[idx].get("ai_analysis")
+    })
+    return stats
 
 
 # ── Excel export ─────────────────────────────────────────────────────────────
@@ -0,0 +1,167 @@
+"""Background PDF → DOCX conversion jobs.
+
+``POST /api/pdf/convert`` converts inside the request, so a 300-page manual
+holds the connection (and a proxy timeout) for minutes. A job saves the PDF,
+returns a ``job_id`` and converts in a bounded thread pool; the conversion
+itself runs as parallel page ranges in the process pool of
+:mod:`app.services.pdf_convert_service`. Clients poll the status for
+per-range progress and download the DOCX from the existing
+``/api/pdf/download/{file_id}`` route — the job id is the file id.
+
+Each job lives in ``UPLOAD_DIR/convert-jobs/<job_id>/``:
+
+- ``job.json``   — status, progress per page range
+- ``input.pdf``  — the uploaded file
+- ``range-*``    — intermediate parsed pages and progress of each range
+
+The DOCX is written to ``OUTPUT_DIR/<job_id>.docx``. Jobs stay on disk until
+deleted or until ``PDF_CONVERT_JOB_TTL_HOURS`` expires. The job directory,
+record, per-user limit and expiry come from
+:class:`app.services.job_store.JobStore`; this module adds the conversion
+and the DOCX.
+"""
+
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional
+from urllib.parse import quote
+
+from app.config import settings
+from app.services.job_store import PROGRESS_INTERVAL, STATUS_DONE, STATUS_ERROR, STATUS_QUEUED, JobStore
+
+if TYPE_CHECKING:
+    from app.services.pdf_convert_service import PdfConvertService
+
+JOBS_DIR = os.path.join(settings.UPLOAD_DIR, "convert-jobs")
+
+
+class ConvertJobService(JobStore):
+    """Queues PDF → DOCX conversions and tracks their progress on disk."""
+
+    def __init__(self, convert_service: Optional["PdfConvertService"] = None):
+        super().__init__(
+            JOBS_DIR,
+            workers=settings.PDF_CONVERT_JOB_WORKERS,
+            jobs_per_user=settings.PDF_CONVERT_JOBS_PER_USER,
+            ttl_hours=settings.PDF_CONVERT_JOB_TTL_HOURS,
+            thread_name_prefix="convert-job",
+        )
+        if convert_service is None:
+            # pdf2docx/OpenCV load with the first job, not when the router is imported
+            from app.services.pdf_convert_service import PdfConvertService
+
+            convert_service = PdfConvertService()
+        self.convert_service = convert_service
+
+    def submit(self, user: str, filename: str, content: bytes) -> Dict[str, Any]:
+        """Save the PDF and queue its conversion.
+
+        Raises :class:`~app.services.job_store.JobLimitExceeded` when the user
+        already has ``PDF_CONVERT_JOBS_PER_USER`` active jobs.
+        """
+        job_id, path = self.reserve(user)
+        try:
+            with open(os.path.join(path, "input.pdf"), "wb") as f:
+                f.write(content)
+            now = time.time()
+            return self.enqueue({
+                "job_id": job_id,
+                "user": user,
+                "status": STATUS_QUEUED,
+                "filename": filename,
+                "original_size": len(content),
+                "converted_size": None,
+                "ranges": [],
+                "error": None,
+                "created_at": now,
+                "updated_at": now,
+            })
+        except Exception:
+            self.abandon(job_id, user)
+            raise
+
+    def execute(self, job: Dict[str, Any]) -> None:
+        work_dir = self.job_path(job["job_id"])
+        last_write = 0.0
+
+        def progress(ranges: list[dict]) -> None:
+            nonlocal last_write
+            # A range changing state is always written; page counts are throttled
+            changed = [item["status"] for item in ranges] != [item["status"] for item in job["ranges"]]
+            job["ranges"] = ranges
+            now = time.time()
+            if changed or now - last_write >= PROGRESS_INTERVAL:
+                last_write = now
+                self.write_job(job)
+
+        output_path = docx_path(job["job_id"])
+        self.convert_service.convert_parallel(
+            os.path.join(work_dir, "input.pdf"), output_path, work_dir, progress=progress,
+        )
+        job["converted_size"] = os.path.getsize(output_path)
+
+    def finalize(self, job: Dict[str, Any]) -> None:
+        if job["status"] == STATUS_ERROR:
+            _remove(docx_path(job["job_id"]))
+        _clear_intermediate(self.job_path(job["job_id"]))
+
+    def drop(self, job_id: str) -> None:
+        super().drop(job_id)
+        _remove(docx_path(job_id))
+
+    def public_status(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        ranges = job["ranges"]
+        total = sum(item["pages"] for item in ranges)
+        done = sum(item["pages_done"] for item in ranges)
+        if job["status"] == STATUS_DONE:
+            done = total
+        status = {
+            "job_id": job["job_id"],
+            "status": job["status"],
+            "filename": job["filename"],
+            "original_size": job["original_size"],
+            "converted_size": job["converted_size"],
+            "pages_done": done,
+            "pages_total": total,
+            "progress": round(done / total, 4) if total else 0.0,
+            "ranges": ranges,
+            "download_url": None,
+            "error": job["error"],
+            "created_at": job["created_at"],
+            "updated_at": job["updated_at"],
+        }
+        if job["status"] == STATUS_DONE:
+            stem = os.path.splitext(job["filename"])[0] or "converted"
+            status["download_url"] = f"/api/pdf/download/{job['job_id']}?filename={quote(stem + '.docx')}"
+        return status
+
+
+def docx_path(job_id: str) -> str:
+    """Where ``/api/pdf/download/{job_id}`` looks for the converted file."""
+    return os.path.join(settings.OUTPUT_DIR, f"{job_id}.docx")
+
+
+def _clear_intermediate(work_dir: str) -> None:
+    for name in os.listdir(work_dir):
+        if name.startswith("range-"):
+            _remove(os.path.join(work_dir, name))
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+_service: Optional[ConvertJobService] = None
+_service_lock = threading.Lock()
+
+
+def get_convert_job_service() -> ConvertJobService:
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = ConvertJobService()
+        return _service
@@ -1,5 +1,129 @@
+"""Conversão de PDF para DOCX (pdf2docx), inteira ou em faixas de páginas paralelas.
+
+O pdf2docx analisa cada página de forma independente (a análise de cabeçalho e
+rodapé no nível do documento ainda não existe na biblioteca), então páginas
+de faixas diferentes podem ser analisadas em processos separados. Cada faixa
+grava as páginas analisadas em JSON (``Converter.serialize``) e uma última
+tarefa restaura todas num único ``Converter`` e gera o DOCX de uma vez — o
+mesmo arquivo que a conversão em passada única produziria.
+"""
+
+import logging
+import os
+from concurrent.futures import FIRST_EXCEPTION, Future, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional
+
+import fitz  # PyMuPDF
 from pdf2docx import Converter
 
+from app.config import settings
+from app.services.process_pool import discard_pool, get_pool, resolve_workers
+
+logger = logging.getLogger(__name__)
+
+# Faixas menores que isso custam mais em abertura do PDF e leitura das fontes
+# (refeitas em cada processo) do que economizam
+MIN_RANGE_PAGES = 10
+# Intervalo (s) entre as leituras do progresso das faixas
+PROGRESS_INTERVAL = 0.5
+
+RANGE_QUEUED = "queued"
+RANGE_RUNNING = "running"
+RANGE_DONE = "done"
+
+
+def page_count(pdf_path: str) -> int:
+    with fitz.open(pdf_path) as doc:
+        return len(doc)
+
+
+def split_ranges(total: int, workers: int, min_pages: int = MIN_RANGE_PAGES) -> list[tuple[int, int]]:
+    """Faixas ``[start, end)`` contíguas e equilibradas, no máximo uma por processo."""
+    if total <= 0:
+        return []
+    count = max(1, min(workers, total // max(1, min_pages)))
+    size, extra = divmod(total, count)
+    ranges: list[tuple[int, int]] = []
+    start = 0
+    for i in range(count):
+        end = start + size + (1 if i < extra else 0)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def parse_page_range(
+    pdf_path: str,
+    start: int,
+    end: int,
+    json_path: str,
+    progress_path: str,
+    on_page: Optional[Callable[[int], None]] = None,
+) -> int:
+    """Tarefa do pool: analisa as páginas ``[start, end)`` e grava o JSON do pdf2docx.
+
+    O progresso (páginas concluídas) vai para ``progress_path`` a cada página,
+    e para ``on_page`` quando roda no processo atual.
+    Retorna o número de páginas analisadas.
+    """
+    _write_progress(progress_path, 0)
+    cv = Converter(pdf_path)
+    try:
+        options = cv.default_settings
+        cv.load_pages(start, end).parse_document(**options)
+        pages = [page for page in cv.pages if not page.skip_parsing]
+        # Uma página por vez pelo próprio parse_pages (mesmo tratamento de erro)
+        for page in pages:
+            page.skip_parsing = True
+        for done, page in enumerate(pages, start=1):
+            page.skip_parsing = False
+            cv.parse_pages(**options)
+            page.skip_parsing = True
+            _write_progress(progress_path, done)
+            if on_page is not None:
+                on_page(done)
+        cv.serialize(json_path)
+        return len(pages)
+    finally:
+        cv.close()
+
+
+def build_docx(pdf_path: str, json_paths: list[str], output_path: str) -> str:
+    """Tarefa do pool: junta as faixas analisadas e gera um único DOCX."""
+    cv = Converter(pdf_path)
+    try:
+        for json_path in json_paths:
+            cv.deserialize(json_path)
+        cv.make_docx(output_path, **cv.default_settings)
+        return output_path
+    finally:
+        cv.close()
+
+
+def _write_progress(path: str, done: int) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(str(done))
+    os.replace(tmp_path, path)
+
+
+def _read_progress(path: str) -> Optional[int]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return int(f.read() or 0)
+    except (OSError, ValueError):
+        return None
+
+
+# ── Pool de processos ────────────────────────────────────────────────────────
+
+# Nome do pool compartilhado (app.services.process_pool)
+_POOL = "pdf_convert"
+
+
+ProgressCallback = Callable[[list[dict]], None]
+
 
 class PdfConvertService:
     def convert(self, pdf_path: str, output_path: str) -> str:
@@ -14,3 +138,79 @@ class PdfConvertService:
             cv.close()
 
         return output_path
+
+    def convert_parallel(
+        self,
+        pdf_path: str,
+        output_path: str,
+        work_dir: str,
+        max_workers: Optional[int] = None,
+        progress: Optional[ProgressCallback] = None,
+        min_range_pages: int = MIN_RANGE_PAGES,
+    ) -> str:
+        """Converte em faixas de páginas paralelas e junta num único DOCX.
+
+        ``work_dir`` recebe os arquivos intermediários (JSON e progresso de cada
+        faixa). ``progress`` é chamado periodicamente com a lista de faixas
+        (``start``, ``end``, ``pages``, ``pages_done``, ``status``).
+        Com um processo (``max_workers=1``) tudo roda no processo atual.
+        """
+        total = page_count(pdf_path)
+        workers = resolve_workers(max_workers, settings.PDF_CONVERT_WORKERS)
+        ranges = split_ranges(total, workers, min_range_pages)
+        if not ranges:
+            raise ValueError("O PDF não tem páginas")
+        state = [
+            {"start": s, "end": e, "pages": e - s, "pages_done": 0, "status": RANGE_QUEUED}
+            for s, e in ranges
+        ]
+        paths = [
+            (os.path.join(work_dir, f"range-{i:03d}.json"), os.path.join(work_dir, f"range-{i:03d}.progress"))
+            for i in range(len(ranges))
+        ]
+
+        def report() -> None:
+            if progress is not None:
+                progress([dict(item) for item in state])
+
+        report()
+        if workers <= 1:
+            for item, (json_path, progress_path) in zip(state, paths):
+                item["status"] = RANGE_RUNNING
+                report()
+
+                def on_page(done: int, item: dict = item) -> None:
+                    item["pages_done"] = done
+                    report()
+
+                parse_page_range(pdf_path, item["start"], item["end"], json_path, progress_path, on_page)
+                item["pages_done"], item["status"] = item["pages"], RANGE_DONE
+                report()
+            return build_docx(pdf_path, [json_path for json_path, _ in paths], output_path)
+
+        pool = get_pool(_POOL, workers)
+        futures: list[Future] = []
+        try:
+            for item, (json_path, progress_path) in zip(state, paths):
+                futures.append(pool.submit(parse_page_range, pdf_path, item["start"], item["end"], json_path, progress_path))
+            pending = set(futures)
+            while pending:
+                _, pending = wait(pending, timeout=PROGRESS_INTERVAL, return_when=FIRST_EXCEPTION)
+                for item, future, (_, progress_path) in zip(state, futures, paths):
+                    if future.done():
+                        future.result()  # propaga o erro da faixa
+                        item["pages_done"], item["status"] = item["pages"], RANGE_DONE
+                    else:
+                        done = _read_progress(progress_path)
+                        if done is not None:
+                            item["pages_done"], item["status"] = done, RANGE_RUNNING
+                report()
+            return pool.submit(build_docx, pdf_path, [json_path for json_path, _ in paths], output_path).result()
+        except BrokenProcessPool:
+            logger.error("Pool de conversão PDF→DOCX interrompido; será recriado")
+            discard_pool(_POOL, pool)
+            raise
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
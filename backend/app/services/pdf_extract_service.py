@@ -1,12 +1,21 @@
 import json
 import logging
+import math
 import os
-from concurrent.futures import ThreadPoolExecutor
-from typing import Dict, List, Any, Optional
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, Iterator, List, Any, Optional
 
 import pdfplumber
 import pandas as pd
 
+from app.config import settings
+from app.services.disk_cache import prompt_version
+from app.services.ocr_cache import get_ocr_cache
+from app.services.process_pool import discard_pool, get_pool, resolve_workers
+
 logger = logging.getLogger(__name__)
 
 # Render DPI para páginas escaneadas antes de mandar pro Gemini. 150 mantém o OCR
@@ -19,6 +28,22 @@ OCR_MAX_WORKERS = 5
 # "pesquisáveis" (imagem da tabela + camada de texto de OCR por cima) têm a imagem
 # cobrindo a página inteira e nenhuma linha vetorial de grade.
 IMAGE_PAGE_MIN_COVERAGE = 0.5
+# Extração paralela: até N shards por processo (equilibra páginas desiguais) e um
+# mínimo de páginas por shard, abaixo do qual abrir o PDF de novo não compensa.
+_SHARDS_PER_WORKER = 4
+_MIN_SHARD_PAGES = 8
+# Renderizar uma página custa bem mais que abrir o documento
+_MIN_RENDER_SHARD_PAGES = 2
+# Streaming: páginas por chunk no pool e chunks em voo por processo. Só esses
+# chunks ficam em memória, então o consumo não cresce com o tamanho do PDF.
+_STREAM_CHUNK_PAGES = 8
+_STREAM_CHUNKS_PER_WORKER = 2
+# Intervalo (s) entre registros de progresso; também serve de heartbeat enquanto
+# uma página lenta ou o OCR seguram o próximo registro.
+STREAM_PROGRESS_INTERVAL = 1.0
+
+# Nome do pool de processos compartilhado (app.services.process_pool)
+_POOL = "pdf_extract"
 
 _OCR_PROMPT = (
     "Você está extraindo dados tabulares da imagem de UMA página de um documento "
@@ -35,6 +60,10 @@ _OCR_PROMPT = (
     '- Se não houver tabela, responda {"tables": []}.'
 )
 
+OCR_MODEL_NAME = "gemini-3.5-flash"
+# Entra na chave do cache de OCR: mudar o prompt ou o modelo invalida as entradas
+_OCR_PROMPT_VERSION = prompt_version(OCR_MODEL_NAME, _OCR_PROMPT)
+
 _ocr_model = None
 _ocr_available: Optional[bool] = None
 
@@ -56,7 +85,7 @@ def _get_ocr_model():
         import google.generativeai as genai
 
         genai.configure(api_key=api_key)
-        _ocr_model = genai.GenerativeModel("gemini-3.5-flash")
+        _ocr_model = genai.GenerativeModel(OCR_MODEL_NAME)
         _ocr_available = True
         return _ocr_model
     except Exception:
@@ -116,8 +145,11 @@ def _normalize_ocr_tables(raw: Any) -> List[Dict[str, Any]]:
     return out
 
 
-def _ocr_image_to_tables(model, png_bytes: bytes) -> List[Dict[str, Any]]:
-    """Manda a imagem da página pro Gemini e devolve as tabelas estruturadas."""
+def _ocr_image_to_tables(model, png_bytes: bytes) -> Optional[List[Dict[str, Any]]]:
+    """Manda a imagem da página pro Gemini e devolve as tabelas estruturadas.
+
+    Retorna None se a chamada falhar, para a falha não ir pro cache.
+    """
     try:
         response = model.generate_content(
             [_OCR_PROMPT, {"mime_type": "image/png", "data": png_bytes}],
@@ -132,98 +164,236 @@ def _ocr_image_to_tables(model, png_bytes: bytes) -> List[Dict[str, Any]]:
         return _normalize_ocr_tables(json.loads(text))
     except Exception:
         logger.exception("Falha no OCR de uma página via Gemini")
-        return []
+        return None
+
+
+def _ocr_page(model, page_num: int, png_bytes: bytes) -> List[Dict[str, Any]]:
+    """OCR de uma página renderizada, já no formato de tabela do extrator.
+
+    Consulta antes o cache de OCR (PNG + DPI + versão do prompt): páginas já
+    vistas não chamam o modelo.
+    """
+    cache = get_ocr_cache()
+    key = cache.key(png_bytes, OCR_RENDER_DPI, _OCR_PROMPT_VERSION) if cache.enabled else None
+    tables = cache.get(key) if key else None
+    if tables is None:
+        tables = _ocr_image_to_tables(model, png_bytes)
+        if tables is None:
+            tables = []
+        elif key:
+            cache.set(key, tables)
+
+    return [
+        {
+            "page": page_num,
+            "table_index": ti,
+            "headers": t["headers"],
+            "rows": t["rows"],
+        }
+        for ti, t in enumerate(tables)
+    ]
+
+
+def _table_record(page_num: int, table_idx: int, table: List[List[Any]]) -> Dict[str, Any]:
+    """Converte a tabela crua do pdfplumber em headers/rows (headers únicos, células str)."""
+    headers = []
+    rows = []
+
+    if len(table) > 1:
+        raw_headers = table[0]
+        data_rows = table[1:]
+
+        # Sanitize headers
+        counts = {}
+        for h in raw_headers:
+            # Handle None or whitespace
+            if h is None or str(h).strip() == "":
+                base_name = "Unnamed"
+            else:
+                base_name = str(h).strip()
+
+            # Handle duplicates
+            if base_name in counts:
+                counts[base_name] += 1
+                headers.append(f"{base_name}.{counts[base_name]}")
+            else:
+                counts[base_name] = 0
+                headers.append(base_name)
+
+        # Process rows calling str() on cells to avoid errors
+        for row in data_rows:
+            cleaned_row = [str(cell) if cell is not None else "" for cell in row]
+            rows.append(cleaned_row)
+    else:
+        # Tabela com apenas uma linha ou sem header claro
+        # Criar headers genéricos 0, 1, 2...
+        headers = [str(i) for i in range(len(table[0]))]
+        rows = [[str(cell) if cell is not None else "" for cell in table[0]]]
+
+    return {
+        "page": page_num,
+        "table_index": table_idx,
+        "headers": headers,
+        "rows": rows,
+    }
+
+
+def _iter_page_tables(pdf, page_indices: Iterable[int]) -> Iterator[tuple[int, int, Optional[List[Dict[str, Any]]]]]:
+    """Percorre páginas de um documento pdfplumber já aberto, uma por vez.
+
+    Gera ``(page_num_1based, page_idx_0based, tabelas)``; ``tabelas`` é None
+    para página escaneada (vai pro OCR). Índices fora do documento são ignorados.
+    """
+    total_pages = len(pdf.pages)
+    for page_idx in page_indices:
+        if not 0 <= page_idx < total_pages:
+            continue
+        page = pdf.pages[page_idx]
+        # page_num é 1-based para exibição
+        page_num = page.page_number
+
+        # Página escaneada → OCR via Gemini. Cobre tanto o scan puro (sem
+        # texto embutido) quanto o scan "pesquisável" (imagem da tabela com
+        # camada de OCR por cima): nos dois casos a tabela está na imagem e o
+        # pdfplumber não consegue extrair dela.
+        if not page.chars or _is_image_page(page):
+            tables = None
+        else:
+            tables = [
+                _table_record(page_num, table_idx, table)
+                for table_idx, table in enumerate(page.extract_tables())
+                if table and len(table) >= 1
+            ]
+
+        # Libera chars/objetos já processados: num PDF de 200 páginas o
+        # handle acumularia todos até o fim.
+        page.close()
+        yield page_num, page_idx, tables
+
+
+def extract_page_range(
+    pdf_path: str, page_indices: Optional[List[int]] = None
+) -> tuple[List[Dict[str, Any]], List[tuple[int, int]], int]:
+    """Extrai as tabelas vetoriais de algumas páginas com um único handle do pdfplumber.
+
+    Nível de módulo para rodar num processo do pool (cada shard abre o próprio
+    handle). Índices fora do documento são ignorados.
+
+    Returns:
+        (tabelas na ordem das páginas, páginas escaneadas como
+        (page_num_1based, page_idx_0based), total de páginas do PDF).
+    """
+    tables_data: List[Dict[str, Any]] = []
+    scanned_pages: List[tuple[int, int]] = []
+
+    with pdfplumber.open(pdf_path) as pdf:
+        total_pages = len(pdf.pages)
+        if page_indices is None:
+            page_indices = range(total_pages)
+        for page_num, page_idx, tables in _iter_page_tables(pdf, page_indices):
+            if tables is None:
+                scanned_pages.append((page_num, page_idx))
+            else:
+                tables_data.extend(tables)
+
+    return tables_data, scanned_pages, total_pages
+
+
+def extract_stream_chunk(
+    pdf_path: str, page_indices: List[int], render_scanned: bool
+) -> tuple[List[Dict[str, Any]], List[tuple[int, bytes]], int]:
+    """Um chunk do streaming: tabelas vetoriais + PNG das páginas escaneadas.
+
+    Renderizar no próprio processo do chunk evita reabrir o PDF no processo
+    principal. Sem OCR disponível (``render_scanned=False``) as páginas
+    escaneadas só são contadas.
+
+    Returns:
+        (tabelas, [(page_num, png)], número de páginas escaneadas).
+    """
+    tables, scanned_pages, _ = extract_page_range(pdf_path, page_indices)
+    rendered = render_pages(pdf_path, scanned_pages) if render_scanned and scanned_pages else []
+    return tables, rendered, len(scanned_pages)
+
+
+def render_pages(pdf_path: str, pages: List[tuple[int, int]], dpi: int = OCR_RENDER_DPI) -> List[tuple[int, bytes]]:
+    """Renderiza páginas como PNG com um handle próprio do PyMuPDF.
+
+    Nível de módulo para rodar num processo do pool: o PyMuPDF não é
+    thread-safe no mesmo documento, mas cada processo abre o seu.
+    """
+    import fitz  # PyMuPDF
+
+    rendered: List[tuple[int, bytes]] = []
+    doc = fitz.open(pdf_path)
+    try:
+        for page_num, page_idx in pages:
+            pix = doc[page_idx].get_pixmap(dpi=dpi)
+            rendered.append((page_num, pix.tobytes("png")))
+    finally:
+        doc.close()
+    return rendered
+
+
+def _shards(items: list, workers: int, min_size: int) -> List[list]:
+    """Divide ``items`` em fatias contíguas: até ``_SHARDS_PER_WORKER`` por processo,
+    nenhuma menor que ``min_size`` (abaixo disso o custo de abrir o PDF domina)."""
+    if workers <= 1 or len(items) < 2 * min_size:
+        return [items] if items else []
+    count = min(workers * _SHARDS_PER_WORKER, len(items) // min_size)
+    size = math.ceil(len(items) / count)
+    return [items[start:start + size] for start in range(0, len(items), size)]
 
 
 class PdfExtractService:
-    def extract_tables(self, pdf_path: str, page_indices: List[int] = None) -> Dict[str, Any]:
+    def extract_tables(
+        self,
+        pdf_path: str,
+        page_indices: List[int] = None,
+        max_workers: Optional[int] = None,
+    ) -> Dict[str, Any]:
         """
         Extrai tabelas de um PDF com robustez e opção de seleção de páginas.
         Args:
             pdf_path: Caminho do arquivo PDF.
             page_indices: Lista opcional de índices de página (0-indexed) para processar.
+            max_workers: Processos para a extração vetorial e a renderização das
+                páginas escaneadas (padrão: ``settings.PDF_EXTRACT_WORKERS``; 1 = serial).
+                As páginas são divididas em shards contíguos, cada um com seu próprio
+                handle do pdfplumber, e o resultado é igual ao do modo serial.
         """
-        tables_data = []
-        total_pages = 0
-        scanned_pages: List[tuple[int, int]] = []  # (page_num_1based, page_idx_0based)
-
-        with pdfplumber.open(pdf_path) as pdf:
-            total_pages = len(pdf.pages)
+        workers = resolve_workers(max_workers, settings.PDF_EXTRACT_WORKERS)
 
-            # Determinar quais páginas processar
+        if workers > 1:
+            with pdfplumber.open(pdf_path) as pdf:
+                total_pages = len(pdf.pages)
             if page_indices is None:
-                pages_to_process = [(i, p) for i, p in enumerate(pdf.pages)]
-            else:
-                pages_to_process = []
-                for idx in page_indices:
-                    if 0 <= idx < total_pages:
-                        pages_to_process.append((idx, pdf.pages[idx]))
-
-            for page_idx, page in pages_to_process:
-                # page_num é 1-based para exibição
-                page_num = page.page_number
-
-                # Página escaneada → OCR via Gemini. Cobre tanto o scan puro (sem
-                # texto embutido) quanto o scan "pesquisável" (imagem da tabela com
-                # camada de OCR por cima): nos dois casos a tabela está na imagem e o
-                # pdfplumber não consegue extrair dela.
-                if not page.chars or _is_image_page(page):
-                    scanned_pages.append((page_num, page_idx))
-                    continue
-
-                tables = page.extract_tables()
-
-                for table_idx, table in enumerate(tables):
-                    if not table or len(table) < 1:
-                        continue
-
-                    # Robust Header Handling (Lógica do original)
-                    headers = []
-                    rows = []
-                    
-                    if len(table) > 1:
-                        raw_headers = table[0]
-                        data_rows = table[1:]
-                        
-                        # Sanitize headers
-                        counts = {}
-                        for h in raw_headers:
-                            # Handle None or whitespace
-                            if h is None or str(h).strip() == "":
-                                base_name = "Unnamed"
-                            else:
-                                base_name = str(h).strip()
-                            
-                            # Handle duplicates
-                            if base_name in counts:
-                                counts[base_name] += 1
-                                headers.append(f"{base_name}.{counts[base_name]}")
-                            else:
-                                counts[base_name] = 0
-                                headers.append(base_name)
-                        
-                        # Process rows calling str() on cells to avoid errors
-                        for row in data_rows:
-                            cleaned_row = [str(cell) if cell is not None else "" for cell in row]
-                            rows.append(cleaned_row)
-                    else:
-                        # Tabela com apenas uma linha ou sem header claro
-                        # Criar headers genéricos 0, 1, 2...
-                        headers = [str(i) for i in range(len(table[0]))]
-                        rows = [[str(cell) if cell is not None else "" for cell in table[0]]]
-
-                    tables_data.append(
-                        {
-                            "page": page_num,
-                            "table_index": table_idx,
-                            "headers": headers,
-                            "rows": rows,
-                        }
-                    )
+                page_indices = list(range(total_pages))
+            shards = _shards(list(page_indices), workers, _MIN_SHARD_PAGES)
+        else:
+            shards = []
+
+        if len(shards) > 1:
+            pool = get_pool(_POOL, workers)
+            try:
+                futures = [pool.submit(extract_page_range, pdf_path, shard) for shard in shards]
+                # Resultados na ordem dos shards = ordem das páginas pedidas
+                shard_results = [future.result() for future in futures]
+            except BrokenProcessPool:
+                discard_pool(_POOL, pool)
+                raise
+        else:
+            shard_results = [extract_page_range(pdf_path, page_indices)]
+
+        tables_data: List[Dict[str, Any]] = []
+        scanned_pages: List[tuple[int, int]] = []
+        for shard_tables, shard_scanned, total_pages in shard_results:
+            tables_data.extend(shard_tables)
+            scanned_pages.extend(shard_scanned)
 
         # OCR das páginas escaneadas (via Gemini) e merge no resultado.
         if scanned_pages:
-            tables_data.extend(self._ocr_scanned_pages(pdf_path, scanned_pages))
+            tables_data.extend(self._ocr_scanned_pages(pdf_path, scanned_pages, workers))
 
         # Ordena por página e índice para preview/Excel consistentes.
         tables_data.sort(key=lambda t: (t["page"], t["table_index"]))
@@ -234,10 +404,169 @@ class PdfExtractService:
             "tables": tables_data,
         }
 
+    def iter_tables(
+        self,
+        pdf_path: str,
+        page_indices: List[int] = None,
+        max_workers: Optional[int] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Versão incremental de ``extract_tables`` para respostas NDJSON.
+
+        Gera registros (dicts) com o campo ``type``:
+            - ``start``: ``total_pages`` do PDF e ``pages_total`` a processar;
+            - ``table``: uma tabela (mesmos campos de ``TableData``), assim que a
+              página dela termina — vetorial ou OCR;
+            - ``progress``: ``pages_done``/``pages_total``, ``tables_found`` e
+              ``ocr_pending``, no máximo a cada ``STREAM_PROGRESS_INTERVAL``;
+            - ``done``: totais finais.
+
+        Tabelas vetoriais saem na ordem das páginas; as de OCR saem quando o
+        Gemini responde (em ordem entre si). Só os chunks em andamento ficam em
+        memória. Fechar o gerador cancela o trabalho pendente.
+        """
+        workers = resolve_workers(max_workers, settings.PDF_EXTRACT_WORKERS)
+        with pdfplumber.open(pdf_path) as pdf:
+            total_pages = len(pdf.pages)
+        if page_indices is None:
+            page_indices = range(total_pages)
+        pages = [idx for idx in page_indices if 0 <= idx < total_pages]
+
+        model = _get_ocr_model()
+        yield {"type": "start", "total_pages": total_pages, "pages_total": len(pages)}
+
+        if workers > 1 and len(pages) >= 2 * _STREAM_CHUNK_PAGES:
+            source = self._stream_chunks_in_pool(pdf_path, pages, workers, model is not None)
+        else:
+            source = self._stream_pages(pdf_path, pages, model is not None)
+
+        ocr_executor = ThreadPoolExecutor(max_workers=OCR_MAX_WORKERS) if model is not None else None
+        ocr_pending: deque = deque()
+        pages_done = tables_found = scanned = 0
+        last_progress = time.monotonic()
+
+        def progress() -> Dict[str, Any]:
+            return {
+                "type": "progress",
+                "pages_done": pages_done,
+                "pages_total": len(pages),
+                "tables_found": tables_found,
+                "ocr_pending": len(ocr_pending),
+            }
+
+        try:
+            # ``source`` gera None enquanto espera, para manter o heartbeat
+            for chunk in source:
+                if chunk is not None:
+                    page_count, tables, rendered, chunk_scanned = chunk
+                    pages_done += page_count
+                    scanned += chunk_scanned
+                    for table in tables:
+                        tables_found += 1
+                        yield {"type": "table", **table}
+                    for page_num, png in rendered:
+                        ocr_pending.append(ocr_executor.submit(_ocr_page, model, page_num, png))
+
+                while ocr_pending and ocr_pending[0].done():
+                    for table in ocr_pending.popleft().result():
+                        tables_found += 1
+                        yield {"type": "table", **table}
+
+                if time.monotonic() - last_progress >= STREAM_PROGRESS_INTERVAL:
+                    last_progress = time.monotonic()
+                    yield progress()
+
+            while ocr_pending:
+                wait([ocr_pending[0]], timeout=STREAM_PROGRESS_INTERVAL)
+                while ocr_pending and ocr_pending[0].done():
+                    for table in ocr_pending.popleft().result():
+                        tables_found += 1
+                        yield {"type": "table", **table}
+                if time.monotonic() - last_progress >= STREAM_PROGRESS_INTERVAL:
+                    last_progress = time.monotonic()
+                    yield progress()
+
+            if scanned and model is None:
+                logger.warning(
+                    "%d página(s) escaneada(s) ignorada(s): Gemini OCR indisponível "
+                    "(GOOGLE_API_KEY ausente?)",
+                    scanned,
+                )
+            yield progress()
+            yield {"type": "done", "total_pages": total_pages, "tables_found": tables_found}
+        finally:
+            source.close()
+            if ocr_executor is not None:
+                ocr_executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def _stream_pages(pdf_path: str, pages: List[int], render_scanned: bool) -> Iterator[Optional[tuple]]:
+        """Fonte serial do streaming: um registro por página, handles abertos uma vez."""
+        fitz_doc = None
+        try:
+            with pdfplumber.open(pdf_path) as pdf:
+                for page_num, page_idx, tables in _iter_page_tables(pdf, pages):
+                    if tables is not None:
+                        yield 1, tables, [], 0
+                        continue
+                    rendered = []
+                    if render_scanned:
+                        if fitz_doc is None:
+                            import fitz  # PyMuPDF
+
+                            fitz_doc = fitz.open(pdf_path)
+                        pix = fitz_doc[page_idx].get_pixmap(dpi=OCR_RENDER_DPI)
+                        rendered.append((page_num, pix.tobytes("png")))
+                    yield 1, [], rendered, 1
+        finally:
+            if fitz_doc is not None:
+                fitz_doc.close()
+
+    @staticmethod
+    def _stream_chunks_in_pool(
+        pdf_path: str, pages: List[int], workers: int, render_scanned: bool
+    ) -> Iterator[Optional[tuple]]:
+        """Fonte paralela do streaming: chunks no pool, entregues na ordem das páginas.
+
+        No máximo ``workers * _STREAM_CHUNKS_PER_WORKER`` chunks em voo, para a
+        memória não depender do número de páginas.
+        """
+        chunks = [pages[start:start + _STREAM_CHUNK_PAGES] for start in range(0, len(pages), _STREAM_CHUNK_PAGES)]
+        pool = get_pool(_POOL, workers)
+        in_flight: deque = deque()
+        next_chunk = 0
+        try:
+            while next_chunk < len(chunks) or in_flight:
+                while next_chunk < len(chunks) and len(in_flight) < workers * _STREAM_CHUNKS_PER_WORKER:
+                    chunk = chunks[next_chunk]
+                    in_flight.append(
+                        (len(chunk), pool.submit(extract_stream_chunk, pdf_path, chunk, render_scanned))
+                    )
+                    next_chunk += 1
+
+                page_count, future = in_flight[0]
+                if not wait([future], timeout=STREAM_PROGRESS_INTERVAL).done:
+                    yield None
+                    continue
+                in_flight.popleft()
+                tables, rendered, scanned = future.result()
+                yield page_count, tables, rendered, scanned
+        except BrokenProcessPool:
+            discard_pool(_POOL, pool)
+            raise
+        finally:
+            for _, future in in_flight:
+                future.cancel()
+
     def _ocr_scanned_pages(
-        self, pdf_path: str, scanned_pages: List[tuple[int, int]]
+        self, pdf_path: str, scanned_pages: List[tuple[int, int]], workers: int = 1
     ) -> List[Dict[str, Any]]:
-        """Renderiza páginas sem texto e extrai tabelas delas via Gemini (em paralelo)."""
+        """Renderiza páginas sem texto e extrai tabelas delas via Gemini (em paralelo).
+
+        Com ``workers > 1`` a renderização também é paralela (shards no pool de
+        processos, um handle do PyMuPDF por processo) e o OCR de cada shard
+        começa assim que ele termina de renderizar.
+        """
         model = _get_ocr_model()
         if model is None:
             logger.warning(
@@ -247,36 +576,26 @@ class PdfExtractService:
             )
             return []
 
-        # Renderiza sequencialmente (PyMuPDF não é thread-safe no mesmo documento);
-        # o OCR — que é a parte lenta — roda em paralelo.
-        import fitz  # PyMuPDF
-
-        rendered: List[tuple[int, bytes]] = []
-        doc = fitz.open(pdf_path)
-        try:
-            for page_num, page_idx in scanned_pages:
-                pix = doc[page_idx].get_pixmap(dpi=OCR_RENDER_DPI)
-                rendered.append((page_num, pix.tobytes("png")))
-        finally:
-            doc.close()
-
-        def _task(item: tuple[int, bytes]) -> List[Dict[str, Any]]:
-            page_num, png = item
-            tables = _ocr_image_to_tables(model, png)
-            return [
-                {
-                    "page": page_num,
-                    "table_index": ti,
-                    "headers": t["headers"],
-                    "rows": t["rows"],
-                }
-                for ti, t in enumerate(tables)
-            ]
-
-        out: List[Dict[str, Any]] = []
+        shards = _shards(scanned_pages, workers, _MIN_RENDER_SHARD_PAGES)
+        ocr_futures = []
         with ThreadPoolExecutor(max_workers=OCR_MAX_WORKERS) as executor:
-            for res in executor.map(_task, rendered):
-                out.extend(res)
+            if len(shards) > 1:
+                pool = get_pool(_POOL, workers)
+                try:
+                    render_futures = [pool.submit(render_pages, pdf_path, shard) for shard in shards]
+                    for future in as_completed(render_futures):
+                        ocr_futures.extend(executor.submit(_ocr_page, model, *item) for item in future.result())
+                except BrokenProcessPool:
+                    discard_pool(_POOL, pool)
+                    raise
+            else:
+                ocr_futures = [
+                    executor.submit(_ocr_page, model, *item) for item in render_pages(pdf_path, scanned_pages)
+                ]
+
+            out: List[Dict[str, Any]] = []
+            for future in ocr_futures:
+                out.extend(future.result())
         return out
 
     def extract_to_excel(self, pdf_path: str, output_path: str, page_indices: List[int] = None) -> str:
@@ -0,0 +1,185 @@
+"""Single-open page context for the P&ID pipeline.
+
+A P&ID job needs several views of every page: raw words (pdfplumber),
+rects/edges/lines (pdfplumber) and vector drawings (PyMuPDF). Opening the
+file once per view and per page re-parses the whole PDF dozens of times on
+large drawing sets. ``DocumentContext`` opens the file once per backend and
+hands out ``PageContext`` objects that parse each page lazily, exactly once.
+
+Uso típico:
+    with DocumentContext(pdf_path) as doc:
+        for page in doc.pages():
+            words = extract_page_words(page, ...)
+            rects = page.rects + page.fitz_rects
+            page.release()
+"""
+
+import logging
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+import fitz  # PyMuPDF
+import pdfplumber
+
+from app.services.pid.core.document_scale import DocumentScale
+
+logger = logging.getLogger(__name__)
+
+# Same tolerances used by text_extraction.extract_words
+WORD_X_TOLERANCE = 2.0
+WORD_Y_TOLERANCE = 2.0
+
+
+class PageContext:
+    """Lazily parsed view of one PDF page, shared by every pipeline stage."""
+
+    def __init__(self, document: "DocumentContext", index: int):
+        self.document = document
+        self.index = index
+        self._plumber_page = document._pdf.pages[index]
+        self.width = float(self._plumber_page.width)
+        self.height = float(self._plumber_page.height)
+        self.document_scale = DocumentScale.from_page(self.width, self.height)
+        self._raw_words: Optional[List[dict]] = None
+        self._rects: Optional[List[dict]] = None
+        self._edges: Optional[List[dict]] = None
+        self._lines: Optional[List[dict]] = None
+        self._fitz_drawings: Optional[List[dict]] = None
+        self._fitz_rects: Optional[List[dict]] = None
+
+    @property
+    def is_landscape(self) -> bool:
+        return self.width > self.height
+
+    @property
+    def raw_words(self) -> List[dict]:
+        """pdfplumber words (dicts), extracted once with the pipeline tolerances."""
+        if self._raw_words is None:
+            self._raw_words = self._plumber_page.extract_words(
+                keep_blank_chars=False,
+                x_tolerance=WORD_X_TOLERANCE,
+                y_tolerance=WORD_Y_TOLERANCE,
+            )
+        return self._raw_words
+
+    @property
+    def has_text(self) -> bool:
+        return len(self.raw_words) > 0
+
+    @property
+    def rects(self) -> List[dict]:
+        if self._rects is None:
+            self._rects = list(self._plumber_page.rects or [])
+        return self._rects
+
+    @property
+    def edges(self) -> List[dict]:
+        if self._edges is None:
+            self._edges = list(self._plumber_page.edges or [])
+        return self._edges
+
+    @property
+    def lines(self) -> List[dict]:
+        if self._lines is None:
+            self._lines = list(self._plumber_page.lines or [])
+        return self._lines
+
+    @property
+    def fitz_drawings(self) -> List[dict]:
+        """PyMuPDF ``get_drawings()`` output; empty if PyMuPDF cannot read the page."""
+        if self._fitz_drawings is None:
+            try:
+                self._fitz_drawings = self.document.fitz_doc[self.index].get_drawings()
+            except Exception as exc:
+                logger.debug("fitz drawings skipped: %s", exc)
+                self._fitz_drawings = []
+        return self._fitz_drawings
+
+    @property
+    def fitz_rects(self) -> List[dict]:
+        """Roughly square rect/quad drawings as pdfplumber-style bbox dicts.
+
+        CAD exports often draw DCS squares as path rectangles that pdfplumber
+        does not report in ``page.rects``.
+        """
+        if self._fitz_rects is None:
+            rects: List[dict] = []
+            for drawing in self.fitz_drawings:
+                items = drawing.get("items", [])
+                if not items or not any(item[0] in ("re", "qu") for item in items):
+                    continue
+                rect = drawing["rect"]
+                width = rect.x1 - rect.x0
+                height = rect.y1 - rect.y0
+                if width > 0.5 and height > 0.5 and 0.6 < width / height < 1.7:
+                    rects.append({"x0": rect.x0, "top": rect.y0, "x1": rect.x1, "bottom": rect.y1})
+            self._fitz_rects = rects
+        return self._fitz_rects
+
+    def release(self) -> None:
+        """Drop cached page data so memory stays bounded by one page."""
+        self._raw_words = None
+        self._rects = None
+        self._edges = None
+        self._lines = None
+        self._fitz_drawings = None
+        self._fitz_rects = None
+        close = getattr(self._plumber_page, "close", None)
+        if close is not None:
+            close()
+
+
+class DocumentContext:
+    """One pdfplumber handle and one PyMuPDF handle for a whole PDF.
+
+    The PyMuPDF document is opened on first use, so jobs that never need
+    vector drawings only pay for pdfplumber.
+    """
+
+    def __init__(self, pdf_path: str):
+        path = Path(pdf_path)
+        if not path.exists():
+            raise FileNotFoundError(f"PDF not found: {pdf_path}")
+        if path.suffix.lower() != ".pdf":
+            raise ValueError(f"Not a PDF file: {pdf_path}")
+
+        self.path = path
+        self._pdf = pdfplumber.open(str(path))
+        self._fitz_doc = None
+        self._pages: dict = {}
+
+    @property
+    def filename(self) -> str:
+        return self.path.name
+
+    @property
+    def total_pages(self) -> int:
+        return len(self._pdf.pages)
+
+    @property
+    def fitz_doc(self):
+        if self._fitz_doc is None:
+            self._fitz_doc = fitz.open(str(self.path))
+        return self._fitz_doc
+
+    def page(self, index: int) -> PageContext:
+        if index not in self._pages:
+            self._pages[index] = PageContext(self, index)
+        return self._pages[index]
+
+    def pages(self) -> Iterator[PageContext]:
+        for index in range(self.total_pages):
+            yield self.page(index)
+
+    def close(self) -> None:
+        self._pages.clear()
+        self._pdf.close()
+        if self._fitz_doc is not None:
+            self._fitz_doc.close()
+            self._fitz_doc = None
+
+    def __enter__(self) -> "DocumentContext":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
@@ -0,0 +1,226 @@
+"""Columnar, array-backed representation of page words.
+
+A dense sheet has tens of thousands of words. As ``ExtractedWord`` objects,
+every geometric check goes through attribute access and recomputes centres
+in Python. ``PageWords`` stores the same words as parallel NumPy columns
+(bbox, centres, page) plus an array of interned strings, so neighbourhood
+filters, distances and line grouping run as vector operations.
+
+The object API stays available as a thin view: ``word(i)`` returns an
+``ExtractedWord`` for row ``i``, created on first access and cached, so
+identity checks keep working and callers that need objects still get them.
+"""
+
+import sys
+from typing import Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from app.services.pid.models.instrument import ExtractedWord, Position
+
+# Widens the x band of ``in_box`` so float rounding never drops a word whose
+# bbox touches the query box
+_SLACK = 1e-6
+
+
+class PageWords:
+    """Words as parallel arrays; row ``i`` is the ``i``-th word in input order.
+
+    Columns: ``text`` (object array of interned strings), ``x0``, ``top``,
+    ``x1``, ``bottom``, ``cx``, ``cy`` (float64), ``page_index`` (int32) and
+    ``merged`` (bool).
+    """
+
+    def __init__(
+        self,
+        texts: Sequence[str],
+        x0: Sequence[float],
+        top: Sequence[float],
+        x1: Sequence[float],
+        bottom: Sequence[float],
+        page_index: Sequence[int],
+        merged: Optional[Sequence[bool]] = None,
+        views: Optional[Sequence[ExtractedWord]] = None,
+    ):
+        n = len(texts)
+        self.text = np.empty(n, dtype=object)
+        self.text[:] = [sys.intern(t) for t in texts]
+        self.x0 = np.asarray(x0, dtype=np.float64)
+        self.top = np.asarray(top, dtype=np.float64)
+        self.x1 = np.asarray(x1, dtype=np.float64)
+        self.bottom = np.asarray(bottom, dtype=np.float64)
+        self.cx = (self.x0 + self.x1) / 2
+        self.cy = (self.top + self.bottom) / 2
+        self.page_index = np.asarray(page_index, dtype=np.int32)
+        self.merged = np.zeros(n, dtype=bool) if merged is None else np.asarray(merged, dtype=bool)
+        self._views: List[Optional[ExtractedWord]] = list(views) if views is not None else [None] * n
+        self._x_order: Optional[np.ndarray] = None
+        self._x_sorted: Optional[np.ndarray] = None
+        self._max_width = float((self.x1 - self.x0).max()) if n else 0.0
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_words(cls, words: Iterable[ExtractedWord]) -> "PageWords":
+        """Columns over existing word objects, which become the row views."""
+        if isinstance(words, PageWords):
+            return words
+        words = list(words)
+        return cls(
+            [w.text for w in words],
+            [w.position.x0 for w in words],
+            [w.position.top for w in words],
+            [w.position.x1 for w in words],
+            [w.position.bottom for w in words],
+            [w.page_index for w in words],
+            merged=[w.merged for w in words],
+            views=words,
+        )
+
+    @classmethod
+    def from_records(cls, records: Sequence[dict], page_index: int) -> "PageWords":
+        """Columns from pdfplumber-style dicts (``text``, ``x0``, ``top``, ``x1``, ``bottom``)."""
+        return cls(
+            [r["text"] for r in records],
+            [float(r["x0"]) for r in records],
+            [float(r["top"]) for r in records],
+            [float(r["x1"]) for r in records],
+            [float(r["bottom"]) for r in records],
+            [page_index] * len(records),
+        )
+
+    # ------------------------------------------------------------------
+    # Object view
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    def __iter__(self) -> Iterator[ExtractedWord]:
+        return (self.word(i) for i in range(len(self.text)))
+
+    def __getitem__(self, i: int) -> ExtractedWord:
+        return self.word(i)
+
+    def word(self, i: int) -> ExtractedWord:
+        view = self._views[i]
+        if view is None:
+            view = ExtractedWord(
+                text=self.text[i],
+                position=Position(
+                    x0=float(self.x0[i]),
+                    top=float(self.top[i]),
+                    x1=float(self.x1[i]),
+                    bottom=float(self.bottom[i]),
+                ),
+                page_index=int(self.page_index[i]),
+                merged=bool(self.merged[i]),
+            )
+            self._views[i] = view
+        return view
+
+    def words(self, rows: Optional[Iterable[int]] = None) -> List[ExtractedWord]:
+        """Views for ``rows`` (all rows when None), in the given order."""
+        if rows is None:
+            rows = range(len(self.text))
+        return [self.word(int(i)) for i in rows]
+
+    # ------------------------------------------------------------------
+    # Vectorized queries
+    # ------------------------------------------------------------------
+
+    def distances_from(self, cx: float, cy: float, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Centre-to-centre distance from (cx, cy) to every row (or ``rows``)."""
+        if rows is None:
+            dx, dy = self.cx - cx, self.cy - cy
+        else:
+            dx, dy = self.cx[rows] - cx, self.cy[rows] - cy
+        return np.sqrt(dx * dx + dy * dy)
+
+    def in_box(
+        self,
+        x0: float,
+        top: float,
+        x1: float,
+        bottom: float,
+        page: Optional[int] = None,
+    ) -> np.ndarray:
+        """Rows whose bbox intersects the closed box, in ascending row order.
+
+        Uses an x0-sorted permutation to cut a narrow band before testing the
+        remaining edges, so a query costs O(log n + band) rather than O(n).
+        """
+        if not len(self.text) or x1 < x0 or bottom < top:
+            return np.empty(0, dtype=np.intp)
+        order, xs = self._by_x0()
+        lo = np.searchsorted(xs, x0 - self._max_width - _SLACK, side="left")
+        hi = np.searchsorted(xs, x1, side="right")
+        rows = order[lo:hi]
+        mask = (self.x1[rows] >= x0) & (self.top[rows] <= bottom) & (self.bottom[rows] >= top)
+        if page is not None:
+            mask &= self.page_index[rows] == page
+        return np.sort(rows[mask])
+
+    def baseline_groups(self, y_tol: float) -> List[np.ndarray]:
+        """Group rows into text lines, each sorted left to right.
+
+        Rows are ordered by (page, top, x0); a line starts at its first word
+        and takes every following word on the same page whose ``top`` is
+        within ``y_tol`` of it. Matches ``tag_detector._group_words_into_lines``.
+        """
+        n = len(self.text)
+        if not n:
+            return []
+        order = np.lexsort((self.x0, self.top, self.page_index))
+        tops = self.top[order]
+        pages = self.page_index[order]
+        page_ends = np.searchsorted(pages, pages, side="right")
+
+        groups = []
+        start = 0
+        while start < n:
+            end = line_end(tops, start, int(page_ends[start]), y_tol)
+            rows = order[start:end]
+            groups.append(rows[np.argsort(self.x0[rows], kind="stable")])
+            start = end
+        return groups
+
+    def _by_x0(self) -> tuple[np.ndarray, np.ndarray]:
+        if self._x_order is None:
+            self._x_order = np.argsort(self.x0, kind="stable")
+            self._x_sorted = self.x0[self._x_order]
+        return self._x_order, self._x_sorted
+
+
+def line_ends(tops: np.ndarray, y_tol: float) -> np.ndarray:
+    """``line_end(tops, i, len(tops), y_tol)`` for every ``i`` at once."""
+    n = len(tops)
+    rows = np.arange(n)
+    ends = np.maximum(np.searchsorted(tops, tops + y_tol, side="right"), rows + 1)
+    # Re-check the boundary with the exact scalar test; fix the rare misses
+    last_in = tops[ends - 1] - tops > y_tol
+    first_out = np.zeros(n, dtype=bool)
+    inside = ends < n
+    first_out[inside] = tops[ends[inside]] - tops[inside] <= y_tol
+    for i in np.flatnonzero(last_in | first_out):
+        ends[i] = line_end(tops, int(i), n, y_tol)
+    return ends
+
+
+def line_end(tops: np.ndarray, start: int, stop: int, y_tol: float) -> int:
+    """First index in ``(start, stop]`` with ``tops[k] - tops[start] > y_tol``.
+
+    ``tops`` must be sorted on ``[start, stop)``. The binary search gives the
+    boundary; the short walk afterwards applies the exact scalar test the
+    sequential loops used, so rounding never moves a word to another line.
+    """
+    anchor = tops[start]
+    end = start + int(np.searchsorted(tops[start:stop], anchor + y_tol, side="right"))
+    end = max(end, start + 1)
+    while end > start + 1 and tops[end - 1] - anchor > y_tol:
+        end -= 1
+    while end < stop and tops[end] - anchor <= y_tol:
+        end += 1
+    return end
@@ -0,0 +1,129 @@
+"""Content-addressed cache of per-page P&ID extraction results.
+
+Each page's ``PageResult`` is stored under a key built from the SHA-256 of the
+PDF bytes, the page index, the profile name, ``max_distance``, the digest of
+tag_profiles.yaml and ``PIPELINE_VERSION``. Changing any detector, the YAML or
+the file invalidates exactly the affected entries. A batch where one file out
+of fifty changed only reprocesses that file's pages.
+
+Only the per-page stages are cached; cross-sheet reconciliation, loops,
+hierarchy, validation and the optional LLM pass always run on the merged set.
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+from pathlib import Path
+from typing import Dict, Optional
+
+from app.config import settings
+from app.services.disk_cache import DiskCache, cache_key
+from app.services.pid.models.instrument import PageResult
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever a per-page stage changes its output (detectors, word merge,
+# title block, notes, symbology). Old entries are then simply never hit.
+PIPELINE_VERSION = "2026.10-2"
+
+# Marker stored for pages without vector text
+_NO_TEXT = b"no-text"
+
+_config_digests: Dict[str, tuple] = {}
+
+
+def config_digest(config_path: str) -> str:
+    """SHA-256 of the profile YAML, recomputed only when its mtime changes."""
+    mtime = os.path.getmtime(config_path)
+    cached = _config_digests.get(config_path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with open(config_path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    _config_digests[config_path] = (mtime, digest)
+    return digest
+
+
+class PidResultCache:
+    """Per-page ``PageResult`` cache on top of :class:`DiskCache`."""
+
+    def __init__(self, disk: DiskCache):
+        self.disk = disk
+
+    @property
+    def enabled(self) -> bool:
+        return self.disk.enabled
+
+    @staticmethod
+    def file_key(file_digest: str, profile_name: str, max_distance: float, config_path: str) -> str:
+        """Key prefix shared by every page of one file under one configuration."""
+        return cache_key(
+            "pid", PIPELINE_VERSION, file_digest, profile_name, float(max_distance),
+            config_digest(config_path),
+        )
+
+    def get_page_count(self, file_key: str) -> Optional[int]:
+        data = self.disk.get(cache_key(file_key, "pages"))
+        if data is None:
+            return None
+        try:
+            return int(data.decode("ascii"))
+        except ValueError:
+            return None
+
+    def set_page_count(self, file_key: str, total_pages: int) -> None:
+        self.disk.set(cache_key(file_key, "pages"), str(total_pages).encode("ascii"))
+
+    def get_page(self, file_key: str, page_index: int) -> tuple[bool, Optional[PageResult]]:
+        """Return ``(hit, page_result)``; ``page_result`` is None for pages without text."""
+        key = cache_key(file_key, page_index)
+        data = self.disk.get(key)
+        if data is None:
+            return False, None
+        if data == _NO_TEXT:
+            return True, None
+        try:
+            return True, pickle.loads(data)
+        except Exception as exc:
+            logger.warning("PID cache entry unreadable, recomputing: %s", exc)
+            self.disk.delete(key)
+            return False, None
+
+    def set_page(self, file_key: str, page_index: int, page_result: Optional[PageResult]) -> None:
+        data = _NO_TEXT if page_result is None else pickle.dumps(page_result, protocol=pickle.HIGHEST_PROTOCOL)
+        self.disk.set(cache_key(file_key, page_index), data)
+
+    def stats(self) -> Dict[str, float]:
+        return self.disk.stats()
+
+
+def rebase_page_result(page_result: PageResult, pdf_path: str) -> PageResult:
+    """Point a cached page result at the file it is being reused for.
+
+    Uploads land on fresh temp paths, so the stored ``source_pdf`` and the
+    ``"<stem> p.N"`` sheet-name fallback refer to an older copy of the file.
+    """
+    pdf_file = Path(pdf_path)
+    source_pdf = str(pdf_file.resolve())
+    page_result.source_pdf = source_pdf
+
+    metadata = page_result.metadata
+    fallback_sheet = f"{pdf_file.stem} p.{page_result.page_index + 1}"
+    for inst in page_result.instruments:
+        inst.source_pdf = source_pdf
+        if metadata is not None and not metadata.document_number:
+            inst.sheet_name = fallback_sheet
+    for eq in page_result.equipment:
+        eq.source_pdf = source_pdf
+    return page_result
+
+
+_cache: Optional[PidResultCache] = None
+
+
+def get_result_cache() -> PidResultCache:
+    global _cache
+    if _cache is None:
+        _cache = PidResultCache(DiskCache(settings.PID_CACHE_DIR, settings.PID_CACHE_MAX_MB * 1024 * 1024))
+    return _cache
@@ -6,6 +6,7 @@ from typing import Dict, List, Optional, Tuple
 
 from app.services.pid.models.instrument import Equipment, ExtractedWord, Instrument, Position
 from app.services.pid.core.document_scale import DocumentScale, _s
+from app.services.pid.core.spatial_index import SpatialIndex
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +35,7 @@ def detect_equipment(
     instruments: List[Instrument],
     scale: Optional[DocumentScale] = None,
     profile: Optional[dict] = None,
+    index: Optional[SpatialIndex] = None,
 ) -> List[Equipment]:
     """Detect equipment tags in extracted words.
 
@@ -47,10 +49,15 @@ def detect_equipment(
         instruments: Already detected instruments (to exclude).
         scale: DocumentScale for adaptive search radius.
         profile: Active tag profile (reads equipment_patterns and spatial settings).
+        index: SpatialIndex over ``words`` shared with the tag detector.
+            Built here when not provided.
 
     Returns:
         List of Equipment objects.
     """
+    if index is None:
+        index = SpatialIndex.from_words(words)
+
     instrument_tags = {inst.tag for inst in instruments}
     equipment_map: Dict[str, Equipment] = {}
 
@@ -90,7 +97,7 @@ def detect_equipment(
 
                     # Look for description nearby
                     desc = _find_equipment_description(
-                        word, words, search_radius=search_radius
+                        word, words, search_radius=search_radius, index=index
                     )
                     if desc:
                         equipment_map[equip_tag].description = desc
@@ -118,6 +125,8 @@ def associate_instruments_to_equipment(
         logger.warning("No equipment detected, skipping association")
         return
 
+    equipment_index = SpatialIndex.from_words(equipment)
+
     for inst in instruments:
         if not inst.position:
             continue
@@ -126,20 +135,19 @@ def associate_instruments_to_equipment(
         if inst.equipment_ref:
             continue
 
-        # Find nearest equipment on same page
+        # Find nearest equipment on same page (first in list order on ties)
         nearest = None
         nearest_dist = float("inf")
 
-        for equip in equipment:
-            if equip.page_index != inst.page_index:
-                continue
-            if not equip.position:
-                continue
-
-            dist = inst.position.distance_to(equip.position)
-            if dist < nearest_dist:
-                nearest_dist = dist
-                nearest = equip
+        found = equipment_index.nearest(
+            inst.position.center_x,
+            inst.position.center_y,
+            distance=lambda equip: inst.position.distance_to(equip.position),
+            max_distance=max_distance,
+            page=inst.page_index,
+        )
+        if found:
+            nearest_dist, nearest = found[0]
 
         if nearest and nearest_dist <= max_distance:
             inst.equipment_ref = nearest.tag
@@ -175,6 +183,7 @@ def _find_equipment_description(
     equip_word: ExtractedWord,
     all_words: List[ExtractedWord],
     search_radius: float = 100.0,
+    index: Optional[SpatialIndex] = None,
 ) -> str:
     """Find a description near an equipment tag.
 
@@ -184,10 +193,19 @@ def _find_equipment_description(
         equip_word: The word containing the equipment tag.
         all_words: All words on the page.
         search_radius: Search radius in PDF points (should be pre-scaled by caller).
+        index: Optional SpatialIndex over ``all_words`` to avoid a full scan.
     """
     if not equip_word.position:
         return ""
 
+    if index is not None:
+        all_words = index.within(
+            equip_word.position.center_x,
+            equip_word.position.center_y,
+            search_radius,
+            page=equip_word.page_index,
+        )
+
     nearby_words = []
     for w in all_words:
         if w.page_index != equip_word.page_index:
@@ -0,0 +1,235 @@
+"""Uniform-grid spatial index over page objects.
+
+Detectors used to answer every geometric question ("which words are beside
+this ISA type?", "which equipment is nearest?") with a full scan of the page,
+which is O(n²) on dense sheets. ``SpatialIndex`` buckets bounding boxes into a
+uniform grid once per page so those questions only touch nearby cells.
+
+Queries return *candidates* in insertion order: every item that could satisfy
+the geometric condition, possibly a few more. Callers keep applying their
+original predicate to the candidates, so results (including first-match and
+tie-break order) are identical to a full scan.
+"""
+
+import math
+from typing import Callable, Generic, Iterable, List, Optional, Tuple, TypeVar
+
+from app.services.pid.models.instrument import ExtractedWord, Position
+
+T = TypeVar("T")
+
+BBox = Tuple[float, float, float, float]  # (x0, top, x1, bottom)
+
+# Fallback cell size in PDF points when the index cannot infer one
+DEFAULT_CELL_SIZE = 50.0
+# Cap on cells per axis, so a huge query box never degenerates into a dense loop
+MAX_CELLS_PER_AXIS = 512
+# Query boxes are widened by this much so float rounding at the boundary
+# never drops an item the caller's exact predicate would accept
+_SLACK = 1e-6
+
+
+class SpatialIndex(Generic[T]):
+    """Grid of ``(page, col, row) → [item ids]`` over item bounding boxes.
+
+    Each item is registered in every cell its bbox overlaps, so both point
+    items (words, judged by their centre) and extended items (squares, line
+    segments) are found by box-intersection queries.
+    """
+
+    def __init__(
+        self,
+        items: Iterable[T],
+        bbox: Callable[[T], Optional[BBox]],
+        page: Callable[[T], int] = lambda item: 0,
+        cell_size: Optional[float] = None,
+    ):
+        self.items: List[T] = []
+        self._boxes: List[BBox] = []
+        self._pages: List[int] = []
+        for item in items:
+            box = bbox(item)
+            if box is None:
+                continue
+            self.items.append(item)
+            self._boxes.append(box)
+            self._pages.append(page(item))
+
+        self.cell_size = cell_size or self._auto_cell_size()
+        self._cells: dict = {}
+        for item_id, (x0, top, x1, bottom) in enumerate(self._boxes):
+            page_idx = self._pages[item_id]
+            for col in range(self._cell(x0), self._cell(x1) + 1):
+                for row in range(self._cell(top), self._cell(bottom) + 1):
+                    self._cells.setdefault((page_idx, col, row), []).append(item_id)
+
+        if self._boxes:
+            self._x_range = (min(b[0] for b in self._boxes), max(b[2] for b in self._boxes))
+            self._grid_bounds = (
+                min(key[1] for key in self._cells), max(key[1] for key in self._cells),
+                min(key[2] for key in self._cells), max(key[2] for key in self._cells),
+            )
+
+    # ------------------------------------------------------------------
+    # Factories
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_words(
+        cls,
+        words: Iterable[ExtractedWord],
+        cell_size: Optional[float] = None,
+    ) -> "SpatialIndex[ExtractedWord]":
+        """Index words (or anything with ``position`` and ``page_index``)."""
+        return cls(words, bbox=_position_bbox, page=lambda w: w.page_index, cell_size=cell_size)
+
+    @classmethod
+    def from_boxes(
+        cls,
+        boxes: Iterable[BBox],
+        cell_size: Optional[float] = None,
+    ) -> "SpatialIndex[BBox]":
+        """Index plain ``(x0, top, x1, bottom)`` tuples on a single page."""
+        return cls(boxes, bbox=lambda b: b, cell_size=cell_size)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def in_box(self, x0: float, top: float, x1: float, bottom: float, page: int = 0) -> List[T]:
+        """Items whose bbox intersects the closed box, in insertion order."""
+        if not self.items or x1 < x0 or bottom < top:
+            return []
+        x0, top, x1, bottom = x0 - _SLACK, top - _SLACK, x1 + _SLACK, bottom + _SLACK
+        ids = self._ids_in_box(x0, top, x1, bottom, page)
+        boxes = self._boxes
+        return [
+            self.items[i] for i in ids
+            if boxes[i][0] <= x1 and boxes[i][2] >= x0 and boxes[i][1] <= bottom and boxes[i][3] >= top
+        ]
+
+    def around(self, cx: float, cy: float, dx: float, dy: float, page: int = 0) -> List[T]:
+        """Items whose bbox comes within ``dx``/``dy`` of (cx, cy)."""
+        return self.in_box(cx - dx, cy - dy, cx + dx, cy + dy, page)
+
+    def within(self, cx: float, cy: float, radius: float, page: int = 0) -> List[T]:
+        """Candidates for a radius query around (cx, cy): the enclosing square."""
+        return self.around(cx, cy, radius, radius, page)
+
+    def same_baseline(self, cy: float, y_tol: float, page: int = 0) -> List[T]:
+        """Items whose vertical extent comes within ``y_tol`` of ``cy``."""
+        if not self.items:
+            return []
+        x_min, x_max = self._x_range
+        return self.in_box(x_min, cy - y_tol, x_max, cy + y_tol, page)
+
+    def nearest(
+        self,
+        cx: float,
+        cy: float,
+        distance: Callable[[T], float],
+        k: int = 1,
+        max_distance: float = math.inf,
+        page: int = 0,
+        accept: Optional[Callable[[T], bool]] = None,
+    ) -> List[Tuple[float, T]]:
+        """k nearest items by ``distance(item)``, ties broken by insertion order.
+
+        Searches rings of cells outward from (cx, cy) and stops once the ring
+        lies farther than the current k-th best, so the answer matches a full
+        scan with ``dist < best`` updates. ``distance`` must not be smaller
+        than the Euclidean distance from (cx, cy) to the item's bbox (true for
+        centre-to-centre distances).
+        """
+        if not self.items or k <= 0:
+            return []
+
+        best: List[Tuple[float, int]] = []
+        seen: set = set()
+        col0, row0 = self._cell(cx), self._cell(cy)
+        max_ring = self._max_ring(col0, row0)
+
+        for ring in range(max_ring + 1):
+            # Closest possible distance of anything first seen in this ring
+            ring_floor = max(0.0, (ring - 1) * self.cell_size)
+            if ring_floor > max_distance:
+                break
+            if len(best) >= k and ring_floor > best[k - 1][0]:
+                break
+            for key in self._ring_cells(col0, row0, ring, page):
+                for item_id in self._cells.get(key, ()):
+                    if item_id in seen:
+                        continue
+                    seen.add(item_id)
+                    item = self.items[item_id]
+                    if accept is not None and not accept(item):
+                        continue
+                    dist = distance(item)
+                    if dist <= max_distance:
+                        best.append((dist, item_id))
+            best.sort()
+            del best[k:]
+
+        return [(dist, self.items[item_id]) for dist, item_id in best]
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _cell(self, coord: float) -> int:
+        return math.floor(coord / self.cell_size)
+
+    def _ids_in_box(self, x0: float, top: float, x1: float, bottom: float, page: int) -> List[int]:
+        c0, c1 = self._cell(x0), self._cell(x1)
+        r0, r1 = self._cell(top), self._cell(bottom)
+        cells = self._cells
+        if (c1 - c0 + 1) * (r1 - r0 + 1) > len(cells):
+            # Query wider than the occupied grid: walk occupied cells instead
+            keys = [
+                key for key in cells
+                if key[0] == page and c0 <= key[1] <= c1 and r0 <= key[2] <= r1
+            ]
+        else:
+            keys = [(page, c, r) for c in range(c0, c1 + 1) for r in range(r0, r1 + 1)]
+
+        found: set = set()
+        for key in keys:
+            bucket = cells.get(key)
+            if bucket:
+                found.update(bucket)
+        return sorted(found)
+
+    def _ring_cells(self, col0: int, row0: int, ring: int, page: int):
+        if ring == 0:
+            yield (page, col0, row0)
+            return
+        for c in range(col0 - ring, col0 + ring + 1):
+            yield (page, c, row0 - ring)
+            yield (page, c, row0 + ring)
+        for r in range(row0 - ring + 1, row0 + ring):
+            yield (page, col0 - ring, r)
+            yield (page, col0 + ring, r)
+
+    def _max_ring(self, col0: int, row0: int) -> int:
+        col_min, col_max, row_min, row_max = self._grid_bounds
+        return max(abs(col0 - col_min), abs(col0 - col_max), abs(row0 - row_min), abs(row0 - row_max))
+
+    def _auto_cell_size(self) -> float:
+        if not self._boxes:
+            return DEFAULT_CELL_SIZE
+        width = max(b[2] for b in self._boxes) - min(b[0] for b in self._boxes)
+        height = max(b[3] for b in self._boxes) - min(b[1] for b in self._boxes)
+        # Aim for a handful of items per cell on a uniformly filled page
+        size = math.sqrt(max(width * height, 1.0) / len(self._boxes)) * 2.0
+        size = max(size, max(width, height) / MAX_CELLS_PER_AXIS, 1.0)
+        return size
+
+
+def _position_bbox(item) -> Optional[BBox]:
+    pos: Optional[Position] = getattr(item, "position", None)
+    if pos is None:
+        return None
+    return (pos.x0, pos.top, pos.x1, pos.bottom)
@@ -19,6 +19,7 @@ from typing import List, Optional, Tuple
 
 from app.services.pid.models.instrument import Instrument
 from app.services.pid.core.document_scale import DocumentScale, _s
+from app.services.pid.core.spatial_index import SpatialIndex
 
 logger = logging.getLogger(__name__)
 
@@ -237,6 +238,14 @@ def _classify_with_rects_and_lines(
                 cx = (x0 + x1) / 2
                 balloon_hlines.append((cx, y0, length))
 
+    # Index squares and h-lines once per page; each instrument then only
+    # checks the symbols around its own balloon.
+    square_index = SpatialIndex.from_boxes(dcs_squares) if dcs_squares else None
+    hline_index = SpatialIndex(
+        balloon_hlines,
+        bbox=lambda hl: (hl[0] - hl[2] / 2, hl[1], hl[0] + hl[2] / 2, hl[1]),
+    )
+
     classified_dcs = 0
     classified_room = 0
 
@@ -264,14 +273,14 @@ def _classify_with_rects_and_lines(
 
         # Check if inside a DCS square (proportional size check via inst_h)
         if dcs_squares:
-            in_square = _is_inside_square(cx, cy, dcs_squares, scale, inst_h=inst_h)
+            in_square = _is_inside_square(cx, cy, dcs_squares, scale, inst_h=inst_h, index=square_index)
         elif use_edge_squares:
             in_square = _instrument_in_square(cx, cy, inst_h, h_edges_pre, v_edges_pre)
         else:
             in_square = False
 
         # Check if has horizontal line through center
-        has_hline = _has_horizontal_line(cx, cy, balloon_hlines, scale, inst_h=inst_h)
+        has_hline = _has_horizontal_line(cx, cy, balloon_hlines, scale, inst_h=inst_h, index=hline_index)
 
         if in_square:
             inst.symbol = "square"
@@ -304,6 +313,7 @@ def _is_inside_square(
     squares: list,
     scale: Optional[DocumentScale] = None,
     inst_h: float = 0.0,
+    index: Optional[SpatialIndex] = None,
 ) -> bool:
     """Check if instrument center is inside a DCS square.
 
@@ -326,6 +336,9 @@ def _is_inside_square(
         max_side = _s(scale, 100.0)
         margin   = _s(scale, 10.0)
 
+    if index is not None:
+        squares = index.around(cx, cy, margin, margin)
+
     for sx0, stop, sx1, sbot in squares:
         w = sx1 - sx0
         h = sbot - stop
@@ -344,6 +357,7 @@ def _has_horizontal_line(
     hlines: list,
     scale: Optional[DocumentScale] = None,
     inst_h: float = 0.0,
+    index: Optional[SpatialIndex] = None,
 ) -> bool:
     """Check if a horizontal line passes through the center of the balloon.
 
@@ -357,6 +371,8 @@ def _has_horizontal_line(
     # Base tolerance: line centre within half the line's own length of cx.
     # This ensures the line physically spans the balloon.
     tolerance_y = max(inst_h * 1.5, _s(scale, 8.0)) if inst_h > 0 else _s(scale, 20.0)
+    if index is not None:
+        hlines = index.around(cx, cy, 0.0, tolerance_y)
     for lx, ly, length in hlines:
         if abs(lx - cx) < length / 2 and abs(ly - cy) < tolerance_y:
             return True
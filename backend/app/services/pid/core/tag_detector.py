@@ -4,6 +4,7 @@ import logging
 import re
 from typing import Dict, List, Optional, Set, Tuple
 
+import numpy as np
 import yaml
 
 from app.services.pid.models.instrument import (
@@ -15,6 +16,8 @@ from app.services.pid.models.instrument import (
     Position,
 )
 from app.services.pid.core.document_scale import DocumentScale, _s
+from app.services.pid.core.page_words import PageWords
+from app.services.pid.core.spatial_index import SpatialIndex
 
 logger = logging.getLogger(__name__)
 
@@ -44,6 +47,8 @@ def detect_tags(
     words: List[ExtractedWord],
     profile: Dict,
     scale: Optional[DocumentScale] = None,
+    index: Optional[SpatialIndex] = None,
+    columns: Optional[PageWords] = None,
 ) -> Tuple[List[Instrument], List[LineNumber]]:
     """Detect instrument tags and line numbers from extracted words.
 
@@ -56,7 +61,16 @@ def detect_tags(
         words: Extracted words with coordinates.
         profile: Active tag profile (from load_profile).
         scale: DocumentScale for adaptive spatial thresholds. None = use base values.
+        index: SpatialIndex over ``words``, shared with other detectors on the
+            same page. Built here when not provided.
+        columns: Columnar ``PageWords`` over ``words`` for the vectorized
+            fragment and balloon strategies. Built here when not provided.
     """
+    if index is None:
+        index = SpatialIndex.from_words(words)
+    if columns is None:
+        columns = PageWords.from_words(words)
+
     instruments = []
     line_numbers = []
     seen_tags: Set[str] = set()
@@ -81,11 +95,13 @@ def detect_tags(
             line_numbers.append(line)
 
     # Strategy 2: Horizontal fragments (adjacent words on same line)
-    fragment_instruments = _detect_fragmented_tags(words, profile, seen_tags, scale)
+    fragment_instruments = _detect_fragmented_tags(words, profile, seen_tags, scale, columns=columns)
     instruments.extend(fragment_instruments)
 
     # Strategy 3: Balloon detection (ISA type + nearby number)
-    balloon_instruments = _detect_balloon_tags(words, profile, seen_tags, scale)
+    balloon_instruments = _detect_balloon_tags(
+        words, profile, seen_tags, scale, index=index, columns=columns
+    )
     instruments.extend(balloon_instruments)
 
     # Remove lower-confidence duplicates that share the same logical tag
@@ -170,6 +186,8 @@ def _detect_balloon_tags(
     profile: Dict,
     already_found: Set[str],
     scale: Optional[DocumentScale] = None,
+    index: Optional[SpatialIndex] = None,
+    columns: Optional[PageWords] = None,
 ) -> List[Instrument]:
     """Detect tags where ISA type and number are grouped vertically in a balloon.
 
@@ -180,7 +198,12 @@ def _detect_balloon_tags(
     stacked vertically.
 
     All spatial tolerances are scaled by DocumentScale when provided.
+    With an ``index``, the context checks only visit nearby words. The
+    stacking search runs vectorized over ``columns`` (built from ``words``
+    when not given).
     """
+    if columns is None:
+        columns = PageWords.from_words(words)
     instruments = []
     has_area = profile.get("has_area_prefix", False)
 
@@ -194,19 +217,25 @@ def _detect_balloon_tags(
     h_tol_x = _s(scale, bal.get("h_tolerance_x", 55.0))
     h_tol_y = _s(scale, bal.get("h_tolerance_y", 18.0))
 
-    isa_type_words = []
-    for w in words:
-        text = w.text.strip()
+    isa_type_rows = []
+    for row, text in enumerate(columns.text):
+        text = text.strip()
         if text in ISA_TYPE_DESCRIPTIONS and len(text) >= 2:
+            w = columns.word(row)
             # Reject short ambiguous types unless they have a number nearby
-            if text in ("AT", "PI", "AI", "SI") and not _is_likely_instrument_context(w, words, scale):
+            if text in ("AT", "PI", "AI", "SI") and not _is_likely_instrument_context(w, words, scale, index=index):
                 continue
             # Reject if this ISA text is embedded inside a longer string (e.g. line tags)
-            if _is_part_of_line_tag(w, words, scale):
+            if _is_part_of_line_tag(w, words, scale, index=index):
                 continue
-            isa_type_words.append(w)
+            isa_type_rows.append(row)
 
-    for type_word in isa_type_words:
+    balloon_parts = np.fromiter(
+        (_is_balloon_part(text.strip()) for text in columns.text), dtype=bool, count=len(columns)
+    )
+
+    for type_row in isa_type_rows:
+        type_word = columns.word(type_row)
         isa_type = type_word.text.strip()
 
         # Font-relative thresholds: computed from the ISA type word's own text height
@@ -218,51 +247,26 @@ def _detect_balloon_tags(
         cx = type_word.position.center_x
         cy = type_word.position.center_y
 
-        stacked_words = []
-        for w in words:
-            if w.page_index != type_word.page_index or w is type_word:
-                continue
-
-            dx = w.position.center_x - cx
-            dy = w.position.center_y - cy
-
-            # Account for Upright/Portrait (stacked along Y) and Rotated/Landscape (stacked along X)
-            align_vert  = abs(dx) < v_tol_x and 0 < dy < v_tol_y   # Directly below
-            align_horiz = abs(dy) < h_tol_y and abs(dx) < h_tol_x  # Beside it
-
-            if align_vert or align_horiz:
-                stacked_words.append(w)
-
-        if not stacked_words:
+        reach_x = max(v_tol_x, h_tol_x)
+        rows = columns.in_box(
+            cx - reach_x, cy - h_tol_y, cx + reach_x, cy + max(v_tol_y, h_tol_y),
+            page=type_word.page_index,
+        )
+        rows = rows[rows != type_row]
+        dx = columns.cx[rows] - cx
+        dy = columns.cy[rows] - cy
+
+        # Account for Upright/Portrait (stacked along Y) and Rotated/Landscape (stacked along X)
+        align_vert  = (np.abs(dx) < v_tol_x) & (dy > 0) & (dy < v_tol_y)   # Directly below
+        align_horiz = (np.abs(dy) < h_tol_y) & (np.abs(dx) < h_tol_x)      # Beside it
+        # Only NUMERIC balloon parts (digits, x placeholders, dashes) and qualifiers
+        stacked = (align_vert | align_horiz) & balloon_parts[rows]
+        if not stacked.any():
             continue
 
-        # Sort by distance to the anchor (the ISA type)
-        stacked_words.sort(key=lambda w: type_word.position.distance_to(w.position))
-
-        # Filter to only keep NUMERIC balloon parts (digits, x placeholders, dashes)
-        # Reject: ISA types, pure letters, line tags, equipment names
-        valid_candidates = []
-        for w in stacked_words:
-            text = w.text.strip()
-            # Must contain at least one digit or 'x'/'X' and be short (balloon numbers are compact)
-            if len(text) > 10:
-                continue
-            # Skip if it's another ISA type
-            if text.upper() in ISA_TYPE_DESCRIPTIONS:
-                continue
-            # Skip lowercase single letters (CAD fragments); allow uppercase (qualifiers A/B/C)
-            if re.match(r'^[a-z]$', text):
-                continue
-            # Accept uppercase single letter qualifiers (e.g. A, B, C, D after number)
-            if re.match(r'^[A-Z]$', text):
-                valid_candidates.append(w)
-                continue
-            # Accept: numeric patterns like '057', 'xxx1', '00X2', '0902', etc.
-            # Also accept '+' which appears as a font-encoding artifact in CAD-generated PDFs
-            # (e.g. "05+1" instead of "051"). The '+' is stripped when building the tag number.
-            text_norm = text.replace("+", "")
-            if text_norm and re.match(r'^[\dxX][\dxXA-Za-z-]*$', text_norm):
-                valid_candidates.append(w)
+        # Sort by distance to the anchor (the ISA type), ties in page order
+        rows, dx, dy = rows[stacked], dx[stacked], dy[stacked]
+        valid_candidates = columns.words(rows[np.argsort(np.sqrt(dx * dx + dy * dy), kind="stable")])
 
         # Take ONLY the closest number parts (max 2) with tight chaining
         number_parts = []
@@ -358,11 +362,36 @@ def _detect_balloon_tags(
     return instruments
 
 
+def _is_balloon_part(text: str) -> bool:
+    """Whether a word can be part of a balloon number (or its qualifier letter).
+
+    Rejects ISA types, pure letters, line tags and equipment names.
+    """
+    # Must contain at least one digit or 'x'/'X' and be short (balloon numbers are compact)
+    if len(text) > 10:
+        return False
+    # Skip if it's another ISA type
+    if text.upper() in ISA_TYPE_DESCRIPTIONS:
+        return False
+    # Skip lowercase single letters (CAD fragments); allow uppercase (qualifiers A/B/C)
+    if re.match(r'^[a-z]$', text):
+        return False
+    # Accept uppercase single letter qualifiers (e.g. A, B, C, D after number)
+    if re.match(r'^[A-Z]$', text):
+        return True
+    # Accept: numeric patterns like '057', 'xxx1', '00X2', '0902', etc.
+    # Also accept '+' which appears as a font-encoding artifact in CAD-generated PDFs
+    # (e.g. "05+1" instead of "051"). The '+' is stripped when building the tag number.
+    text_norm = text.replace("+", "")
+    return bool(text_norm and re.match(r'^[\dxX][\dxXA-Za-z-]*$', text_norm))
+
+
 def _find_area_prefix(
     type_word: ExtractedWord,
     words: List[ExtractedWord],
     scale: Optional[DocumentScale] = None,
     search_radius: Optional[float] = None,
+    index: Optional[SpatialIndex] = None,
 ) -> str:
     """Find an area prefix horizontally near an ISA type word."""
     if search_radius is None:
@@ -371,6 +400,8 @@ def _find_area_prefix(
 
     cx = type_word.position.center_x
     cy = type_word.position.center_y
+    if index is not None:
+        words = index.around(cx, cy, search_radius, y_tol, page=type_word.page_index)
     for w in words:
         if w.page_index != type_word.page_index:
             continue
@@ -386,6 +417,7 @@ def _is_part_of_line_tag(
     word: ExtractedWord,
     all_words: List[ExtractedWord],
     scale: Optional[DocumentScale] = None,
+    index: Optional[SpatialIndex] = None,
 ) -> bool:
     """Check if an ISA type word is part of a line tag string (e.g. '6"-PR-21231-073-BA-IF').
 
@@ -403,6 +435,9 @@ def _is_part_of_line_tag(
     y_tol = word_h * 1.5   # same line: within 1.5 text heights vertically
     x_tol = word_h * 5.0   # adjacent in tag: within 5 text heights horizontally
 
+    if index is not None:
+        all_words = index.around(cx, cy, x_tol, y_tol, page=word.page_index)
+
     for w in all_words:
         if w.page_index != word.page_index or w is word:
             continue
@@ -472,6 +507,7 @@ def _is_likely_instrument_context(
     word: ExtractedWord,
     all_words: List[ExtractedWord],
     scale: Optional[DocumentScale] = None,
+    index: Optional[SpatialIndex] = None,
 ) -> bool:
     """Check if a short ISA-like word is likely an instrument tag, not English text.
 
@@ -479,6 +515,11 @@ def _is_likely_instrument_context(
     """
     radius = _s(scale, 50.0)
 
+    if index is not None:
+        all_words = index.within(
+            word.position.center_x, word.position.center_y, radius, page=word.page_index
+        )
+
     for w in all_words:
         if w.page_index != word.page_index:
             continue
@@ -544,14 +585,18 @@ def _detect_fragmented_tags(
     profile: Dict,
     already_found: Set[str],
     scale: Optional[DocumentScale] = None,
+    columns: Optional[PageWords] = None,
 ) -> List[Instrument]:
     """Detect tags split across multiple adjacent words on the same line."""
     instruments = []
 
-    sorted_words = sorted(
-        words, key=lambda w: (w.page_index, w.position.top, w.position.x0)
-    )
-    lines = _group_words_into_lines(sorted_words, y_tolerance=_s(scale, 5.0))
+    if columns is not None:
+        lines = [columns.words(rows) for rows in columns.baseline_groups(_s(scale, 5.0))]
+    else:
+        sorted_words = sorted(
+            words, key=lambda w: (w.page_index, w.position.top, w.position.x0)
+        )
+        lines = _group_words_into_lines(sorted_words, y_tolerance=_s(scale, 5.0))
 
     tag_pattern = re.compile(profile["tag_pattern"])
     max_gap = _s(scale, 15.0)
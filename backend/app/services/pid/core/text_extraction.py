@@ -1,14 +1,26 @@
 """Extract words with coordinates from PDF pages, handling fragmented text."""
 
 import logging
-from typing import List, Optional
+from typing import List, Optional, Union
 
+import numpy as np
 import pdfplumber
 
+from app.services.pid.core.page_context import (
+    WORD_X_TOLERANCE,
+    WORD_Y_TOLERANCE,
+    DocumentContext,
+    PageContext,
+)
+from app.services.pid.core.page_words import PageWords, line_ends
 from app.services.pid.models.instrument import ExtractedWord, Position
 
 logger = logging.getLogger(__name__)
 
+# Line windows up to this many words are scanned in plain Python; longer
+# ones use a vectorized gap test (NumPy call overhead dominates below this)
+_SCAN_WINDOW = 32
+
 
 def extract_words(
     pdf_path: str,
@@ -40,70 +52,11 @@ def extract_words(
             page = pdf.pages[page_idx]
             raw_words = page.extract_words(
                 keep_blank_chars=False,
-                x_tolerance=2.0,
-                y_tolerance=2.0,
+                x_tolerance=WORD_X_TOLERANCE,
+                y_tolerance=WORD_Y_TOLERANCE,
             )
 
-            # Surgical Merge Pass: Heal ONLY exploded single characters from CAD.
-            # Some CAD exports write each letter as a separate text object ('T','I' -> 'TI').
-            # We ONLY merge words where BOTH the previous and current are very short (<=2 chars)
-            # and they sit on the exact same line with a tiny gap. This prevents merging
-            # multi-character words like 'PDI', 'NOTA', or line tags.
-            raw_words.sort(key=lambda w: (round(float(w["top"]) / 3.0) * 3.0, float(w["x0"])))
-
-            healed_words = []
-            for w in raw_words:
-                text = w.get("text", "").strip()
-                if not text:
-                    continue
-
-                if not healed_words:
-                    healed_words.append(dict(w))
-                    continue
-
-                prev = healed_words[-1]
-                prev_text = prev.get("text", "").strip()
-
-                # ONLY merge if CURRENT word is a single character (the exploded piece)
-                if len(text) <= 2:
-                    top1, bot1 = float(prev["top"]), float(prev["bottom"])
-                    top2, bot2 = float(w["top"]), float(w["bottom"])
-
-                    # Y overlap check (same baseline)
-                    overlap = min(bot1, bot2) - max(top1, top2)
-
-                    if overlap > 0:
-                        gap = float(w["x0"]) - float(prev["x1"])
-                        # Very tight gap only (max 3px) to avoid cross-column merges
-                        if -2.0 <= gap <= 3.0:
-                            prev["text"] = prev_text + text
-                            prev["x1"] = max(float(prev["x1"]), float(w["x1"]))
-                            prev["top"] = min(top1, top2)
-                            prev["bottom"] = max(bot1, bot2)
-                            continue
-
-                healed_words.append(dict(w))
-
-            page_words = []
-            for w in healed_words:
-                text = w.get("text", "").strip()
-                if not text:
-                    continue
-
-                word = ExtractedWord(
-                    text=text,
-                    position=Position(
-                        x0=float(w["x0"]),
-                        top=float(w["top"]),
-                        x1=float(w["x1"]),
-                        bottom=float(w["bottom"]),
-                    ),
-                    page_index=page_idx,
-                )
-                page_words.append(word)
-
-            # Merge adjacent words that are likely part of the same tag
-            merged = _merge_adjacent_words(page_words, merge_gap_x, merge_gap_y)
+            merged = _build_page_words(raw_words, page_idx, merge_gap_x, merge_gap_y)
             all_words.extend(merged)
 
             logger.debug(
@@ -115,8 +68,82 @@ def extract_words(
     return all_words
 
 
+def extract_page_words(
+    page: PageContext,
+    merge_gap_x: float = 5.0,
+    merge_gap_y: float = 3.0,
+) -> List[ExtractedWord]:
+    """Extract words from an already-open page context.
+
+    Same output as ``extract_words(pdf_path, [page.index], ...)`` but reuses
+    the page's cached pdfplumber words instead of reopening the file.
+    """
+    merged = _build_page_words(page.raw_words, page.index, merge_gap_x, merge_gap_y)
+    logger.debug(
+        f"Page {page.index}: {len(page.raw_words)} raw words -> "
+        f"{len(merged)} after merge"
+    )
+    return merged
+
+
+def _build_page_words(
+    raw_words: List[dict],
+    page_idx: int,
+    merge_gap_x: float,
+    merge_gap_y: float,
+) -> List[ExtractedWord]:
+    """Heal exploded CAD characters and merge adjacent fragments for one page."""
+    # Surgical Merge Pass: Heal ONLY exploded single characters from CAD.
+    # Some CAD exports write each letter as a separate text object ('T','I' -> 'TI').
+    # We ONLY merge words where BOTH the previous and current are very short (<=2 chars)
+    # and they sit on the exact same line with a tiny gap. This prevents merging
+    # multi-character words like 'PDI', 'NOTA', or line tags.
+    ordered = sorted(raw_words, key=lambda w: (round(float(w["top"]) / 3.0) * 3.0, float(w["x0"])))
+
+    healed_words = []
+    for w in ordered:
+        text = w.get("text", "").strip()
+        if not text:
+            continue
+
+        if not healed_words:
+            healed_words.append(dict(w))
+            continue
+
+        prev = healed_words[-1]
+        prev_text = prev.get("text", "").strip()
+
+        # ONLY merge if CURRENT word is a single character (the exploded piece)
+        if len(text) <= 2:
+            top1, bot1 = float(prev["top"]), float(prev["bottom"])
+            top2, bot2 = float(w["top"]), float(w["bottom"])
+
+            # Y overlap check (same baseline)
+            overlap = min(bot1, bot2) - max(top1, top2)
+
+            if overlap > 0:
+                gap = float(w["x0"]) - float(prev["x1"])
+                # Very tight gap only (max 3px) to avoid cross-column merges
+                if -2.0 <= gap <= 3.0:
+                    prev["text"] = prev_text + text
+                    prev["x1"] = max(float(prev["x1"]), float(w["x1"]))
+                    prev["top"] = min(top1, top2)
+                    prev["bottom"] = max(bot1, bot2)
+                    continue
+
+        healed_words.append(dict(w))
+
+    healed_words = [w for w in healed_words if w.get("text", "").strip()]
+    for w in healed_words:
+        w["text"] = w["text"].strip()
+    page_words = PageWords.from_records(healed_words, page_idx)
+
+    # Merge adjacent words that are likely part of the same tag
+    return _merge_adjacent_words(page_words, merge_gap_x, merge_gap_y)
+
+
 def _merge_adjacent_words(
-    words: List[ExtractedWord],
+    words: Union[List[ExtractedWord], PageWords],
     max_gap_x: float,
     max_gap_y: float,
 ) -> List[ExtractedWord]:
@@ -127,55 +154,69 @@ def _merge_adjacent_words(
     - Horizontal gap is less than max_gap_x
     - The combined text looks like it could be a tag (contains alphanumeric + dashes)
 
+    Runs on the columnar ``PageWords`` form: the line window of each word is
+    found by binary search and the next mergeable fragment by a vectorized
+    gap test, instead of walking word objects one by one.
+
     Args:
-        words: Words to process.
+        words: Words to process (objects or columns).
         max_gap_x: Maximum horizontal gap to merge.
         max_gap_y: Maximum vertical difference for same line.
 
     Returns:
         List with adjacent words merged where appropriate.
     """
-    if not words:
+    if not len(words):
         return []
 
-    # Sort by vertical position (top), then horizontal (x0)
-    sorted_words = sorted(words, key=lambda w: (w.position.top, w.position.x0))
+    columns = PageWords.from_words(words)
+
+    # Sort by vertical position (top), then horizontal (x0); lexsort is stable
+    order = np.lexsort((columns.x0, columns.top))
+    x0s = columns.x0[order]
+    x0_list = x0s.tolist()
+    x1_list = columns.x1[order].tolist()
+    bottom_list = columns.bottom[order].tolist()
+    # Words on the same line as word i: tops within max_gap_y of its top
+    ends = line_ends(columns.top[order], max_gap_y).tolist()
+    n = len(order)
 
     result = []
     i = 0
 
-    while i < len(sorted_words):
-        current = sorted_words[i]
-        merged_text = current.text
-        merged_x1 = current.position.x1
-        merged_bottom = current.position.bottom
-        was_merged = False
-
-        # Look ahead for adjacent words on same line
+    while i < n:
+        end = ends[i]
+        parts = [i]
+        merged_x1 = x1_list[i]
+        merged_bottom = bottom_list[i]
         j = i + 1
-        while j < len(sorted_words):
-            next_word = sorted_words[j]
-
-            # Check if on same line (vertical overlap)
-            vertical_diff = abs(next_word.position.top - current.position.top)
-            if vertical_diff > max_gap_y:
-                break  # Past this line, stop looking
-
-            # Check horizontal gap
-            gap = next_word.position.x0 - merged_x1
-            if gap < 0 or gap > max_gap_x:
-                j += 1
-                continue
-
-            # Merge
-            merged_text += next_word.text
-            merged_x1 = next_word.position.x1
-            merged_bottom = max(merged_bottom, next_word.position.bottom)
-            was_merged = True
-            j += 1
-
-        merged_word = ExtractedWord(
-            text=merged_text,
+        while j < end:
+            # Next fragment starting within max_gap_x of the merged right edge
+            if end - j > _SCAN_WINDOW:
+                gaps = x0s[j:end] - merged_x1
+                hits = np.flatnonzero((gaps >= 0) & (gaps <= max_gap_x))
+                k = j + int(hits[0]) if len(hits) else end
+            else:
+                k = j
+                while k < end and not 0 <= x0_list[k] - merged_x1 <= max_gap_x:
+                    k += 1
+            if k == end:
+                break
+            parts.append(k)
+            merged_x1 = x1_list[k]
+            merged_bottom = max(merged_bottom, bottom_list[k])
+            j = k + 1
+
+        current = columns.word(int(order[i]))
+        if len(parts) == 1:
+            if current.merged:
+                current = ExtractedWord(current.text, current.position, current.page_index)
+            result.append(current)
+            i += 1
+            continue
+
+        result.append(ExtractedWord(
+            text="".join(columns.text[order[k]] for k in parts),
             position=Position(
                 x0=current.position.x0,
                 top=current.position.top,
@@ -183,16 +224,12 @@ def _merge_adjacent_words(
                 bottom=merged_bottom,
             ),
             page_index=current.page_index,
-            merged=was_merged,
-        )
-        result.append(merged_word)
+            merged=True,
+        ))
 
         # Also keep original unmerged words so tag detector can try both
-        if was_merged:
-            for k in range(i, j):
-                result.append(sorted_words[k])
-
-        i = j if was_merged else i + 1
+        result.extend(columns.words(order[i:end]))
+        i = end
 
     return result
 
@@ -217,22 +254,15 @@ def extract_words_by_zone(
     Returns:
         Dict mapping (row, col) zone tuple to list of ExtractedWord.
     """
-    words = extract_words(
-        pdf_path,
-        page_indices=[page_index],
-        merge_gap_x=merge_gap_x,
-        merge_gap_y=merge_gap_y,
-    )
+    with DocumentContext(pdf_path) as doc:
+        page = doc.page(page_index)
+        words = extract_page_words(page, merge_gap_x=merge_gap_x, merge_gap_y=merge_gap_y)
+        page_width = page.width
+        page_height = page.height
 
     if not words:
         return {}
 
-    # Get page dimensions
-    with pdfplumber.open(pdf_path) as pdf:
-        page = pdf.pages[page_index]
-        page_width = float(page.width)
-        page_height = float(page.height)
-
     zone_width = page_width / zones
     zone_height = page_height / zones
 
@@ -1,13 +1,36 @@
 """Export extraction results to CSV."""
 
 import csv
+import io
 import logging
 from pathlib import Path
+from typing import Iterator, List
 
 from app.services.pid.models.instrument import ExtractionResult
 
 logger = logging.getLogger(__name__)
 
+CSV_HEADERS = [
+    "Tag Number",
+    "ISA Type",
+    "Description",
+    "Symbol",
+    "Classification",
+    "Physical?",
+    "Furnished by Package?",
+    "Area",
+    "Tag Number (Num)",
+    "Qualifier",
+    "Loop ID",
+    "Sheet",
+    "Source PDF",
+    "Confidence",
+    "Notes",
+]
+
+# Rows encoded per chunk when streaming
+STREAM_ROWS_PER_CHUNK = 500
+
 
 def export_to_csv(result: ExtractionResult, output_path: str) -> str:
     """Export instrument list to a CSV file.
@@ -21,50 +44,58 @@ def export_to_csv(result: ExtractionResult, output_path: str) -> str:
     """
     path = Path(output_path)
 
-    headers = [
-        "Tag Number",
-        "ISA Type",
-        "Description",
-        "Symbol",
-        "Classification",
-        "Physical?",
-        "Furnished by Package?",
-        "Area",
-        "Tag Number (Num)",
-        "Qualifier",
-        "Loop ID",
-        "Sheet",
-        "Source PDF",
-        "Confidence",
-        "Notes",
-    ]
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_HEADERS)
+        writer.writerows(_instrument_rows(result))
+
+    logger.info(f"CSV exported to {path.absolute()}")
+    return str(path.absolute())
+
 
+def iter_csv(result: ExtractionResult, rows_per_chunk: int = STREAM_ROWS_PER_CHUNK) -> Iterator[bytes]:
+    """Yield the same CSV as ``export_to_csv`` as UTF-8 (with BOM) byte chunks.
+
+    Rows are encoded as they are produced, so a ``StreamingResponse`` can send
+    the file without building it in memory or on disk.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff")
+    writer.writerow(CSV_HEADERS)
+
+    for count, row in enumerate(_instrument_rows(result), 1):
+        writer.writerow(row)
+        if count % rows_per_chunk == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _instrument_rows(result: ExtractionResult) -> Iterator[List[str]]:
     sorted_instruments = sorted(
         result.instruments,
         key=lambda i: (i.area or "", i.isa_type, i.tag_number or "", i.qualifier),
     )
 
-    with open(path, "w", newline="", encoding="utf-8-sig") as f:
-        writer = csv.writer(f)
-        writer.writerow(headers)
-        for inst in sorted_instruments:
-            writer.writerow([
-                inst.tag,
-                inst.isa_type,
-                inst.isa_description,
-                inst.symbol,
-                inst.classification,
-                "Yes" if inst.is_physical else "No",
-                "Yes" if getattr(inst, "furnished_by_package", False) else "No",
-                inst.area,
-                inst.tag_number,
-                inst.qualifier,
-                inst.loop_id,
-                inst.sheet_name or str(inst.page_index + 1),
-                Path(getattr(inst, "source_pdf", "")).name if getattr(inst, "source_pdf", "") else "",
-                f"{inst.confidence:.0%}",
-                "; ".join(inst.notes) if inst.notes else "",
-            ])
-
-    logger.info(f"CSV exported to {path.absolute()}")
-    return str(path.absolute())
+    for inst in sorted_instruments:
+        yield [
+            inst.tag,
+            inst.isa_type,
+            inst.isa_description,
+            inst.symbol,
+            inst.classification,
+            "Yes" if inst.is_physical else "No",
+            "Yes" if getattr(inst, "furnished_by_package", False) else "No",
+            inst.area,
+            inst.tag_number,
+            inst.qualifier,
+            inst.loop_id,
+            inst.sheet_name or str(inst.page_index + 1),
+            Path(getattr(inst, "source_pdf", "")).name if getattr(inst, "source_pdf", "") else "",
+            f"{inst.confidence:.0%}",
+            "; ".join(inst.notes) if inst.notes else "",
+        ]
@@ -1,8 +1,21 @@
-"""Export extraction results to Excel (.xlsx) with professional formatting."""
+"""Export extraction results to Excel (.xlsx) with professional formatting.
 
+Workbooks are built in openpyxl's write-only mode: rows are serialized as
+they are appended instead of being kept as cell objects, so memory stays flat
+for consolidated batches with tens of thousands of instruments. Column widths,
+filters and frozen headers are set before the rows, as write-only requires;
+every cell style (fonts, fills, borders, alignment) is kept.
+"""
+
+import io
 import logging
+import queue
+import threading
 from pathlib import Path
+from typing import BinaryIO, Iterator, List, Optional, Union
+
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
 from openpyxl.utils import get_column_letter
 
@@ -28,6 +41,14 @@ THIN_BORDER = Border(
     bottom=Side(style="thin"),
 )
 
+PHYSICAL_FILL = PatternFill(start_color="E2EFDA", end_color="E2EFDA", fill_type="solid")  # Greenish
+DCS_FILL = PatternFill(start_color="FCE4EC", end_color="FCE4EC", fill_type="solid")  # Reddish
+SUMMARY_FONT = Font(bold=True)
+
+# Chunk size and number of buffered chunks when streaming a workbook
+STREAM_CHUNK_SIZE = 256 * 1024
+_STREAM_QUEUE_CHUNKS = 8
+
 
 def export_to_excel(
     result: ExtractionResult,
@@ -48,7 +69,19 @@ def export_to_excel(
     Returns:
         Absolute path to the created file.
     """
-    wb = Workbook()
+    path = Path(output_path)
+    write_excel(result, str(path), include_support_sheets=include_support_sheets)
+    logger.info(f"Excel exported to {path.absolute()}")
+    return str(path.absolute())
+
+
+def write_excel(
+    result: ExtractionResult,
+    target: Union[str, BinaryIO],
+    include_support_sheets: bool = True,
+) -> None:
+    """Write the workbook to a path or a binary stream (need not be seekable)."""
+    wb = Workbook(write_only=True)
 
     # Sheet 1: Instrument Index
     _create_instrument_sheet(wb, result)
@@ -63,17 +96,128 @@ def export_to_excel(
         # Sheet 4: Drawing Info
         _create_metadata_sheet(wb, result)
 
-    # Save
-    path = Path(output_path)
-    wb.save(str(path))
-    logger.info(f"Excel exported to {path.absolute()}")
-    return str(path.absolute())
+    wb.save(target)
+
+
+def iter_excel(
+    result: ExtractionResult,
+    include_support_sheets: bool = True,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """Yield the .xlsx bytes while the workbook is being written.
+
+    The workbook is written by a helper thread into a bounded queue, so the
+    caller (e.g. a ``StreamingResponse``) sends bytes as soon as they exist
+    and no output file is needed. If the iterator is closed early the rest of
+    the output is discarded; rows are already serialized by then, so only the
+    final zip copy remains.
+    """
+    pipe = _ChunkPipe(chunk_size)
+
+    def produce() -> None:
+        try:
+            write_excel(result, pipe, include_support_sheets=include_support_sheets)
+        except BaseException as exc:  # surfaced to the consumer
+            pipe.error = exc
+        finally:
+            pipe.close()
+
+    writer = threading.Thread(target=produce, name="xlsx-stream", daemon=True)
+    writer.start()
+    try:
+        yield from pipe.chunks()
+    finally:
+        pipe.cancel()
+        writer.join()
+
+
+class _ChunkPipe(io.RawIOBase):
+    """Write-only, unseekable file object that hands fixed-size chunks to a reader."""
+
+    _DONE = object()
+
+    def __init__(self, chunk_size: int):
+        self._chunk_size = chunk_size
+        self._buffer = bytearray()
+        self._queue: queue.Queue = queue.Queue(maxsize=_STREAM_QUEUE_CHUNKS)
+        self.error: Optional[BaseException] = None
+        self._cancelled = threading.Event()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        if self._cancelled.is_set():
+            return len(data)
+        self._buffer += data
+        while len(self._buffer) >= self._chunk_size:
+            self._put(bytes(self._buffer[:self._chunk_size]))
+            del self._buffer[:self._chunk_size]
+        return len(data)
+
+    def close(self) -> None:
+        if not self.closed:
+            if self._buffer and not self._cancelled.is_set():
+                self._put(bytes(self._buffer))
+            self._buffer.clear()
+            self._put(self._DONE)
+        super().close()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+        # Unblock a writer waiting on a full queue
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+    def chunks(self) -> Iterator[bytes]:
+        while True:
+            item = self._queue.get()
+            if item is self._DONE:
+                break
+            yield item
+        if self.error is not None:
+            raise self.error
+
+    def _put(self, item) -> None:
+        while not self._cancelled.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+
+def _styled_cell(ws, value, font=None, fill=None, alignment=None, border=None) -> WriteOnlyCell:
+    cell = WriteOnlyCell(ws, value=value)
+    if font is not None:
+        cell.font = font
+    if fill is not None:
+        cell.fill = fill
+    if alignment is not None:
+        cell.alignment = alignment
+    if border is not None:
+        cell.border = border
+    return cell
+
+
+def _header_row(ws, headers: List[str]) -> list:
+    return [
+        _styled_cell(ws, header, font=HEADER_FONT, fill=HEADER_FILL, alignment=HEADER_ALIGNMENT, border=THIN_BORDER)
+        for header in headers
+    ]
+
+
+def _set_column_widths(ws, col_widths: List[int]) -> None:
+    for col, width in enumerate(col_widths, 1):
+        ws.column_dimensions[get_column_letter(col)].width = width
 
 
 def _create_instrument_sheet(wb: Workbook, result: ExtractionResult) -> None:
     """Create the main Instrument Index sheet."""
-    ws = wb.active
-    ws.title = "Instrument Index"
+    ws = wb.create_sheet("Instrument Index")
 
     # Headers
     headers = [
@@ -99,21 +243,22 @@ def _create_instrument_sheet(wb: Workbook, result: ExtractionResult) -> None:
         "Notes",
     ]
 
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.font = HEADER_FONT
-        cell.fill = HEADER_FILL
-        cell.alignment = HEADER_ALIGNMENT
-        cell.border = THIN_BORDER
-
-    # Data rows
     # Sort instruments: by area, then by ISA type, then by tag number
     sorted_instruments = sorted(
         result.instruments,
         key=lambda i: (i.area or "", i.isa_type, i.tag_number or "", i.qualifier),
     )
 
-    for row_idx, inst in enumerate(sorted_instruments, 2):
+    # Column widths, auto-filter and frozen header go before any row
+    col_widths = [22, 10, 35, 12, 22, 10, 18, 12, 18, 10, 15, 12, 18, 14, 20, 22, 30, 18, 12, 40]
+    _set_column_widths(ws, col_widths)
+    ws.auto_filter.ref = f"A1:{get_column_letter(len(headers))}{len(sorted_instruments) + 1}"
+    ws.freeze_panes = "A2"
+
+    ws.append(_header_row(ws, headers))
+
+    # Data rows
+    for inst in sorted_instruments:
         data = [
             inst.tag,
             inst.isa_type,
@@ -138,33 +283,19 @@ def _create_instrument_sheet(wb: Workbook, result: ExtractionResult) -> None:
             "; ".join(inst.notes) if inst.notes else "",
         ]
 
+        row = []
         for col, value in enumerate(data, 1):
-            cell = ws.cell(row=row_idx, column=col, value=value)
-            cell.font = DATA_FONT
-            cell.alignment = DATA_ALIGNMENT
-            cell.border = THIN_BORDER
-
+            fill = None
             # Highlight low confidence
             if col == 19 and inst.confidence < 0.5:
-                cell.fill = WARNING_FILL
-
+                fill = WARNING_FILL
             # Color Physical vs DCS
             if col == 6:
-                if inst.is_physical:
-                    cell.fill = PatternFill(start_color="E2EFDA", end_color="E2EFDA", fill_type="solid") # Greenish
-                else:
-                    cell.fill = PatternFill(start_color="FCE4EC", end_color="FCE4EC", fill_type="solid") # Reddish
-
-    # Column widths
-    col_widths = [22, 10, 35, 12, 22, 10, 18, 12, 18, 10, 15, 12, 18, 14, 20, 22, 30, 18, 12, 40]
-    for col, width in enumerate(col_widths, 1):
-        ws.column_dimensions[get_column_letter(col)].width = width
-
-    # Auto-filter
-    ws.auto_filter.ref = f"A1:{get_column_letter(len(headers))}{len(sorted_instruments) + 1}"
-
-    # Freeze header row
-    ws.freeze_panes = "A2"
+                fill = PHYSICAL_FILL if inst.is_physical else DCS_FILL
+            row.append(_styled_cell(
+                ws, value, font=DATA_FONT, fill=fill, alignment=DATA_ALIGNMENT, border=THIN_BORDER,
+            ))
+        ws.append(row)
 
 
 def _create_loops_sheet(wb: Workbook, result: ExtractionResult) -> None:
@@ -172,17 +303,16 @@ def _create_loops_sheet(wb: Workbook, result: ExtractionResult) -> None:
     ws = wb.create_sheet("Loops")
 
     headers = ["Loop ID", "Instruments", "Complete?", "Missing"]
+    sorted_loops = sorted(result.loops, key=lambda l: l.loop_id)
 
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.font = HEADER_FONT
-        cell.fill = HEADER_FILL
-        cell.alignment = HEADER_ALIGNMENT
-        cell.border = THIN_BORDER
+    col_widths = [15, 60, 12, 40]
+    _set_column_widths(ws, col_widths)
+    ws.auto_filter.ref = f"A1:D{len(sorted_loops) + 1}"
+    ws.freeze_panes = "A2"
 
-    sorted_loops = sorted(result.loops, key=lambda l: l.loop_id)
+    ws.append(_header_row(ws, headers))
 
-    for row_idx, loop in enumerate(sorted_loops, 2):
+    for loop in sorted_loops:
         data = [
             loop.loop_id,
             ", ".join(loop.instruments),
@@ -190,21 +320,13 @@ def _create_loops_sheet(wb: Workbook, result: ExtractionResult) -> None:
             ", ".join(loop.missing) if loop.missing else "",
         ]
 
+        row = []
         for col, value in enumerate(data, 1):
-            cell = ws.cell(row=row_idx, column=col, value=value)
-            cell.font = DATA_FONT
-            cell.alignment = DATA_ALIGNMENT
-            cell.border = THIN_BORDER
-
-            if col == 3 and not loop.is_complete:
-                cell.fill = WARNING_FILL
-
-    col_widths = [15, 60, 12, 40]
-    for col, width in enumerate(col_widths, 1):
-        ws.column_dimensions[get_column_letter(col)].width = width
-
-    ws.auto_filter.ref = f"A1:D{len(sorted_loops) + 1}"
-    ws.freeze_panes = "A2"
+            fill = WARNING_FILL if col == 3 and not loop.is_complete else None
+            row.append(_styled_cell(
+                ws, value, font=DATA_FONT, fill=fill, alignment=DATA_ALIGNMENT, border=THIN_BORDER,
+            ))
+        ws.append(row)
 
 
 def _create_validation_sheet(wb: Workbook, result: ExtractionResult) -> None:
@@ -213,50 +335,33 @@ def _create_validation_sheet(wb: Workbook, result: ExtractionResult) -> None:
 
     headers = ["Type", "Message"]
 
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.font = HEADER_FONT
-        cell.fill = HEADER_FILL
-        cell.alignment = HEADER_ALIGNMENT
-        cell.border = THIN_BORDER
-
-    row = 2
-
-    # Summary row
-    ws.cell(row=row, column=1, value="SUMMARY").font = Font(bold=True)
-    ws.cell(
-        row=row, column=2,
-        value=f"{len(result.instruments)} instruments, "
-              f"{len(result.loops)} loops, "
-              f"{len(result.warnings)} warnings, "
-              f"{len(result.errors)} errors"
-    ).font = Font(bold=True)
-    row += 1
-
-    # Errors first
-    for error in result.errors:
-        cell_type = ws.cell(row=row, column=1, value="ERROR")
-        cell_type.fill = ERROR_FILL
-        cell_type.border = THIN_BORDER
-        cell_msg = ws.cell(row=row, column=2, value=error)
-        cell_msg.fill = ERROR_FILL
-        cell_msg.border = THIN_BORDER
-        row += 1
-
-    # Then warnings
-    for warning in result.warnings:
-        cell_type = ws.cell(row=row, column=1, value="WARNING")
-        cell_type.fill = WARNING_FILL
-        cell_type.border = THIN_BORDER
-        cell_msg = ws.cell(row=row, column=2, value=warning)
-        cell_msg.fill = WARNING_FILL
-        cell_msg.border = THIN_BORDER
-        row += 1
-
     ws.column_dimensions["A"].width = 12
     ws.column_dimensions["B"].width = 100
     ws.freeze_panes = "A2"
 
+    ws.append(_header_row(ws, headers))
+
+    # Summary row
+    ws.append([
+        _styled_cell(ws, "SUMMARY", font=SUMMARY_FONT),
+        _styled_cell(
+            ws,
+            f"{len(result.instruments)} instruments, "
+            f"{len(result.loops)} loops, "
+            f"{len(result.warnings)} warnings, "
+            f"{len(result.errors)} errors",
+            font=SUMMARY_FONT,
+        ),
+    ])
+
+    # Errors first, then warnings
+    for kind, messages, fill in (("ERROR", result.errors, ERROR_FILL), ("WARNING", result.warnings, WARNING_FILL)):
+        for message in messages:
+            ws.append([
+                _styled_cell(ws, kind, fill=fill, border=THIN_BORDER),
+                _styled_cell(ws, message, fill=fill, border=THIN_BORDER),
+            ])
+
 
 def _create_metadata_sheet(wb: Workbook, result: ExtractionResult) -> None:
     """Create the Drawing Info sheet with title block metadata."""
@@ -270,14 +375,13 @@ def _create_metadata_sheet(wb: Workbook, result: ExtractionResult) -> None:
         "Sheet", "Total Sheets", "Date", "Scale",
     ]
 
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.font = HEADER_FONT
-        cell.fill = HEADER_FILL
-        cell.alignment = HEADER_ALIGNMENT
-        cell.border = THIN_BORDER
+    col_widths = [20, 10, 50, 10, 8, 10, 15, 10]
+    _set_column_widths(ws, col_widths)
+    ws.freeze_panes = "A2"
+
+    ws.append(_header_row(ws, headers))
 
-    for row_idx, meta in enumerate(result.metadata, 2):
+    for meta in result.metadata:
         data = [
             meta.document_number,
             meta.revision,
@@ -288,13 +392,4 @@ def _create_metadata_sheet(wb: Workbook, result: ExtractionResult) -> None:
             meta.date,
             meta.scale,
         ]
-        for col, value in enumerate(data, 1):
-            cell = ws.cell(row=row_idx, column=col, value=value)
-            cell.font = DATA_FONT
-            cell.border = THIN_BORDER
-
-    col_widths = [20, 10, 50, 10, 8, 10, 15, 10]
-    for col, width in enumerate(col_widths, 1):
-        ws.column_dimensions[get_column_letter(col)].width = width
-
-    ws.freeze_panes = "A2"
+        ws.append([_styled_cell(ws, value, font=DATA_FONT, border=THIN_BORDER) for value in data])
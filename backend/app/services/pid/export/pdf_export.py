@@ -1,13 +1,33 @@
 """Export highlighted PDFs with bounding boxes for verified instruments using PyMuPDF (fitz) for vector quality."""
 
+import hashlib
+import heapq
 import logging
+import os
+import re
+from collections import defaultdict
 from pathlib import Path
+from typing import Optional
+
 import fitz  # PyMuPDF
 
 from app.services.pid.models.instrument import ExtractionResult
 
 logger = logging.getLogger(__name__)
 
+# Bundle save options: PyMuPDF garbage level and pages appended between staging
+# writes. Levels 3/4 (MuPDF's own dedup) compare objects pairwise and take
+# minutes on large bundles, so duplicates are merged by _dedup_streams instead
+# and the save only drops unused objects and compacts the xref (level 2).
+# Staging costs a write and a reopen per flush, so bundles whose sources add
+# up to less than BUNDLE_STAGE_BYTES are built in memory.
+BUNDLE_GARBAGE = 2
+BUNDLE_FLUSH_PAGES = 40
+BUNDLE_STAGE_BYTES = 64 * 1024 * 1024
+
+# Object reference inside an object definition ("12 0 R")
+_REF = re.compile(r"\b(\d+) 0 R\b")
+
 
 def export_highlighted_pdf(
     input_pdf_path: str,
@@ -50,13 +70,37 @@ def export_highlighted_pdf_bundle(
     input_pdf_paths: list[str],
     output_pdf_path: str,
     result: ExtractionResult,
+    garbage: int = BUNDLE_GARBAGE,
+    deflate: bool = True,
+    dedup: bool = True,
+    flush_pages: int = BUNDLE_FLUSH_PAGES,
+    stage_bytes: int = BUNDLE_STAGE_BYTES,
 ) -> str:
-    """Generate one marked PDF containing all input PDFs in order."""
+    """Generate one marked PDF containing all input PDFs in order.
+
+    Detections are indexed by (source, page) once for the whole batch. Each
+    source is annotated and appended in turn; every ``flush_pages`` pages the
+    bundle is written to a staging file (incrementally after the first
+    write) and reopened, so the pages already appended do not stay in memory.
+    With ``dedup``, identical streams repeated across sources (fonts, logos,
+    title-block content) are merged before the final save, which rewrites
+    the staging file with ``garbage`` (PyMuPDF level) and ``deflate``.
+
+    Staging only applies when the sources total more than ``stage_bytes``;
+    ``flush_pages=0`` keeps any bundle in memory and saves once.
+    """
     path = Path(output_pdf_path)
     if not path.parent.exists():
         path.parent.mkdir(parents=True, exist_ok=True)
 
+    if flush_pages and _total_size(input_pdf_paths) <= stage_bytes:
+        flush_pages = 0
+
+    index = AnnotationIndex(result)
+    staging_path = path.with_name(path.name + ".staging")
     output_doc = fitz.open()
+    staged = False
+    pending_pages = 0
     try:
         for input_pdf_path in input_pdf_paths:
             try:
@@ -65,61 +109,170 @@ def export_highlighted_pdf_bundle(
                 logger.error(f"Failed to open {input_pdf_path} for highlighting: {e}")
                 continue
 
-            _annotate_document(doc, input_pdf_path, result)
+            _annotate_document(doc, input_pdf_path, result, index)
             output_doc.insert_pdf(doc)
+            pending_pages += len(doc)
             doc.close()
 
+            if flush_pages and pending_pages >= flush_pages:
+                if staged:
+                    output_doc.saveIncr()
+                else:
+                    output_doc.save(str(staging_path))
+                    staged = True
+                output_doc.close()
+                output_doc = fitz.open(str(staging_path))
+                pending_pages = 0
+
         if len(output_doc) == 0:
             logger.error("No PDF pages available for bundled highlighted export")
-            output_doc.close()
             return ""
 
-        output_doc.save(str(path))
+        if dedup:
+            merged = _dedup_streams(output_doc)
+            if merged:
+                logger.info(f"Bundle export merged {merged} duplicate streams")
+            garbage = max(garbage, 1)  # drop the merged copies
+        output_doc.save(str(path), garbage=garbage, deflate=deflate)
     finally:
         try:
             output_doc.close()
         except Exception:
             pass
+        if staging_path.exists():
+            staging_path.unlink()
 
     absolute_path = str(path.absolute())
     logger.info(f"Bundled marked Vector PDF exported to {absolute_path}")
     return absolute_path
 
 
-def _annotate_document(doc: fitz.Document, input_pdf_path: str, result: ExtractionResult) -> None:
+def _total_size(paths: list[str]) -> int:
+    total = 0
+    for path in paths:
+        try:
+            total += os.path.getsize(path)
+        except OSError:
+            pass  # reported when the bundle opens it
+    return total
+
+
+class AnnotationIndex:
+    """Instruments and equipment to draw, grouped by (source_pdf, page_index).
+
+    Built once per result, so a bundle of N files does not rescan every
+    detection N times. Detections without ``source_pdf`` apply to every file
+    (as single-file results may not set it); per page they are merged back
+    with the file's own detections in result order.
+    """
+
+    def __init__(self, result: ExtractionResult):
+        self.instruments = self._group(result.instruments)
+        self.equipment = self._group(result.equipment)
+        self._pages: dict[str, set[int]] = defaultdict(set)
+        for source, page_idx in (*self.instruments, *self.equipment):
+            self._pages[source].add(page_idx)
+
+    @staticmethod
+    def _group(items) -> dict[tuple[str, int], list]:
+        groups: dict[tuple[str, int], list] = defaultdict(list)
+        for seq, item in enumerate(items):
+            if item.position is None:
+                continue
+            groups[(getattr(item, "source_pdf", "") or "", item.page_index)].append((seq, item))
+        return groups
+
+    def pages(self, source_pdf: str) -> set[int]:
+        """Pages of ``source_pdf`` with anything to draw."""
+        return self._pages.get(source_pdf, set()) | self._pages.get("", set())
+
+    def page_instruments(self, source_pdf: str, page_idx: int) -> list:
+        return self._lookup(self.instruments, source_pdf, page_idx)
+
+    def page_equipment(self, source_pdf: str, page_idx: int) -> list:
+        return self._lookup(self.equipment, source_pdf, page_idx)
+
+    @staticmethod
+    def _lookup(groups: dict, source_pdf: str, page_idx: int) -> list:
+        own = groups.get((source_pdf, page_idx), [])
+        shared = groups.get(("", page_idx), [])
+        if own and shared:
+            return [item for _, item in heapq.merge(own, shared, key=lambda entry: entry[0])]
+        return [item for _, item in own or shared]
+
+
+def _dedup_streams(doc: fitz.Document) -> int:
+    """Point every reference to a duplicate stream at its first copy.
+
+    Streams are matched by a hash of their dictionary and raw bytes, so the
+    cost is linear in the number of objects. A stream whose dictionary refers
+    to merged streams (e.g. an image and its soft mask) only becomes equal
+    to its twin after the rewrite, hence the extra passes. The duplicates are
+    left unreferenced for the save's garbage collection. Returns the number
+    of streams merged.
+    """
+    merged: dict[int, int] = {}
+    xref_count = doc.xref_length()
+    rescan = True
+    while rescan:
+        seen: dict[bytes, int] = {}
+        remap: dict[int, int] = {}
+        for xref in range(1, xref_count):
+            if xref in merged or not doc.xref_is_stream(xref):
+                continue
+            digest = hashlib.sha256(doc.xref_object(xref, compressed=True).encode("utf-8"))
+            digest.update(b"\x00")
+            digest.update(doc.xref_stream_raw(xref))
+            first = seen.setdefault(digest.digest(), xref)
+            if first != xref:
+                remap[xref] = first
+        if not remap:
+            break
+        merged.update(remap)
+
+        def _target(match: re.Match) -> str:
+            xref = int(match.group(1))
+            return f"{remap.get(xref, xref)} 0 R"
+
+        rescan = False
+        for xref in range(1, xref_count):
+            if xref in merged:
+                continue
+            if doc.xref_is_stream(xref):
+                # update_object would drop the stream; rewrite key by key
+                for key in doc.xref_get_keys(xref):
+                    _, value = doc.xref_get_key(xref, key)
+                    new_value = _REF.sub(_target, value)
+                    if new_value != value:
+                        doc.xref_set_key(xref, key, new_value)
+                        rescan = True
+            else:
+                definition = doc.xref_object(xref, compressed=True)
+                new_definition = _REF.sub(_target, definition)
+                if new_definition != definition:
+                    doc.update_object(xref, new_definition)
+    return len(merged)
+
+
+def _annotate_document(
+    doc: fitz.Document,
+    input_pdf_path: str,
+    result: ExtractionResult,
+    index: Optional[AnnotationIndex] = None,
+) -> None:
     input_source = str(Path(input_pdf_path).resolve())
+    if index is None:
+        index = AnnotationIndex(result)
 
-    # Group instruments by page. When a batch has many PDFs, keep only
-    # detections from this specific source file to avoid page-index collisions.
-    instruments_by_page = {}
-    for inst in result.instruments:
-        if inst.position is None:
+    # When a batch has many PDFs, the index keeps detections from this
+    # specific source file apart to avoid page-index collisions.
+    for page_idx in sorted(index.pages(input_source)):
+        if not 0 <= page_idx < len(doc):
             continue
-        if getattr(inst, "source_pdf", "") and inst.source_pdf != input_source:
-            continue
-        page_idx = inst.page_index
-        if page_idx not in instruments_by_page:
-            instruments_by_page[page_idx] = []
-        instruments_by_page[page_idx].append(inst)
-
-    # Group equipment by page
-    equipment_by_page = {}
-    for eq in result.equipment:
-        if eq.position is None:
-            continue
-        if getattr(eq, "source_pdf", "") and eq.source_pdf != input_source:
-            continue
-        page_idx = eq.page_index
-        if page_idx not in equipment_by_page:
-            equipment_by_page[page_idx] = []
-        equipment_by_page[page_idx].append(eq)
-
-    # Draw annotations
-    for page_idx in range(len(doc)):
         page = doc[page_idx]
 
         # Equipments (Blue)
-        for eq in equipment_by_page.get(page_idx, []):
+        for eq in index.page_equipment(input_source, page_idx):
             margin = 5
             rect = fitz.Rect(
                 eq.position.x0 - margin,
@@ -137,7 +290,7 @@ def _annotate_document(doc: fitz.Document, input_pdf_path: str, result: Extracti
 
         # Instruments (Yellow for Field, Red for DCS/Control Room, Orange for low confidence)
         # Skip near-zero confidence: likely non-instrument symbols (diamonds, etc.)
-        for inst in instruments_by_page.get(page_idx, []):
+        for inst in index.page_instruments(input_source, page_idx):
             if inst.confidence < 0.15:
                 continue
             inst_h = max(inst.position.bottom - inst.position.top, 2.0)
@@ -239,7 +239,9 @@ ISA_TYPE_DESCRIPTIONS.update(_z_variants)
 ISA_VALID_TYPES = sorted(ISA_TYPE_DESCRIPTIONS.keys(), key=len, reverse=True)
 
 
-@dataclass
+# Words and positions are slotted: a dense sheet creates tens of thousands of
+# them. Bulk geometry runs on the columnar ``core.page_words.PageWords``.
+@dataclass(slots=True)
 class Position:
     """Bounding box position from PDF extraction."""
     x0: float
@@ -261,7 +263,7 @@ class Position:
         return (dx * dx + dy * dy) ** 0.5
 
 
-@dataclass
+@dataclass(slots=True)
 class ExtractedWord:
     """A word extracted from PDF with its position."""
     text: str
@@ -365,6 +367,23 @@ class DrawingMetadata:
     checked_by: str = ""
 
 
+@dataclass
+class PageResult:
+    """Output of the per-page pipeline stages (words → symbology) for one page.
+
+    Pages are processed independently, possibly in worker processes, and
+    merged into an ExtractionResult in document order afterwards.
+    """
+    source_pdf: str
+    page_index: int
+    scale: object = None                                 # DocumentScale for this page
+    metadata: Optional[DrawingMetadata] = None           # None when the page had no words
+    notes: list = field(default_factory=list)            # List of DrawingNote
+    instruments: list = field(default_factory=list)      # List of Instrument
+    equipment: list = field(default_factory=list)        # List of Equipment
+    line_numbers: list = field(default_factory=list)     # List of LineNumber
+
+
 @dataclass
 class ExtractionResult:
     """Complete result of processing one or more P&ID sheets."""
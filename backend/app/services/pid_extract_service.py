@@ -1,14 +1,19 @@
 """Service wrapper for PID Instrument Extractor pipeline."""
 
 import logging
+import math
+from concurrent.futures import as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict
-
-import fitz  # PyMuPDF
-import pdfplumber
-
-from app.services.pid.core.ingestion import load_pdf
-from app.services.pid.core.text_extraction import extract_words
+from typing import Any, Callable, Dict, Optional
+
+from app.config import settings
+from app.services.disk_cache import file_sha256
+from app.services.pid.core.page_context import DocumentContext, PageContext
+from app.services.pid.core.result_cache import PidResultCache, get_result_cache, rebase_page_result
+from app.services.pid.core.spatial_index import SpatialIndex
+from app.services.pid.core.text_extraction import extract_page_words
 from app.services.pid.core.tag_detector import detect_tags, load_profile
 from app.services.pid.core.title_block import parse_title_block
 from app.services.pid.core.notes_parser import parse_notes
@@ -23,12 +28,169 @@ from app.services.pid.core.cross_sheet import reconcile_cross_sheets
 from app.services.pid.core.validator import validate
 from app.services.pid.export.excel_export import export_to_excel
 from app.services.pid.export.pdf_export import export_highlighted_pdf, export_highlighted_pdf_bundle
-from app.services.pid.models.instrument import ExtractionResult
+from app.services.pid.models.instrument import ExtractionResult, PageResult
+from app.services.process_pool import discard_pool, get_pool, resolve_workers
 
 logger = logging.getLogger(__name__)
 
+# progress(pages_done, pages_total), called as pages finish
+ProgressCallback = Callable[[int, int], None]
+
 CONFIG_PATH = str(Path(__file__).parent / "pid" / "config" / "tag_profiles.yaml")
 
+# Target number of tasks per worker; more, smaller tasks balance uneven pages
+_TASKS_PER_WORKER = 4
+
+# Name of the shared process pool (app.services.process_pool)
+_POOL = "pid_extract"
+
+
+def extract_pdf_pages(
+    pdf_path: str,
+    profile: dict,
+    max_distance: float,
+    page_indices: Optional[list[int]] = None,
+    on_page: Optional[Callable[[int], None]] = None,
+) -> tuple[list[PageResult], list[int], int]:
+    """Run the per-page stages on some pages of one PDF.
+
+    Module-level so it can run in a worker process. Opens the file once for
+    all requested pages. ``on_page(page_idx)`` is called after each page
+    (in-process runs only).
+
+    Returns:
+        (page results in page order, indices of pages without vector text,
+        total page count of the PDF).
+    """
+    pdf_file = Path(pdf_path)
+    merge_settings = profile.get("word_merge", {})
+    source_pdf = str(pdf_file.resolve())
+    page_results: list[PageResult] = []
+    pages_without_text: list[int] = []
+
+    # One pdfplumber + one PyMuPDF handle for the whole file; every stage
+    # reads the same parsed page instead of reopening the PDF.
+    with DocumentContext(str(pdf_file)) as doc:
+        indices = page_indices if page_indices is not None else range(doc.total_pages)
+        for page_idx in indices:
+            page = doc.page(page_idx)
+            if not page.has_text:
+                pages_without_text.append(page.index)
+            else:
+                page_results.append(
+                    _process_page(page, pdf_file, source_pdf, profile, merge_settings, max_distance)
+                )
+            page.release()
+            if on_page is not None:
+                on_page(page_idx)
+        total_pages = doc.total_pages
+
+    return page_results, pages_without_text, total_pages
+
+
+def _process_page(
+    page: PageContext,
+    pdf_file: Path,
+    source_pdf: str,
+    profile: dict,
+    merge_settings: dict,
+    max_distance: float,
+) -> PageResult:
+    page_idx = page.index
+
+    # Scale context derived from actual page dimensions
+    scale = page.document_scale
+    page_result = PageResult(source_pdf=source_pdf, page_index=page_idx, scale=scale)
+
+    words = extract_page_words(
+        page,
+        merge_gap_x=scale.px(merge_settings.get("max_horizontal_gap", 5.0)),
+        merge_gap_y=scale.px(merge_settings.get("max_vertical_gap", 3.0)),
+    )
+
+    if not words:
+        return page_result
+
+    metadata = parse_title_block(words, page.width, page.height, page_idx, scale=scale)
+    metadata.sheet_number = metadata.sheet_number or str(page_idx + 1)
+    page_result.metadata = metadata
+
+    notes = parse_notes(words, page.width, page.height, scale=scale)
+    page_result.notes = notes
+
+    # One spatial index over the page words, shared by every word-level detector
+    word_index = SpatialIndex.from_words(words)
+
+    instruments, line_numbers = detect_tags(words, profile, scale=scale, index=word_index)
+
+    for inst in instruments:
+        inst.sheet_name = metadata.document_number or f"{pdf_file.stem} p.{page_idx + 1}"
+        inst.source_pdf = source_pdf
+
+    page_result.line_numbers = line_numbers
+
+    for note in notes:
+        if note.affects_instruments:
+            for inst in instruments:
+                if not note.affected_types or inst.isa_type in note.affected_types:
+                    inst.notes.append(f"Note {note.number}: {note.text[:100]}")
+
+    equipment = detect_equipment(words, instruments, scale=scale, profile=profile, index=word_index)
+    for eq in equipment:
+        eq.source_pdf = source_pdf
+
+    spatial_cfg = profile.get("spatial", {})
+    effective_max_distance = scale.px(spatial_cfg.get("tag_equipment_max_distance", max_distance))
+    associate_instruments_to_equipment(instruments, equipment, effective_max_distance)
+
+    page_rects = page.rects + page.fitz_rects
+    scale.auto_calibrate(page_rects)
+    classify_instruments(
+        instruments,
+        page.edges,
+        page_rects=page_rects,
+        page_lines=page.lines,
+        scale=scale,
+        profile=profile,
+    )
+
+    page_result.instruments = instruments
+    page_result.equipment = equipment
+
+    logger.debug(
+        f"Page {page_idx + 1}: {len(instruments)} instruments, "
+        f"{len(equipment)} equipment, {len(line_numbers)} lines"
+    )
+    return page_result
+
+
+@dataclass
+class _FilePlan:
+    """Pages of one input file: cached results plus the ones still to compute."""
+    pdf_path: str
+    total_pages: int
+    file_key: str = ""
+    pages: dict = field(default_factory=dict)      # page_idx -> PageResult | None (no text)
+    missing: list = field(default_factory=list)    # page indices not in the cache
+
+
+class _ProgressTracker:
+    """Counts finished pages across all files and forwards them to a callback."""
+
+    def __init__(self, plans: list[_FilePlan], callback: Optional[ProgressCallback]):
+        self.total = sum(plan.total_pages for plan in plans)
+        self.done = self.total - sum(len(plan.missing) for plan in plans)
+        self.callback = callback
+        self._report()
+
+    def advance(self, pages: int) -> None:
+        self.done += pages
+        self._report()
+
+    def _report(self) -> None:
+        if self.callback is not None:
+            self.callback(self.done, self.total)
+
 
 class PidExtractService:
     """Extracts instrument tags from P&ID PDFs."""
@@ -50,22 +212,45 @@ class PidExtractService:
         max_distance: float = 200.0,
         use_llm: bool = False,
         source_filenames: dict[str, str] | None = None,
+        workers: int | None = None,
+        use_cache: bool = True,
+        progress: Optional[ProgressCallback] = None,
     ) -> ExtractionResult:
-        """Run the full extraction pipeline on one or more PDF files."""
+        """Run the full extraction pipeline on one or more PDF files.
+
+        The per-page stages (words → title block → notes → tags → equipment →
+        symbology) run in a process pool when ``workers`` (default:
+        ``settings.PID_EXTRACT_WORKERS``) is greater than one and there is more
+        than one page. Page results are merged in file/page order before the
+        cross-sheet stages, so the output is identical to serial mode.
+
+        With ``use_cache``, pages already extracted from identical file bytes
+        under the same profile/config are served from the result cache and
+        only the remaining pages are processed.
+
+        ``progress(pages_done, pages_total)`` is reported once cached pages are
+        known and again as each page (serial) or page chunk (pool) finishes.
+        """
         tag_profile = load_profile(CONFIG_PATH, profile_name)
+        workers = resolve_workers(workers, settings.PID_EXTRACT_WORKERS)
+        cache = get_result_cache() if use_cache else None
+        if cache is not None and not cache.enabled:
+            cache = None
 
-        result = ExtractionResult()
-        for pdf_path in pdf_paths:
-            start_instruments = len(result.instruments)
-            start_equipment = len(result.equipment)
+        plans = [self._plan_file(pdf_path, profile_name, max_distance, cache) for pdf_path in pdf_paths]
+        tracker = _ProgressTracker(plans, progress)
+        self._compute_missing_pages(plans, tag_profile, max_distance, workers, cache, tracker)
 
-            self._process_single_pdf(pdf_path, tag_profile, max_distance, result)
+        result = ExtractionResult()
+        for plan in plans:
+            pages_without_text = [idx for idx in range(plan.total_pages) if plan.pages[idx] is None]
+            self._log_pages_without_text(plan.pdf_path, pages_without_text, plan.total_pages)
 
-            display_name = self._resolve_source_filename(pdf_path, source_filenames)
-            for inst in result.instruments[start_instruments:]:
-                inst.source_filename = display_name
-            for eq in result.equipment[start_equipment:]:
-                eq.source_filename = display_name
+            display_name = self._resolve_source_filename(plan.pdf_path, source_filenames)
+            for page_idx in range(plan.total_pages):
+                page_result = plan.pages[page_idx]
+                if page_result is not None:
+                    self._merge_page_result(result, page_result, display_name)
 
         if result.instruments:
             reconcile_cross_sheets(result)
@@ -79,6 +264,131 @@ class PidExtractService:
 
         return result
 
+    @staticmethod
+    def _plan_file(
+        pdf_path: str,
+        profile_name: str,
+        max_distance: float,
+        cache: Optional[PidResultCache],
+    ) -> "_FilePlan":
+        """Count pages and collect cached page results for one file."""
+        if cache is None:
+            with DocumentContext(pdf_path) as doc:
+                total_pages = doc.total_pages
+            return _FilePlan(pdf_path, total_pages, missing=list(range(total_pages)))
+
+        file_key = cache.file_key(file_sha256(pdf_path), profile_name, max_distance, CONFIG_PATH)
+        total_pages = cache.get_page_count(file_key)
+        if total_pages is None:
+            with DocumentContext(pdf_path) as doc:
+                total_pages = doc.total_pages
+            cache.set_page_count(file_key, total_pages)
+
+        plan = _FilePlan(pdf_path, total_pages, file_key=file_key)
+        for page_idx in range(total_pages):
+            hit, page_result = cache.get_page(file_key, page_idx)
+            if not hit:
+                plan.missing.append(page_idx)
+            elif page_result is None:
+                plan.pages[page_idx] = None
+            else:
+                plan.pages[page_idx] = rebase_page_result(page_result, pdf_path)
+
+        if plan.missing:
+            logger.info(
+                "%s: %d/%d páginas em cache",
+                Path(pdf_path).name, total_pages - len(plan.missing), total_pages,
+            )
+        return plan
+
+    @staticmethod
+    def _compute_missing_pages(
+        plans: list["_FilePlan"],
+        profile: dict,
+        max_distance: float,
+        workers: int,
+        cache: Optional[PidResultCache],
+        tracker: "_ProgressTracker",
+    ) -> None:
+        """Run the per-page stages for every uncached page, serially or in the pool.
+
+        Chunks are submitted in file/page order and their results are slotted
+        back by page index, so the merge order never depends on which worker
+        finished first.
+        """
+        total_missing = sum(len(plan.missing) for plan in plans)
+        if total_missing == 0:
+            return
+
+        chunk_size = max(1, math.ceil(total_missing / (workers * _TASKS_PER_WORKER)))
+        tasks: list[tuple["_FilePlan", list[int]]] = []
+        for plan in plans:
+            if workers > 1 and total_missing > 1:
+                for start in range(0, len(plan.missing), chunk_size):
+                    tasks.append((plan, plan.missing[start:start + chunk_size]))
+            elif plan.missing:
+                tasks.append((plan, plan.missing))
+
+        if workers > 1 and len(tasks) > 1:
+            pool = get_pool(_POOL, workers)
+            try:
+                futures = {
+                    pool.submit(extract_pdf_pages, plan.pdf_path, profile, max_distance, pages): len(pages)
+                    for plan, pages in tasks
+                }
+                for future in as_completed(futures):
+                    future.result()
+                    tracker.advance(futures[future])
+                chunk_results = [future.result() for future in futures]
+            except BrokenProcessPool:
+                discard_pool(_POOL, pool)
+                raise
+        else:
+            chunk_results = [
+                extract_pdf_pages(plan.pdf_path, profile, max_distance, pages, on_page=lambda _: tracker.advance(1))
+                for plan, pages in tasks
+            ]
+
+        for (plan, _), (page_results, pages_without_text, _) in zip(tasks, chunk_results):
+            for page_result in page_results:
+                plan.pages[page_result.page_index] = page_result
+            for page_idx in pages_without_text:
+                plan.pages[page_idx] = None
+
+            # Store before the cross-sheet stages mutate the instruments
+            if cache is not None and plan.file_key:
+                for page_result in page_results:
+                    cache.set_page(plan.file_key, page_result.page_index, page_result)
+                for page_idx in pages_without_text:
+                    cache.set_page(plan.file_key, page_idx, None)
+
+    @staticmethod
+    def _merge_page_result(result: ExtractionResult, page_result: PageResult, display_name: str) -> None:
+        result.page_scales[(page_result.source_pdf, page_result.page_index)] = page_result.scale
+        if page_result.metadata is None:
+            return
+
+        result.metadata.append(page_result.metadata)
+        result.notes.extend(page_result.notes)
+        result.line_numbers.extend(page_result.line_numbers)
+
+        for inst in page_result.instruments:
+            inst.source_filename = display_name
+        for eq in page_result.equipment:
+            eq.source_filename = display_name
+        result.instruments.extend(page_result.instruments)
+        result.equipment.extend(page_result.equipment)
+
+    @staticmethod
+    def _log_pages_without_text(pdf_path: str, pages_without_text: list[int], total_pages: int) -> None:
+        filename = Path(pdf_path).name
+        if len(pages_without_text) == total_pages:
+            logger.warning("%s: PDF sem texto vetorial. OCR ainda não está habilitado.", filename)
+            return
+
+        for page_idx in pages_without_text:
+            logger.warning("%s página %s sem texto vetorial; ignorada", filename, page_idx + 1)
+
     @staticmethod
     def _resolve_source_filename(
         pdf_path: str,
@@ -206,116 +516,6 @@ class PidExtractService:
         )
         return export_highlighted_pdf_bundle(pdf_paths, output_path, result)
 
-    def _process_single_pdf(
-        self,
-        pdf_path: str,
-        profile: dict,
-        max_distance: float,
-        result: ExtractionResult,
-    ) -> None:
-        pdf_file = Path(pdf_path)
-        doc = load_pdf(str(pdf_file))
-
-        if not any(page.has_text for page in doc.pages):
-            logger.warning("%s: PDF sem texto vetorial. OCR ainda não está habilitado.", doc.filename)
-            return
-
-        merge_settings = profile.get("word_merge", {})
-        source_pdf = str(pdf_file.resolve())
-
-        for page_info in doc.pages:
-            if not page_info.has_text:
-                logger.warning("%s página %s sem texto vetorial; ignorada", doc.filename, page_info.index + 1)
-                continue
-
-            page_idx = page_info.index
-
-            # Scale context derived from actual page dimensions
-            scale = page_info.document_scale
-            result.page_scales[(source_pdf, page_idx)] = scale
-
-            words = extract_words(
-                str(pdf_file),
-                page_indices=[page_idx],
-                merge_gap_x=scale.px(merge_settings.get("max_horizontal_gap", 5.0)),
-                merge_gap_y=scale.px(merge_settings.get("max_vertical_gap", 3.0)),
-            )
-
-            if not words:
-                continue
-
-            metadata = parse_title_block(words, page_info.width, page_info.height, page_idx, scale=scale)
-            metadata.sheet_number = metadata.sheet_number or str(page_idx + 1)
-            result.metadata.append(metadata)
-
-            notes = parse_notes(words, page_info.width, page_info.height, scale=scale)
-            result.notes.extend(notes)
-
-            instruments, line_numbers = detect_tags(words, profile, scale=scale)
-
-            for inst in instruments:
-                inst.sheet_name = metadata.document_number or f"{pdf_file.stem} p.{page_idx + 1}"
-                inst.source_pdf = source_pdf
-
-            for line in line_numbers:
-                result.line_numbers.append(line)
-
-            for note in notes:
-                if note.affects_instruments:
-                    for inst in instruments:
-                        if not note.affected_types or inst.isa_type in note.affected_types:
-                            inst.notes.append(f"Note {note.number}: {note.text[:100]}")
-
-            equipment = detect_equipment(words, instruments, scale=scale, profile=profile)
-            for eq in equipment:
-                eq.source_pdf = source_pdf
-
-            spatial_cfg = profile.get("spatial", {})
-            effective_max_distance = scale.px(spatial_cfg.get("tag_equipment_max_distance", max_distance))
-            associate_instruments_to_equipment(instruments, equipment, effective_max_distance)
-
-            fitz_rects = self._extract_rectangles_with_fitz(pdf_file, page_idx)
-            with pdfplumber.open(str(pdf_file)) as pdf_sym:
-                sym_page = pdf_sym.pages[page_idx]
-                page_rects = (sym_page.rects or []) + fitz_rects
-                scale.auto_calibrate(page_rects)
-                classify_instruments(
-                    instruments,
-                    sym_page.edges or [],
-                    page_rects=page_rects,
-                    page_lines=sym_page.lines or [],
-                    scale=scale,
-                    profile=profile,
-                )
-
-            result.instruments.extend(instruments)
-            result.equipment.extend(equipment)
-
-            logger.debug(
-                f"Page {page_idx + 1}: {len(instruments)} instruments, "
-                f"{len(equipment)} equipment, {len(line_numbers)} lines"
-            )
-
-    @staticmethod
-    def _extract_rectangles_with_fitz(pdf_path: Path, page_idx: int) -> list[dict]:
-        rects: list[dict] = []
-        try:
-            doc = fitz.open(str(pdf_path))
-            page = doc[page_idx]
-            for drawing in page.get_drawings():
-                items = drawing.get("items", [])
-                if not items or not any(item[0] in ("re", "qu") for item in items):
-                    continue
-                rect = drawing["rect"]
-                width = rect.x1 - rect.x0
-                height = rect.y1 - rect.y0
-                if width > 0.5 and height > 0.5 and 0.6 < width / height < 1.7:
-                    rects.append({"x0": rect.x0, "top": rect.y0, "x1": rect.x1, "bottom": rect.y1})
-            doc.close()
-        except Exception as exc:
-            logger.debug("fitz rectangle extraction skipped: %s", exc)
-        return rects
-
     @staticmethod
     def _result_to_dict(result: ExtractionResult) -> Dict[str, Any]:
         instruments = []
@@ -0,0 +1,215 @@
+"""Background P&ID extraction jobs.
+
+The P&ID routes used to run ``PidExtractService`` inside ``async def``
+handlers, so one large batch blocked the event loop (and every other route)
+for minutes. Jobs move that work into a bounded thread pool: the request only
+saves the PDFs and returns a ``job_id``; clients poll the status for per-page
+progress and fetch the result once it is done.
+
+Each job lives in ``UPLOAD_DIR/pid-jobs/<job_id>/``:
+
+- ``job.json``   — status, progress and the uploaded file list
+- ``*.pdf``      — the input files
+- ``result.pkl`` — the pickled ``ExtractionResult``
+- ``result.json`` / ``*.xlsx`` / ``annotated.pdf`` — exports, built on first
+  request and reused, so the preview and the Excel of a batch come from the
+  same extraction.
+
+Jobs stay on disk until deleted or until ``PID_JOB_TTL_HOURS`` expires. The
+job directory, record, per-user limit and expiry come from
+:class:`app.services.job_store.JobStore`.
+"""
+
+import json
+import os
+import pickle
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from app.config import settings
+from app.services.job_store import (
+    PROGRESS_INTERVAL,
+    STATUS_DONE,
+    STATUS_QUEUED,
+    JobNotReady,
+    JobStore,
+    atomic_write,
+)
+from app.services.pid.models.instrument import ExtractionResult
+
+if TYPE_CHECKING:
+    from app.services.pid_extract_service import PidExtractService
+
+JOBS_DIR = os.path.join(settings.UPLOAD_DIR, "pid-jobs")
+
+
+class PidJobService(JobStore):
+    """Queues P&ID extractions and serves their results from disk."""
+
+    def __init__(self, extract_service: Optional["PidExtractService"] = None):
+        super().__init__(
+            JOBS_DIR,
+            workers=settings.PID_JOB_WORKERS,
+            jobs_per_user=settings.PID_JOBS_PER_USER,
+            ttl_hours=settings.PID_JOB_TTL_HOURS,
+            thread_name_prefix="pid-job",
+        )
+        if extract_service is None:
+            # PyMuPDF/pdfplumber load with the first job, not when the router is imported
+            from app.services.pid_extract_service import PidExtractService
+
+            extract_service = PidExtractService()
+        self.extract_service = extract_service
+        # Serializes lazy export generation per job
+        self._export_locks: Dict[str, threading.Lock] = {}
+
+    def submit(
+        self,
+        job_id: str,
+        user: str,
+        files: list[dict[str, str]],
+        profile_name: str = "promon",
+        use_llm: bool = False,
+    ) -> Dict[str, Any]:
+        """Queue a reserved job whose PDFs are already in its directory.
+
+        ``files`` is a list of ``{"path", "filename"}`` in batch order.
+        """
+        now = time.time()
+        return self.enqueue({
+            "job_id": job_id,
+            "user": user,
+            "status": STATUS_QUEUED,
+            "profile": profile_name,
+            "use_llm": use_llm,
+            "files": files,
+            "pages_done": 0,
+            "pages_total": 0,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+        })
+
+    def execute(self, job: Dict[str, Any]) -> None:
+        last_write = 0.0
+
+        def progress(done: int, total: int) -> None:
+            nonlocal last_write
+            job["pages_done"], job["pages_total"] = done, total
+            now = time.time()
+            if now - last_write >= PROGRESS_INTERVAL or done == total:
+                last_write = now
+                self.write_job(job)
+
+        paths = [item["path"] for item in job["files"]]
+        result = self.extract_service.extract_many(
+            paths,
+            job["profile"],
+            use_llm=job["use_llm"],
+            source_filenames={item["path"]: item["filename"] for item in job["files"]},
+            progress=progress,
+        )
+        with open(os.path.join(self.job_path(job["job_id"]), "result.pkl"), "wb") as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def public_status(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        total = job["pages_total"]
+        return {
+            "job_id": job["job_id"],
+            "status": job["status"],
+            "profile": job["profile"],
+            "files": [item["filename"] for item in job["files"]],
+            "pages_done": job["pages_done"],
+            "pages_total": total,
+            "progress": round(job["pages_done"] / total, 4) if total else 0.0,
+            "error": job["error"],
+            "created_at": job["created_at"],
+            "updated_at": job["updated_at"],
+        }
+
+    def drop(self, job_id: str) -> None:
+        super().drop(job_id)
+        with self._lock:
+            self._export_locks.pop(job_id, None)
+
+    # ------------------------------------------------------------------
+    # Results
+    # ------------------------------------------------------------------
+
+    def result(self, job_id: str, user: str) -> ExtractionResult:
+        """The job's ``ExtractionResult``, for exports streamed by the caller."""
+        job = self.get(job_id, user)
+        if job["status"] != STATUS_DONE:
+            raise JobNotReady(job_id)
+        return self._load_result(job_id)
+
+    def result_json(self, job_id: str, user: str) -> Dict[str, Any]:
+        path = self._export(job_id, user, "result.json", self._write_json)
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def result_excel(self, job_id: str, user: str, single_sheet: bool) -> str:
+        from app.services.pid.export.excel_export import export_to_excel
+
+        name = "instrument_index_single.xlsx" if single_sheet else "instrument_index.xlsx"
+        return self._export(
+            job_id, user, name,
+            lambda job, result, out: export_to_excel(result, out, include_support_sheets=not single_sheet),
+        )
+
+    def result_pdf(self, job_id: str, user: str) -> str:
+        from app.services.pid.export.pdf_export import export_highlighted_pdf_bundle
+
+        return self._export(
+            job_id, user, "annotated.pdf",
+            lambda job, result, out: export_highlighted_pdf_bundle(
+                [item["path"] for item in job["files"]], out, result,
+            ),
+        )
+
+    @staticmethod
+    def _write_json(job: Dict[str, Any], result: ExtractionResult, output_path: str) -> None:
+        from app.services.pid_extract_service import PidExtractService
+
+        data = PidExtractService._result_to_dict(result)
+        if len(job["files"]) == 1:
+            data["filename"] = job["files"][0]["filename"]
+        atomic_write(output_path, json.dumps(data, ensure_ascii=False).encode("utf-8"))
+
+    def _export(self, job_id: str, user: str, name: str, build) -> str:
+        job = self.get(job_id, user)
+        if job["status"] != STATUS_DONE:
+            raise JobNotReady(job_id)
+
+        output_path = os.path.join(self.job_path(job_id), name)
+        with self._lock:
+            lock = self._export_locks.setdefault(job_id, threading.Lock())
+        with lock:
+            if not os.path.exists(output_path):
+                result = self._load_result(job_id)
+                # Build under a temp name so a failed export is never served
+                partial_path = f"{output_path}.part"
+                try:
+                    build(job, result, partial_path)
+                    os.replace(partial_path, output_path)
+                finally:
+                    if os.path.exists(partial_path):
+                        os.remove(partial_path)
+        return output_path
+
+    def _load_result(self, job_id: str) -> ExtractionResult:
+        with open(os.path.join(self.job_path(job_id), "result.pkl"), "rb") as f:
+            return pickle.load(f)
+
+
+_service: Optional[PidJobService] = None
+_service_lock = threading.Lock()
+
+
+def get_job_service() -> PidJobService:
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = PidJobService()
+        return _service
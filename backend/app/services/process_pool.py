@@ -0,0 +1,97 @@
+"""Process pools shared by the CPU-bound services.
+
+Each service (P&ID extraction, table extraction, PDF comments, PDF → Word,
+civil OCR/batch) runs its per-page or per-file work in a
+``ProcessPoolExecutor`` kept alive between requests, so the worker start-up
+and imports are paid once. Pools are registered here by name: callers that
+share a name share the processes, and every pool in the process is visible
+in one place.
+
+A pool is created on first use with the size its service configures and is
+never resized or replaced while live: other requests may be holding it, and
+a pool shut down under them fails their next ``submit``. Callers that want
+fewer processes than the pool has bound their own concurrency through the
+number of tasks they keep in flight (:func:`map_bounded`). A pool broken by
+a crashed worker is discarded and the next request starts a fresh one.
+"""
+
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+_pools: Dict[str, Tuple[ProcessPoolExecutor, int]] = {}
+_lock = threading.Lock()
+
+
+def resolve_workers(workers: Optional[int], configured: int) -> int:
+    """Effective worker count: explicit value, else ``configured`` (0 = one per CPU)."""
+    if workers is None:
+        workers = configured
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return workers
+
+
+def get_pool(
+    name: str,
+    workers: int,
+    initializer: Optional[Callable[[], None]] = None,
+) -> ProcessPoolExecutor:
+    """Pool ``name``; ``workers`` is its size if this call creates it."""
+    with _lock:
+        entry = _pools.get(name)
+        if entry is None:
+            entry = (ProcessPoolExecutor(max_workers=max(1, workers), initializer=initializer), max(1, workers))
+            _pools[name] = entry
+        return entry[0]
+
+
+def discard_pool(name: str, pool: Optional[ProcessPoolExecutor] = None) -> None:
+    """Drop pool ``name`` (after ``BrokenProcessPool``, or to resize it in a benchmark).
+
+    With ``pool``, only if it is still the registered one: a caller that saw
+    its pool break late must not drop the fresh pool another request started.
+    """
+    with _lock:
+        current, _ = _pools.get(name, (None, 0))
+        if current is None or (pool is not None and current is not pool):
+            return
+        del _pools[name]
+    current.shutdown(wait=False)
+
+
+def map_bounded(
+    pool: ProcessPoolExecutor,
+    fn: Callable[..., Any],
+    args: Iterable[tuple],
+    limit: int,
+) -> List[Any]:
+    """``fn(*item)`` for each item of ``args`` in ``pool``, results in order.
+
+    At most ``limit`` tasks are in flight, whatever the pool's size. The first
+    error (``BrokenProcessPool`` included) is raised after the tasks not yet
+    started are cancelled.
+    """
+    items = list(args)
+    results: List[Any] = [None] * len(items)
+    pending: Dict[Future, int] = {}
+    next_item = 0
+    try:
+        while next_item < len(items) or pending:
+            while next_item < len(items) and len(pending) < max(1, limit):
+                pending[pool.submit(fn, *items[next_item])] = next_item
+                next_item += 1
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[pending.pop(future)] = future.result()
+    finally:
+        for future in pending:
+            future.cancel()
+    return results
+
+
+def pool_sizes() -> Dict[str, int]:
+    """Worker count of each live pool."""
+    with _lock:
+        return {name: size for name, (_, size) in _pools.items()}
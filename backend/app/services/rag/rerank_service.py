@@ -4,44 +4,103 @@ The Conhecimento RAG has been migrated to services/conhecimento-backend/.
 This file is kept because the Email RAG service depends on it.
 """
 
+from collections import OrderedDict
 from flashrank import Ranker, RerankRequest
-from typing import List, Any
+from typing import Dict, List, Any, Optional, Tuple
 from langchain_core.documents import Document
+import hashlib
 import os
+import threading
 from app.config import settings
 
 
+class RerankScoreCache:
+    """LRU of cross-encoder scores keyed by (query digest, passage digest).
+
+    A score depends only on the query and the passage text, so follow-up and
+    repeated questions over the same mailbox skip the model for passages
+    already scored. Keying on the text rather than the chunk id means a
+    re-indexed message (same ids, new content) is scored again.
+    ``max_entries`` <= 0 disables the cache.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._scores: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def digest(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get(self, key: Tuple[str, str]) -> Optional[float]:
+        with self._lock:
+            score = self._scores.get(key)
+            if score is None:
+                self.misses += 1
+                return None
+            self._scores.move_to_end(key)
+            self.hits += 1
+            return score
+
+    def put(self, key: Tuple[str, str], score: float) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._scores[key] = score
+            self._scores.move_to_end(key)
+            while len(self._scores) > self.max_entries:
+                self._scores.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._scores), "hits": self.hits, "misses": self.misses}
+
+
 class RerankService:
-    def __init__(self):
+    def __init__(self, cache: Optional[RerankScoreCache] = None):
         cache_dir = os.path.join(settings.DATA_DIR, "rerank_cache")
         os.makedirs(cache_dir, exist_ok=True)
         self.ranker = Ranker(model_name="ms-marco-TinyBERT-L-2-v2", cache_dir=cache_dir)
+        self.cache = cache or RerankScoreCache(settings.EMAIL_RERANK_CACHE_SIZE)
 
     def rerank(self, query: str, documents: List[Any], top_k: int = 5) -> List[Any]:
         if not documents:
             return []
 
+        query_key = self.cache.digest(query)
+        scores: Dict[int, float] = {}
         passages = []
         for i, doc in enumerate(documents):
-            doc_id = str(doc.metadata.get("id", i))
+            cache_key = (query_key, self.cache.digest(doc.page_content))
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                scores[i] = cached
+                continue
             passages.append({
-                "id": doc_id,
+                "id": i,
                 "text": doc.page_content,
-                "meta": doc.metadata,
+                "meta": {"cache_key": cache_key},
             })
 
-        request = RerankRequest(query=query, passages=passages)
-        results = self.ranker.rerank(request)
+        if passages:
+            for res in self.ranker.rerank(RerankRequest(query=query, passages=passages)):
+                score = float(res["score"])
+                scores[res["id"]] = score
+                self.cache.put(res["meta"]["cache_key"], score)
 
-        top_results = results[:top_k]
+        ranked = sorted(scores, key=lambda i: scores[i], reverse=True)[:top_k]
         reranked_docs = []
 
-        for res in top_results:
+        for i in ranked:
             doc = Document(
-                page_content=res["text"],
-                metadata=res["meta"],
+                page_content=documents[i].page_content,
+                metadata=dict(documents[i].metadata),
+                id=getattr(documents[i], "id", None),
             )
-            doc.metadata["rerank_score"] = res["score"]
+            doc.metadata["rerank_score"] = scores[i]
             reranked_docs.append(doc)
 
         return reranked_docs
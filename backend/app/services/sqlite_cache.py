@@ -0,0 +1,202 @@
+"""Size-bounded SQLite store for short texts keyed by a hash.
+
+One table per cache, one row per key: the text, its size and when it was
+created and last read. Entries expire after ``ttl_seconds``; when the stored
+text exceeds ``max_bytes`` the least recently used entries are removed.
+SQLite handles concurrent access from several threads and worker processes
+(WAL mode, one short-lived connection per operation), so the file can live
+under ``DATA_DIR`` and be shared by every worker.
+
+Backs the AI explanation cache of the PDF comments module and the
+translation memory.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterable
+
+logger = logging.getLogger(__name__)
+
+# After eviction the cache is trimmed to this fraction of max_bytes
+_EVICT_TARGET = 0.9
+# SQLite's default limit of host parameters per statement is 999
+_QUERY_CHUNK = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS {table} (
+    key TEXT PRIMARY KEY,
+    {column} TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS {table}_accessed ON {table} (accessed_at);
+"""
+
+
+class SQLiteTextCache:
+    """Text per key in one SQLite table, with TTL and size-bounded LRU eviction.
+
+    ``key_func`` turns the caller's parts into a key (:meth:`key`); ``table``
+    and ``value_column`` name where the text lives, so several caches can
+    share the implementation (and a file). ``label`` names the cache in logs.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl_seconds: float,
+        max_bytes: int,
+        table: str,
+        key_func: Callable[..., str],
+        value_column: str = "value",
+        label: str = "Cache",
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.table = table
+        self.value_column = value_column
+        self.label = label
+        self._key_func = key_func
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._ready = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 and self.ttl_seconds > 0
+
+    def key(self, *parts: str) -> str:
+        return self._key_func(*parts)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """Unexpired entries for ``keys``; hits are marked as recently used."""
+        keys = list(dict.fromkeys(keys))
+        if not self.enabled or not keys:
+            return {}
+        now = time.time()
+        found: Dict[str, str] = {}
+        try:
+            with self._connect() as conn:
+                for start in range(0, len(keys), _QUERY_CHUNK):
+                    chunk = keys[start:start + _QUERY_CHUNK]
+                    marks = ",".join("?" * len(chunk))
+                    rows = conn.execute(
+                        f"SELECT key, {self.value_column} FROM {self.table} "
+                        f"WHERE key IN ({marks}) AND created_at >= ?",
+                        (*chunk, now - self.ttl_seconds),
+                    ).fetchall()
+                    found.update(rows)
+                    if rows:
+                        conn.executemany(
+                            f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?",
+                            [(now, key) for key, _ in rows],
+                        )
+        except sqlite3.Error as exc:
+            logger.warning("%s indisponível: %s", self.label, exc)
+            found = {}
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def set_many(self, entries: Dict[str, str]) -> None:
+        if not self.enabled or not entries:
+            return
+        now = time.time()
+        rows = [(key, text, len(text.encode("utf-8")), now, now) for key, text in entries.items()]
+        try:
+            with self._connect() as conn:
+                conn.executemany(f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?, ?, ?, ?)", rows)
+                self._evict(conn, now)
+        except sqlite3.Error as exc:
+            logger.warning("%s: falha ao gravar: %s", self.label, exc)
+
+    def clear(self) -> None:
+        with self._connect() as conn:
+            conn.execute(f"DELETE FROM {self.table}")
+
+    def stats(self) -> Dict[str, float]:
+        entries, size = 0, 0
+        if self.enabled:
+            try:
+                with self._connect() as conn:
+                    entries, size = conn.execute(
+                        f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}"
+                    ).fetchone()
+            except sqlite3.Error:
+                pass
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": entries,
+                "size_bytes": size,
+                "max_bytes": self.max_bytes,
+            }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _connect(self) -> "_Closing":
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                    with _Closing(sqlite3.connect(self.path, timeout=10)) as conn:
+                        conn.execute("PRAGMA journal_mode=WAL")
+                        conn.executescript(_SCHEMA.format(table=self.table, column=self.value_column))
+                    self._ready = True
+        return _Closing(sqlite3.connect(self.path, timeout=10))
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        removed = conn.execute(
+            f"DELETE FROM {self.table} WHERE created_at < ?", (now - self.ttl_seconds,)
+        ).rowcount
+        total = conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()[0]
+        if total > self.max_bytes:
+            target = self.max_bytes * _EVICT_TARGET
+            # Oldest first until the running total of the survivors fits
+            victims = []
+            for key, size in conn.execute(f"SELECT key, size FROM {self.table} ORDER BY accessed_at"):
+                if total <= target:
+                    break
+                victims.append((key,))
+                total -= size
+            conn.executemany(f"DELETE FROM {self.table} WHERE key = ?", victims)
+            removed += len(victims)
+        if removed:
+            with self._lock:
+                self.evictions += removed
+
+
+class _Closing:
+    """``with`` over a connection that commits (or rolls back) and then closes.
+
+    ``sqlite3.Connection`` as a context manager only ends the transaction.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            if exc_type is None:
+                self.conn.commit()
+            else:
+                self.conn.rollback()
+        finally:
+            self.conn.close()
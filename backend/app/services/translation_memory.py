@@ -0,0 +1,66 @@
+"""Persistent translation memory for the translate endpoint.
+
+Long documents come back for translation after small edits (a new revision
+of a specification, a corrected paragraph). The translator works segment by
+segment — paragraphs split into sentences — and each translated segment is
+stored in a small SQLite file under ``DATA_DIR`` keyed by a hash of the
+whitespace-normalized source text, the source/target languages, a digest of
+the glossary and the prompt version. Only segments that are not in memory
+are sent to the model.
+
+Storage, expiry and LRU eviction are those of
+:class:`app.services.sqlite_cache.SQLiteTextCache`.
+"""
+
+from typing import Mapping, Optional
+
+from app.config import settings
+from app.services.sqlite_cache import SQLiteTextCache
+from app.services.disk_cache import cache_key
+
+
+def _normalize(text: str) -> str:
+    # Case is kept: "PUMP" and "pump" translate differently
+    return " ".join((text or "").split())
+
+
+def glossary_digest(glossary: Optional[Mapping[str, str]]) -> str:
+    """Order-independent digest of the glossary ("" when there is none)."""
+    if not glossary:
+        return ""
+    return cache_key(*sorted((_normalize(src), _normalize(dst)) for src, dst in glossary.items()))[:16]
+
+
+def segment_key(
+    prompt_version: str,
+    segment: str,
+    source_lang: str,
+    target_lang: str,
+    glossary: str,
+) -> str:
+    return cache_key("translate", prompt_version, _normalize(segment), source_lang, target_lang, glossary)
+
+
+class TranslationMemory(SQLiteTextCache):
+    """Translated text per source segment."""
+
+    def __init__(self, path: str, ttl_seconds: float, max_bytes: int):
+        super().__init__(
+            path, ttl_seconds, max_bytes,
+            table="segments", key_func=segment_key, value_column="translation",
+            label="Memória de tradução",
+        )
+
+
+_memory: Optional[TranslationMemory] = None
+
+
+def get_translation_memory() -> TranslationMemory:
+    global _memory
+    if _memory is None:
+        _memory = TranslationMemory(
+            settings.TRANSLATE_MEMORY_PATH,
+            settings.TRANSLATE_MEMORY_TTL_DAYS * 86400,
+            settings.TRANSLATE_MEMORY_MAX_MB * 1024 * 1024,
+        )
+    return _memory
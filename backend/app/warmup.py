@@ -0,0 +1,133 @@
+"""Carregamento sob demanda das dependências pesadas de cada módulo da API.
+
+Importar todos os routers com os serviços puxava PyMuPDF, pdfplumber, pandas,
+openpyxl, pdf2docx/OpenCV e o SDK do Gemini antes da primeira request — segundos
+de cold start e centenas de MB mesmo quando só o P&ID ou a tradução são usados.
+Agora cada router declara o seu subsistema (``Depends(require("pdf"))``): os
+módulos pesados são importados numa thread na primeira request do módulo (ou no
+warm-up opcional do startup, ``STARTUP_WARMUP``), e ``/health/ready`` mostra o
+que já está carregado.
+"""
+
+import asyncio
+import importlib
+import logging
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Subsistema → módulos com as dependências pesadas (importados juntos)
+SUBSYSTEMS: Dict[str, tuple] = {
+    "translate": ("app.services.gemini_service",),
+    "pdf": (
+        "app.services.pdf_extract_service",
+        "app.services.pdf_convert_service",
+        "app.services.word_format_service",
+    ),
+    "pid": (
+        "app.services.pid_extract_service",
+        "app.services.pid.export.excel_export",
+        "app.services.pid.export.pdf_export",
+    ),
+    "civil": (
+        "app.services.civil.batch_processor",
+        "app.services.civil.excel_generator",
+    ),
+    "pdf_comments": ("app.services.pdf_comments_service",),
+}
+
+_locks = {name: threading.Lock() for name in SUBSYSTEMS}
+_load_ms: Dict[str, float] = {}
+_errors: Dict[str, str] = {}
+_warmup: Dict[str, object] = {"subsystems": [], "done": True}
+
+
+def is_warm(name: str) -> bool:
+    return all(module in sys.modules for module in SUBSYSTEMS[name])
+
+
+def load(name: str) -> None:
+    """Importa os módulos do subsistema (uma vez; chamadas concorrentes esperam)."""
+    if name in _load_ms:
+        return
+    with _locks[name]:
+        if name in _load_ms:
+            return
+        start = time.perf_counter()
+        try:
+            for module in SUBSYSTEMS[name]:
+                importlib.import_module(module)
+        except Exception as exc:
+            _errors[name] = str(exc)
+            raise
+        _errors.pop(name, None)
+        _load_ms[name] = round((time.perf_counter() - start) * 1000, 1)
+    logger.info("Subsistema %s carregado em %.0f ms", name, _load_ms[name])
+
+
+def require(name: str):
+    """Dependência do router: carrega o subsistema fora do event loop na primeira request."""
+    if name not in SUBSYSTEMS:
+        raise ValueError(f"Subsistema desconhecido: {name}")
+
+    async def _require_subsystem() -> None:
+        if name not in _load_ms:
+            await asyncio.to_thread(load, name)
+
+    return _require_subsystem
+
+
+def parse_warmup(spec: str) -> List[str]:
+    """``"all"`` → todos; ``"pid, translate"`` → esses; vazio → nenhum (tudo sob demanda)."""
+    names = [item.strip() for item in (spec or "").split(",") if item.strip()]
+    if "all" in names:
+        return list(SUBSYSTEMS)
+    unknown = [item for item in names if item not in SUBSYSTEMS]
+    if unknown:
+        logger.warning("STARTUP_WARMUP: subsistemas desconhecidos ignorados: %s", ", ".join(unknown))
+    return [item for item in names if item in SUBSYSTEMS]
+
+
+def start_warmup(spec: str) -> Optional[threading.Thread]:
+    """Carrega os subsistemas de ``spec`` numa thread em background."""
+    names = parse_warmup(spec)
+    _warmup.update(subsystems=names, done=not names)
+    if not names:
+        return None
+
+    def _run() -> None:
+        for name in names:
+            try:
+                load(name)
+            except Exception:
+                logger.exception("Falha no warm-up do subsistema %s", name)
+        _warmup["done"] = True
+
+    thread = threading.Thread(target=_run, name="warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def readiness() -> dict:
+    """Estado de cada subsistema; pronto quando o warm-up pedido terminou sem falhas.
+
+    Um subsistema do warm-up que falhou deixa o processo não pronto até uma
+    carga seguinte (na primeira request do módulo) dar certo.
+    """
+    failed = [name for name in _warmup["subsystems"] if name in _errors]
+    return {
+        "ready": bool(_warmup["done"]) and not failed,
+        "warmup": list(_warmup["subsystems"]),
+        "failed": failed,
+        "subsystems": {
+            name: {
+                "warm": is_warm(name),
+                "load_ms": _load_ms.get(name),
+                **({"error": _errors[name]} if name in _errors else {}),
+            }
+            for name in SUBSYSTEMS
+        },
+    }
@@ -0,0 +1,171 @@
+"""Benchmark: circle detection on civil foundation drawings, loop vs. NumPy.
+
+Builds a synthetic A1 foundation plan with ``--paths`` vector items (short
+strokes, small rectangles and circles as clutter) plus the circles the
+extractor looks for — the base and the two sump rings — and times:
+
+- ``get_drawings``: PyMuPDF path extraction, paid once per page either way;
+- ``loop``: the previous per-dict Python loop, greedy radius dedup and
+  nested ring pairing;
+- ``numpy``: building the ``(n, 4)`` rect array from the same dicts plus the
+  vectorised detection (what the first call on a page costs);
+- ``numpy warm``: the detection alone on the cached array;
+- ``regions``: the OCR region grid on the same array.
+
+Every run checks that both implementations return the same radii.
+
+Usage:
+    cd backend
+    python -m scripts.bench_civil_circles --paths 5000 50000
+"""
+
+import argparse
+import logging
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+import fitz  # PyMuPDF
+
+from app.services.civil.models import ConfigProjeto
+from app.services.civil.pdf_extractor import (
+    _CIRCLE_SQUARENESS,
+    _PT_TO_M_BASE,
+    _R_BASE_MAX,
+    _R_BASE_MIN,
+    _R_POCO_MAX,
+    _R_POCO_MIN,
+    PDFExtractor,
+    _DocumentoPDF,
+    _rects_array,
+    _regioes_graficas,
+)
+
+_SCALE = 50
+_A1 = (2384, 1684)
+
+
+def build_foundation_pdf(path: str, paths: int, seed: int = 0) -> None:
+    """A1 sheet with ``paths`` clutter items and the base/sump circles at 1:50."""
+    rng = random.Random(seed)
+    pt_per_m = 1 / (_SCALE * _PT_TO_M_BASE)
+    doc = fitz.open()
+    page = doc.new_page(width=_A1[0], height=_A1[1])
+    shape = page.new_shape()
+    for i in range(paths):
+        x, y = rng.uniform(40, _A1[0] - 80), rng.uniform(40, _A1[1] - 80)
+        kind = i % 3
+        if kind == 0:
+            shape.draw_line((x, y), (x + rng.uniform(1, 30), y + rng.uniform(-10, 10)))
+        elif kind == 1:
+            shape.draw_rect(fitz.Rect(x, y, x + rng.uniform(1, 20), y + rng.uniform(1, 20)))
+        else:
+            shape.draw_circle((x, y), rng.uniform(1, 8))
+        shape.finish(width=0.3)
+    center = (_A1[0] / 2, _A1[1] / 2)
+    for radius_m in (6.0, 1.0, 1.15):
+        shape.draw_circle(center, radius_m * pt_per_m)
+        shape.finish(width=0.5)
+    shape.commit()
+    doc.save(path)
+    doc.close()
+
+
+def legacy_circles(drawings: list, scale: int, config: ConfigProjeto) -> dict[str, float]:
+    """The pre-NumPy implementation, kept here as the reference."""
+    pt_to_m = scale * _PT_TO_M_BASE
+    radii_m: list[float] = []
+    for d in drawings:
+        r = d["rect"]
+        w, h = r.width, r.height
+        if w < 10 or h < 10:
+            continue
+        if abs(w - h) / max(w, h) > _CIRCLE_SQUARENESS:
+            continue
+        radii_m.append(round(w / 2 * pt_to_m, 4))
+
+    radii_unique: list[float] = []
+    for r in sorted(radii_m):
+        if not radii_unique or abs(r - radii_unique[-1]) > 0.01:
+            radii_unique.append(r)
+    radii_unique.sort(reverse=True)
+
+    result: dict[str, float] = {}
+    for r in radii_unique:
+        if _R_BASE_MIN <= r <= _R_BASE_MAX:
+            result["r_base"] = r
+            break
+    candidates = sorted(r for r in radii_unique if _R_POCO_MIN <= r <= _R_POCO_MAX)
+    for i in range(len(candidates) - 1, 0, -1):
+        for j in range(i - 1, -1, -1):
+            if 0.05 <= candidates[i] - candidates[j] <= 0.30:
+                result["r_ext_parede"], result["r_poco"] = candidates[i], candidates[j]
+                return result
+    if candidates:
+        result["r_poco"] = candidates[0]
+    return result
+
+
+class _CachedPage:
+    """Stands in for ``_DocumentoPDF`` with an already-built rect array."""
+
+    page_count = 1
+
+    def __init__(self, rects):
+        self.rects = rects
+
+    def drawing_rects(self, page_index: int):
+        return self.rects
+
+
+def _timed(fn, repeat: int = 1):
+    best, value = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, value
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--paths", type=int, nargs="+", default=[5000, 50000])
+    parser.add_argument("--repeat", type=int, default=5, help="best of N for the detection timings")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    config = ConfigProjeto()
+    extractor = PDFExtractor(config)
+
+    print(f"{'paths':>6} {'get_drawings':>12} {'loop ms':>8} {'numpy ms':>9} {'warm ms':>8} {'regions ms':>10}  same")
+    with tempfile.TemporaryDirectory() as tmp:
+        for paths in args.paths:
+            path = os.path.join(tmp, f"foundation_{paths}.pdf")
+            build_foundation_pdf(path, paths)
+
+            with fitz.open(path) as doc:
+                extract_s, drawings = _timed(lambda: doc[0].get_drawings())
+                loop_s, legacy = _timed(lambda: legacy_circles(drawings, _SCALE, config), args.repeat)
+
+                numpy_s, vectorised = _timed(
+                    lambda: extractor._extract_circles_from_vectors(_CachedPage(_rects_array(drawings)), _SCALE),
+                    args.repeat,
+                )
+
+            with _DocumentoPDF(Path(path)) as pdf:
+                pdf.drawing_rects(0)
+                warm_s, _ = _timed(lambda: extractor._extract_circles_from_vectors(pdf, _SCALE), args.repeat)
+                regions_s, _ = _timed(
+                    lambda: _regioes_graficas(tuple(pdf.page(0).rect), pdf.drawing_rects(0), [], []), args.repeat
+                )
+
+            print(
+                f"{paths:>6} {extract_s:>12.2f} {loop_s * 1000:>8.1f} {numpy_s * 1000:>9.1f} "
+                f"{warm_s * 1000:>8.2f} {regions_s * 1000:>10.1f}  {legacy == vectorised}"
+            )
+
+
+if __name__ == "__main__":
+    main()
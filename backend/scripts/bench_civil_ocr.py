@@ -0,0 +1,234 @@
+"""Benchmark: region-limited OCR vs. full-page OCR on civil foundation drawings.
+
+Needs a working Tesseract (``tesseract`` on PATH, used through pytesseract).
+For every page the extractor would OCR it runs:
+
+- ``full``: the previous behaviour — the whole page rendered at ``OCR_DPI``
+  and read in one Tesseract call, native text included;
+- ``regions``: ``PDFExtractor._extract_text_ocr`` (graphic regions only,
+  native text blanked out), serial.
+
+and reports the time, the characters read, the share of the expected
+drawing labels found (synthetic sheets only), and whether the geometry
+parsed from native text + OCR text is the same for both.
+
+Without ``--pdf`` two synthetic A1 sheets at 1:50 are built:
+
+- ``scan``: the whole drawing is a noisy, slightly rotated raster (a scanned
+  sheet with no text layer);
+- ``mixed``: a CAD sheet with native title block and notes, the plan
+  circles in vectors under a raster label stamp and the section view
+  pasted as a raster detail.
+
+Full-page OCR also reads the native text a second time; the geometry
+heuristics look at words near keywords, so that duplicate can change what
+they pick even when both passes read the same labels.
+
+Usage:
+    cd backend
+    python -m scripts.bench_civil_ocr [--pdf drawing.pdf ...] [--dpi 150]
+"""
+
+import argparse
+import io
+import logging
+import os
+import random
+import re
+import tempfile
+import time
+from pathlib import Path
+
+import fitz  # PyMuPDF
+import numpy as np
+import pytesseract
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+from app.services.civil import pdf_extractor
+from app.services.civil.models import ConfigProjeto
+from app.services.civil.pdf_extractor import PDFExtractor, _DocumentoPDF
+
+_A1 = (2384, 1684)
+_SCALE = 50
+_PT_PER_M = 1 / (_SCALE * pdf_extractor._PT_TO_M_BASE)
+
+TITLE = ["DE-5210.00-26360-120-ET4-406=D", "TANQUES TQ-26360001", "FUNDACAO - PLANTA E CORTE", "ESCALA 1:50"]
+NOTES = ["NOTAS:", "1. COTAS EM CM, ELEVACOES EM M.", "2. CONCRETO FCK 30 MPA."]
+PLAN_LABELS = ["PLANTA", "R600", "R115", "R100", "POCO"]
+SECTION_LABELS = [
+    "CORTE A-A",
+    "EL. +0,575",
+    "EL. +0,000",
+    "EL. -0,600",
+    "PAREDE 25",
+    "104 ESTACAS METALICAS HP310x110",
+    "COMPRIMENTO ESTIMADO 23 a 25m",
+]
+
+
+def _font(size: int) -> ImageFont.ImageFont:
+    return ImageFont.load_default(size=size)
+
+
+def _draw_plan(draw: ImageDraw.ImageDraw, cx: float, cy: float, px_per_pt: float) -> None:
+    for radius_m in (6.0, 1.15, 1.0):
+        r = radius_m * _PT_PER_M * px_per_pt
+        draw.ellipse((cx - r, cy - r, cx + r, cy + r), outline=0, width=3)
+    size = int(22 * px_per_pt)
+    base_r = 6.0 * _PT_PER_M * px_per_pt
+    draw.text((cx - base_r, cy - base_r - 60 * px_per_pt), "PLANTA", fill=0, font=_font(int(30 * px_per_pt)))
+    draw.text((cx + base_r * 0.55, cy - base_r * 0.55), "R600", fill=0, font=_font(size))
+    draw.text((cx + 30 * px_per_pt, cy - 80 * px_per_pt), "R115", fill=0, font=_font(size))
+    draw.text((cx + 30 * px_per_pt, cy + 50 * px_per_pt), "R100", fill=0, font=_font(size))
+    draw.text((cx - 40 * px_per_pt, cy + 90 * px_per_pt), "POCO", fill=0, font=_font(size))
+
+
+def _draw_section(draw: ImageDraw.ImageDraw, x: float, y: float, w: float, px_per_pt: float) -> None:
+    size = int(22 * px_per_pt)
+    draw.text((x, y), "CORTE A-A", fill=0, font=_font(int(30 * px_per_pt)))
+    top = y + 80 * px_per_pt
+    slab = 35 * px_per_pt
+    draw.rectangle((x, top, x + w, top + slab), outline=0, width=3)
+    for i in range(9):
+        px = x + 30 * px_per_pt + i * (w - 60 * px_per_pt) / 8
+        draw.line((px, top + slab, px, top + slab + 260 * px_per_pt), fill=0, width=2)
+    draw.text((x + w + 20 * px_per_pt, top - 14 * px_per_pt), "EL. +0,575", fill=0, font=_font(size))
+    draw.text((x + w + 20 * px_per_pt, top + slab - 10 * px_per_pt), "EL. +0,000", fill=0, font=_font(size))
+    draw.text((x + w + 20 * px_per_pt, top + slab + 40 * px_per_pt), "EL. -0,600", fill=0, font=_font(size))
+    draw.text((x + w * 0.4, top - 40 * px_per_pt), "PAREDE 25", fill=0, font=_font(size))
+    draw.text((x, top + slab + 290 * px_per_pt), "104 ESTACAS METALICAS HP310x110", fill=0, font=_font(size))
+    draw.text((x, top + slab + 330 * px_per_pt), "COMPRIMENTO ESTIMADO 23 a 25m", fill=0, font=_font(size))
+
+
+def _scanned(img: Image.Image, rng: random.Random) -> bytes:
+    """Scanner look: slight rotation, blur and speckle noise."""
+    img = img.rotate(rng.uniform(-0.4, 0.4), resample=Image.BICUBIC, fillcolor=255, expand=False)
+    img = img.filter(ImageFilter.GaussianBlur(0.6))
+    arr = np.asarray(img, dtype=np.int16)
+    noise = np.random.default_rng(rng.randrange(1 << 30)).normal(0, 12, arr.shape)
+    arr = np.clip(arr + noise, 0, 255).astype(np.uint8)
+    buf = io.BytesIO()
+    Image.fromarray(arr).save(buf, format="PNG", optimize=True)
+    return buf.getvalue()
+
+
+def build_scan_pdf(path: str, dpi: int, seed: int = 0) -> None:
+    """The whole sheet as a raster, no text layer."""
+    rng = random.Random(seed)
+    px_per_pt = dpi / 72
+    img = Image.new("L", (int(_A1[0] * px_per_pt), int(_A1[1] * px_per_pt)), 255)
+    draw = ImageDraw.Draw(img)
+    draw.rectangle((20 * px_per_pt, 20 * px_per_pt, img.width - 20 * px_per_pt, img.height - 20 * px_per_pt), outline=0, width=4)
+    _draw_plan(draw, 600 * px_per_pt, 800 * px_per_pt, px_per_pt)
+    _draw_section(draw, 1150 * px_per_pt, 300 * px_per_pt, 700 * px_per_pt, px_per_pt)
+    for i, line in enumerate(TITLE):
+        draw.text((1750 * px_per_pt, (1450 + 40 * i) * px_per_pt), line, fill=0, font=_font(int(24 * px_per_pt)))
+    for i, line in enumerate(NOTES):
+        draw.text((1150 * px_per_pt, (1100 + 34 * i) * px_per_pt), line, fill=0, font=_font(int(20 * px_per_pt)))
+    doc = fitz.open()
+    page = doc.new_page(width=_A1[0], height=_A1[1])
+    page.insert_image(page.rect, stream=_scanned(img, rng))
+    doc.save(path)
+    doc.close()
+
+
+def build_mixed_pdf(path: str, dpi: int, seed: int = 0) -> None:
+    """CAD sheet: native title block/notes, vector plan, raster section detail."""
+    rng = random.Random(seed)
+    doc = fitz.open()
+    page = doc.new_page(width=_A1[0], height=_A1[1])
+    shape = page.new_shape()
+    shape.draw_rect(fitz.Rect(20, 20, _A1[0] - 20, _A1[1] - 20))
+    shape.finish(width=1)
+    center = (600, 800)
+    for radius_m in (6.0, 1.15, 1.0):
+        shape.draw_circle(center, radius_m * _PT_PER_M)
+        shape.finish(width=0.5)
+    shape.commit()
+    # Plan labels as a raster stamp over the vector circles (common in converted sheets)
+    px_per_pt = dpi / 72
+    plan = Image.new("L", (int(1000 * px_per_pt), int(1000 * px_per_pt)), 255)
+    _draw_plan(ImageDraw.Draw(plan), 500 * px_per_pt, 500 * px_per_pt, px_per_pt)
+    page.insert_image(fitz.Rect(100, 300, 1100, 1300), stream=_scanned(plan, rng), overlay=False)
+
+    section = Image.new("L", (int(1000 * px_per_pt), int(800 * px_per_pt)), 255)
+    _draw_section(ImageDraw.Draw(section), 40 * px_per_pt, 40 * px_per_pt, 700 * px_per_pt, px_per_pt)
+    page.insert_image(fitz.Rect(1150, 260, 2150, 1060), stream=_scanned(section, rng))
+    for i, line in enumerate(TITLE):
+        page.insert_text((1750, 1470 + 40 * i), line, fontsize=20)
+    for i, line in enumerate(NOTES):
+        page.insert_text((1150, 1120 + 34 * i), line, fontsize=16)
+    doc.save(path)
+    doc.close()
+
+
+def full_page_ocr(pdf: _DocumentoPDF) -> str:
+    """The previous implementation: every page, whole sheet, one call."""
+    mat = fitz.Matrix(pdf_extractor.OCR_DPI / 72, pdf_extractor.OCR_DPI / 72)
+    partes = []
+    for i in range(pdf.page_count):
+        pix = pdf.page(i).get_pixmap(matrix=mat, colorspace=fitz.csGRAY)
+        img = Image.frombytes("L", [pix.width, pix.height], pix.samples)
+        partes.append(pytesseract.image_to_string(img, lang=pdf_extractor._OCR_LANG, config=pdf_extractor._OCR_CONFIG))
+    return "\n".join(partes)
+
+
+def _normalize(text: str) -> str:
+    # Tesseract often drops or adds the blank after "EL."
+    return re.sub(r"\s+", "", text).upper()
+
+
+def label_recall(text: str, labels: list[str]) -> float:
+    found = _normalize(text)
+    return sum(_normalize(label) in found for label in labels) / len(labels)
+
+
+def geometry(extractor: PDFExtractor, native: str, ocr: str) -> list[tuple]:
+    geo = extractor._parse_text(native + "\n" + ocr, "bench")
+    return [(item.item, item.raio, item.altura, item.quantidade, item.comprimento) for item in geo.itens]
+
+
+def compare(extractor: PDFExtractor, path: Path, labels: list[str] | None) -> None:
+    with _DocumentoPDF(path) as pdf:
+        native = extractor._extract_text_pdfplumber(pdf)
+        start = time.perf_counter()
+        full = full_page_ocr(pdf)
+        full_s = time.perf_counter() - start
+        start = time.perf_counter()
+        regions = extractor._extract_text_ocr(pdf, max_workers=1)
+        regions_s = time.perf_counter() - start
+    geo_full, geo_regions = geometry(extractor, native, full), geometry(extractor, native, regions)
+    for label, text, seconds in (("full", full, full_s), ("regions", regions, regions_s)):
+        recall = f"{label_recall(text, labels):.0%}" if labels else "-"
+        print(f"{path.stem:>10} {label:>8} {seconds:>8.2f} {len(text):>7} {recall:>7}")
+    print(f"{'':>10} {'geometry':>8} {'same' if geo_full == geo_regions else 'DIFFERENT'}")
+    if geo_full != geo_regions:
+        for a, b in zip(geo_full, geo_regions):
+            if a != b:
+                print(f"{'':>12} full {a}\n{'':>12} regions {b}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pdf", type=Path, nargs="*", default=[])
+    parser.add_argument("--dpi", type=int, default=150, help="raster resolution of the synthetic sheets")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    print(f"tesseract {pytesseract.get_tesseract_version()}, OCR at {pdf_extractor.OCR_DPI} dpi")
+    print(f"{'sheet':>10} {'ocr':>8} {'seconds':>8} {'chars':>7} {'labels':>7}")
+    extractor = PDFExtractor(ConfigProjeto())
+    for path in args.pdf:
+        compare(extractor, path, None)
+    if args.pdf:
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        scan, mixed = os.path.join(tmp, "scan.pdf"), os.path.join(tmp, "mixed.pdf")
+        build_scan_pdf(scan, args.dpi)
+        build_mixed_pdf(mixed, args.dpi)
+        compare(extractor, Path(scan), TITLE + NOTES + PLAN_LABELS + SECTION_LABELS)
+        compare(extractor, Path(mixed), PLAN_LABELS + SECTION_LABELS)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""Benchmark: email RAG answer streams vs. latency of unrelated endpoints.
+
+Starts two servers under uvicorn on free local ports:
+
+- a fake OpenAI-compatible LLM (``/v1/chat/completions`` with
+  ``stream=true``) that waits ``--first-token-ms`` and then sends
+  ``--tokens`` chunks ``--token-ms`` apart;
+- the API under test: the email router on a temporary SQLite database plus
+  an unrelated ``/ping`` route.
+
+``--streams`` chat questions are opened at once while ``/ping`` is polled.
+Two modes are compared:
+
+- ``legacy``: the previous ``stream_answer`` — retrieval inline and the
+  synchronous LangChain stream iterated inside the async response;
+- ``async``: ``astream_answer`` — retrieval in the bounded executor, async
+  LLM stream.
+
+Retrieval (query embedding, Chroma MMR, FlashRank) needs the models from
+the Hugging Face hub, so it is stood in for by ``--retrieval-ms`` of
+``time.sleep``; like the native code it replaces, it releases the GIL.
+Reported: ``/ping`` p50/p95/max while streaming (and idle, as baseline),
+and time-to-first-token from the ``timings`` in each stream's final event.
+Client, fake LLM and API share one process (and the GIL), so part of the
+``async`` ping latency is the load generator itself.
+
+Usage:
+    cd backend
+    python -m scripts.bench_email_rag_stream --streams 20 --retrieval-ms 150
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from langchain_core.documents import Document
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.database import Base, get_db
+from app.models.email_models import EmailAccount
+from app.models.rag_models import ChatSession
+
+
+def fake_llm_app(first_token_s: float, tokens: int, token_s: float) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/v1/chat/completions")
+    async def completions(request: Request):
+        body = await request.json()
+
+        def chunk(delta: dict, finish: str | None = None) -> str:
+            data = {
+                "id": "chatcmpl-bench",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "gpt-4o-mini"),
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+            }
+            return f"data: {json.dumps(data)}\n\n"
+
+        async def events():
+            await asyncio.sleep(first_token_s)
+            yield chunk({"role": "assistant", "content": ""})
+            for i in range(tokens):
+                yield chunk({"content": f"palavra{i} "})
+                await asyncio.sleep(token_s)
+            yield chunk({}, "stop")
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+class Server:
+    """Runs an ASGI app under uvicorn in a background thread."""
+
+    def __init__(self, app: FastAPI):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="error"))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self) -> "Server":
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.should_exit = True
+        self.thread.join()
+
+
+def simulated_retrieval(retrieval_s: float):
+    def retrieve(self, question: str, collection_id: str, k_initial: int = 40, k_final: int = 7):
+        time.sleep(retrieval_s)
+        return [
+            Document(
+                page_content=f"Trecho {i} sobre {question}",
+                metadata={"email_sender": "Fulano <f@example.com>", "email_date": "2026-01-01", "email_subject": f"Assunto {i}"},
+            )
+            for i in range(k_final)
+        ]
+
+    return retrieve
+
+
+async def legacy_stream_answer(self, question, collection_id, chat_history=None, timings=None):
+    """The previous implementation, kept here as the reference."""
+    docs = self._retrieve_and_rerank(question, collection_id)
+    for chunk in self.streaming_llm.stream(self._build_messages(question, docs, chat_history)):
+        if chunk.content:
+            yield chunk.content
+
+
+def build_app(db_path: str) -> tuple[FastAPI, str, list[str]]:
+    from app.routers import email
+
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False)
+
+    def override_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(email.router, prefix="/api/email")
+    app.dependency_overrides[get_db] = override_db
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    db = SessionLocal()
+    account = EmailAccount(
+        user_id="bench", access_token="t", token_expires_at=datetime.utcnow() + timedelta(hours=1),
+        collection_id="bench-collection",
+    )
+    db.add(account)
+    db.commit()
+    sessions = []
+    for _ in range(64):
+        session = ChatSession(collection_id="bench-collection", title="bench")
+        db.add(session)
+        db.commit()
+        sessions.append(session.id)
+    db.close()
+    return app, "bench", sessions
+
+
+async def ask(client: httpx.AsyncClient, session_id: str, user_id: str) -> dict:
+    start = time.perf_counter()
+    timings = {}
+    async with client.stream(
+        "POST", f"/api/email/chat/{session_id}/message",
+        params={"user_id": user_id}, json={"content": "qual o prazo da válvula?"},
+    ) as response:
+        async for line in response.aiter_lines():
+            if line.startswith("data: "):
+                event = json.loads(line[6:])
+                if "error" in event:
+                    raise RuntimeError(event["error"])
+                if event.get("done"):
+                    timings = event.get("timings") or {}
+    timings["client_total_ms"] = (time.perf_counter() - start) * 1000
+    return timings
+
+
+async def poll_ping(client: httpx.AsyncClient, stop: asyncio.Event, interval_s: float) -> list[float]:
+    latencies = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get("/ping")
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(interval_s)
+    return latencies
+
+
+async def run_load(base_url: str, user_id: str, sessions: list[str], streams: int) -> tuple[list[float], list[dict]]:
+    limits = httpx.Limits(max_connections=streams + 4)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        stop = asyncio.Event()
+        poller = asyncio.create_task(poll_ping(client, stop, 0.02))
+        results = await asyncio.gather(*(ask(client, sessions[i % len(sessions)], user_id) for i in range(streams)))
+        stop.set()
+        return await poller, results
+
+
+async def idle_baseline(base_url: str, seconds: float) -> list[float]:
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        stop = asyncio.Event()
+        poller = asyncio.create_task(poll_ping(client, stop, 0.02))
+        await asyncio.sleep(seconds)
+        stop.set()
+        return await poller
+
+
+def _pct(values: list[float], q: float) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[int(q) - 1]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--streams", type=int, default=20)
+    parser.add_argument("--retrieval-ms", type=float, default=150)
+    parser.add_argument("--first-token-ms", type=float, default=300)
+    parser.add_argument("--tokens", type=int, default=60)
+    parser.add_argument("--token-ms", type=float, default=15)
+    parser.add_argument("--modes", nargs="+", default=["legacy", "async"], choices=["legacy", "async"])
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    llm = fake_llm_app(args.first_token_ms / 1000, args.tokens, args.token_ms / 1000)
+    with Server(llm) as llm_server, tempfile.TemporaryDirectory() as tmp:
+        settings.OPENAI_API_KEY = "bench"
+        settings.OPENAI_BASE_URL = f"{llm_server.url}/v1"
+
+        from app.services.email.email_rag_service import EmailRAGService
+
+        EmailRAGService._retrieve_and_rerank = simulated_retrieval(args.retrieval_ms / 1000)
+        async_stream = EmailRAGService.astream_answer
+
+        print(f"{'mode':>7} {'ping p50':>8} {'p95':>7} {'max':>7} {'ttft p50':>8} {'ttft p95':>8} {'total p95':>9}")
+        for mode in args.modes:
+            EmailRAGService.astream_answer = legacy_stream_answer if mode == "legacy" else async_stream
+            app, user_id, sessions = build_app(os.path.join(tmp, f"{mode}.db"))
+            with Server(app) as api:
+                idle = asyncio.run(idle_baseline(api.url, 1.0))
+                pings, results = asyncio.run(run_load(api.url, user_id, sessions, args.streams))
+            ttft = [r["ttft_ms"] for r in results if "ttft_ms" in r]
+            totals = [r["client_total_ms"] for r in results]
+            if mode == args.modes[0]:
+                print(f"{'idle':>7} {_pct(idle, 50):>8.1f} {_pct(idle, 95):>7.1f} {max(idle):>7.1f}")
+            ttft_cols = f"{_pct(ttft, 50):>8.0f} {_pct(ttft, 95):>8.0f}" if ttft else f"{'-':>8} {'-':>8}"
+            print(
+                f"{mode:>7} {_pct(pings, 50):>8.1f} {_pct(pings, 95):>7.1f} {max(pings):>7.1f} "
+                f"{ttft_cols} {_pct(totals, 95):>9.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
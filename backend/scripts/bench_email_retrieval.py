@@ -0,0 +1,262 @@
+"""Benchmark: adaptive email retrieval vs. the fixed MMR pipeline.
+
+Builds a synthetic mailbox in a temporary Chroma store — threads on a few
+hundred topics, where replies quote the previous message, so near-duplicate
+chunks are common — and answers the same questions with both pipelines:
+
+- ``legacy``: MMR retriever with ``fetch_k = 10 × k`` (k = 40), every
+  candidate reranked, top 7 kept;
+- ``adaptive``: ``EmailVectorStoreService.search`` (pool sized to the
+  collection and score distribution, MMR only when it would change the
+  selected set) and the reranker's (query, passage text) score LRU.
+
+Recall@7 and recall@40 are measured against the legacy output (chunk ids).
+``R@7 ideal`` compares the final 7 with what the reranker picks when it
+scores all ``10 × k`` nearest chunks — legacy MMR also reaches deep into
+the pool for diversity, so disagreeing with it is not always a loss.
+Each question set is asked twice: ``cold`` with an empty score cache, then
+``warm`` (repeated/follow-up questions). Latency columns are per question;
+``mmr`` is the share of questions where MMR ran.
+
+The embedding model and the FlashRank weights come from the Hugging Face
+hub. When they cannot be loaded, chunks are embedded with signed feature
+hashing (384 dims) and reranking uses a lexical-overlap stand-in that sleeps
+``--rerank-ms`` per passage, roughly TinyBERT on one CPU core. Chroma, the
+MMR selection and the caching are the real code.
+
+Usage:
+    cd backend
+    python -m scripts.bench_email_retrieval --chunks 2000 100000 --queries 100
+"""
+
+import argparse
+import hashlib
+import logging
+import random
+import statistics
+import tempfile
+import time
+from functools import lru_cache
+from typing import List
+
+import numpy as np
+from langchain_chroma import Chroma
+from langchain_core.embeddings import Embeddings
+
+from app.services.email import email_vector_store
+from app.services.email.email_vector_store import EmailVectorStoreService
+from app.services.rag.rerank_service import RerankScoreCache, RerankService
+
+_COMMON = (
+    "por favor segue anexo conforme reunião ontem att obrigado prezados bom dia equipe "
+    "revisão pendente retorno prazo semana próxima informação"
+).split()
+_COMMON_SET = set(_COMMON)
+_DIM = 384
+
+
+@lru_cache(maxsize=200_000)
+def _token_vector(token: str) -> tuple:
+    digest = hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+    slots = [int.from_bytes(digest[i:i + 2], "little") % _DIM for i in range(0, 8, 2)]
+    signs = [1.0 if digest[8 + i] & 1 else -1.0 for i in range(4)]
+    return tuple(zip(slots, signs))
+
+
+class HashingEmbeddings(Embeddings):
+    """Bag-of-words feature hashing, common words down-weighted; model-free."""
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(_DIM, dtype=np.float32)
+        for token in text.lower().split():
+            weight = 0.3 if token in _COMMON_SET else 1.0
+            for slot, sign in _token_vector(token):
+                vector[slot] += sign * weight
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+class LexicalRanker:
+    """Stand-in for the FlashRank ``Ranker``: token overlap, fixed cost per passage."""
+
+    def __init__(self, passage_s: float):
+        self.passage_s = passage_s
+
+    def rerank(self, request) -> List[dict]:
+        time.sleep(self.passage_s * len(request.passages))
+        query = set(request.query.lower().split())
+        results = []
+        for passage in request.passages:
+            tokens = passage["text"].lower().split()
+            overlap = sum(1 for token in tokens if token in query)
+            results.append({**passage, "score": overlap / (len(tokens) ** 0.5 or 1.0)})
+        return sorted(results, key=lambda item: item["score"], reverse=True)
+
+
+def build_mailbox(chunks: int, topics: int, seed: int) -> tuple[list[str], list[dict], list[str]]:
+    rng = random.Random(seed)
+    vocab = [[f"t{t}w{w}" for w in range(14)] for t in range(topics)]
+    texts, metas, ids = [], [], []
+    thread = 0
+    while len(texts) < chunks:
+        topic = rng.randrange(topics)
+        previous = None
+        for reply in range(rng.randint(1, 6)):
+            words = [rng.choice(vocab[topic]) for _ in range(rng.randint(6, 14))]
+            words += [rng.choice(_COMMON) for _ in range(rng.randint(10, 20))]
+            words += [rng.choice(vocab[rng.randrange(topics)]) for _ in range(rng.randint(0, 6))]
+            rng.shuffle(words)
+            text = " ".join(words)
+            if previous and rng.random() < 0.7:
+                text = f"{text} > {previous}"[:600]
+            previous = text
+            texts.append(text)
+            metas.append({"collection_id": "", "email_subject": f"Tópico {topic}", "thread": thread})
+            ids.append(f"c{len(ids)}")
+            if len(texts) >= chunks:
+                break
+        thread += 1
+    return texts, metas, ids
+
+
+def build_queries(count: int, topics: int, seed: int) -> list[str]:
+    rng = random.Random(seed + 1)
+    queries = []
+    for _ in range(count):
+        topic = rng.randrange(topics)
+        words = [f"t{topic}w{rng.randrange(14)}" for _ in range(rng.randint(2, 4))]
+        queries.append(" ".join(words + [rng.choice(_COMMON)]))
+    return queries
+
+
+def load_store(persist_dir: str, embeddings: Embeddings) -> EmailVectorStoreService:
+    store = EmailVectorStoreService.__new__(EmailVectorStoreService)
+    store.persist_directory = persist_dir
+    store.embedding_function = embeddings
+    store.vector_db = Chroma(
+        persist_directory=persist_dir, embedding_function=embeddings, collection_name="email_bench",
+    )
+    return store
+
+
+def load_reranker(rerank_s: float) -> tuple[RerankService, str]:
+    try:
+        service = RerankService(cache=RerankScoreCache(0))
+        return service, "flashrank"
+    except Exception as exc:
+        logging.getLogger(__name__).debug("FlashRank indisponível: %s", exc)
+    service = RerankService.__new__(RerankService)
+    service.ranker = LexicalRanker(rerank_s)
+    service.cache = RerankScoreCache(0)
+    return service, "lexical stand-in"
+
+
+def _pct(values: list[float], q: int) -> float:
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1] if len(values) > 1 else values[0]
+
+
+def run(store, reranker, queries: list[str], collection_id: str, mode: str, k: int, top: int):
+    results, search_ms, rerank_ms = [], [], []
+    mmr_runs = 0
+    mmr = email_vector_store._mmr
+
+    def counting_mmr(*args):
+        nonlocal mmr_runs
+        mmr_runs += 1
+        return mmr(*args)
+
+    email_vector_store._mmr = counting_mmr
+    for query in queries:
+        start = time.perf_counter()
+        if mode == "legacy":
+            candidates = store.as_retriever(collection_id=collection_id, k=k).invoke(query)
+        else:
+            candidates = store.search(query, collection_id, k=k)
+        middle = time.perf_counter()
+        final = reranker.rerank(query, candidates, top_k=top)
+        end = time.perf_counter()
+        search_ms.append((middle - start) * 1000)
+        rerank_ms.append((end - middle) * 1000)
+        results.append(([doc.id for doc in candidates], [doc.id for doc in final]))
+    email_vector_store._mmr = mmr
+    mmr_share = 1.0 if mode == "legacy" else mmr_runs / len(queries)
+    return results, search_ms, rerank_ms, mmr_share
+
+
+def ideal_top(store, queries: list[str], collection_id: str, k: int, top: int) -> list[tuple]:
+    """Reranker's choice over the whole ``10 × k`` nearest chunks, per question."""
+    ranker = RerankService.__new__(RerankService)
+    ranker.ranker = LexicalRanker(0.0)
+    ranker.cache = RerankScoreCache(0)
+    ideal = []
+    for query in queries:
+        nearest = store.vector_db.similarity_search(query, k=10 * k, filter={"collection_id": collection_id})
+        ideal.append(([], [doc.id for doc in ranker.rerank(query, nearest, top_k=top)]))
+    return ideal
+
+
+def _recall(results, reference, index: int) -> float:
+    scores = [
+        len(set(got[index]) & set(ref[index])) / max(1, len(ref[index]))
+        for got, ref in zip(results, reference)
+    ]
+    return sum(scores) / len(scores)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, nargs="+", default=[2000, 100000])
+    parser.add_argument("--topics", type=int, default=400)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--rerank-ms", type=float, default=1.5, help="stand-in cost per passage")
+    parser.add_argument("--cache-size", type=int, default=50000)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    embeddings = HashingEmbeddings()
+    reranker, reranker_name = load_reranker(args.rerank_ms / 1000)
+    print(f"reranker: {reranker_name}")
+    print(
+        f"{'chunks':>7} {'mode':>8} {'pass':>5} {'search p50':>10} {'p95':>6} "
+        f"{'rerank p50':>10} {'p95':>6} {'total p95':>9} {'mmr':>5} {'R@40':>5} {'R@7':>5} {'R@7 ideal':>9}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        store = load_store(tmp, embeddings)
+        for count in args.chunks:
+            collection_id = f"bench-{count}"
+            texts, metas, ids = build_mailbox(count, args.topics, seed=count)
+            for meta in metas:
+                meta["collection_id"] = collection_id
+            ids = [f"{collection_id}:{i}" for i in ids]
+            for start in range(0, count, 5000):
+                store.vector_db.add_texts(
+                    texts[start:start + 5000], metadatas=metas[start:start + 5000], ids=ids[start:start + 5000],
+                )
+            queries = build_queries(args.queries, args.topics, seed=count)
+            ideal = ideal_top(store, queries, collection_id, 40, 7)
+
+            reranker.cache = RerankScoreCache(0)
+            legacy = run(store, reranker, queries, collection_id, "legacy", 40, 7)
+            reference = legacy[0]
+            rows = [("legacy", "-", *legacy)]
+            reranker.cache = RerankScoreCache(args.cache_size)
+            for label in ("cold", "warm"):
+                rows.append(("adaptive", label, *run(store, reranker, queries, collection_id, "adaptive", 40, 7)))
+            for mode, label, results, search_ms, rerank_ms, mmr_share in rows:
+                totals = [a + b for a, b in zip(search_ms, rerank_ms)]
+                print(
+                    f"{count:>7} {mode:>8} {label:>5} {_pct(search_ms, 50):>10.1f} {_pct(search_ms, 95):>6.1f} "
+                    f"{_pct(rerank_ms, 50):>10.1f} {_pct(rerank_ms, 95):>6.1f} {_pct(totals, 95):>9.1f} {mmr_share:>5.2f} "
+                    f"{_recall(results, reference, 0):>5.2f} {_recall(results, reference, 1):>5.2f} "
+                    f"{_recall(results, ideal, 1):>9.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
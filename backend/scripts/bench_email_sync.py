@@ -0,0 +1,267 @@
+"""Benchmark: email sync against a local fake Microsoft Graph server.
+
+Starts a small Graph look-alike (``/v1.0/me/messages`` with ``$filter`` on
+``receivedDateTime``, ``$top``, ``$orderby`` and ``@odata.nextLink`` paging)
+under uvicorn on a free local port, with ``--latency-ms`` added to every page
+like a real tenant. Each run syncs the same synthetic mailbox into a fresh
+SQLite database:
+
+- ``legacy``: the previous loop — ``$top=50``, a new HTTP client per page,
+  one INSERT + COMMIT + REFRESH per message, all chunks stored at the end;
+- ``pipeline``: ``sync_emails`` — date windows paged concurrently over one
+  pooled client into a bounded queue, bulk inserts of
+  ``EMAIL_SYNC_BATCH_SIZE`` rows per commit, chunks stored per batch.
+
+Both runs must store the same messages and produce the same number of
+chunks. The pipeline then syncs the unchanged mailbox again: with the
+per-account watermark this is one Graph request (``repeat`` columns). ``--throttle-every N`` answers every N-th request with 429 to
+exercise the retry path. The vector store is replaced by a counter, so the
+embedding model is not needed.
+
+Usage:
+    cd backend
+    python -m scripts.bench_email_sync --messages 2000 20000 --latency-ms 150
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import socket
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlencode
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import rag_models  # noqa: F401  (collections table)
+from app.models.email_models import EmailAccount, EmailMessage, EmailSyncJob, EmailSyncStatus
+from app.services.email.email_sync_service import _prepare_message, sync_emails
+from app.services.email.microsoft_graph import get_graph_service
+
+_WORDS = "pedido válvula bomba relatório reunião projeto prazo medição revisão contrato tubulação".split()
+
+
+def build_mailbox(count: int, months: int, seed: int = 0) -> list[dict]:
+    """``count`` Graph-shaped messages spread over the last ``months``, newest first."""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    span = timedelta(days=months * 30 - 1).total_seconds()
+    messages = []
+    for i in range(count):
+        received = now - timedelta(seconds=rng.uniform(60, span))
+        paragraphs = "".join(
+            f"<p>{' '.join(rng.choice(_WORDS) for _ in range(rng.randint(20, 60)))}</p>"
+            for _ in range(rng.randint(1, 8))
+        )
+        messages.append({
+            "id": f"AAMk-{seed}-{i:07d}",
+            "subject": f"Assunto {i} {rng.choice(_WORDS)}",
+            "from": {"emailAddress": {"name": f"Remetente {i % 97}", "address": f"r{i % 97}@example.com"}},
+            "toRecipients": [{"emailAddress": {"name": "Eu", "address": "eu@example.com"}}],
+            "receivedDateTime": received.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "body": {"contentType": "html", "content": f"<html><body>{paragraphs}</body></html>"},
+            "bodyPreview": paragraphs[3:120],
+        })
+    messages.sort(key=lambda m: m["receivedDateTime"], reverse=True)
+    return messages
+
+
+def fake_graph_app(mailbox: list[dict], latency_s: float, throttle_every: int) -> FastAPI:
+    app = FastAPI()
+    app.state.requests = requests = {"count": 0}
+
+    def parse_filter(expr: str) -> tuple[str, str]:
+        since, until = "", "9999"
+        for clause in expr.split(" and "):
+            _, op, value = clause.split(" ")
+            if op == "ge":
+                since = value
+            elif op == "lt":
+                until = value
+        return since, until
+
+    @app.get("/v1.0/me/messages")
+    async def messages(request: Request):
+        requests["count"] += 1
+        await asyncio.sleep(latency_s)
+        if throttle_every and requests["count"] % throttle_every == 0:
+            return JSONResponse({"error": {"code": "TooManyRequests"}}, status_code=429, headers={"Retry-After": "0"})
+
+        params = request.query_params
+        since, until = parse_filter(params["$filter"])
+        top, skip = int(params.get("$top", 10)), int(params.get("$skip", 0))
+        selected = [m for m in mailbox if since <= m["receivedDateTime"] < until]
+        page = selected[skip:skip + top]
+        data = {"value": page}
+        if skip + top < len(selected):
+            query = urlencode({**params, "$skip": skip + top})
+            data["@odata.nextLink"] = f"{request.base_url}v1.0/me/messages?{query}"
+        return data
+
+    @app.get("/v1.0/me/messages/{message_id}")
+    async def message(message_id: str):
+        requests["count"] += 1
+        await asyncio.sleep(latency_s)
+        for msg in mailbox:
+            if msg["id"] == message_id:
+                return msg
+        return JSONResponse({"error": {"code": "ErrorItemNotFound"}}, status_code=404)
+
+    return app
+
+
+class FakeGraphServer:
+    """Runs the fake Graph app under uvicorn in a background thread."""
+
+    def __init__(self, app: FastAPI):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="error"))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/v1.0"
+
+    def __enter__(self) -> "FakeGraphServer":
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.should_exit = True
+        self.thread.join()
+
+
+class _CountingStore:
+    def __init__(self):
+        self.chunks = 0
+
+    def add_documents(self, documents, ids=None) -> None:
+        self.chunks += len(documents)
+
+
+async def legacy_sync(account_id: str, period_months: int, db, store: _CountingStore) -> EmailSyncJob:
+    """The pre-pipeline loop, kept here as the reference."""
+    account = db.query(EmailAccount).filter(EmailAccount.id == account_id).first()
+    job = EmailSyncJob(account_id=account_id, status=EmailSyncStatus.SYNCING, period_months=period_months)
+    db.add(job)
+    db.commit()
+
+    existing_ids = {row[0] for row in db.query(EmailMessage.microsoft_message_id).all()}
+    since_date = datetime.utcnow() - timedelta(days=period_months * 30)
+    graph = get_graph_service()
+    next_link, new_messages = None, []
+    while True:
+        result = await graph.get_messages(account.access_token, since_date, next_link=next_link)
+        new_messages.extend(m for m in result["value"] if m["id"] not in existing_ids)
+        next_link = result.get("next_link")
+        if not next_link or not result["value"]:
+            break
+    job.total_emails = len(new_messages)
+    db.commit()
+
+    chunks = []
+    for msg in new_messages:
+        row, msg_chunks = _prepare_message(msg, account_id, account.collection_id)
+        record = EmailMessage(**row)
+        db.add(record)
+        db.commit()
+        db.refresh(record)
+        chunks.extend(msg_chunks)
+        record.is_indexed = bool(msg_chunks)
+        job.processed_emails += 1
+        job.indexed_emails += int(bool(msg_chunks))
+        db.commit()
+    store.add_documents(chunks)
+    job.status = EmailSyncStatus.COMPLETED
+    db.commit()
+    return job
+
+
+def run_mode(mode: str, db_path: str, period_months: int, requests: dict) -> tuple[float, dict]:
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+    account = EmailAccount(
+        user_id="bench",
+        access_token="token",
+        token_expires_at=datetime.utcnow() + timedelta(hours=1),
+        collection_id="bench-collection",
+    )
+    db.add(account)
+    db.commit()
+
+    store = _CountingStore()
+    start = time.perf_counter()
+    if mode == "legacy":
+        job = asyncio.run(legacy_sync(account.id, period_months, db, store))
+    else:
+        job = asyncio.run(sync_emails(account.id, period_months, db, vector_store=store))
+    elapsed = time.perf_counter() - start
+
+    repeat = None
+    if mode == "pipeline":
+        requests["count"] = 0
+        start = time.perf_counter()
+        asyncio.run(sync_emails(account.id, period_months, db, vector_store=_CountingStore()))
+        repeat = (time.perf_counter() - start, requests["count"])
+
+    rows = db.query(
+        EmailMessage.microsoft_message_id, EmailMessage.subject, EmailMessage.sender_email,
+        EmailMessage.recipients, EmailMessage.received_at, EmailMessage.body_preview, EmailMessage.is_indexed,
+    ).all()
+    summary = {
+        "rows": sorted(tuple(row) for row in rows),
+        "chunks": store.chunks,
+        "counters": (job.total_emails, job.processed_emails, job.indexed_emails),
+    }
+    db.close()
+    engine.dispose()
+    return elapsed, summary, repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, nargs="+", default=[2000, 20000])
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--latency-ms", type=float, default=150, help="server-side delay per page")
+    parser.add_argument("--throttle-every", type=int, default=0, help="answer every N-th request with 429")
+    parser.add_argument("--modes", nargs="+", default=["legacy", "pipeline"], choices=["legacy", "pipeline"])
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    graph = get_graph_service()
+
+    print(f"{'messages':>8} {'mode':>9} {'wall s':>8} {'msg/s':>8} {'chunks':>7} {'repeat s':>8} {'requests':>8}  same")
+    for count in args.messages:
+        mailbox = build_mailbox(count, args.months)
+        app = fake_graph_app(mailbox, args.latency_ms / 1000, args.throttle_every)
+        with FakeGraphServer(app) as server, tempfile.TemporaryDirectory() as tmp:
+            graph.GRAPH_BASE = server.base_url
+            reference = None
+            for mode in args.modes:
+                elapsed, summary, repeat = run_mode(
+                    mode, os.path.join(tmp, f"{mode}.db"), args.months, app.state.requests,
+                )
+                reference = reference or summary
+                repeat_s, repeat_requests = (f"{repeat[0]:.2f}", str(repeat[1])) if repeat else ("-", "-")
+                print(
+                    f"{count:>8} {mode:>9} {elapsed:>8.2f} {count / elapsed:>8.0f} {summary['chunks']:>7} "
+                    f"{repeat_s:>8} {repeat_requests:>8}  {summary == reference and len(summary['rows']) == count}"
+                )
+
+
+if __name__ == "__main__":
+    main()
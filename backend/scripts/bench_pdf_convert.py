@@ -0,0 +1,141 @@
+"""Check and benchmark: PDF → DOCX in parallel page ranges vs. one pass.
+
+Generates fixture PDFs (headings, wrapped paragraphs, two-column pages,
+ruled tables, embedded images) with ``--pages`` page counts, converts each
+once with ``Converter.convert`` as the reference and then with
+``PdfConvertService.convert_parallel`` split into 1 to ``--max-ranges``
+ranges (``min_range_pages=1``, so every range count is actually used). The
+pool is restarted with the range count before each run.
+
+Each DOCX is compared part by part with the reference, ``docProps/*``
+excluded (creation time). ``same`` must be ``True`` on every row; the
+script exits with status 1 otherwise. ``wall s`` includes the final
+``build_docx`` step; on one CPU the ranges only add overhead.
+
+Usage:
+    cd backend
+    python -m scripts.bench_pdf_convert [--pages 1 7 25 40] [--max-ranges 4]
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+import zipfile
+
+import fitz  # PyMuPDF
+
+from app.services.pdf_convert_service import _POOL, PdfConvertService
+from app.services.process_pool import discard_pool, get_pool
+
+_WORDS = (
+    "bomba válvula linha tanque pressão vazão instrumento controle projeto "
+    "revisão desenho folha dados processo fluido temperatura nível sinal"
+).split()
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    text = " ".join(rng.choice(_WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+
+def _image(rng: random.Random) -> bytes:
+    pix = fitz.Pixmap(fitz.csRGB, 64, 48, rng.randbytes(64 * 48 * 3), False)
+    return pix.tobytes("png")
+
+
+def build_fixture(path: str, pages: int, seed: int = 0) -> str:
+    """A PDF with a mix of layouts: text, two columns, tables and images."""
+    rng = random.Random(seed)
+    doc = fitz.open()
+    for number in range(pages):
+        page = doc.new_page(width=595, height=842)
+        page.insert_text((56, 70), f"Seção {number + 1} — {_sentence(rng, 3)}", fontsize=16)
+        kind = number % 4
+        if kind == 0:
+            box = fitz.Rect(56, 100, 539, 500)
+            page.insert_textbox(box, " ".join(_sentence(rng, 14) for _ in range(12)), fontsize=11)
+            page.insert_image(fitz.Rect(56, 520, 248, 664), stream=_image(rng))
+        elif kind == 1:
+            for left in (56, 310):
+                box = fitz.Rect(left, 100, left + 229, 780)
+                page.insert_textbox(box, " ".join(_sentence(rng, 10) for _ in range(14)), fontsize=10)
+        elif kind == 2:
+            rows, cols, top = 12, 4, 110
+            widths = [120, 120, 120, 123]
+            for row in range(rows + 1):
+                y = top + row * 24
+                page.draw_line((56, y), (539, y))
+            x = 56
+            for col in range(cols + 1):
+                page.draw_line((x, top), (x, top + rows * 24))
+                if col < cols:
+                    for row in range(rows):
+                        text = f"TAG-{rng.randint(100, 999)}" if row else f"Coluna {col + 1}"
+                        page.insert_text((x + 4, top + row * 24 + 16), text, fontsize=10)
+                    x += widths[col]
+            page.insert_textbox(fitz.Rect(56, 420, 539, 780), _sentence(rng, 40), fontsize=11)
+        else:
+            page.insert_image(fitz.Rect(56, 100, 300, 280), stream=_image(rng))
+            page.insert_textbox(fitz.Rect(310, 100, 539, 280), _sentence(rng, 30), fontsize=10)
+            page.insert_textbox(fitz.Rect(56, 300, 539, 780), " ".join(_sentence(rng, 12) for _ in range(10)), fontsize=11)
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def docx_parts(path: str) -> dict[str, bytes]:
+    with zipfile.ZipFile(path) as archive:
+        return {
+            name: archive.read(name)
+            for name in archive.namelist()
+            if not name.startswith("docProps/")
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 7, 25, 40])
+    parser.add_argument("--max-ranges", type=int, default=4)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    service = PdfConvertService()
+    all_same = True
+    print(f"{'pages':>5} {'ranges':>6} {'wall s':>8} {'parts':>6} {'same':>5}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            pdf_path = build_fixture(os.path.join(tmp, f"fixture_{pages}.pdf"), pages, seed=pages)
+            reference_path = os.path.join(tmp, f"reference_{pages}.docx")
+            start = time.perf_counter()
+            service.convert(pdf_path, reference_path)
+            print(f"{pages:>5} {'single':>6} {time.perf_counter() - start:>8.2f}")
+            reference = docx_parts(reference_path)
+
+            for ranges in range(1, args.max_ranges + 1):
+                discard_pool(_POOL)
+                if ranges > 1:
+                    get_pool(_POOL, ranges).submit(os.getpid).result()
+                work_dir = tempfile.mkdtemp(dir=tmp)
+                output_path = os.path.join(tmp, f"parallel_{pages}_{ranges}.docx")
+                start = time.perf_counter()
+                service.convert_parallel(pdf_path, output_path, work_dir, max_workers=ranges, min_range_pages=1)
+                elapsed = time.perf_counter() - start
+                parts = docx_parts(output_path)
+                same = parts == reference
+                all_same &= same
+                print(f"{pages:>5} {ranges:>6} {elapsed:>8.2f} {len(parts):>6} {str(same):>5}")
+                if not same:
+                    differing = sorted(
+                        name for name in parts.keys() | reference.keys() if parts.get(name) != reference.get(name)
+                    )
+                    print(f"{'':>12} differing parts: {', '.join(differing)}")
+    discard_pool(_POOL)
+    sys.exit(0 if all_same else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Benchmark: PdfExtractService.extract_tables, serial vs. sharded.
+
+Builds synthetic instrument-index style PDFs (one ruled table per page, plus
+an optional share of image-only "scanned" pages) and times
+``extract_tables`` with ``max_workers=1`` and with each requested worker
+count. Every parallel result is compared with the serial one. The pool is
+warmed up before timing, as it is kept alive between requests in the API.
+
+Scanned pages are only rendered when the Gemini key is configured; without
+it they are detected and skipped, as in production. ``--render`` times the
+page rendering on its own (serial vs. pool) so it can be measured offline.
+
+Usage:
+    cd backend
+    python -m scripts.bench_pdf_tables --pages 10 50 200 --workers 2 4
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+import fitz  # PyMuPDF
+
+from app.services import pdf_extract_service
+from app.services.pdf_extract_service import _POOL, PdfExtractService, _shards, render_pages
+from app.services.process_pool import discard_pool, get_pool
+
+_ROWS = 40
+_COLS = 8
+
+
+def build_table_pdf(path: str, pages: int, scanned_every: int = 0) -> None:
+    """Write a PDF with a ruled ``_ROWS`` x ``_COLS`` table on every page.
+
+    With ``scanned_every`` > 0, every n-th page is an image of a table with
+    no text layer, which the service routes to OCR.
+    """
+    doc = fitz.open()
+    width, height = 842, 595
+    left, top, cell_w, cell_h = 30, 40, 98, 13
+    for page_no in range(pages):
+        page = doc.new_page(width=width, height=height)
+        if scanned_every and page_no % scanned_every == scanned_every - 1:
+            pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, width, height), False)
+            pix.clear_with(230)
+            page.insert_image(page.rect, pixmap=pix)
+            continue
+        for r in range(_ROWS + 1):
+            y = top + r * cell_h
+            page.draw_line((left, y), (left + _COLS * cell_w, y), width=0.5)
+        for c in range(_COLS + 1):
+            x = left + c * cell_w
+            page.draw_line((x, top), (x, top + _ROWS * cell_h), width=0.5)
+        for r in range(_ROWS):
+            for c in range(_COLS):
+                text = f"COL{c}" if r == 0 else f"{page_no + 1}-{r:02d}-{c}"
+                page.insert_text((left + c * cell_w + 3, top + r * cell_h + 10), text, fontsize=7)
+    doc.save(path)
+    doc.close()
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    value = fn()
+    return time.perf_counter() - start, value
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4])
+    parser.add_argument("--scanned-every", type=int, default=10, help="every n-th page is a scan (0 = none)")
+    parser.add_argument("--render", action="store_true", help="also time scanned-page rendering")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    service = PdfExtractService()
+
+    print(f"{'pages':>6} {'workers':>7} {'seconds':>8} {'speedup':>8} {'tables':>7}  same")
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            path = os.path.join(tmp, f"tables_{pages}.pdf")
+            build_table_pdf(path, pages, args.scanned_every)
+
+            serial_s, serial = _timed(lambda: service.extract_tables(path, max_workers=1))
+            print(f"{pages:>6} {1:>7} {serial_s:>8.2f} {1.0:>8.2f} {serial['tables_found']:>7}")
+            for workers in args.workers:
+                # The shared pool only grows: start each size from a fresh, warm pool
+                discard_pool(_POOL)
+                get_pool(_POOL, workers).submit(os.getpid).result()
+                par_s, par = _timed(lambda: service.extract_tables(path, max_workers=workers))
+                print(
+                    f"{pages:>6} {workers:>7} {par_s:>8.2f} {serial_s / par_s:>8.2f} "
+                    f"{par['tables_found']:>7}  {par == serial}"
+                )
+
+            if args.render and args.scanned_every:
+                scanned = [
+                    (idx + 1, idx) for idx in range(pages) if idx % args.scanned_every == args.scanned_every - 1
+                ]
+                render_s, rendered = _timed(lambda: render_pages(path, scanned))
+                print(f"{pages:>6} {'render':>7} {render_s:>8.2f} {'':>8} {len(rendered):>7}")
+                for workers in args.workers:
+                    discard_pool(_POOL)
+                    pool = get_pool(_POOL, workers)
+                    pool.submit(os.getpid).result()
+                    shards = _shards(scanned, workers, pdf_extract_service._MIN_RENDER_SHARD_PAGES)
+                    par_s, _ = _timed(
+                        lambda: [f.result() for f in [pool.submit(render_pages, path, s) for s in shards]]
+                    )
+                    print(f"{pages:>6} {workers:>7} {par_s:>8.2f} {render_s / par_s:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
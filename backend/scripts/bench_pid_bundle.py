@@ -0,0 +1,125 @@
+"""Benchmark: annotated P&ID bundle export, in-memory vs. staged.
+
+Builds a batch of synthetic P&ID files, extracts them once, then exports the
+annotated bundle in a fresh process per mode so peak RSS is comparable:
+
+- ``memory``: the previous behaviour — every source appended to one
+  in-memory document and saved once, without garbage collection or deflate;
+- ``mupdf``: in memory, MuPDF's own dedup (``garbage=4``) and deflate;
+- ``default``: the defaults of ``export_highlighted_pdf_bundle`` — linear
+  stream dedup, final save with ``garbage=BUNDLE_GARBAGE`` and deflate;
+  staging writes every ``BUNDLE_FLUSH_PAGES`` pages only when the sources
+  total more than ``BUNDLE_STAGE_BYTES``;
+- ``staged``: the same with staging forced on (``stage_bytes=0``), as a
+  bundle over the threshold would run.
+
+``--pad-kb`` embeds an incompressible image of that size in every source,
+so the batch weighs like real CAD exports and memory differences show.
+
+Usage:
+    cd backend
+    python -m scripts.bench_pid_bundle --files 20 80 --pages 1 --pad-kb 2048
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import random
+import pickle
+import resource
+import tempfile
+import time
+
+import fitz  # PyMuPDF
+
+from scripts.synthetic_pid import build_synthetic_pid
+
+MODES = {
+    "memory": {"garbage": 0, "deflate": False, "dedup": False, "flush_pages": 0},
+    "mupdf": {"garbage": 4, "deflate": True, "dedup": False, "flush_pages": 0},
+    "default": {},
+    "staged": {"stage_bytes": 0},
+}
+
+
+def _pad_pdf(path: str, kb: int, seed: int) -> None:
+    """Embed a random-noise JPEG of roughly ``kb`` KB on the first page.
+
+    JPEG (DCT) like the raster content of real drawings: already compressed,
+    so ``deflate`` leaves it alone.
+    """
+    side = int((kb * 1024 / 1.5) ** 0.5)
+    rng = random.Random(seed)
+    pix = fitz.Pixmap(fitz.csRGB, side, side, rng.randbytes(side * side * 3), False)
+    doc = fitz.open(path)
+    doc[0].insert_image(fitz.Rect(20, 20, 120, 120), stream=pix.tobytes("jpeg"))
+    doc.saveIncr()
+    doc.close()
+
+
+def _child(mode: str, pdf_paths: list[str], result_path: str, output_path: str, queue) -> None:
+    logging.disable(logging.CRITICAL)
+    from app.services.pid.export.pdf_export import export_highlighted_pdf_bundle
+
+    with open(result_path, "rb") as f:
+        result = pickle.load(f)
+    base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    export_highlighted_pdf_bundle(pdf_paths, output_path, result, **MODES[mode])
+    elapsed = time.perf_counter() - start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((elapsed, base_rss, peak_rss))
+
+
+def run_mode(mode: str, pdf_paths: list[str], result_path: str, output_path: str) -> tuple[float, float, float]:
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_child, args=(mode, pdf_paths, result_path, output_path, queue))
+    proc.start()
+    elapsed, base_rss, peak_rss = queue.get()
+    proc.join()
+    # ru_maxrss is reported in KiB on Linux
+    return elapsed, base_rss / 1024, peak_rss / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, nargs="+", default=[20, 80])
+    parser.add_argument("--pages", type=int, default=2, help="pages per file")
+    parser.add_argument("--balloons", type=int, default=80)
+    parser.add_argument("--paper", default="A1")
+    parser.add_argument("--pad-kb", type=int, default=0, help="incompressible image per source (KB)")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES))
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    from app.services.pid_extract_service import PidExtractService
+
+    print(f"{'files':>5} {'mode':>7} {'wall s':>8} {'base MB':>8} {'peak MB':>8} {'delta MB':>8} {'out MB':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for files in args.files:
+            pdf_paths = [
+                build_synthetic_pid(os.path.join(tmp, f"pid_{files}_{i}.pdf"), args.pages, args.balloons, args.paper, seed=i)
+                for i in range(files)
+            ]
+            result = PidExtractService().extract_many(pdf_paths, use_cache=False)
+            if args.pad_kb:
+                for i, pdf_path in enumerate(pdf_paths):
+                    _pad_pdf(pdf_path, args.pad_kb, seed=i)
+            result_path = os.path.join(tmp, f"result_{files}.pkl")
+            with open(result_path, "wb") as f:
+                pickle.dump(result, f)
+
+            for mode in args.modes:
+                output_path = os.path.join(tmp, f"bundle_{files}_{mode}.pdf")
+                elapsed, base, peak = run_mode(mode, pdf_paths, result_path, output_path)
+                size = os.path.getsize(output_path) / (1024 * 1024)
+                print(
+                    f"{files:>5} {mode:>7} {elapsed:>8.2f} {base:>8.1f} {peak:>8.1f} "
+                    f"{peak - base:>8.1f} {size:>7.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
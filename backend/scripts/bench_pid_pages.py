@@ -0,0 +1,117 @@
+"""Benchmark: P&ID page-data acquisition vs. page count.
+
+Compares the old access pattern (``load_pdf`` + one pdfplumber open for
+words, one PyMuPDF open and one pdfplumber open for symbology, per page)
+with the single-open ``DocumentContext``, and times the full
+``PidExtractService.extract`` pipeline. Each run happens in a fresh process
+so peak RSS is comparable.
+
+Usage:
+    cd backend
+    python -m scripts.bench_pid_pages --pages 1 5 10 20 40
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+import fitz  # PyMuPDF
+import pdfplumber
+
+from scripts.synthetic_pid import build_synthetic_pid
+
+
+def _reopen_per_page(pdf_path: str) -> int:
+    from app.services.pid.core.ingestion import load_pdf
+    from app.services.pid.core.text_extraction import extract_words
+
+    doc = load_pdf(pdf_path)
+    total = 0
+    for page_info in doc.pages:
+        words = extract_words(pdf_path, page_indices=[page_info.index])
+        fitz_doc = fitz.open(pdf_path)
+        drawings = fitz_doc[page_info.index].get_drawings()
+        fitz_doc.close()
+        with pdfplumber.open(pdf_path) as pdf:
+            page = pdf.pages[page_info.index]
+            total += len(words) + len(drawings) + len(page.rects) + len(page.edges) + len(page.lines)
+    return total
+
+
+def _single_open(pdf_path: str) -> int:
+    from app.services.pid.core.page_context import DocumentContext
+    from app.services.pid.core.text_extraction import extract_page_words
+
+    total = 0
+    with DocumentContext(pdf_path) as doc:
+        for page in doc.pages():
+            words = extract_page_words(page)
+            total += len(words) + len(page.fitz_drawings) + len(page.rects) + len(page.edges) + len(page.lines)
+            page.release()
+    return total
+
+
+def _full_pipeline(pdf_path: str) -> int:
+    from app.services.pid_extract_service import PidExtractService
+
+    return len(PidExtractService().extract(pdf_path).instruments)
+
+
+MODES = {
+    "reopen": _reopen_per_page,
+    "context": _single_open,
+    "pipeline": _full_pipeline,
+}
+
+
+def _child(mode: str, pdf_path: str, queue) -> None:
+    logging.disable(logging.CRITICAL)
+    # Import outside the timed region so both modes pay the same baseline
+    import app.services.pid_extract_service  # noqa: F401
+
+    base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    MODES[mode](pdf_path)
+    elapsed = time.perf_counter() - start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((elapsed, base_rss, peak_rss))
+
+
+def run_mode(mode: str, pdf_path: str) -> tuple[float, float, float]:
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_child, args=(mode, pdf_path, queue))
+    proc.start()
+    elapsed, base_rss, peak_rss = queue.get()
+    proc.join()
+    # ru_maxrss is reported in KiB on Linux
+    return elapsed, base_rss / 1024, peak_rss / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 5, 10, 20, 40])
+    parser.add_argument("--balloons", type=int, default=120)
+    parser.add_argument("--paper", default="A0")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES))
+    args = parser.parse_args()
+
+    print(f"{'pages':>5} {'mode':>9} {'wall s':>8} {'s/page':>7} {'base MB':>8} {'peak MB':>8} {'delta MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            pdf_path = os.path.join(tmp, f"pid_{pages}.pdf")
+            build_synthetic_pid(pdf_path, pages, args.balloons, args.paper)
+            for mode in args.modes:
+                elapsed, base, peak = run_mode(mode, pdf_path)
+                print(
+                    f"{pages:>5} {mode:>9} {elapsed:>8.2f} {elapsed / pages:>7.3f} "
+                    f"{base:>8.1f} {peak:>8.1f} {peak - base:>8.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Benchmark: full-scan vs. SpatialIndex neighbour queries on dense pages.
+
+Runs the neighbourhood-heavy P&ID helpers on synthetic single pages with
+1k, 5k and 20k words, once scanning every word (``index=None``) and once
+through a shared ``SpatialIndex``, and checks both give the same answer.
+
+Usage:
+    cd backend
+    python -m scripts.bench_pid_spatial --sizes 1000 5000 20000
+"""
+
+import argparse
+import logging
+import random
+import time
+
+from app.services.pid.core.document_scale import DocumentScale
+from app.services.pid.core.spatial_engine import _find_equipment_description
+from app.services.pid.core.spatial_index import SpatialIndex
+from app.services.pid.core.symbol_detector import _has_horizontal_line, _is_inside_square
+from app.services.pid.core.tag_detector import _detect_balloon_tags, detect_tags, load_profile
+from app.services.pid_extract_service import CONFIG_PATH
+from scripts.synthetic_pid import synthetic_page_words
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    value = fn()
+    return time.perf_counter() - start, value
+
+
+def _balloons(words, profile, scale, index):
+    return [i.tag for i in _detect_balloon_tags(words, profile, set(), scale, index=index)]
+
+
+def _descriptions(words, index):
+    return [_find_equipment_description(w, words, 300.0, index=index) for w in words if "-VE" in w.text]
+
+
+def _symbols(words, squares, hlines, square_index, hline_index):
+    out = []
+    for w in words:
+        cx, cy = w.position.center_x, w.position.center_y
+        out.append((
+            _is_inside_square(cx, cy, squares, inst_h=6.0, index=square_index),
+            _has_horizontal_line(cx, cy, hlines, inst_h=6.0, index=hline_index),
+        ))
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--profile", default="promon")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    profile = load_profile(CONFIG_PATH, args.profile)
+    scale = DocumentScale.from_page(3370.4, 2383.9)
+
+    print(f"{'words':>6} {'stage':>13} {'scan s':>8} {'index s':>8} {'speedup':>8}  same")
+    for size in args.sizes:
+        words = synthetic_page_words(size, seed=size)
+        rng = random.Random(size)
+        squares = []
+        for _ in range(size // 4):
+            x, y, side = rng.uniform(0, 3300), rng.uniform(0, 2300), rng.uniform(6, 60)
+            squares.append((x, y, x + side, y + side))
+        hlines = [(rng.uniform(0, 3300), rng.uniform(0, 2300), rng.uniform(10, 50)) for _ in range(size // 4)]
+
+        build_s, index = _timed(lambda: SpatialIndex.from_words(words))
+        square_index = SpatialIndex.from_boxes(squares)
+        hline_index = SpatialIndex(hlines, bbox=lambda hl: (hl[0] - hl[2] / 2, hl[1], hl[0] + hl[2] / 2, hl[1]))
+        print(f"{size:>6} {'index build':>13} {'':>8} {build_s:>8.3f}")
+
+        stages = [
+            ("balloons", lambda ix: _balloons(words, profile, scale, ix), index),
+            ("equip desc", lambda ix: _descriptions(words, ix), index),
+            ("symbology", lambda ix: _symbols(words, squares, hlines, ix and square_index, ix and hline_index), index),
+        ]
+        for name, stage, stage_index in stages:
+            scan_s, scan_out = _timed(lambda: stage(None))
+            index_s, index_out = _timed(lambda: stage(stage_index))
+            print(
+                f"{size:>6} {name:>13} {scan_s:>8.3f} {index_s:>8.3f} "
+                f"{scan_s / max(index_s, 1e-9):>7.1f}x  {scan_out == index_out}"
+            )
+
+        total_s, _ = _timed(lambda: detect_tags(words, profile, scale=scale))
+        print(f"{size:>6} {'detect_tags':>13} {'':>8} {total_s:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Benchmark: word objects vs. columnar PageWords on dense pages.
+
+Reports the memory held by a page's words as ``ExtractedWord`` objects and
+as ``PageWords`` columns, and times the word-level passes that run on the
+columns (adjacent-word merge, fragment line grouping, balloon stacking) at
+1k, 5k and 20k words. The fragment pass is also timed on the object path
+(``columns=None``) and both answers are compared.
+
+Usage:
+    cd backend
+    python -m scripts.bench_pid_words --sizes 1000 5000 20000
+"""
+
+import argparse
+import logging
+import time
+import tracemalloc
+
+from app.services.pid.core.document_scale import DocumentScale
+from app.services.pid.core.page_words import PageWords
+from app.services.pid.core.spatial_index import SpatialIndex
+from app.services.pid.core.tag_detector import _detect_balloon_tags, _detect_fragmented_tags, load_profile
+from app.services.pid.core.text_extraction import _merge_adjacent_words
+from app.services.pid.models.instrument import ExtractedWord, Position
+from app.services.pid_extract_service import CONFIG_PATH
+from scripts.synthetic_pid import synthetic_page_words
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    value = fn()
+    return time.perf_counter() - start, value
+
+
+def _allocated(fn) -> tuple[float, object]:
+    """Bytes still allocated by ``fn``'s return value, in MB."""
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    value = fn()
+    used = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    return used / (1024 * 1024), value
+
+
+def _copy_words(words):
+    return [
+        ExtractedWord(
+            text=w.text,
+            position=Position(w.position.x0, w.position.top, w.position.x1, w.position.bottom),
+            page_index=w.page_index,
+        )
+        for w in words
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--profile", default="promon")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    profile = load_profile(CONFIG_PATH, args.profile)
+    scale = DocumentScale.from_page(3370.4, 2383.9)
+
+    print(f"{'words':>6} {'objects MB':>10} {'columns MB':>10}")
+    for size in args.sizes:
+        words = synthetic_page_words(size, seed=size)
+        objects_mb, _ = _allocated(lambda: _copy_words(words))
+        # No views: measure the columns alone, as built by text extraction
+        columns_mb, _ = _allocated(lambda: PageWords(
+            [w.text for w in words],
+            [w.position.x0 for w in words],
+            [w.position.top for w in words],
+            [w.position.x1 for w in words],
+            [w.position.bottom for w in words],
+            [w.page_index for w in words],
+        ))
+        print(f"{size:>6} {objects_mb:>10.2f} {columns_mb:>10.2f}")
+
+    print()
+    print(f"{'words':>6} {'stage':>12} {'objects s':>10} {'columns s':>10}  same")
+    for size in args.sizes:
+        words = synthetic_page_words(size, seed=size)
+        build_s, columns = _timed(lambda: PageWords.from_words(words))
+        print(f"{size:>6} {'build':>12} {'':>10} {build_s:>10.3f}")
+
+        merge_s, _ = _timed(lambda: _merge_adjacent_words(words, 5.0, 3.0))
+        print(f"{size:>6} {'merge':>12} {'':>10} {merge_s:>10.3f}")
+
+        scan_s, scan_out = _timed(lambda: _detect_fragmented_tags(words, profile, set(), scale))
+        cols_s, cols_out = _timed(lambda: _detect_fragmented_tags(words, profile, set(), scale, columns=columns))
+        same = [i.tag for i in scan_out] == [i.tag for i in cols_out]
+        print(f"{size:>6} {'fragments':>12} {scan_s:>10.3f} {cols_s:>10.3f}  {same}")
+
+        index = SpatialIndex.from_words(words)
+        balloon_s, _ = _timed(
+            lambda: _detect_balloon_tags(words, profile, set(), scale, index=index, columns=columns)
+        )
+        print(f"{size:>6} {'balloons':>12} {'':>10} {balloon_s:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
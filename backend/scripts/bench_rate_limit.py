@@ -0,0 +1,234 @@
+"""Benchmark and checks for the rate limiter backends.
+
+Runs against fakeredis (needs ``lupa`` for the Lua script) or, with
+``--redis-url``, a real Redis. Each check prints ``ok``/``FAIL``:
+
+- ``shared``: ``--workers`` limiters with their own Redis connections (one
+  per uvicorn worker in production) send requests for the same user; Redis
+  allows exactly the limit, the in-memory limiter ``workers × limit``;
+- ``window``: a 1 s window blocks the (limit + 1)-th request with
+  Retry-After and allows again once the window has passed;
+- ``fallback``: with Redis unreachable requests are still limited per process
+  and later decisions do not wait for the connection timeout;
+- ``eviction``: idle keys leave the in-memory limiter a few per call, and
+  ``max_keys`` caps it;
+- ``routes``: on a router mounted with a prefix (as in ``app/main.py``), a
+  ``RATE_LIMIT_ROUTE_BUDGETS`` entry limits one route while the other routes
+  of the group keep the group budget, and a templated entry
+  (``{job_id}``) is one budget for every id;
+- ``atomic``: a request rejected by one of its limits (route or group) is
+  not recorded under the other, for both backends.
+
+Then decision latency (p50/p99/max over ``--decisions`` calls) for each
+backend. fakeredis runs the script in-process through lupa, so its latency
+is not that of a Redis server; pass ``--redis-url`` to measure the network
+round trip.
+
+Usage:
+    cd backend
+    python -m scripts.bench_rate_limit [--redis-url redis://localhost:6379/15]
+"""
+
+import argparse
+import logging
+import statistics
+import threading
+import time
+import uuid
+
+from fastapi import APIRouter, Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.dependencies import rate_limit
+from app.dependencies.rate_limit import InMemoryRateLimiter, RedisRateLimiter
+
+
+def make_redis_limiter(redis_url: str | None, fake_server=None) -> RedisRateLimiter:
+    limiter = RedisRateLimiter(redis_url or "redis://fakeredis", fallback=InMemoryRateLimiter())
+    if redis_url is None:
+        import fakeredis
+
+        limiter._client = fakeredis.FakeRedis(server=fake_server)
+        limiter._script = limiter._client.register_script(rate_limit._SLIDING_WINDOW_LUA)
+    return limiter
+
+
+def check(name: str, passed: bool, detail: str) -> None:
+    print(f"{name:>9}  {'ok' if passed else 'FAIL':<4}  {detail}")
+
+
+def check_shared(factory, workers: int, per_worker: int, limit: int) -> None:
+    key = f"pdf:{uuid.uuid4().hex}"
+    results = {}
+    for name in ("memory", "redis"):
+        limiters = [InMemoryRateLimiter() if name == "memory" else factory() for _ in range(workers)]
+        allowed = []
+
+        def worker(limiter):
+            allowed.append(sum(limiter.allow(key, limit, 60)[0] for _ in range(per_worker)))
+
+        threads = [threading.Thread(target=worker, args=(limiter,)) for limiter in limiters]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        results[name] = sum(allowed)
+    check(
+        "shared", results["redis"] == limit,
+        f"{workers} workers × {per_worker} requests, limit {limit}: "
+        f"memory allowed {results['memory']}, redis allowed {results['redis']}",
+    )
+
+
+def check_window(limiter) -> None:
+    key = f"w:{uuid.uuid4().hex}"
+    first = [limiter.allow(key, 5, 1)[0] for _ in range(5)]
+    blocked, retry_after = limiter.allow(key, 5, 1)
+    time.sleep(1.05)
+    again = limiter.allow(key, 5, 1)[0]
+    check(
+        "window", all(first) and not blocked and retry_after == 1 and again,
+        f"5 allowed, 6th blocked (Retry-After {retry_after}), allowed after 1 s: {again}",
+    )
+
+
+def check_fallback() -> None:
+    limiter = RedisRateLimiter("redis://127.0.0.1:9/0", fallback=InMemoryRateLimiter())
+    key = f"f:{uuid.uuid4().hex}"
+    start = time.perf_counter()
+    first = limiter.allow(key, 2, 60)[0]
+    first_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    rest = [limiter.allow(key, 2, 60)[0] for _ in range(2)]
+    rest_ms = (time.perf_counter() - start) * 1000 / 2
+    check(
+        "fallback", first and rest == [True, False] and rest_ms < 1,
+        f"decisions {[first, *rest]}; first {first_ms:.1f} ms (connection refused), then {rest_ms:.3f} ms",
+    )
+
+
+def check_eviction(keys: int) -> None:
+    limiter = InMemoryRateLimiter()
+    for i in range(keys):
+        limiter.allow(f"ip:{i}", 10, 1)
+    before = len(limiter)
+    time.sleep(1.05)
+    start = time.perf_counter()
+    calls = keys // rate_limit._EVICT_PER_CALL + 1
+    for _ in range(calls):
+        limiter.allow("ip:new", 10**6, 60)
+    per_call_ms = (time.perf_counter() - start) * 1000 / calls
+    capped = InMemoryRateLimiter(max_keys=1000)
+    for i in range(keys):
+        capped.allow(f"ip:{i}", 10, 60)
+    check(
+        "eviction", before == keys and len(limiter) == 1 and len(capped) == 1000,
+        f"{before} keys → {len(limiter)} within {calls} calls after their window "
+        f"({per_call_ms:.3f} ms/call); max_keys=1000 holds {len(capped)}",
+    )
+
+
+def check_routes() -> None:
+    # Mounted like app/main.py: a prefixed APIRouter, so the route's own path lacks the prefix
+    router = APIRouter(dependencies=[Depends(rate_limit.enforce_pdf_rate_limit)])
+
+    @router.post("/convert")
+    def convert():
+        return {}
+
+    @router.post("/extract")
+    def extract():
+        return {}
+
+    @router.get("/jobs/{job_id}/download")
+    def download(job_id: str):
+        return {}
+
+    app = FastAPI()
+    app.include_router(router, prefix="/api/pdf")
+
+    saved = rate_limit.limiter, settings.RATE_LIMIT_ROUTE_BUDGETS
+    rate_limit.limiter = InMemoryRateLimiter()
+    settings.RATE_LIMIT_ROUTE_BUDGETS = "/api/pdf/convert=3/60, /api/pdf/jobs/{job_id}/download=2/60"
+    try:
+        client = TestClient(app)
+        headers = {"x-user-id": "route-check"}
+        convert_codes = [client.post("/api/pdf/convert", headers=headers).status_code for _ in range(5)]
+        extract_codes = [client.post("/api/pdf/extract", headers=headers).status_code for _ in range(5)]
+        # One budget for the template, whatever the job id
+        download_codes = [
+            client.get(f"/api/pdf/jobs/{job_id}/download", headers=headers).status_code for job_id in "abc"
+        ]
+    finally:
+        rate_limit.limiter, settings.RATE_LIMIT_ROUTE_BUDGETS = saved
+    check(
+        "routes",
+        convert_codes == [200] * 3 + [429] * 2
+        and extract_codes == [200] * 5
+        and download_codes == [200, 200, 429],
+        f"/convert (3/60): {convert_codes}; /extract (group {settings.RATE_LIMIT_PDF_PER_MIN}/min): "
+        f"{extract_codes}; /jobs/{{job_id}}/download (2/60): {download_codes}",
+    )
+
+
+def check_atomic(name: str, limiter) -> None:
+    user = uuid.uuid4().hex
+    group, route = (f"pdf:{user}", 5, 60), (f"route:/convert:{user}", 2, 60)
+    decisions = [limiter.allow_all([group, route])[0] for _ in range(4)]
+    # The route budget is spent: the 2 rejected requests must not have used the group's
+    group_left = [limiter.allow(group[0], group[1], group[2])[0] for _ in range(4)]
+    check(
+        "atomic", decisions == [True, True, False, False] and group_left == [True, True, True, False],
+        f"{name}: group 5 + route 2 → {decisions}; group afterwards {group_left}",
+    )
+
+
+def latency(limiter, decisions: int, population: int) -> tuple[float, float, float]:
+    for i in range(population):
+        limiter.allow(f"warm:{i}", 60, 60)
+    samples = []
+    for i in range(decisions):
+        start = time.perf_counter()
+        limiter.allow(f"pdf:user{i % 500}", 60, 60)
+        samples.append((time.perf_counter() - start) * 1000)
+    q = statistics.quantiles(samples, n=100, method="inclusive")
+    return q[49], q[98], max(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--redis-url", default=None, help="real Redis (default: fakeredis)")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--decisions", type=int, default=20000)
+    parser.add_argument("--keys", type=int, default=100000, help="distinct clients for the eviction check")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    fake_server = None
+    if args.redis_url is None:
+        import fakeredis
+
+        fake_server = fakeredis.FakeServer()
+
+    def factory() -> RedisRateLimiter:
+        return make_redis_limiter(args.redis_url, fake_server)
+
+    check_shared(factory, args.workers, per_worker=50, limit=60)
+    check_window(factory())
+    check_fallback()
+    check_eviction(args.keys)
+    check_routes()
+    check_atomic("memory", InMemoryRateLimiter())
+    check_atomic("redis", factory())
+
+    print()
+    print(f"{'backend':>10} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    backends = [("memory", InMemoryRateLimiter(), args.keys), ("fakeredis" if fake_server else "redis", factory(), 1000)]
+    for name, limiter, population in backends:
+        p50, p99, worst = latency(limiter, args.decisions, population)
+        print(f"{name:>10} {p50:>8.3f} {p99:>8.3f} {worst:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Benchmark: API cold start and memory, eager vs. lazy loading of heavy libraries.
+
+Each run is a fresh Python process (``--runs`` per mode, medians reported)
+that imports ``app.main`` and runs the application startup (lifespan) through
+the TestClient, then polls ``/health/ready``:
+
+- ``eager``: every subsystem's services are imported before ``app.main``,
+  as the routers used to do at module load (PyMuPDF, pdfplumber, pandas,
+  openpyxl, pdf2docx/OpenCV, the Gemini SDK);
+- ``lazy``: the default; nothing heavy is loaded until a route needs it;
+- ``warmup``: ``STARTUP_WARMUP=all``; startup returns at once and a
+  background thread loads every subsystem, ``/health/ready`` answers 503
+  until it is done. ``/health`` latency is sampled meanwhile (the import
+  thread competes for the GIL).
+
+Columns: ``import`` (``app.main`` and, for eager, the services), ``ready``
+(from the start of the import until ``/health/ready`` returns 200),
+``process`` (the same, seen by the parent: includes interpreter start-up),
+``rss`` when ready, and ``rss all`` after every subsystem is loaded. For
+``lazy`` the first-request cost of each subsystem (one-time import on the
+module's first request) is listed below the table, loaded in table order —
+later subsystems reuse libraries the earlier ones already imported.
+
+Usage:
+    cd backend
+    python -m scripts.bench_startup [--runs 3]
+"""
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+MODES = ("eager", "lazy", "warmup")
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def child(mode: str) -> None:
+    import logging
+    import warnings
+
+    warnings.simplefilter("ignore")
+    logging.disable(logging.CRITICAL)
+    start = time.perf_counter()
+    if mode == "eager":
+        import importlib
+
+        from app.warmup import SUBSYSTEMS
+
+        for modules in SUBSYSTEMS.values():
+            for module in modules:
+                importlib.import_module(module)
+
+    from fastapi.testclient import TestClient
+
+    from app import warmup
+    from app.main import app
+
+    imported = time.perf_counter()
+    health_ms = []
+    with TestClient(app) as client:
+        while client.get("/health/ready").status_code != 200:
+            t = time.perf_counter()
+            client.get("/health")
+            health_ms.append((time.perf_counter() - t) * 1000)
+            time.sleep(0.01)
+        ready = time.perf_counter()
+        ready_rss = rss_mb()
+        print("READY", flush=True)
+
+        first_use = {}
+        for name in warmup.SUBSYSTEMS:
+            t = time.perf_counter()
+            warmup.load(name)
+            first_use[name] = (time.perf_counter() - t) * 1000
+        all_rss = rss_mb()
+
+    print("RESULT", json.dumps({
+        "import_ms": (imported - start) * 1000,
+        "ready_ms": (ready - start) * 1000,
+        "rss_mb": ready_rss,
+        "rss_all_mb": all_rss,
+        "first_use_ms": first_use,
+        "health_max_ms": max(health_ms) if health_ms else None,
+    }))
+
+
+def run_mode(mode: str) -> dict:
+    env = dict(os.environ, STARTUP_WARMUP="all" if mode == "warmup" else "")
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "scripts.bench_startup", "--child", mode],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, env=env, text=True,
+    )
+    process_ms, result = None, None
+    # Libraries may print their own warnings on stdout: only the marked lines count
+    for line in proc.stdout:
+        if line.startswith("READY") and process_ms is None:
+            process_ms = (time.perf_counter() - start) * 1000
+        elif line.startswith("RESULT "):
+            result = json.loads(line[len("RESULT "):])
+    proc.wait()
+    if result is None:
+        raise RuntimeError(f"{mode}: child process exited with {proc.returncode}")
+    result["process_ms"] = process_ms
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child)
+        return
+
+    results = {mode: [run_mode(mode) for _ in range(args.runs)] for mode in MODES}
+
+    def med(mode: str, key: str) -> float:
+        return statistics.median(run[key] for run in results[mode])
+
+    print(f"{args.runs} runs per mode, medians")
+    print(f"{'mode':>7} {'import ms':>9} {'ready ms':>9} {'process ms':>10} {'rss MB':>7} {'rss all MB':>10} {'/health max ms':>14}")
+    for mode in MODES:
+        health = [run["health_max_ms"] for run in results[mode] if run["health_max_ms"] is not None]
+        print(
+            f"{mode:>7} {med(mode, 'import_ms'):>9.0f} {med(mode, 'ready_ms'):>9.0f} {med(mode, 'process_ms'):>10.0f} "
+            f"{med(mode, 'rss_mb'):>7.0f} {med(mode, 'rss_all_mb'):>10.0f} "
+            f"{(f'{statistics.median(health):.1f}' if health else '-'):>14}"
+        )
+    print()
+    print("lazy: one-time load on each module's first request (ms)")
+    for name in results["lazy"][0]["first_use_ms"]:
+        print(f"  {name:>12} {statistics.median(run['first_use_ms'][name] for run in results['lazy']):>7.0f}")
+
+
+if __name__ == "__main__":
+    main()
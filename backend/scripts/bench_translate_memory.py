@@ -0,0 +1,201 @@
+"""Benchmark: segment translation with translation memory on long documents.
+
+Builds a synthetic ~30-page specification (numbered sections, paragraphs of
+several sentences, list items, repeated boilerplate) and translates it with
+``GeminiService.translate_segments`` against a fake model that answers the
+batch prompt after ``--latency-ms`` plus ``--ms-per-token`` per output
+token. Three passes share one temporary translation memory:
+
+- ``first``: empty memory, every distinct sentence goes to the model;
+- ``edited``: the same document lightly edited (``--edit-rate`` of the
+  sentences reworded, one paragraph inserted, one removed);
+- ``again``: the edited document once more, all from memory.
+
+For each pass: sentences, share reused from memory, model requests,
+estimated tokens sent, and wall time. ``legacy`` is the old single-prompt
+call for the whole text, which pays every token on every pass. Each output
+is also checked against the fake model applied sentence by sentence (the
+document must come back in order with its original separators).
+
+Usage:
+    cd backend
+    python -m scripts.bench_translate_memory [--pages 30 --edit-rate 0.03]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import tempfile
+import time
+from types import SimpleNamespace
+
+from app.config import settings
+from app.services import gemini_service
+from app.services.gemini_service import GeminiService, split_segments
+from app.services.translation_memory import TranslationMemory
+
+_WORDS = (
+    "bomba válvula tubulação pressão projeto instalação fornecedor material aço carbono "
+    "inox flange solda ensaio inspeção norma requisito operação manutenção desenho "
+    "revisão documento cliente contratada equipamento motor elétrico painel cabo "
+    "instrumento transmissor temperatura vazão nível fluido água óleo vapor isolamento "
+    "pintura suporte estrutura fundação concreto tanque vaso trocador calor compressor"
+).split()
+
+
+def fake_translate(segment: str) -> str:
+    return f"[en] {segment}"
+
+
+class FakeModel:
+    """Answers the segment prompt after a latency proportional to the output."""
+
+    def __init__(self, latency_s: float, per_token_s: float):
+        self.latency_s = latency_s
+        self.per_token_s = per_token_s
+        self.prompt_tokens = 0
+
+    def generate_content(self, prompt: str, generation_config=None):
+        self.prompt_tokens += gemini_service._estimate_tokens(prompt)
+        if generation_config is None:
+            # Legacy whole-text prompt: the output is about as long as the prompt
+            time.sleep(self.latency_s + self.per_token_s * gemini_service._estimate_tokens(prompt))
+            body = {"detected_language": "Portuguese", "improved_text": None, "translated_text": ""}
+            return SimpleNamespace(text=json.dumps(body))
+        segments = json.loads(prompt.rsplit("\n\n", 1)[1])
+        translations = [fake_translate(segment) for segment in segments]
+        time.sleep(self.latency_s + self.per_token_s * sum(map(gemini_service._estimate_tokens, translations)))
+        return SimpleNamespace(text=json.dumps(
+            {"detected_language": "Portuguese", "translations": translations}, ensure_ascii=False,
+        ))
+
+
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(_WORDS) for _ in range(rng.randint(8, 22))]
+    words[0] = words[0].capitalize()
+    if rng.random() < 0.3:
+        words.insert(rng.randrange(1, len(words)), f"{rng.randint(2, 900)} mm")
+    return " ".join(words) + "."
+
+
+def build_document(pages: int, seed: int) -> list[list[str]]:
+    """Paragraphs as lists of lines (a line holds one or more sentences)."""
+    rng = random.Random(seed)
+    boilerplate = [_sentence(rng) for _ in range(6)]
+    paragraphs = []
+    for section in range(1, pages * 2 + 1):
+        paragraphs.append([f"{section}. {' '.join(rng.choice(_WORDS) for _ in range(3)).upper()}"])
+        for _ in range(rng.randint(3, 5)):
+            if rng.random() < 0.2:
+                paragraphs.append([f"- {_sentence(rng)}" for _ in range(rng.randint(2, 5))])
+            else:
+                sentences = [_sentence(rng) for _ in range(rng.randint(2, 6))]
+                if rng.random() < 0.15:
+                    sentences.append(rng.choice(boilerplate))
+                paragraphs.append([" ".join(sentences)])
+    return paragraphs
+
+
+def edit_document(paragraphs: list[list[str]], rate: float, seed: int) -> list[list[str]]:
+    rng = random.Random(seed + 1)
+    edited = []
+    for lines in paragraphs:
+        new_lines = []
+        for line in lines:
+            parts = re.split(r"(?<=\.) ", line)
+            parts = [_sentence(rng) if rng.random() < rate and len(p) > 40 else p for p in parts]
+            new_lines.append(" ".join(parts))
+        edited.append(new_lines)
+    edited.insert(len(edited) // 3, [" ".join(_sentence(rng) for _ in range(4))])
+    del edited[2 * len(edited) // 3]
+    return edited
+
+
+def render(paragraphs: list[list[str]]) -> str:
+    return "\n\n".join("\n".join(lines) for lines in paragraphs) + "\n"
+
+
+def expected_output(text: str) -> str:
+    return "".join(
+        piece.replace(piece.strip(), fake_translate(piece.strip())) if translatable else piece
+        for piece, translatable in split_segments(text)
+    )
+
+
+async def run_pass(service: GeminiService, memory: TranslationMemory, text: str) -> dict:
+    service.model.prompt_tokens = 0
+    start = time.perf_counter()
+    result = await service.translate_segments(text, "pt", "en", memory=memory)
+    elapsed = time.perf_counter() - start
+    return {
+        **result["segments"],
+        "tokens": service.model.prompt_tokens,
+        "seconds": elapsed,
+        "correct": result["translated_text"] == expected_output(text),
+    }
+
+
+async def run_legacy(service: GeminiService, text: str) -> dict:
+    service.model.prompt_tokens = 0
+    start = time.perf_counter()
+    await service.translate(text, "pt", "en")
+    return {
+        "total": len([p for p, t in split_segments(text) if t]),
+        "cached": 0,
+        "requests": 1,
+        "tokens": service.model.prompt_tokens,
+        "seconds": time.perf_counter() - start,
+        "correct": None,
+    }
+
+
+async def main_async(args) -> None:
+    paragraphs = build_document(args.pages, seed=args.seed)
+    original = render(paragraphs)
+    edited = render(edit_document(paragraphs, args.edit_rate, seed=args.seed))
+    roundtrip = "".join(piece for piece, _ in split_segments(edited)) == edited
+    print(
+        f"document: {len(original) // 1000} kB, {len(paragraphs)} paragraphs; "
+        f"split/join round trip: {'ok' if roundtrip else 'FAIL'}"
+    )
+
+    service = GeminiService.__new__(GeminiService)
+    service.model = FakeModel(args.latency_ms / 1000, args.ms_per_token / 1000)
+    rows = [("legacy", await run_legacy(service, original))]
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = TranslationMemory(os.path.join(tmp, "tm.db"), 86400, 64 * 1024 * 1024)
+        for label, text in (("first", original), ("edited", edited), ("again", edited)):
+            rows.append((label, await run_pass(service, memory, text)))
+
+    print(
+        f"batch budget {settings.TRANSLATE_BATCH_TOKENS} tokens, concurrency {settings.TRANSLATE_CONCURRENCY}, "
+        f"fake model {args.latency_ms:.0f} ms + {args.ms_per_token:.1f} ms/token"
+    )
+    print(f"{'pass':>7} {'sentences':>9} {'reused':>7} {'requests':>8} {'tokens':>8} {'seconds':>8} {'output':>6}")
+    for label, row in rows:
+        reused = row["cached"] / row["total"] if row["total"] else 0.0
+        print(
+            f"{label:>7} {row['total']:>9} {reused:>7.1%} {row['requests']:>8} {row['tokens']:>8} "
+            f"{row['seconds']:>8.2f} {'-' if row['correct'] is None else 'ok' if row['correct'] else 'FAIL':>6}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=30)
+    parser.add_argument("--edit-rate", type=float, default=0.03, help="share of sentences reworded")
+    parser.add_argument("--latency-ms", type=float, default=800)
+    parser.add_argument("--ms-per-token", type=float, default=4.0, help="fake model output speed")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
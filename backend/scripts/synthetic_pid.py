@@ -0,0 +1,136 @@
+"""Synthetic P&ID fixtures for local benchmarks.
+
+Builds vector PDFs that look enough like a real P&ID for the extraction
+pipeline to exercise every stage: ISA balloons (field, DCS square and
+control-room h-line), equipment tags with descriptions, line numbers,
+a notes block and a title block.
+
+Usage:
+    cd backend
+    python -m scripts.synthetic_pid --pages 10 --out /tmp/pid_synthetic.pdf
+"""
+
+import argparse
+import random
+
+import fitz  # PyMuPDF
+
+from app.services.pid.core.document_scale import PAPER_SIZES
+from app.services.pid.models.instrument import ExtractedWord, Position
+
+ISA_TYPES = ["PIT", "TIT", "FIT", "LIT", "PI", "TI", "FIC", "LIC", "PDI", "XV", "HS", "ZS"]
+EQUIPMENT_WORDS = ["VESSEL", "PUMP", "TANK", "FILTER", "DRUM"]
+
+
+def build_synthetic_pid(
+    path: str,
+    pages: int = 1,
+    balloons_per_page: int = 80,
+    paper: str = "A1",
+    seed: int = 0,
+) -> str:
+    """Write a multi-page synthetic P&ID PDF and return its path."""
+    rng = random.Random(seed)
+    width, height = PAPER_SIZES[paper]
+    doc = fitz.open()
+
+    for page_idx in range(pages):
+        page = doc.new_page(width=width, height=height)
+        shape = page.new_shape()
+
+        # Process piping grid (long lines the symbology must ignore)
+        for y in range(80, int(height * 0.75), 120):
+            shape.draw_line((40, y), (width * 0.68, y))
+        for x in range(80, int(width * 0.68), 160):
+            shape.draw_line((x, 40), (x, height * 0.75))
+
+        # Instrument balloons on a jittered grid
+        cols = max(1, int((balloons_per_page ** 0.5) * 1.4))
+        for b in range(balloons_per_page):
+            col, row = b % cols, b // cols
+            cx = 70 + col * (width * 0.62 / cols) + rng.uniform(-4, 4)
+            cy = 70 + row * 60 + rng.uniform(-4, 4)
+            if cy > height * 0.74:
+                break
+            isa = ISA_TYPES[(b + page_idx) % len(ISA_TYPES)]
+            number = f"{page_idx + 1:02d}{b:03d}"
+            shape.draw_circle((cx, cy), 14)
+            kind = b % 5
+            if kind == 1:
+                shape.draw_rect(fitz.Rect(cx - 16, cy - 16, cx + 16, cy + 16))
+            elif kind == 2:
+                shape.draw_line((cx - 17, cy), (cx + 17, cy))
+            page.insert_text((cx - 6, cy - 2), isa, fontsize=6)
+            page.insert_text((cx - 8, cy + 7), number, fontsize=6)
+            if b % 17 == 0:
+                page.insert_text((cx + 16, cy - 10), "(F)", fontsize=5)
+
+        # Equipment, line numbers
+        for e in range(12):
+            ex = 90 + e * (width * 0.6 / 12)
+            ey = height * 0.72
+            page.insert_text((ex, ey), f"{100 + page_idx % 9:03d}-VE{e:02d}A", fontsize=7)
+            page.insert_text((ex, ey + 10), EQUIPMENT_WORDS[e % len(EQUIPMENT_WORDS)], fontsize=7)
+        for ln in range(8):
+            page.insert_text(
+                (60 + ln * 180, 60), f'6"-S6AAFPN-L{ln + 200:05d}-DHT', fontsize=6,
+            )
+
+        # Notes block (top-right) and title block (bottom-right)
+        nx = width * 0.72
+        page.insert_text((nx, 60), "NOTAS", fontsize=8)
+        page.insert_text((nx, 75), "1. ALL PRESSURE INSTRUMENTS SHALL HAVE FLANGE RATING 300#", fontsize=6)
+        page.insert_text((nx, 85), "2. THERMOWELL MATERIAL PER SPECIFICATION", fontsize=6)
+        ty = height * 0.86
+        page.insert_text((nx, ty), "FLUXOGRAMA DE ENGENHARIA - SISTEMA DE AGUA", fontsize=8)
+        page.insert_text((nx, ty + 14), f"E.DTAE001-EQ2-{13300 + page_idx}", fontsize=8)
+        page.insert_text((nx, ty + 28), "REV 0", fontsize=8)
+        page.insert_text((nx, ty + 42), f"FOLHA {page_idx + 1}/{pages}", fontsize=8)
+        page.insert_text((nx, ty + 56), "ÁREA 122 ESCALA S/E 12/03/2025", fontsize=8)
+
+        shape.finish(color=(0, 0, 0), width=0.5)
+        shape.commit()
+
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def synthetic_page_words(count: int, paper: str = "A0", seed: int = 0) -> list[ExtractedWord]:
+    """Return ``count`` words spread over one page, with balloon-like clusters."""
+    rng = random.Random(seed)
+    width, height = PAPER_SIZES[paper]
+    words: list[ExtractedWord] = []
+    while len(words) < count:
+        x = rng.uniform(20, width - 60)
+        y = rng.uniform(20, height - 20)
+        roll = rng.random()
+        if roll < 0.15:
+            words.append(_word(ISA_TYPES[rng.randrange(len(ISA_TYPES))], x, y))
+            words.append(_word(f"{rng.randrange(1000, 9999)}", x - 2, y + 8))
+        elif roll < 0.25:
+            words.append(_word(f"{rng.randrange(100, 999)}", x, y))
+        elif roll < 0.30:
+            words.append(_word(f"{rng.randrange(100, 999)}-VE{rng.randrange(10, 99)}A", x, y))
+        elif roll < 0.33:
+            words.append(_word(EQUIPMENT_WORDS[rng.randrange(len(EQUIPMENT_WORDS))], x, y))
+        elif roll < 0.36:
+            words.append(_word(f'6"-S6AAFPN-L{rng.randrange(100, 999):05d}-DHT', x, y))
+        else:
+            words.append(_word(rng.choice(["VER", "NOTA", "DE", "PARA", "X", "A", "B", "AGUA"]), x, y))
+    return words[:count]
+
+
+def _word(text: str, x: float, y: float) -> ExtractedWord:
+    w = len(text) * 3.2
+    return ExtractedWord(text=text, position=Position(x0=x, top=y, x1=x + w, bottom=y + 6.0), page_index=0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=1)
+    parser.add_argument("--balloons", type=int, default=80)
+    parser.add_argument("--paper", default="A1", choices=sorted(PAPER_SIZES))
+    parser.add_argument("--out", default="/tmp/pid_synthetic.pdf")
+    args = parser.parse_args()
+    print(build_synthetic_pid(args.out, args.pages, args.balloons, args.paper))